@@ -447,6 +447,14 @@ def create_app(config_name: str | None = None) -> Flask:
 
     app.logger.info("Universal Process Framework API blueprints registered and CSRF exemptions applied where configured")
 
+    # Variant dropdowns search an in-memory index kept fresh by NOTIFY;
+    # until it is loaded /variants/select2 queries the database
+    if app.config.get("VARIANT_AUTOCOMPLETE_INDEX") and database.db_pool:
+        from .services.variant_autocomplete_index import init_variant_autocomplete_index
+
+        init_variant_autocomplete_index()
+        app.logger.info("Variant autocomplete index started")
+
     # If specific view function names need exemption but are only available
     # after registration, we try to exempt them but log missing keys.
     # Only exempt explicit endpoints that require CSRF exemption:
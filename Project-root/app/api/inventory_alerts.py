@@ -17,6 +17,7 @@ from app.services.inventory_alert_service import (
     InventoryAlertService,
     ProcurementRecommendationService,
 )
+from app.services.mrp_service import MaterialRequirementsService
 from . import api_bp  # reuse existing /api prefix blueprint
 
 # New UPF-specific blueprint mounted at /api/upf per action plan
@@ -424,6 +425,39 @@ def upf_check_lot(production_lot_id: int):
         return APIResponse.error("internal_error", "Inventory check failed", 500)
 
 
+@inventory_alerts_bp.route("/inventory-alerts/material-requirements", methods=["GET"])
+@login_required
+def upf_material_requirements():
+    """Netted procurement needs across all open production lots.
+
+    Query params:
+        - lot_ids: optional comma-separated lot ids to restrict the run
+        - include_draft_pos: count Draft purchase orders as incoming (default false)
+    """
+    raw_ids = request.args.get("lot_ids", "").strip()
+    try:
+        lot_ids = [int(x) for x in raw_ids.split(",") if x.strip()] if raw_ids else None
+    except ValueError:
+        return APIResponse.error(
+            "validation_error", "lot_ids must be comma-separated integers", 400
+        )
+    include_draft = request.args.get("include_draft_pos", "false").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    try:
+        plan = MaterialRequirementsService.calculate_requirements(
+            lot_ids=lot_ids, include_draft_pos=include_draft
+        )
+        return APIResponse.success(plan)
+    except Exception as e:
+        current_app.logger.error(f"Error calculating material requirements: {e}")
+        return APIResponse.error(
+            "internal_error", "Material requirements calculation failed", 500
+        )
+
+
 @inventory_alerts_bp.route(
     "/inventory-alerts/lot/<int:production_lot_id>", methods=["GET"]
 )
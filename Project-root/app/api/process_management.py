@@ -15,6 +15,7 @@ from app import limiter
 from app.services.audit_service import audit
 from app.services.costing_service import CostingService
 from app.services.process_service import ProcessService
+from app.services.process_version_service import ProcessVersionService
 from app.services.subprocess_service import SubprocessService
 from app.utils.response import APIResponse
 from app.validators import ProcessValidationError
@@ -694,6 +695,74 @@ def get_worst_case_costing(process_id):
         return APIResponse.error("internal_error", str(e), 500)
 
 
+@process_api_bp.route("/processes/<int:process_id>/versions", methods=["GET"])
+@login_required
+def list_process_versions(process_id):
+    """List frozen versions of a process with the lots pinned to each."""
+    try:
+        process = ProcessService.get_process(process_id)
+        if not process:
+            return APIResponse.not_found("Process", process_id)
+
+        if not can_access_process(process):
+            return APIResponse.error("forbidden", "Access denied", 403)
+
+        return APIResponse.success(ProcessVersionService.list_versions(process_id))
+
+    except Exception as e:
+        current_app.logger.error(f"Error listing process versions: {e}")
+        return APIResponse.error("internal_error", str(e), 500)
+
+
+@process_api_bp.route("/processes/<int:process_id>/versions", methods=["POST"])
+@login_required
+def freeze_process_version(process_id):
+    """Freeze the current process structure (no-op if unchanged)."""
+    try:
+        process = ProcessService.get_process(process_id)
+        if not process:
+            return APIResponse.not_found("Process", process_id)
+
+        if not can_access_process(process):
+            return APIResponse.error("forbidden", "Access denied", 403)
+
+        user_id = current_user.id if current_user.is_authenticated else None
+        version = ProcessVersionService.freeze_process(process_id, user_id)
+        if not version:
+            return APIResponse.error(
+                "not_available", "Process versioning is not enabled", 501
+            )
+        return APIResponse.success(version)
+
+    except Exception as e:
+        current_app.logger.error(f"Error freezing process version: {e}")
+        return APIResponse.error("internal_error", str(e), 500)
+
+
+@process_api_bp.route(
+    "/processes/<int:process_id>/versions/<int:version_id>", methods=["GET"]
+)
+@login_required
+def get_process_version(process_id, version_id):
+    """Get one frozen version including its structure and cost breakdown."""
+    try:
+        process = ProcessService.get_process(process_id)
+        if not process:
+            return APIResponse.not_found("Process", process_id)
+
+        if not can_access_process(process):
+            return APIResponse.error("forbidden", "Access denied", 403)
+
+        version = ProcessVersionService.get_version(version_id)
+        if not version or version["process_id"] != process_id:
+            return APIResponse.not_found("Process version", version_id)
+        return APIResponse.success(version)
+
+    except Exception as e:
+        current_app.logger.error(f"Error retrieving process version: {e}")
+        return APIResponse.error("internal_error", str(e), 500)
+
+
 @process_api_bp.route(
     "/processes/<int:process_id>/profitability", methods=["GET"]
 )  # New plural (frontend uses this)
@@ -146,6 +146,151 @@ def create_production_lot():
         return APIResponse.error("internal_error", str(e), 500)
 
 
+# Upper bound on lots handled by one bulk request
+MAX_BULK_LOTS = 200
+
+
+@production_api_bp.route("/production-lots/bulk", methods=["POST"])
+@login_required
+@limiter.limit("20 per hour")
+def create_production_lots_bulk():
+    """Create many production lots in one transaction.
+
+    Request JSON: {"lots": [{"process_id": int, "quantity": int, "lot_number": str?}]}
+    """
+    try:
+        if not request.is_json:
+            return APIResponse.error(
+                "validation_error", "Content-Type must be application/json", 400
+            )
+
+        entries = (request.json or {}).get("lots")
+        if not isinstance(entries, list) or not entries:
+            return APIResponse.error("validation_error", "lots must be a non-empty list", 400)
+        if len(entries) > MAX_BULK_LOTS:
+            return APIResponse.error(
+                "validation_error", f"At most {MAX_BULK_LOTS} lots per request", 400
+            )
+
+        # Validate every entry BEFORE any DB modification
+        lots = []
+        errors = []
+        for index, entry in enumerate(entries):
+            entry = entry if isinstance(entry, dict) else {}
+            try:
+                process_id = int(entry.get("process_id"))
+                quantity = float(entry.get("quantity"))
+            except (TypeError, ValueError):
+                errors.append(f"lots[{index}]: process_id and numeric quantity are required")
+                continue
+            if quantity <= 0:
+                errors.append(f"lots[{index}]: Quantity must be greater than 0")
+                continue
+            lots.append(
+                {
+                    "process_id": process_id,
+                    "quantity": int(quantity),
+                    "lot_number": entry.get("lot_number"),
+                }
+            )
+        if errors:
+            return APIResponse.error("validation_error", errors, 400)
+
+        # Process-level checks once per distinct process, at its largest quantity
+        user_id_safe = getattr(current_user, "id", None)
+        max_quantity = {}
+        for lot in lots:
+            max_quantity[lot["process_id"]] = max(
+                lot["quantity"], max_quantity.get(lot["process_id"], 0)
+            )
+        for process_id, quantity in sorted(max_quantity.items()):
+            errs = validate_production_lot_creation(
+                process_id, quantity, int(user_id_safe or 0)
+            )
+            errors.extend(f"process {process_id}: {e}" for e in errs)
+        if errors:
+            return APIResponse.error("validation_error", errors, 400)
+
+        result = ProductionService.create_production_lots_bulk(
+            lots, user_id=int(current_user.id)
+        )
+
+        current_app.logger.info(
+            f"{result['created_count']} production lots created in bulk by user {current_user.id}"
+        )
+        return APIResponse.created(result, f"{result['created_count']} production lots created")
+    except Exception as e:
+        current_app.logger.error(f"Error creating production lots in bulk: {e}")
+        return APIResponse.error("internal_error", str(e), 500)
+
+
+@production_api_bp.route("/production-lots/bulk-status", methods=["POST"])
+@login_required
+def bulk_transition_production_lots():
+    """Cancel or finalize many lots; all-or-nothing.
+
+    Request JSON: {"action": "cancel"|"finalize", "lot_ids": [int], "reason": str?}
+    """
+    try:
+        if not request.is_json:
+            return APIResponse.error(
+                "validation_error", "Content-Type must be application/json", 400
+            )
+
+        data = request.json or {}
+        action = (data.get("action") or "").lower()
+        if action not in ("cancel", "finalize"):
+            return APIResponse.error(
+                "validation_error", "action must be 'cancel' or 'finalize'", 400
+            )
+        try:
+            lot_ids = [int(i) for i in data.get("lot_ids") or []]
+        except (TypeError, ValueError):
+            return APIResponse.error("validation_error", "lot_ids must be integers", 400)
+        if not lot_ids:
+            return APIResponse.error("validation_error", "lot_ids is required", 400)
+        if len(lot_ids) > MAX_BULK_LOTS:
+            return APIResponse.error(
+                "validation_error", f"At most {MAX_BULK_LOTS} lots per request", 400
+            )
+
+        result = ProductionService.bulk_transition_production_lots(
+            lot_ids,
+            action,
+            reason=data.get("reason", "User cancelled") if action == "cancel" else None,
+            owner_id=None if is_admin() else getattr(current_user, "id", None),
+        )
+        if not result["success"]:
+            return APIResponse.error(
+                "conflict",
+                "One or more lots cannot be transitioned; no lots were changed",
+                409,
+                data=result,
+            )
+
+        # Audit
+        try:
+            from app.services.audit_service import audit
+
+            for lot in result["updated"]:
+                audit.log_action(
+                    action=action.upper(),
+                    resource_type="production_lot",
+                    resource_id=lot["lot_id"],
+                    resource_name=lot["lot_number"],
+                    changes={"status": lot["status"]},
+                    user_id=getattr(current_user, "id", None),
+                    timestamp=datetime.utcnow(),
+                )
+        except Exception:
+            current_app.logger.exception("Failed to write audit log for bulk lot transition")
+
+        return APIResponse.success(result, f"{len(result['updated'])} production lots updated")
+    except Exception as e:
+        current_app.logger.error(f"Error in bulk lot transition: {e}")
+        return APIResponse.error("internal_error", str(e), 500)
+
+
 # Plan: manual inventory validate endpoint
 @production_api_bp.route(
     "/production-lots/<int:lot_id>/validate-inventory", methods=["POST"]
@@ -1087,13 +1232,47 @@ def validate_lot_readiness(lot_id):
         if lot["created_by"] != getattr(current_user, "id", None) and not is_admin():
             return APIResponse.error("forbidden", "Access denied", 403)
 
-        is_ready, missing = ProductionService.validate_lot_readiness(lot_id)
-        return APIResponse.success({"is_ready": is_ready, "missing": missing})
+        readiness = ProductionService.evaluate_lots_readiness([lot_id]).get(lot_id) or {}
+        missing = readiness.get("missing_or_groups", [])
+        return APIResponse.success(
+            {"is_ready": not missing, "missing": missing, "readiness": readiness}
+        )
     except Exception as e:
         current_app.logger.error(f"Error validating lot: {e}")
         return APIResponse.error("internal_error", str(e), 500)
 
 
+@production_api_bp.route("/production-lots/readiness", methods=["GET"])
+@login_required
+def get_lots_readiness():
+    """Readiness reports for many lots (lots list badges).
+
+    Query params:
+        - ids: comma-separated lot ids (at most MAX_BULK_LOTS)
+    """
+    try:
+        lot_ids = [int(x) for x in request.args.get("ids", "").split(",") if x.strip()]
+    except ValueError:
+        return APIResponse.error("validation_error", "ids must be comma-separated integers", 400)
+    if not lot_ids:
+        return APIResponse.error("validation_error", "ids is required", 400)
+    if len(lot_ids) > MAX_BULK_LOTS:
+        return APIResponse.error(
+            "validation_error", f"At most {MAX_BULK_LOTS} lots per request", 400
+        )
+
+    try:
+        readiness = ProductionService.evaluate_lots_readiness(lot_ids)
+        if not is_admin():
+            # Only report lots the caller owns
+            uid = getattr(current_user, "id", None)
+            readiness = {k: v for k, v in readiness.items() if v["created_by"] == uid}
+        return APIResponse.success({str(k): v for k, v in readiness.items()})
+    except Exception as e:
+        current_app.logger.error(f"Error evaluating lot readiness: {e}")
+        return APIResponse.error("internal_error", str(e), 500)
+
+
 @production_api_bp.route("/production-lots/<int:lot_id>/execute", methods=["POST"])
 @login_required
 @role_required("admin", "inventory_manager", "production_manager")
@@ -1165,28 +1344,7 @@ def execute_production_lot(lot_id):
 def finalize_production_lot(lot_id: int):
     """Finalize lot if no CRITICAL alerts remain unacknowledged."""
     try:
-        # Pre-check using alert summary to confirm CRITICAL recognition
-        try:
-            from app.services.inventory_alert_service import InventoryAlertService
-
-            summary = InventoryAlertService.get_production_lot_alert_summary(lot_id)
-            crit = (summary.get("alerts_by_severity") or {}).get("CRITICAL", 0)
-            if crit and crit > 0:
-                msg = "Critical inventory alerts pending. Please acknowledge before finalizing."
-                return (
-                    jsonify(
-                        {
-                            "success": False,
-                            "data": None,
-                            "error": {"code": "conflict", "message": msg},
-                            "message": msg,
-                        }
-                    ),
-                    409,
-                )
-        except Exception:
-            # If pre-check fails, proceed to service which will also validate
-            pass
+        # The service checks blocking alerts in the same readiness evaluation
         try:
             uid = getattr(current_user, "id", None)
             result = ProductionService.finalize_production_lot(
@@ -1210,12 +1368,11 @@ def finalize_production_lot(lot_id: int):
         try:
             from app.services.audit_service import audit
 
-            lot = ProductionService.get_production_lot(lot_id)
             audit.log_action(
                 action="FINALIZE",
                 resource_type="production_lot",
                 resource_id=lot_id,
-                resource_name=lot.get("lot_number") if lot else None,
+                resource_name=result.get("lot_number"),
                 changes={"status": result.get("status")},
                 user_id=getattr(current_user, "id", None),
                 timestamp=datetime.utcnow(),
@@ -29,6 +29,7 @@ from flask import Blueprint, current_app
 from flask_login import login_required
 from psycopg2.extras import RealDictCursor
 
+from app.services.metrics_snapshot_service import MetricsSnapshotService
 from app.utils.response import APIResponse
 from database import get_conn
 
@@ -37,18 +38,6 @@ reports_api_bp = Blueprint("reports_api", __name__)
 # Helper utilities ---------------------------------------------------------
 
 
-def _safe_pct_change(current: int | float, previous: int | float) -> float:
-    """Compute percentage change, guarding division by zero.
-    Returns 0.0 if previous is 0 or None.
-    """
-    try:
-        if previous in (None, 0):
-            return 0.0
-        return round(((current - previous) / previous) * 100.0, 2)
-    except Exception:
-        return 0.0
-
-
 def _coalesce_number(value, cast=float, default=0):
     try:
         if value is None:
@@ -68,87 +57,18 @@ def get_upf_metrics():
     Response fields (frontend contract):
     - total_processes, total_lots, avg_cost, completed_lots
     - processes_change, lots_change, cost_change, completed_change
+    - refreshed_at (when the shared metrics snapshot was computed)
     """
     try:
-        with get_conn(cursor_factory=RealDictCursor) as (conn, cur):
-            # Core current period metrics (non-deleted processes; lots overall)
-            cur.execute(
-                """
-                SELECT
-                    COUNT(*) FILTER (WHERE p.deleted_at IS NULL) AS total_processes,
-                    AVG(p.worst_case_cost) FILTER (WHERE p.deleted_at IS NULL) AS avg_cost,
-                    COUNT(pl.id) AS total_lots,
-                    COUNT(pl.id) FILTER (WHERE pl.status = 'completed') AS completed_lots
-                FROM processes p
-                LEFT JOIN production_lots pl ON pl.process_id = p.id;
-                """
+        snapshot = MetricsSnapshotService.get(
+            "upf", float(current_app.config.get("METRICS_SNAPSHOT_TTL", 0))
+        )
+        return APIResponse.success(
+            dict(
+                snapshot["metrics"],
+                refreshed_at=snapshot["refreshed_at"].isoformat(),
             )
-            metrics = cur.fetchone() or {}
-
-            # Month-over-month snapshot comparisons (last 30 vs previous 30 days)
-            # If created_at doesn't exist or yields nulls, fall back to zeros.
-            change_data = {
-                "processes_change": 0.0,
-                "lots_change": 0.0,
-                "cost_change": 0.0,
-                "completed_change": 0.0,
-            }
-            try:
-                cur.execute(
-                    """
-                    SELECT
-                        COUNT(*) FILTER (WHERE p.deleted_at IS NULL AND p.created_at >= NOW() - INTERVAL '30 days') AS proc_recent,
-                        COUNT(*) FILTER (WHERE p.deleted_at IS NULL AND p.created_at < NOW() - INTERVAL '30 days' AND p.created_at >= NOW() - INTERVAL '60 days') AS proc_prev,
-                        AVG(p.worst_case_cost) FILTER (WHERE p.deleted_at IS NULL AND p.created_at >= NOW() - INTERVAL '30 days') AS cost_recent,
-                        AVG(p.worst_case_cost) FILTER (WHERE p.deleted_at IS NULL AND p.created_at < NOW() - INTERVAL '30 days' AND p.created_at >= NOW() - INTERVAL '60 days') AS cost_prev
-                    FROM processes p;
-                    """
-                )
-                proc_change = cur.fetchone() or {}
-
-                cur.execute(
-                    """
-                    SELECT
-                        COUNT(pl.id) FILTER (WHERE pl.created_at >= NOW() - INTERVAL '30 days') AS lots_recent,
-                        COUNT(pl.id) FILTER (WHERE pl.created_at < NOW() - INTERVAL '30 days' AND pl.created_at >= NOW() - INTERVAL '60 days') AS lots_prev,
-                        COUNT(pl.id) FILTER (WHERE pl.status='completed' AND pl.created_at >= NOW() - INTERVAL '30 days') AS completed_recent,
-                        COUNT(pl.id) FILTER (WHERE pl.status='completed' AND pl.created_at < NOW() - INTERVAL '30 days' AND pl.created_at >= NOW() - INTERVAL '60 days') AS completed_prev
-                    FROM production_lots pl;
-                    """
-                )
-                lot_change = cur.fetchone() or {}
-
-                change_data = {
-                    "processes_change": _safe_pct_change(
-                        _coalesce_number(proc_change.get("proc_recent"), int, 0),
-                        _coalesce_number(proc_change.get("proc_prev"), int, 0),
-                    ),
-                    "lots_change": _safe_pct_change(
-                        _coalesce_number(lot_change.get("lots_recent"), int, 0),
-                        _coalesce_number(lot_change.get("lots_prev"), int, 0),
-                    ),
-                    "cost_change": _safe_pct_change(
-                        _coalesce_number(proc_change.get("cost_recent"), float, 0.0),
-                        _coalesce_number(proc_change.get("cost_prev"), float, 0.0),
-                    ),
-                    "completed_change": _safe_pct_change(
-                        _coalesce_number(lot_change.get("completed_recent"), int, 0),
-                        _coalesce_number(lot_change.get("completed_prev"), int, 0),
-                    ),
-                }
-            except Exception as e:
-                current_app.logger.warning(
-                    f"[REPORTS] Change metric calculation failed; defaulting to 0: {e}"
-                )
-
-        response = {
-            "total_processes": _coalesce_number(metrics.get("total_processes"), int, 0),
-            "total_lots": _coalesce_number(metrics.get("total_lots"), int, 0),
-            "avg_cost": _coalesce_number(metrics.get("avg_cost"), float, 0.0),
-            "completed_lots": _coalesce_number(metrics.get("completed_lots"), int, 0),
-            **change_data,
-        }
-        return APIResponse.success(response)
+        )
     except Exception as e:
         current_app.logger.warning(
             f"[REPORTS] Error in metrics endpoint (missing tables or DB issue): {e}",
@@ -1,28 +1,223 @@
 from __future__ import annotations
 
-import csv
+import itertools
 import json
 import os
 import uuid
-from io import StringIO
+from datetime import date, datetime, time, timedelta
 
 import database
 import psycopg2
 import psycopg2.extras
-from flask import Response, current_app, jsonify, request
+from flask import Response, current_app, jsonify, request, send_file, url_for
 from flask_login import current_user, login_required
 from psycopg2 import sql
 
 from .. import limiter
+from ..services.background_worker import (
+    ensure_export_worker,
+    get_export_job,
+    queue_export_job,
+)
+from ..services.export_service import EXPORTS, FILE_FORMATS, ExportService
+from ..services.item_hierarchy_index import ItemHierarchyIndex
+from ..services.low_stock_service import LowStockService
+from ..services.master_data_cache import DEPENDENCIES, MasterDataCache
+from ..services.stock_ledger_service import StockLedgerService
+from ..services.stock_receipt_service import StockReceiptService
+from ..services.stock_rollup_service import StockRollupService
+from ..services.supplier_directory import SupplierDirectory
+from ..services.supplier_ledger_service import SupplierLedgerService
+from ..services.variant_autocomplete_index import get_variant_autocomplete_index
+from ..services.variant_read_model import VariantReadModel
+from ..services.variant_search_service import VariantSearchService
 from ..utils import get_or_create_item_master_id, get_or_create_master_id, role_required
 from ..utils.file_validation import validate_upload
-from ..utils.response import APIResponse
+from ..utils.pagination import (
+    count_mode,
+    count_rows,
+    decode_cursor,
+    encode_cursor,
+    encode_offset_cursor,
+    keyset_condition,
+    order_by,
+)
+from ..utils.pg_json import fetch_json_array, iter_json_rows, passthrough_enabled
+from ..utils.response import APIResponse, raw_json_response, stream_json_array
 
 # Import api_bp from __init__ after it's been defined
 from . import api_bp
 
+# Columns matched by variant search when the search documents are not migrated
+SELECT2_SEARCH_COLUMNS = (
+    "vr.item_name",
+    "vr.color_name",
+    "vr.size_name",
+    "vr.model_name",
+    "vr.brand_name",
+)
+
+# Keyset pagination sort keys (app.utils.pagination); the last key is unique
+ITEM_SORT_KEYS = (("i.name", "ASC"), ("i.item_id", "ASC"))
+# Rows per round-trip when streaming the unpaginated /all-variants list
+ALL_VARIANTS_STREAM_BATCH = 2000
+
+# Variant listings sort on output columns of a ranked subquery
+VARIANT_SORT_KEYS = (
+    ("item_name", "ASC"),
+    ("color", "ASC"),
+    ("size", "ASC"),
+    ("id", "ASC"),
+)
+RANKED_VARIANT_SORT_KEYS = (("search_rank", "DESC"),) + VARIANT_SORT_KEYS
+LEDGER_VIEW_SORT_KEYS = (
+    ("event_date", "DESC"),
+    ("event_type", "DESC"),
+    ("event_id", "DESC"),
+    ("COALESCE(stock_entry_id, 0)", "DESC"),
+)
+STOCK_ENTRY_SORT_KEYS = (("se.entry_date", "DESC"), ("se.entry_id", "DESC"))
+
+
+def _variant_page_keys(search_term):
+    return RANKED_VARIANT_SORT_KEYS if search_term else VARIANT_SORT_KEYS
+
+
+def _variant_cursor(row, keys):
+    return encode_cursor([row[column] for column, _ in keys])
+
+
+def _variant_listing_item(row):
+    return {
+        "id": row["id"],
+        "item_id": row["item_id"],
+        "name": row["name"],
+        "item_name": row["item_name"],
+        "color": row["color"],
+        "size": row["size"],
+        "quantity": row["quantity"] or 0,
+        "unit": row["unit"] or "pcs",
+        "model": row["model"],
+        "brand": row["brand"],
+        "unit_price": float(row["unit_price"] or 0),
+        "reorder_level": row["reorder_level"] or 5,
+        "category": row["category"],
+        "category_id": row["category_id"],
+        "description": row["description"],
+    }
+
+
+def _iter_all_variants():
+    """Yield every live variant for /all-variants, fetched in batches."""
+    with database.get_conn(cursor_factory=psycopg2.extras.DictCursor) as (
+        conn,
+        cur,
+    ):
+        stream = conn.cursor(
+            name="all_variants_stream", cursor_factory=psycopg2.extras.DictCursor
+        )
+        stream.itersize = ALL_VARIANTS_STREAM_BATCH
+        source = VariantReadModel.source(cur)
+        try:
+            stream.execute(
+                f"""
+                SELECT
+                    vr.variant_id as id,
+                    vr.item_id,
+                    vr.display_name as name,
+                    vr.item_name,
+                    vr.color_name as color,
+                    vr.size_name as size,
+                    vr.opening_stock as quantity,
+                    vr.unit,
+                    COALESCE(vr.model_name, 'N/A') as model,
+                    COALESCE(vr.brand_name, 'N/A') as brand,
+                    0.00 as unit_price,
+                    vr.threshold as reorder_level,
+                    COALESCE(vr.category_name, 'N/A') as category,
+                    vr.category_id,
+                    vr.description
+                FROM {source} vr
+                WHERE NOT vr.is_deleted
+                ORDER BY vr.item_name, vr.color_name, vr.size_name
+                """
+            )
+            for row in stream:
+                yield _variant_listing_item(row)
+        finally:
+            stream.close()
+
+
+def _iter_all_variants_json():
+    """Yield every live variant for /all-variants as Postgres-rendered JSON."""
+    with database.get_conn() as (conn, cur):
+        source = VariantReadModel.source(cur)
+        yield from iter_json_rows(
+            conn,
+            f"""
+            SELECT
+                vr.variant_id as id,
+                vr.item_id,
+                vr.display_name as name,
+                vr.item_name,
+                vr.color_name as color,
+                vr.size_name as size,
+                COALESCE(vr.opening_stock, 0) as quantity,
+                COALESCE(NULLIF(vr.unit, ''), 'pcs') as unit,
+                COALESCE(vr.model_name, 'N/A') as model,
+                COALESCE(vr.brand_name, 'N/A') as brand,
+                0.0::float8 as unit_price,
+                COALESCE(NULLIF(vr.threshold, 0), 5) as reorder_level,
+                COALESCE(vr.category_name, 'N/A') as category,
+                vr.category_id,
+                vr.description
+            FROM {source} vr
+            WHERE NOT vr.is_deleted
+            ORDER BY vr.item_name, vr.color_name, vr.size_name
+            """,
+            batch_size=ALL_VARIANTS_STREAM_BATCH,
+        )
+
+
+def _select2_variant_result(row):
+    """Format a variant row for Select2, with a stock indicator on the text."""
+    qty = row["quantity"] or 0
+    available = row["available"] if row["available"] is not None else qty
+    reorder = row["reorder_level"] or 0
+    if available <= 0:
+        stock_info = " 🔴"
+    elif available <= reorder:
+        stock_info = " 🟡"
+    else:
+        stock_info = " 🟢"
+
+    return {
+        "id": row["id"],
+        "text": row["text"] + stock_info,
+        "item_name": row["item_name"],
+        "color": row["color"],
+        "size": row["size"],
+        "quantity": qty,
+        "available": float(available),
+        "unit": row["unit"] or "pcs",
+        "model": row["model"],
+        "brand": row["brand"],
+        "reorder_level": reorder,
+    }
+
 
 # --- Utility: Generic CRUD for masters ---
+def _master_data_ttl():
+    return float(current_app.config.get("MASTER_DATA_CACHE_TTL", 0))
+
+
+def _item_data_changed():
+    """Item writes may add masters (get_or_create) and change the hierarchy."""
+    for table in DEPENDENCIES:
+        MasterDataCache.invalidate(table)
+    MasterDataCache.invalidate("item_master")
+
+
 def _make_api_crud_routes(entity_name, table_name, id_col, name_col):
     plural_name = f"{entity_name}s"
     get_endpoint = f"get_{plural_name}"
@@ -33,16 +228,17 @@ def _make_api_crud_routes(entity_name, table_name, id_col, name_col):
     @api_bp.route(f"/{plural_name}", methods=["GET"], endpoint=get_endpoint)
     @login_required
     def get_entities():
-        with database.get_conn() as (conn, cur):
-            query = sql.SQL("SELECT {}, {} FROM {} ORDER BY {}").format(
-                sql.Identifier(id_col),
-                sql.Identifier(name_col),
-                sql.Identifier(table_name),
-                sql.Identifier(name_col),
-            )
-            cur.execute(query)
-            items = cur.fetchall()
-        return jsonify([{"id": item[0], "name": item[1]} for item in items])
+        items, etag = MasterDataCache.get_list(
+            table_name, id_col, name_col, _master_data_ttl()
+        )
+        if etag in request.if_none_match:
+            response = current_app.response_class(status=304)
+        else:
+            response = jsonify(items)
+        response.set_etag(etag)
+        # Browsers revalidate every time; unchanged lists cost a 304
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
 
     @api_bp.route(f"/{plural_name}", methods=["POST"], endpoint=add_endpoint)
     @login_required
@@ -61,6 +257,7 @@ def _make_api_crud_routes(entity_name, table_name, id_col, name_col):
                 )
                 cur.execute(query, (name,))
                 new_id = cur.fetchone()[0]
+            MasterDataCache.invalidate(table_name)
             return jsonify({"id": new_id, "name": name}), 201
         except psycopg2.IntegrityError:
             return jsonify({"error": f'"{name}" already exists.'}), 409
@@ -87,6 +284,7 @@ def _make_api_crud_routes(entity_name, table_name, id_col, name_col):
                 )
                 cur.execute(query, (name, item_id))
                 conn.commit()
+            MasterDataCache.invalidate(table_name)
             return jsonify({"message": f"{entity_name.capitalize()} updated"}), 200
         except psycopg2.IntegrityError:
             return jsonify({"error": f'The name "{name}" already exists.'}), 409
@@ -106,6 +304,7 @@ def _make_api_crud_routes(entity_name, table_name, id_col, name_col):
                     sql.Identifier(table_name), sql.Identifier(id_col)
                 )
                 cur.execute(query, (item_id,))
+            MasterDataCache.invalidate(table_name)
             return "", 204
         except psycopg2.IntegrityError:
             return jsonify({"error": "This item is in use and cannot be deleted."}), 409
@@ -124,27 +323,38 @@ _make_api_crud_routes("variation", "variation_master", "variation_id", "variatio
 @api_bp.route("/stock-trend")
 @login_required
 def stock_trend_data():
+    """
+    Stock received per day, week or month.
+
+    Query params: start_date, end_date (ISO dates, default the last 30
+    days), granularity (day|week|month), supplier_id, variant_id.
+    """
     try:
-        with database.get_conn(cursor_factory=psycopg2.extras.DictCursor) as (
-            conn,
-            cur,
-        ):
-            cur.execute(
-                """
-                SELECT date_series.day::date, COALESCE(SUM(se.quantity_added), 0) as total_stock
-                FROM generate_series(CURRENT_DATE - INTERVAL '29 days', CURRENT_DATE, '1 day') as date_series(day)
-                LEFT JOIN stock_entries se ON date_series.day = DATE(se.entry_date)
-                GROUP BY date_series.day
-                ORDER BY date_series.day;
-                """
-            )
-            trend_data = cur.fetchall()
-            labels = [row["day"].strftime("%Y-%m-%d") for row in trend_data]
-            values = [float(row["total_stock"]) for row in trend_data]
-            return jsonify({"labels": labels, "values": values})
+        end = request.args.get("end_date")
+        end = date.fromisoformat(end) if end else date.today()
+        start = request.args.get("start_date")
+        start = date.fromisoformat(start) if start else end - timedelta(days=29)
+        granularity = request.args.get("granularity", "day")
+        trend = StockRollupService.trend(
+            start,
+            end,
+            granularity,
+            supplier_id=request.args.get("supplier_id", type=int),
+            variant_id=request.args.get("variant_id", type=int),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Error fetching stock trend data: {e}")
         return jsonify({"error": "Failed to fetch stock trend data"}), 500
+    return jsonify(
+        {
+            "granularity": granularity,
+            "labels": [row["bucket"].strftime("%Y-%m-%d") for row in trend],
+            "values": [row["quantity"] for row in trend],
+            "amounts": [row["amount"] for row in trend],
+        }
+    )
 
 
 # Dependencies
@@ -152,11 +362,9 @@ def stock_trend_data():
 @login_required
 def get_color_dependencies(color_id):
     try:
-        with database.get_conn() as (conn, cur):
-            cur.execute(
-                "SELECT COUNT(*) FROM item_variant WHERE color_id = %s", (color_id,)
-            )
-            count = cur.fetchone()[0]
+        count = MasterDataCache.dependency_count(
+            "color_master", color_id, _master_data_ttl()
+        )
         return jsonify({"count": count})
     except Exception as e:
         current_app.logger.error(
@@ -169,11 +377,9 @@ def get_color_dependencies(color_id):
 @login_required
 def get_size_dependencies(size_id):
     try:
-        with database.get_conn() as (conn, cur):
-            cur.execute(
-                "SELECT COUNT(*) FROM item_variant WHERE size_id = %s", (size_id,)
-            )
-            count = cur.fetchone()[0]
+        count = MasterDataCache.dependency_count(
+            "size_master", size_id, _master_data_ttl()
+        )
         return jsonify({"count": count})
     except Exception as e:
         current_app.logger.error(f"Error fetching dependencies for size {size_id}: {e}")
@@ -184,11 +390,9 @@ def get_size_dependencies(size_id):
 @login_required
 def get_model_dependencies(model_id):
     try:
-        with database.get_conn() as (conn, cur):
-            cur.execute(
-                "SELECT COUNT(*) FROM item_master WHERE model_id = %s", (model_id,)
-            )
-            count = cur.fetchone()[0]
+        count = MasterDataCache.dependency_count(
+            "model_master", model_id, _master_data_ttl()
+        )
         return jsonify({"count": count})
     except Exception as e:
         current_app.logger.error(
@@ -201,12 +405,9 @@ def get_model_dependencies(model_id):
 @login_required
 def get_variation_dependencies(variation_id):
     try:
-        with database.get_conn() as (conn, cur):
-            cur.execute(
-                "SELECT COUNT(*) FROM item_master WHERE variation_id = %s",
-                (variation_id,),
-            )
-            count = cur.fetchone()[0]
+        count = MasterDataCache.dependency_count(
+            "variation_master", variation_id, _master_data_ttl()
+        )
         return jsonify({"count": count})
     except Exception as e:
         current_app.logger.error(
@@ -219,35 +420,34 @@ def get_variation_dependencies(variation_id):
 @api_bp.route("/suppliers")
 @login_required
 def get_suppliers():
+    """
+    Live suppliers with their contact counts, ordered by firm name.
+
+    Optional query params: q (firm name or GSTIN contains), and page and
+    per_page, which return {"items", "page", "per_page", "total"} instead
+    of the full list.
+    """
     try:
-        with database.get_conn(cursor_factory=psycopg2.extras.DictCursor) as (
-            conn,
-            cur,
-        ):
-            # Check if deleted_at column exists
-            cur.execute("""
-                SELECT column_name FROM information_schema.columns 
-                WHERE table_name = 'suppliers' AND column_name = 'deleted_at'
-            """)
-            has_deleted_at = cur.fetchone() is not None
-            
-            # Build query based on column availability
-            if has_deleted_at:
-                cur.execute("SELECT * FROM suppliers WHERE deleted_at IS NULL ORDER BY firm_name")
-            else:
-                cur.execute("SELECT * FROM suppliers ORDER BY firm_name")
-            
-            suppliers = []
-            for row in cur.fetchall():
-                supplier_dict = dict(row)
-                # Fetch contact count for this supplier
-                cur.execute(
-                    "SELECT COUNT(*) as contact_count FROM supplier_contacts WHERE supplier_id = %s",
-                    (supplier_dict['supplier_id'],)
+        suppliers = SupplierDirectory.search(
+            _master_data_ttl(), request.args.get("q", "").strip()
+        )
+        page = request.args.get("page")
+        per_page = request.args.get("per_page")
+        if page or per_page:
+            try:
+                page = max(int(page or 1), 1)
+                per_page = min(max(int(per_page or 50), 1), 500)
+            except ValueError:
+                return APIResponse.error(
+                    "validation_error", "page and per_page must be integers", 400
                 )
-                contact_count = cur.fetchone()['contact_count']
-                supplier_dict['contact_count'] = contact_count
-                suppliers.append(supplier_dict)
+            offset = (page - 1) * per_page
+            suppliers = {
+                "items": suppliers[offset : offset + per_page],
+                "page": page,
+                "per_page": per_page,
+                "total": len(suppliers),
+            }
         return APIResponse.success(suppliers, "Suppliers retrieved successfully")
     except Exception as e:
         current_app.logger.error(f"Error fetching suppliers: {e}")
@@ -318,6 +518,7 @@ def add_supplier():
                         continue
             
             conn.commit()
+        SupplierDirectory.invalidate()
         return APIResponse.created(
             {"supplier_id": supplier_id},
             "Supplier added successfully"
@@ -401,6 +602,7 @@ def update_supplier(supplier_id):
                         continue
             
             conn.commit()
+        SupplierDirectory.invalidate()
         return APIResponse.success(None, "Supplier updated successfully")
     except psycopg2.IntegrityError:
         return APIResponse.error(
@@ -421,6 +623,7 @@ def delete_supplier(supplier_id):
         with database.get_conn() as (conn, cur):
             cur.execute("DELETE FROM suppliers WHERE supplier_id = %s", (supplier_id,))
             conn.commit()
+        SupplierDirectory.invalidate()
         return APIResponse.success(None, "Supplier deleted successfully")
     except psycopg2.IntegrityError:
         return APIResponse.error("in_use_error", "This supplier is in use and cannot be deleted.", 409)
@@ -574,23 +777,52 @@ def get_supplier_variants(supplier_id):
 def get_supplier_ledger(supplier_id):
     # Enhanced supplier ledger: supports optional filters and pagination.
     # If a DB view `supplier_ledger` exists prefer querying it (simpler and index-friendly).
+    # Pass `cursor` (empty for the first page) to page by keyset instead of
+    # `page`; totals are then only computed on request (count=estimate|exact).
     variant = request.args.get("variant")
     start_date = request.args.get("start_date")
     end_date = request.args.get("end_date")
     page = int(request.args.get("page", 1))
     per_page = int(request.args.get("per_page", 50))
     offset = (page - 1) * per_page
+    cursor = request.args.get("cursor")
+    count = count_mode(
+        request.args.get("count"), "none" if cursor is not None else "exact"
+    )
+    try:
+        after = decode_cursor(cursor)["k"] if cursor else None
+    except (ValueError, KeyError):
+        return APIResponse.error("invalid_cursor", "Invalid cursor", 400)
 
     try:
         with database.get_conn(cursor_factory=psycopg2.extras.DictCursor) as (
             conn,
             cur,
         ):
+            # Prefer the materialized ledger (with running balances)
+            if SupplierLedgerService.present(cur):
+                rows, total, next_cursor = SupplierLedgerService.page(
+                    cur,
+                    supplier_id,
+                    count,
+                    per_page,
+                    offset=offset,
+                    after=after,
+                    variant_id=int(variant) if variant else None,
+                    start_date=start_date,
+                    end_date=end_date,
+                )
+                return APIResponse.success(
+                    _ledger_page(rows, total, count, page, per_page, cursor, next_cursor),
+                    "Ledger retrieved successfully",
+                )
+
             # Check if supplier_ledger view exists
             cur.execute("SELECT to_regclass('public.supplier_ledger')")
             reg = cur.fetchone()[0]
             if reg:
                 # Use the consolidated view
+                keys = LEDGER_VIEW_SORT_KEYS
                 where_clauses = ["supplier_id = %s"]
                 params = [supplier_id]
                 if variant:
@@ -604,25 +836,44 @@ def get_supplier_ledger(supplier_id):
                     params.append(end_date)
 
                 where_sql = " AND ".join(where_clauses)
-                count_q = f"SELECT COUNT(*) FROM supplier_ledger WHERE {where_sql}"
-                cur.execute(count_q, tuple(params))
-                total = cur.fetchone()[0]
+                total = count_rows(
+                    cur, count, f"SELECT 1 FROM supplier_ledger WHERE {where_sql}", params
+                )
 
+                page_sql, page_params = where_sql, list(params)
+                if after is not None:
+                    condition, cursor_params = keyset_condition(keys, after)
+                    page_sql += " AND " + condition
+                    page_params += cursor_params
+                    offset = 0
                 query = f"""
-                    SELECT event_date, event_type, reference_number, receipt_id, stock_entry_id, variant_id, quantity, cost_per_unit, po_status, notes
+                    SELECT event_date, event_type, event_id, reference_number, receipt_id, stock_entry_id, variant_id, quantity, cost_per_unit, po_status, notes
                     FROM supplier_ledger
-                    WHERE {where_sql}
-                    ORDER BY event_date DESC
+                    WHERE {page_sql}
+                    ORDER BY {order_by(keys)}
                     LIMIT %s OFFSET %s
                 """
-                cur.execute(query, tuple(params + [per_page, offset]))
+                cur.execute(query, tuple(page_params + [per_page + 1, offset]))
                 rows = [dict(r) for r in cur.fetchall()]
+                next_cursor = None
+                if len(rows) > per_page:
+                    rows = rows[:per_page]
+                    last = rows[-1]
+                    next_cursor = encode_cursor(
+                        [
+                            last["event_date"],
+                            last["event_type"],
+                            last["event_id"],
+                            last["stock_entry_id"] or 0,
+                        ]
+                    )
                 return APIResponse.success(
-                    {"items": rows, "total": total, "page": page, "per_page": per_page},
+                    _ledger_page(rows, total, count, page, per_page, cursor, next_cursor),
                     "Ledger retrieved successfully"
                 )
 
             # Fallback: view not present — query stock_entries & receipts directly
+            keys = STOCK_ENTRY_SORT_KEYS
             base_where = "se.supplier_id = %s"
             params = [supplier_id]
             if variant:
@@ -635,16 +886,23 @@ def get_supplier_ledger(supplier_id):
                 base_where += " AND se.entry_date <= %s"
                 params.append(end_date)
 
-            count_q = f"SELECT COUNT(*) FROM stock_entries se WHERE {base_where}"
-            cur.execute(count_q, tuple(params))
-            total = cur.fetchone()[0]
+            total = count_rows(
+                cur, count, f"SELECT 1 FROM stock_entries se WHERE {base_where}", params
+            )
 
+            page_where, page_params = base_where, list(params)
+            if after is not None:
+                condition, cursor_params = keyset_condition(keys, after)
+                page_where += " AND " + condition
+                page_params += cursor_params
+                offset = 0
             query = f"""
                 SELECT 
                     se.entry_date as date,
+                    se.entry_id,
                     s.firm_name as supplier_name,
                     sr.bill_number,
-                    im.name as item_name,
+                    vr.item_name,
                     se.quantity_added as qty,
                     se.cost_per_unit,
                     sr.receipt_id,
@@ -654,21 +912,22 @@ def get_supplier_ledger(supplier_id):
                 FROM stock_entries se
                 JOIN stock_receipts sr ON se.receipt_id = sr.receipt_id
                 JOIN suppliers s ON sr.supplier_id = s.supplier_id
-                JOIN item_variant iv ON se.variant_id = iv.variant_id
-                JOIN item_master im ON iv.item_id = im.item_id
-                WHERE {base_where}
-                ORDER BY se.entry_date DESC
+                JOIN {VariantReadModel.source(cur)} vr ON vr.variant_id = se.variant_id
+                WHERE {page_where}
+                ORDER BY {order_by(keys)}
                 LIMIT %s OFFSET %s
             """
-            cur.execute(query, tuple(params + [per_page, offset]))
+            cur.execute(query, tuple(page_params + [per_page + 1, offset]))
             ledger_entries = [dict(row) for row in cur.fetchall()]
+            next_cursor = None
+            if len(ledger_entries) > per_page:
+                ledger_entries = ledger_entries[:per_page]
+                last = ledger_entries[-1]
+                next_cursor = encode_cursor([last["date"], last["entry_id"]])
         return APIResponse.success(
-            {
-                "items": ledger_entries,
-                "total": total,
-                "page": page,
-                "per_page": per_page,
-            },
+            _ledger_page(
+                ledger_entries, total, count, page, per_page, cursor, next_cursor
+            ),
             "Ledger retrieved successfully"
         )
     except Exception as e:
@@ -678,6 +937,17 @@ def get_supplier_ledger(supplier_id):
         return APIResponse.error("fetch_error", "Failed to fetch ledger", 500)
 
 
+def _ledger_page(rows, total, count, page, per_page, cursor, next_cursor):
+    """Ledger response body shared by the supplier and variant ledgers."""
+    body = {"items": rows, "per_page": per_page, "next_cursor": next_cursor}
+    if cursor is None:
+        body["page"] = page
+    if total is not None:
+        body["total"] = total
+        body["total_is_estimate"] = count == "estimate"
+    return body
+
+
 # Stock receipts
 @api_bp.route("/stock-receipts", methods=["POST"])
 @login_required
@@ -720,53 +990,10 @@ def add_stock_receipt():
                 ),
             )
             receipt_id = cur.fetchone()[0]
-            for item in items:
-                variant_id = item.get("variant_id")
-                quantity = item.get("quantity")
-                cost = item.get("cost")
-                if not variant_id or not quantity:
-                    continue
-                cur.execute(
-                    "INSERT INTO stock_entries (variant_id, quantity_added, supplier_id, cost_per_unit, receipt_id) VALUES (%s, %s, %s, %s, %s)",
-                    (variant_id, quantity, supplier_id, cost, receipt_id),
-                )
-                cur.execute(
-                    "UPDATE item_variant SET opening_stock = opening_stock + %s WHERE variant_id = %s",
-                    (quantity, variant_id),
-                )
-                if po_id:
-                    cur.execute(
-                        "UPDATE purchase_order_items SET received_quantity = received_quantity + %s WHERE po_id = %s AND variant_id = %s",
-                        (quantity, po_id, variant_id),
-                    )
-                if supplier_id and cost:
-                    cur.execute(
-                        """
-                        INSERT INTO supplier_item_rates (supplier_id, item_id, rate)
-                        SELECT %s, item_id, %s FROM item_variant WHERE variant_id = %s
-                        ON CONFLICT (supplier_id, item_id) DO UPDATE SET rate = EXCLUDED.rate
-                        """,
-                        (supplier_id, cost, variant_id),
-                    )
-            if po_id:
-                cur.execute(
-                    """
-                    SELECT SUM(quantity) as total_ordered, SUM(received_quantity) as total_received
-                    FROM purchase_order_items WHERE po_id = %s
-                    """,
-                    (po_id,),
-                )
-                total_ordered, total_received = cur.fetchone()
-                if total_received >= total_ordered:
-                    new_status = "Completed"
-                elif total_received > 0:
-                    new_status = "Partially Received"
-                else:
-                    new_status = "Ordered"
-                cur.execute(
-                    "UPDATE purchase_orders SET status = %s WHERE po_id = %s",
-                    (new_status, po_id),
-                )
+            StockLedgerService.tag(cur, StockLedgerService.RECEIPT, receipt_id)
+            StockReceiptService.post_lines(
+                cur, receipt_id, supplier_id, po_id or None, items
+            )
             conn.commit()
         return (
             jsonify(
@@ -875,6 +1102,16 @@ def get_stock_receipts():
 
                 offset = (page - 1) * per_page
                 paged_query = base_query + " LIMIT %s OFFSET %s"
+                if passthrough_enabled():
+                    return raw_json_response(
+                        fetch_json_array(
+                            conn,
+                            paged_query,
+                            params + [per_page, offset],
+                            order_by="receipt_date DESC",
+                        ),
+                        envelope={"total": total, "page": page, "per_page": per_page},
+                    )
                 cur.execute(paged_query, tuple(params + [per_page, offset]))
                 receipts = [dict(row) for row in cur.fetchall()]
                 return jsonify(
@@ -887,6 +1124,12 @@ def get_stock_receipts():
                 )
 
             # fallback: no pagination requested — return the full list (backwards compatible)
+            if passthrough_enabled():
+                return raw_json_response(
+                    fetch_json_array(
+                        conn, base_query, params, order_by="receipt_date DESC"
+                    )
+                )
             cur.execute(base_query, tuple(params))
             receipts = [dict(row) for row in cur.fetchall()]
         return jsonify(receipts)
@@ -930,29 +1173,60 @@ def get_stock_receipt_details(receipt_id):
 def delete_stock_receipt(receipt_id):
     try:
         with database.get_conn() as (conn, cur):
-            cur.execute(
-                "SELECT variant_id, quantity_added FROM stock_entries WHERE receipt_id = %s",
-                (receipt_id,),
-            )
-            entries = cur.fetchall()
-            for variant_id, quantity_added in entries:
-                cur.execute(
-                    "UPDATE item_variant SET opening_stock = opening_stock - %s WHERE variant_id = %s",
-                    (quantity_added, variant_id),
-                )
-            cur.execute(
-                "DELETE FROM stock_entries WHERE receipt_id = %s", (receipt_id,)
-            )
-            cur.execute(
-                "DELETE FROM stock_receipts WHERE receipt_id = %s", (receipt_id,)
-            )
+            StockLedgerService.tag(cur, StockLedgerService.RECEIPT_REVERSAL, receipt_id)
+            result = StockReceiptService.reverse(cur, [receipt_id])
             conn.commit()
+        if result["missing"]:
+            return jsonify({"error": "Stock receipt not found"}), 404
         return "", 204
     except Exception as e:
         current_app.logger.error(f"Error deleting stock receipt {receipt_id}: {e}")
         return jsonify({"error": "Database error"}), 500
 
 
+@api_bp.route("/stock-receipts/reverse", methods=["POST"])
+@login_required
+@role_required("admin")
+def reverse_stock_receipts():
+    """
+    Reverse and delete many receipts in one transaction.
+
+    JSON body: {"receipt_ids": [int, ...]}. Either every receipt is
+    reversed or, if any does not exist, none is (404 listing the missing).
+    """
+    receipt_ids = (request.get_json(silent=True) or {}).get("receipt_ids")
+    if (
+        not isinstance(receipt_ids, list)
+        or not receipt_ids
+        or not all(isinstance(r, int) and not isinstance(r, bool) for r in receipt_ids)
+    ):
+        return jsonify({"error": "receipt_ids must be a non-empty list of ids"}), 400
+    try:
+        with database.get_conn() as (conn, cur):
+            StockLedgerService.tag(
+                cur,
+                StockLedgerService.RECEIPT_REVERSAL,
+                ",".join(str(r) for r in sorted(set(receipt_ids))),
+            )
+            result = StockReceiptService.reverse(cur, receipt_ids)
+            if result["missing"]:
+                conn.rollback()
+                return (
+                    jsonify(
+                        {
+                            "error": "Stock receipts not found",
+                            "missing": result["missing"],
+                        }
+                    ),
+                    404,
+                )
+            conn.commit()
+        return jsonify(result)
+    except Exception as e:
+        current_app.logger.error(f"Error reversing stock receipts {receipt_ids}: {e}")
+        return jsonify({"error": "Database error"}), 500
+
+
 # Purchase Orders
 @api_bp.route("/purchase-orders")
 @login_required
@@ -979,6 +1253,10 @@ def get_purchase_orders():
                 params.append(end_date)
             if conditions:
                 query += " WHERE " + " AND ".join(conditions)
+            if passthrough_enabled():
+                return raw_json_response(
+                    fetch_json_array(conn, query, params, order_by="order_date DESC")
+                )
             query += " ORDER BY po.order_date DESC"
             cur.execute(query, tuple(params))
             pos = [dict(row) for row in cur.fetchall()]
@@ -1138,10 +1416,7 @@ def get_purchase_order_by_number(po_number):
 @login_required
 def get_item_names():
     try:
-        with database.get_conn() as (conn, cur):
-            cur.execute("SELECT DISTINCT name FROM item_master ORDER BY name")
-            names = [row[0] for row in cur.fetchall()]
-        return jsonify(names)
+        return jsonify(ItemHierarchyIndex.get(_master_data_ttl()).names)
     except Exception as e:
         current_app.logger.error(f"Error fetching item names: {e}")
         return jsonify({"error": "Failed to fetch item names"}), 500
@@ -1154,20 +1429,8 @@ def get_models_for_item():
     if not item_name:
         return jsonify([])
     try:
-        with database.get_conn() as (conn, cur):
-            cur.execute(
-                """
-                SELECT DISTINCT mm.model_id, mm.model_name
-                FROM model_master mm
-                JOIN item_master im ON mm.model_id = im.model_id
-                WHERE im.name = %s ORDER BY mm.model_name
-                """,
-                (item_name,),
-            )
-            models = [
-                {"id": row[0], "name": row[1]} for row in cur.fetchall() if row[1]
-            ]
-        return jsonify(models)
+        index = ItemHierarchyIndex.get(_master_data_ttl())
+        return jsonify(index.models(item_name))
     except Exception as e:
         current_app.logger.error(f"Error fetching models for item {item_name}: {e}")
         return jsonify({"error": "Failed to fetch models"}), 500
@@ -1181,18 +1444,8 @@ def get_variations_for_item_model():
     if not item_name:
         return jsonify([])
     try:
-        with database.get_conn() as (conn, cur):
-            query = "SELECT DISTINCT vm.variation_id, vm.variation_name FROM variation_master vm JOIN item_master im ON vm.variation_id = im.variation_id WHERE im.name = %s"
-            params = [item_name]
-            if model_name:
-                query += " AND im.model_id IN (SELECT model_id FROM model_master WHERE model_name = %s)"
-                params.append(model_name)
-            query += " ORDER BY vm.variation_name"
-            cur.execute(query, tuple(params))
-            variations = [
-                {"id": row[0], "name": row[1]} for row in cur.fetchall() if row[1]
-            ]
-        return jsonify(variations)
+        index = ItemHierarchyIndex.get(_master_data_ttl())
+        return jsonify(index.variations(item_name, model_name))
     except Exception as e:
         current_app.logger.error(
             f"Error fetching variations for item '{item_name}' and model '{model_name}': {e}"
@@ -1203,25 +1456,41 @@ def get_variations_for_item_model():
 @api_bp.route("/items", methods=["GET"])
 @login_required
 def get_items():
+    """
+    List items by name.
+
+    Pages by ``page`` (OFFSET, exact total by default) or, when ``cursor`` is
+    given (empty for the first page), by keyset on the name; the cursor mode
+    only counts when asked (``count=estimate|exact``).
+    """
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 50, type=int)
     per_page = max(1, min(per_page, 500))
     search_term = request.args.get("search", "")
     show_low_stock_only = request.args.get("low_stock", "false").lower() == "true"
+    cursor = request.args.get("cursor")
+    count = count_mode(
+        request.args.get("count"), "none" if cursor is not None else "exact"
+    )
     offset = (page - 1) * per_page
+    try:
+        after = decode_cursor(cursor)["k"] if cursor else None
+    except (ValueError, KeyError):
+        return jsonify({"error": "Invalid cursor"}), 400
     try:
         with database.get_conn(cursor_factory=psycopg2.extras.DictCursor) as (
             conn,
             cur,
         ):
+            # Per-item summary is computed only for the rows on the page
             base_query = """
                 FROM item_master i
                 LEFT JOIN model_master mm ON i.model_id = mm.model_id
                 LEFT JOIN variation_master vm ON i.variation_id = vm.variation_id
-                LEFT JOIN (
-                    SELECT item_id, COUNT(*) as variant_count, SUM(opening_stock) as total_stock, SUM(threshold) as total_threshold, BOOL_OR(opening_stock <= threshold) as has_low_stock_variants
-                    FROM item_variant GROUP BY item_id
-                ) as variant_summary ON i.item_id = variant_summary.item_id
+                LEFT JOIN LATERAL (
+                    SELECT COUNT(*) as variant_count, SUM(opening_stock) as total_stock, SUM(threshold) as total_threshold, BOOL_OR(opening_stock <= threshold) as has_low_stock_variants
+                    FROM item_variant WHERE item_variant.item_id = i.item_id
+                ) as variant_summary ON TRUE
                 """
             conditions = []
             params = []
@@ -1236,9 +1505,23 @@ def get_items():
                 pat = f"%{search_term}%"
                 params.extend([pat, pat, pat])
             where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
-            count_query = f"SELECT COUNT(i.item_id) {base_query} {where_clause}"
-            cur.execute(count_query, tuple(params))
-            total_items = cur.fetchone()[0]
+            total_items = count_rows(
+                cur,
+                count,
+                f"SELECT i.item_id {base_query} {where_clause}",
+                params,
+            )
+
+            page_conditions = list(conditions)
+            page_params = list(params)
+            if after is not None:
+                condition, cursor_params = keyset_condition(ITEM_SORT_KEYS, after)
+                page_conditions.append(condition)
+                page_params.extend(cursor_params)
+                offset = 0
+            page_where = (
+                " WHERE " + " AND ".join(page_conditions) if page_conditions else ""
+            )
             items_query = f"""
                 SELECT i.item_id, i.name, mm.model_name as model, vm.variation_name as variation, i.description, i.image_path,
                        COALESCE(variant_summary.variant_count, 0) as variant_count,
@@ -1246,12 +1529,21 @@ def get_items():
                        COALESCE(variant_summary.total_threshold, 0) as total_threshold,
                        COALESCE(variant_summary.has_low_stock_variants, FALSE) as has_low_stock_variants
                 {base_query}
-                {where_clause}
-                ORDER BY i.name
+                {page_where}
+                ORDER BY {order_by(ITEM_SORT_KEYS)}
                 LIMIT %s OFFSET %s
             """
-            cur.execute(items_query, tuple(params + [per_page, offset]))
+            cur.execute(
+                items_query,
+                tuple(page_params + [per_page + 1, offset]),
+            )
             items = cur.fetchall()
+            next_cursor = None
+            if len(items) > per_page:
+                items = items[:per_page]
+                next_cursor = encode_cursor(
+                    [items[-1]["name"], items[-1]["item_id"]]
+                )
             items_data = [
                 {
                     "id": item["item_id"],
@@ -1267,15 +1559,18 @@ def get_items():
                 }
                 for item in items
             ]
-            return jsonify(
-                {
-                    "items": items_data,
-                    "total_items": total_items,
-                    "page": page,
-                    "per_page": per_page,
-                    "total_pages": (total_items + per_page - 1) // per_page,
-                }
-            )
+            response = {
+                "items": items_data,
+                "per_page": per_page,
+                "next_cursor": next_cursor,
+            }
+            if cursor is None:
+                response["page"] = page
+            if total_items is not None:
+                response["total_items"] = total_items
+                response["total_pages"] = (total_items + per_page - 1) // per_page
+                response["total_is_estimate"] = count == "estimate"
+            return jsonify(response)
     except Exception as e:
         current_app.logger.error(f"Error fetching items: {e}")
         return jsonify({"error": "Failed to fetch items"}), 500
@@ -1350,6 +1645,7 @@ def add_item_api():
                 ),
             )
             item_id = cur.fetchone()[0]
+            StockLedgerService.tag(cur, StockLedgerService.ITEM_EDIT, item_id)
             variants = json.loads(data["variants"])
             for v in variants:
                 color_id = get_or_create_master_id(
@@ -1370,6 +1666,7 @@ def add_item_api():
                     ),
                 )
             conn.commit()
+        _item_data_changed()
         return jsonify({"message": "Item saved successfully", "item_id": item_id}), 201
     except psycopg2.IntegrityError as e:
         current_app.logger.warning(f"Integrity error adding item variant: {e}")
@@ -1454,177 +1751,114 @@ def get_all_variants():
         # support optional pagination and search to avoid returning the entire dataset
         page = request.args.get("page")
         per_page = request.args.get("per_page")
+        cursor = request.args.get("cursor")
         search_term = request.args.get("q", "").strip()
 
+        # No pagination requested — return the full list (backwards
+        # compatible), streamed from a server-side cursor so memory stays flat
+        if not ((page and per_page) or cursor is not None):
+            passthrough = passthrough_enabled()
+            variants = (
+                _iter_all_variants_json() if passthrough else _iter_all_variants()
+            )
+            first = next(variants, None)  # runs the query; errors still get a 500
+            return stream_json_array(
+                itertools.chain([] if first is None else [first], variants),
+                raw=passthrough,
+            )
+
+        # Paginated by page/per_page, or by cursor (empty for the first page)
         with database.get_conn(cursor_factory=psycopg2.extras.DictCursor) as (
             conn,
             cur,
         ):
-            # If page/per_page provided, return paginated response with metadata
-            if page and per_page:
-                try:
-                    page = int(page)
-                    per_page = int(per_page)
-                    if page < 1:
-                        page = 1
-                    if per_page < 1:
-                        per_page = 50
-                except ValueError:
+            try:
+                page = int(page or 1)
+                per_page = int(per_page or 50)
+                if page < 1:
                     page = 1
+                if per_page < 1:
                     per_page = 50
+            except ValueError:
+                page = 1
+                per_page = 50
 
-                offset = (page - 1) * per_page
-
-                # Build optional search condition
-                params = []
-                search_condition = ""
-                if search_term:
-                    search_condition = """
-                        AND (
-                            LOWER(im.name) LIKE LOWER(%s) OR
-                            LOWER(cm.color_name) LIKE LOWER(%s) OR
-                            LOWER(sm.size_name) LIKE LOWER(%s) OR
-                            LOWER(mm.model_name) LIKE LOWER(%s) OR
-                            LOWER(ibm.item_brand_name) LIKE LOWER(%s)
-                        )
-                    """
-                    pattern = f"%{search_term}%"
-                    params = [pattern] * 5
-
-                # get total
-                count_query = f"""
-                    SELECT COUNT(*) as total
-                    FROM item_variant iv
-                    JOIN item_master im ON iv.item_id = im.item_id
-                    JOIN color_master cm ON iv.color_id = cm.color_id
-                    JOIN size_master sm ON iv.size_id = sm.size_id
-                    LEFT JOIN model_master mm ON im.model_id = mm.model_id
-                    LEFT JOIN item_brand_master ibm ON im.item_brand_id = ibm.item_brand_id
-                    WHERE iv.deleted_at IS NULL
-                      AND im.deleted_at IS NULL
-                      {search_condition}
-                """
-                cur.execute(count_query, params)
-                total = cur.fetchone()["total"]
-
-                data_query = f"""
-                    SELECT
-                        iv.variant_id as id,
-                        iv.item_id,
-                        im.name || ' - ' || cm.color_name || ' - ' || sm.size_name as name,
-                        im.name as item_name,
-                        cm.color_name as color,
-                        sm.size_name as size,
-                        iv.opening_stock as quantity,
-                        iv.unit,
-                        COALESCE(mm.model_name, 'N/A') as model,
-                        COALESCE(ibm.item_brand_name, 'N/A') as brand,
-                        0.00 as unit_price,
-                        iv.threshold as reorder_level,
-                        COALESCE(icm.item_category_name, 'N/A') as category,
-                        im.item_category_id as category_id,
-                        im.description
-                    FROM item_variant iv
-                    JOIN item_master im ON iv.item_id = im.item_id
-                    JOIN color_master cm ON iv.color_id = cm.color_id
-                    JOIN size_master sm ON iv.size_id = sm.size_id
-                    LEFT JOIN model_master mm ON im.model_id = mm.model_id
-                    LEFT JOIN item_brand_master ibm ON im.item_brand_id = ibm.item_brand_id
-                    LEFT JOIN item_category_master icm ON im.item_category_id = icm.item_category_id
-                    WHERE iv.deleted_at IS NULL
-                      AND im.deleted_at IS NULL
-                      {search_condition}
-                    ORDER BY im.name, cm.color_name, sm.size_name
-                    LIMIT %s OFFSET %s
-                """
-                cur.execute(data_query, params + [per_page, offset])
-                items = []
-                for row in cur.fetchall():
-                    items.append(
-                        {
-                            "id": row["id"],
-                            "item_id": row["item_id"],
-                            "name": row["name"],
-                            "item_name": row["item_name"],
-                            "color": row["color"],
-                            "size": row["size"],
-                            "quantity": row["quantity"] or 0,
-                            "unit": row["unit"] or "pcs",
-                            "model": row["model"],
-                            "brand": row["brand"],
-                            "unit_price": float(row["unit_price"] or 0),
-                            "reorder_level": row["reorder_level"] or 5,
-                            "category": row["category"],
-                            "category_id": row["category_id"],
-                            "description": row["description"],
-                        }
-                    )
+            offset = (page - 1) * per_page
+            count = count_mode(
+                request.args.get("count"),
+                "none" if cursor is not None else "exact",
+            )
+            try:
+                after = decode_cursor(cursor)["k"] if cursor else None
+            except (ValueError, KeyError):
+                return jsonify({"error": "Invalid cursor"}), 400
 
-                return (
-                    jsonify(
-                        {
-                            "items": items,
-                            "page": page,
-                            "per_page": per_page,
-                            "total": total,
-                        }
-                    ),
-                    200,
-                )
+            # Optional trigram-indexed, ranked search
+            search = VariantSearchService.build_filter(
+                cur,
+                search_term,
+                variant_alias="vr",
+                fallback_columns=SELECT2_SEARCH_COLUMNS,
+            )
+            keys = _variant_page_keys(search_term)
 
-            # fallback: no pagination requested — return the full list (backwards compatible)
-            cur.execute(
-                """
+            ranked_query = f"""
                 SELECT
-                    iv.variant_id as id,
-                    iv.item_id,
-                    im.name || ' - ' || cm.color_name || ' - ' || sm.size_name as name,
-                    im.name as item_name,
-                    cm.color_name as color,
-                    sm.size_name as size,
-                    iv.opening_stock as quantity,
-                    iv.unit,
-                    COALESCE(mm.model_name, 'N/A') as model,
-                    COALESCE(ibm.item_brand_name, 'N/A') as brand,
+                    vr.variant_id as id,
+                    vr.item_id,
+                    vr.display_name as name,
+                    vr.item_name,
+                    vr.color_name as color,
+                    vr.size_name as size,
+                    vr.opening_stock as quantity,
+                    vr.unit,
+                    COALESCE(vr.model_name, 'N/A') as model,
+                    COALESCE(vr.brand_name, 'N/A') as brand,
                     0.00 as unit_price,
-                    iv.threshold as reorder_level,
-                    COALESCE(icm.item_category_name, 'N/A') as category,
-                    im.item_category_id as category_id,
-                    im.description
-                FROM item_variant iv
-                JOIN item_master im ON iv.item_id = im.item_id
-                JOIN color_master cm ON iv.color_id = cm.color_id
-                JOIN size_master sm ON iv.size_id = sm.size_id
-                LEFT JOIN model_master mm ON im.model_id = mm.model_id
-                LEFT JOIN item_brand_master ibm ON im.item_brand_id = ibm.item_brand_id
-                LEFT JOIN item_category_master icm ON im.item_category_id = icm.item_category_id
-                WHERE iv.deleted_at IS NULL
-                  AND im.deleted_at IS NULL
-                ORDER BY im.name, cm.color_name, sm.size_name
-                """
+                    vr.threshold as reorder_level,
+                    COALESCE(vr.category_name, 'N/A') as category,
+                    vr.category_id,
+                    vr.description,
+                    {search['rank']} as search_rank
+                FROM {VariantReadModel.source(cur)} vr
+                {search['join']}
+                WHERE NOT vr.is_deleted
+                  AND {search['condition']}
+            """
+            ranked_params = search["rank_params"] + search["params"]
+            total = count_rows(cur, count, ranked_query, ranked_params)
+
+            page_condition, page_params = "TRUE", []
+            if after is not None:
+                page_condition, page_params = keyset_condition(keys, after)
+                offset = 0
+            cur.execute(
+                f"""
+                SELECT * FROM ({ranked_query}) ranked
+                WHERE {page_condition}
+                ORDER BY {order_by(keys)}
+                LIMIT %s OFFSET %s
+                """,
+                ranked_params + page_params + [per_page + 1, offset],
             )
-            variants = []
-            for row in cur.fetchall():
-                variants.append(
-                    {
-                        "id": row["id"],
-                        "item_id": row["item_id"],
-                        "name": row["name"],
-                        "item_name": row["item_name"],
-                        "color": row["color"],
-                        "size": row["size"],
-                        "quantity": row["quantity"] or 0,
-                        "unit": row["unit"] or "pcs",
-                        "model": row["model"],
-                        "brand": row["brand"],
-                        "unit_price": float(row["unit_price"] or 0),
-                        "reorder_level": row["reorder_level"] or 5,
-                        "category": row["category"],
-                        "category_id": row["category_id"],
-                        "description": row["description"],
-                    }
-                )
-            return jsonify(variants), 200
+            rows = cur.fetchall()
+            next_cursor = None
+            if len(rows) > per_page:
+                rows = rows[:per_page]
+                next_cursor = _variant_cursor(rows[-1], keys)
+            items = [_variant_listing_item(row) for row in rows]
+
+            response = {
+                "items": items,
+                "per_page": per_page,
+                "next_cursor": next_cursor,
+            }
+            if cursor is None:
+                response["page"] = page
+            if total is not None:
+                response["total"] = total
+                response["total_is_estimate"] = count == "estimate"
+            return jsonify(response), 200
     except Exception as e:
         current_app.logger.error(f"Error fetching all variants: {e}")
         import traceback
@@ -1642,107 +1876,126 @@ def get_variants_select2():
         - q: search term (optional)
         - page: page number (default 1)
         - page_size: items per page (default 30)
+        - cursor: next_cursor of the previous page (replaces page)
     """
     try:
         search_term = request.args.get("q", "").strip()
         page = int(request.args.get("page", 1))
         page_size = int(request.args.get("page_size", 30))
         offset = (page - 1) * page_size
+        cursor = request.args.get("cursor")
+        try:
+            position = decode_cursor(cursor) if cursor else {}
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        if "o" in position:
+            offset = position["o"]
+        after = position.get("k")
+
+        # Served from the in-process index when it is loaded and has matches;
+        # its pages continue by offset
+        index = get_variant_autocomplete_index()
+        hit = None
+        if index and after is None:
+            hit = index.search(search_term, offset, page_size)
+        if hit is not None:
+            rows, more = hit
+            return (
+                jsonify(
+                    {
+                        "results": [_select2_variant_result(r) for r in rows],
+                        "pagination": {
+                            "more": more,
+                            "next_cursor": (
+                                encode_offset_cursor(offset + page_size)
+                                if more
+                                else None
+                            ),
+                        },
+                    }
+                ),
+                200,
+            )
 
         with database.get_conn(cursor_factory=psycopg2.extras.DictCursor) as (
             conn,
             cur,
         ):
-            # Build search condition
-            search_condition = ""
-            params = []
-            if search_term:
-                search_condition = """
-                    AND (
-                        LOWER(im.name) LIKE LOWER(%s) OR
-                        LOWER(cm.color_name) LIKE LOWER(%s) OR
-                        LOWER(sm.size_name) LIKE LOWER(%s) OR
-                        LOWER(mm.model_name) LIKE LOWER(%s) OR
-                        LOWER(ibm.item_brand_name) LIKE LOWER(%s)
-                    )
-                """
-                search_pattern = f"%{search_term}%"
-                params = [search_pattern] * 5
+            # Trigram-indexed, ranked search (LIKE scan on unmigrated databases)
+            search = VariantSearchService.build_filter(
+                cur,
+                search_term,
+                variant_alias="vr",
+                fallback_columns=SELECT2_SEARCH_COLUMNS,
+            )
+            keys = _variant_page_keys(search_term)
 
-            # Get total count
-            count_query = f"""
-                SELECT COUNT(*) as total
-                FROM item_variant iv
-                JOIN item_master im ON iv.item_id = im.item_id
-                JOIN color_master cm ON iv.color_id = cm.color_id
-                JOIN size_master sm ON iv.size_id = sm.size_id
-                LEFT JOIN model_master mm ON im.model_id = mm.model_id
-                LEFT JOIN item_brand_master ibm ON im.item_brand_id = ibm.item_brand_id
-                WHERE iv.deleted_at IS NULL
-                  AND im.deleted_at IS NULL
-                  {search_condition}
-            """
-            cur.execute(count_query, params)
-            total = cur.fetchone()["total"]
+            # Stock indicators use available-to-promise when reservations exist
+            cur.execute("SELECT to_regclass('variant_stock_availability')")
+            if cur.fetchone()[0]:
+                atp_column = "vsa.available_to_promise"
+                atp_join = "LEFT JOIN variant_stock_availability vsa ON vsa.variant_id = vr.variant_id"
+            else:
+                atp_column = "vr.opening_stock"
+                atp_join = ""
 
-            # Get paginated results
-            data_query = f"""
+            ranked_query = f"""
                 SELECT
-                    iv.variant_id as id,
-                    im.name || ' - ' || cm.color_name || ' - ' || sm.size_name as text,
-                    im.name as item_name,
-                    cm.color_name as color,
-                    sm.size_name as size,
-                    iv.opening_stock as quantity,
-                    iv.unit,
-                    COALESCE(mm.model_name, 'N/A') as model,
-                    COALESCE(ibm.item_brand_name, 'N/A') as brand,
-                    iv.threshold as reorder_level
-                FROM item_variant iv
-                JOIN item_master im ON iv.item_id = im.item_id
-                JOIN color_master cm ON iv.color_id = cm.color_id
-                JOIN size_master sm ON iv.size_id = sm.size_id
-                LEFT JOIN model_master mm ON im.model_id = mm.model_id
-                LEFT JOIN item_brand_master ibm ON im.item_brand_id = ibm.item_brand_id
-                WHERE iv.deleted_at IS NULL
-                  AND im.deleted_at IS NULL
-                  {search_condition}
-                ORDER BY im.name, cm.color_name, sm.size_name
-                LIMIT %s OFFSET %s
+                    vr.variant_id as id,
+                    vr.display_name as text,
+                    vr.item_name,
+                    vr.color_name as color,
+                    vr.size_name as size,
+                    vr.opening_stock as quantity,
+                    vr.unit,
+                    COALESCE(vr.model_name, 'N/A') as model,
+                    COALESCE(vr.brand_name, 'N/A') as brand,
+                    vr.threshold as reorder_level,
+                    {atp_column} as available,
+                    {search['rank']} as search_rank
+                FROM {VariantReadModel.source(cur)} vr
+                {search['join']}
+                {atp_join}
+                WHERE NOT vr.is_deleted
+                  AND {search['condition']}
             """
-            cur.execute(data_query, params + [page_size, offset])
+            page_condition, page_params = "TRUE", []
+            if after is not None:
+                page_condition, page_params = keyset_condition(keys, after)
+                offset = 0
+            # One extra row answers "more" without counting every match
+            cur.execute(
+                f"""
+                SELECT * FROM ({ranked_query}) ranked
+                WHERE {page_condition}
+                ORDER BY {order_by(keys)}
+                LIMIT %s OFFSET %s
+                """,
+                search["rank_params"]
+                + search["params"]
+                + page_params
+                + [page_size + 1, offset],
+            )
+            rows = cur.fetchall()
+            more = len(rows) > page_size
+            rows = rows[:page_size]
 
-            results = []
-            for row in cur.fetchall():
-                # Add stock indicator to the text
-                stock_info = ""
-                qty = row["quantity"] or 0
-                reorder = row["reorder_level"] or 0
-                if qty == 0:
-                    stock_info = " 🔴"
-                elif qty <= reorder:
-                    stock_info = " 🟡"
-                else:
-                    stock_info = " 🟢"
-
-                results.append(
+            results = [_select2_variant_result(row) for row in rows]
+
+            return (
+                jsonify(
                     {
-                        "id": row["id"],
-                        "text": row["text"] + stock_info,
-                        "item_name": row["item_name"],
-                        "color": row["color"],
-                        "size": row["size"],
-                        "quantity": qty,
-                        "unit": row["unit"] or "pcs",
-                        "model": row["model"],
-                        "brand": row["brand"],
-                        "reorder_level": reorder,
+                        "results": results,
+                        "pagination": {
+                            "more": more,
+                            "next_cursor": (
+                                _variant_cursor(rows[-1], keys) if more else None
+                            ),
+                        },
                     }
-                )
-
-            more = (offset + page_size) < total
-
-            return jsonify({"results": results, "pagination": {"more": more}}), 200
+                ),
+                200,
+            )
 
     except Exception as e:
         current_app.logger.error(f"Error fetching variants for select2: {e}")
@@ -1761,14 +2014,9 @@ def search_variants():
             cur,
         ):
             cur.execute(
-                """
-                SELECT iv.variant_id, im.name as item_name, mm.model_name, vm.variation_name, cm.color_name, sm.size_name, im.description
-                FROM item_variant iv
-                JOIN item_master im ON iv.item_id = im.item_id
-                LEFT JOIN model_master mm ON im.model_id = mm.model_id
-                LEFT JOIN variation_master vm ON im.variation_id = vm.variation_id
-                JOIN color_master cm ON iv.color_id = cm.color_id
-                JOIN size_master sm ON iv.size_id = sm.size_id
+                f"""
+                SELECT vr.variant_id, vr.item_name, vr.model_name, vr.variation_name, vr.color_name, vr.size_name, vr.description
+                FROM {VariantReadModel.source(cur)} vr
                 ORDER BY item_name, model_name, variation_name, color_name, size_name
                 """
             )
@@ -1820,69 +2068,95 @@ def get_variant_rate():
         current_app.logger.error(f"Error fetching variant rate: {e}")
         return jsonify({"error": "Failed to fetch rate"}), 500
 
-        @api_bp.route("/variant-ledger")
-        @login_required
-        def variant_ledger():
-            """Return received-stock records for a variant across suppliers for rate comparison.
-            Query params:
-              - variant_id (required)
-              - supplier_id (optional)
-              - start_date, end_date (optional)
-              - page, per_page (pagination)
-            """
-            variant_id = request.args.get("variant_id")
-            if not variant_id:
-                return jsonify({"error": "variant_id is required"}), 400
-            supplier_id = request.args.get("supplier_id")
-            start_date = request.args.get("start_date")
-            end_date = request.args.get("end_date")
-            page = int(request.args.get("page", 1))
-            per_page = int(request.args.get("per_page", 50))
-            offset = (page - 1) * per_page
 
-            try:
-                with database.get_conn(cursor_factory=psycopg2.extras.DictCursor) as (
-                    conn,
-                    cur,
-                ):
-                    base_where = "se.variant_id = %s"
-                    params = [int(variant_id)]
-                    if supplier_id:
-                        base_where += " AND sr.supplier_id = %s"
-                        params.append(int(supplier_id))
-                    if start_date:
-                        base_where += " AND se.entry_date >= %s"
-                        params.append(start_date)
-                    if end_date:
-                        base_where += " AND se.entry_date <= %s"
-                        params.append(end_date)
-
-                    count_q = f"SELECT COUNT(*) FROM stock_entries se JOIN stock_receipts sr ON se.receipt_id = sr.receipt_id WHERE {base_where}"
-                    cur.execute(count_q, tuple(params))
-                    total = cur.fetchone()[0]
-
-                    query = f"""
-                        SELECT se.entry_date, sr.receipt_id, sr.receipt_number, sr.bill_number, sr.supplier_id, s.firm_name as supplier_name,
-                               se.variant_id, im.name as item_name, se.quantity_added as qty, se.cost_per_unit,
-                               COALESCE(sir.rate, NULL) as supplier_current_rate
-                        FROM stock_entries se
-                        JOIN stock_receipts sr ON se.receipt_id = sr.receipt_id
-                        JOIN suppliers s ON sr.supplier_id = s.supplier_id
-                        JOIN item_variant iv ON se.variant_id = iv.variant_id
-                        JOIN item_master im ON iv.item_id = im.item_id
-                        LEFT JOIN supplier_item_rates sir ON sir.item_id = iv.item_id AND sir.supplier_id = sr.supplier_id
-                        WHERE {base_where}
-                        ORDER BY se.entry_date DESC
-                        LIMIT %s OFFSET %s
-                    """
-                    cur.execute(query, tuple(params + [per_page, offset]))
-                    rows = [dict(r) for r in cur.fetchall()]
-                return jsonify(
-                    {"items": rows, "total": total, "page": page, "per_page": per_page}
+@api_bp.route("/variant-ledger")
+@login_required
+def variant_ledger():
+    """Return received-stock records for a variant across suppliers for rate comparison.
+    Query params:
+      - variant_id (required)
+      - supplier_id (optional)
+      - start_date, end_date (optional)
+      - page, per_page (pagination)
+      - cursor: next_cursor of the previous page (empty for the first page)
+      - count: none | estimate | exact (default exact by page, none by cursor)
+    """
+    variant_id = request.args.get("variant_id")
+    if not variant_id:
+        return jsonify({"error": "variant_id is required"}), 400
+    supplier_id = request.args.get("supplier_id")
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+    page = int(request.args.get("page", 1))
+    per_page = int(request.args.get("per_page", 50))
+    offset = (page - 1) * per_page
+    cursor = request.args.get("cursor")
+    count = count_mode(
+        request.args.get("count"), "none" if cursor is not None else "exact"
+    )
+    try:
+        after = decode_cursor(cursor)["k"] if cursor else None
+    except (ValueError, KeyError):
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    try:
+        with database.get_conn(cursor_factory=psycopg2.extras.DictCursor) as (
+            conn,
+            cur,
+        ):
+            keys = STOCK_ENTRY_SORT_KEYS
+            base_where = "se.variant_id = %s"
+            params = [int(variant_id)]
+            if supplier_id:
+                base_where += " AND sr.supplier_id = %s"
+                params.append(int(supplier_id))
+            if start_date:
+                base_where += " AND se.entry_date >= %s"
+                params.append(start_date)
+            if end_date:
+                base_where += " AND se.entry_date <= %s"
+                params.append(end_date)
+
+            total = count_rows(
+                cur,
+                count,
+                f"SELECT 1 FROM stock_entries se JOIN stock_receipts sr ON se.receipt_id = sr.receipt_id WHERE {base_where}",
+                params,
+            )
+
+            page_where, page_params = base_where, list(params)
+            if after is not None:
+                condition, cursor_params = keyset_condition(keys, after)
+                page_where += " AND " + condition
+                page_params += cursor_params
+                offset = 0
+            query = f"""
+                SELECT se.entry_date, se.entry_id, sr.receipt_id, sr.receipt_number, sr.bill_number, sr.supplier_id, s.firm_name as supplier_name,
+                       se.variant_id, vr.item_name, se.quantity_added as qty, se.cost_per_unit,
+                       COALESCE(sir.rate, NULL) as supplier_current_rate
+                FROM stock_entries se
+                JOIN stock_receipts sr ON se.receipt_id = sr.receipt_id
+                JOIN suppliers s ON sr.supplier_id = s.supplier_id
+                JOIN {VariantReadModel.source(cur)} vr ON vr.variant_id = se.variant_id
+                LEFT JOIN supplier_item_rates sir ON sir.item_id = vr.item_id AND sir.supplier_id = sr.supplier_id
+                WHERE {page_where}
+                ORDER BY {order_by(keys)}
+                LIMIT %s OFFSET %s
+            """
+            cur.execute(query, tuple(page_params + [per_page + 1, offset]))
+            rows = [dict(r) for r in cur.fetchall()]
+            next_cursor = None
+            if len(rows) > per_page:
+                rows = rows[:per_page]
+                next_cursor = encode_cursor(
+                    [rows[-1]["entry_date"], rows[-1]["entry_id"]]
                 )
-            except Exception as e:
-                current_app.logger.error(f"Error fetching variant ledger: {e}")
-                return jsonify({"error": "Failed to fetch variant ledger"}), 500
+        return jsonify(
+            _ledger_page(rows, total, count, page, per_page, cursor, next_cursor)
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error fetching variant ledger: {e}")
+        return jsonify({"error": "Failed to fetch variant ledger"}), 500
 
 
 @api_bp.route("/items/<int:item_id>", methods=["PUT"])
@@ -2005,6 +2279,7 @@ def update_item(item_id):
             cur.execute(update_query, tuple(values))
             conn.commit()
 
+            StockLedgerService.tag(cur, StockLedgerService.ITEM_EDIT, item_id)
             changed_variants = json.loads(data.get("variants", "{}"))
             for v in changed_variants.get("added", []):
                 color_id = get_master_id_with_cache(
@@ -2060,6 +2335,7 @@ def update_item(item_id):
                         (deleted_ids,),
                     )
             conn.commit()
+            _item_data_changed()
             cur.execute(
                 """
                 SELECT i.item_id, i.name, mm.model_name as model, vm.variation_name as variation, i.description, i.image_path,
@@ -2158,6 +2434,7 @@ def bulk_delete_items():
         with database.get_conn() as (conn, cur):
             cur.execute("DELETE FROM item_master WHERE item_id = ANY(%s)", (item_ids,))
             conn.commit()
+        _item_data_changed()
         return jsonify({"message": f"{len(item_ids)} items deleted successfully."}), 200
     except Exception as e:
         current_app.logger.error(f"Error bulk deleting items: {e}")
@@ -2172,6 +2449,7 @@ def delete_item(item_id):
         with database.get_conn() as (conn, cur):
             cur.execute("DELETE FROM item_master WHERE item_id = %s", (item_id,))
             conn.commit()
+        _item_data_changed()
         return "", 204
     except Exception as e:
         current_app.logger.error(f"Error deleting item {item_id}: {e}")
@@ -2191,6 +2469,7 @@ def update_variant_stock(variant_id):
         )
     try:
         with database.get_conn() as (conn, cur):
+            StockLedgerService.tag(cur, StockLedgerService.MANUAL_ADJUSTMENT)
             cur.execute(
                 "UPDATE item_variant SET opening_stock = %s WHERE variant_id = %s RETURNING item_id, opening_stock, threshold",
                 (int(new_stock), variant_id),
@@ -2230,6 +2509,64 @@ def update_variant_stock(variant_id):
         return jsonify({"error": "Database error"}), 500
 
 
+def _parse_as_of(value):
+    """ISO date or datetime; a bare date means the end of that day."""
+    if len(value) == 10:
+        return datetime.combine(date.fromisoformat(value), time.max)
+    return datetime.fromisoformat(value)
+
+
+@api_bp.route("/variants/<int:variant_id>/stock-movements")
+@login_required
+def get_variant_stock_movements(variant_id):
+    try:
+        since = request.args.get("since")
+        until = request.args.get("until")
+        since = _parse_as_of(since) if since else None
+        until = _parse_as_of(until) if until else None
+        limit = min(max(request.args.get("limit", 100, type=int), 1), 1000)
+    except ValueError:
+        return jsonify({"error": "Invalid date"}), 400
+    try:
+        movements = StockLedgerService.movements(variant_id, since, until, limit)
+        return jsonify(movements)
+    except Exception as e:
+        current_app.logger.error(
+            f"Error fetching stock movements for variant {variant_id}: {e}"
+        )
+        return jsonify({"error": "Database error"}), 500
+
+
+@api_bp.route("/stock/as-of")
+@login_required
+def get_stock_as_of():
+    """Balances of ?variant_ids=1,2,3 at ?date=YYYY-MM-DD[THH:MM:SS]."""
+    try:
+        as_of = _parse_as_of(request.args.get("date", ""))
+        variant_ids = [
+            int(v) for v in request.args.get("variant_ids", "").split(",") if v.strip()
+        ]
+    except ValueError:
+        return jsonify({"error": "A valid date and variant_ids are required"}), 400
+    if not variant_ids:
+        return jsonify({"error": "A valid date and variant_ids are required"}), 400
+    if len(variant_ids) > 1000:
+        return jsonify({"error": "At most 1000 variants per request"}), 400
+    try:
+        balances = StockLedgerService.stock_as_of(variant_ids, as_of)
+        if balances is None:
+            return jsonify({"error": "Stock ledger is not available"}), 503
+        return jsonify(
+            {
+                "as_of": as_of.isoformat(),
+                "balances": {str(k): v for k, v in balances.items()},
+            }
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error fetching stock as of {as_of}: {e}")
+        return jsonify({"error": "Database error"}), 500
+
+
 @api_bp.route("/variants/<int:variant_id>/threshold", methods=["PUT"])
 @login_required
 def update_variant_threshold(variant_id):
@@ -2279,6 +2616,7 @@ def add_variant(item_id):
             size_id = get_or_create_master_id(
                 cur, data["size"], "size_master", "size_id", "size_name"
             )
+            StockLedgerService.tag(cur, StockLedgerService.ITEM_EDIT, item_id)
             cur.execute(
                 "INSERT INTO item_variant (item_id, color_id, size_id, opening_stock, threshold, unit) VALUES (%s, %s, %s, %s, %s, %s) RETURNING variant_id",
                 (
@@ -2326,6 +2664,7 @@ def update_variant(variant_id):
             size_id = get_or_create_master_id(
                 cur, data["size"], "size_master", "size_id", "size_name"
             )
+            StockLedgerService.tag(cur, StockLedgerService.MANUAL_ADJUSTMENT)
             cur.execute(
                 "UPDATE item_variant SET color_id = %s, size_id = %s, opening_stock = %s, threshold = %s, unit = %s WHERE variant_id = %s",
                 (
@@ -2354,99 +2693,220 @@ def update_variant(variant_id):
         return jsonify({"error": "Failed to update variant"}), 500
 
 
+def _iter_low_stock_report():
+    """Yield the low-stock report rows, fetched in batches."""
+    with database.get_conn() as (conn, cur):
+        stream = conn.cursor(
+            name="low_stock_report", cursor_factory=psycopg2.extras.RealDictCursor
+        )
+        stream.itersize = ALL_VARIANTS_STREAM_BATCH
+        try:
+            stream.execute(LowStockService.report_query(cur))
+            for row in stream:
+                yield dict(row)
+        finally:
+            stream.close()
+
+
+def _iter_low_stock_report_json():
+    """Yield the low-stock report rows as Postgres-rendered JSON."""
+    with database.get_conn() as (conn, cur):
+        yield from iter_json_rows(
+            conn,
+            LowStockService.report_query(cur),
+            batch_size=ALL_VARIANTS_STREAM_BATCH,
+        )
+
+
 @api_bp.route("/low-stock-report")
 @login_required
 def get_low_stock_report():
+    """Live low-stock variants, streamed from a server-side cursor."""
     try:
-        with database.get_conn(cursor_factory=psycopg2.extras.DictCursor) as (
-            conn,
-            cur,
-        ):
-            cur.execute(
-                """
-                SELECT im.name as item_name, mm.model_name, vm.variation_name, cm.color_name, sm.size_name, iv.opening_stock, iv.threshold
-                FROM item_variant iv
-                JOIN item_master im ON iv.item_id = im.item_id
-                LEFT JOIN model_master mm ON im.model_id = mm.model_id
-                LEFT JOIN variation_master vm ON im.variation_id = vm.variation_id
-                JOIN color_master cm ON iv.color_id = cm.color_id
-                JOIN size_master sm ON iv.size_id = sm.size_id
-                WHERE iv.opening_stock <= iv.threshold
-                ORDER BY im.name, cm.color_name, sm.size_name
-                """
-            )
-            report_data = [dict(row) for row in cur.fetchall()]
-        return jsonify(report_data)
+        passthrough = passthrough_enabled()
+        rows = (
+            _iter_low_stock_report_json() if passthrough else _iter_low_stock_report()
+        )
+        first = next(rows, None)  # runs the query; errors still get a 500
+        return stream_json_array(
+            itertools.chain([] if first is None else [first], rows),
+            raw=passthrough,
+        )
     except Exception as e:
         current_app.logger.error(f"Error generating low stock report: {e}")
         return jsonify({"error": "Failed to generate low stock report"}), 500
 
 
+@api_bp.route("/low-stock-summary")
+@login_required
+def get_low_stock_summary():
+    """Count of live low-stock variants and the version of that set."""
+    try:
+        with database.get_conn() as (conn, cur):
+            return jsonify(LowStockService.summary(cur))
+    except Exception as e:
+        current_app.logger.error(f"Error reading low stock summary: {e}")
+        return jsonify({"error": "Failed to read low stock summary"}), 500
+
+
+def _export_owner(name):
+    """Owner restriction for the current user (PermissionError if refused)."""
+    return ExportService.owner_scope(
+        name, getattr(current_user, "id", None), current_user.role == "admin"
+    )
+
+
+def _export_response(name, filename):
+    """
+    Stream an export as CSV. Query params: columns (comma-separated),
+    gzip=1, and the export's filters. Non-admins only get their own rows of
+    per-user exports.
+    """
+    try:
+        owner_id = _export_owner(name)
+    except PermissionError:
+        return jsonify({"error": "Insufficient permissions"}), 403
+    columns = [
+        c.strip() for c in request.args.get("columns", "").split(",") if c.strip()
+    ]
+    compress = request.args.get("gzip", "").lower() in ("1", "true", "yes")
+    try:
+        body = ExportService.stream_csv(
+            name,
+            columns or None,
+            request.args.to_dict(),
+            compress=compress,
+            owner_id=owner_id,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if compress:
+        response = Response(body, mimetype="application/gzip")
+        filename += ".gz"
+    else:
+        response = Response(body, mimetype="text/csv")
+    response.headers.set("Content-Disposition", "attachment", filename=filename)
+    return response
+
+
 @api_bp.route("/inventory/export/csv")
 @login_required
 def export_inventory_csv():
+    return _export_response("inventory", "inventory.csv")
+
+
+@api_bp.route("/exports/audit_log.csv")
+@login_required
+@role_required("admin")
+def export_audit_log_csv():
+    return _export_response("audit_log", "audit_log.csv")
+
+
+@api_bp.route("/exports/<name>.csv")
+@login_required
+def export_csv(name):
+    if name not in EXPORTS or name == "audit_log":
+        return jsonify({"error": "Unknown export"}), 404
+    return _export_response(name, f"{name}.csv")
+
+
+def _can_read_export(job):
+    return current_user.role == "admin" or job["user_id"] == getattr(
+        current_user, "id", None
+    )
+
+
+@api_bp.route("/exports/jobs", methods=["POST"])
+@login_required
+def create_export_job():
+    """
+    Queue a file export (xlsx, parquet or csv) for background processing.
+
+    JSON body: export, format, optional columns (list) and filters (object).
+    Returns 202 with the export_id; poll the status URL, then download.
+    """
+    data = request.get_json(silent=True) or {}
+    name = data.get("export")
+    fmt = data.get("format", "xlsx")
+    columns = data.get("columns") or None
+    filters = data.get("filters") or {}
+    if name not in EXPORTS:
+        return jsonify({"error": "Unknown export"}), 404
     try:
-        with database.get_conn(cursor_factory=psycopg2.extras.DictCursor) as (
-            conn,
-            cur,
-        ):
-            cur.execute(
-                """
-                SELECT i.name as item_name, mm.model_name, vm.variation_name, cm.color_name, sm.size_name, iv.opening_stock, iv.threshold, iv.unit
-                FROM item_variant iv
-                JOIN item_master i ON iv.item_id = i.item_id
-                LEFT JOIN model_master mm ON i.model_id = mm.model_id
-                LEFT JOIN variation_master vm ON i.variation_id = vm.variation_id
-                JOIN color_master cm ON iv.color_id = cm.color_id
-                JOIN size_master sm ON iv.size_id = sm.size_id
-                ORDER BY item_name, model_name, variation_name, color_name, size_name
-                """
-            )
-            inventory_data = cur.fetchall()
-
-            def generate():
-                data = StringIO()
-                writer = csv.writer(data)
-                writer.writerow(
-                    [
-                        "Item Name",
-                        "Model",
-                        "Variation",
-                        "Color",
-                        "Size",
-                        "Stock",
-                        "Threshold",
-                        "Unit",
-                    ]
-                )
-                yield data.getvalue()
-                data.seek(0)
-                data.truncate(0)
-                for row in inventory_data:
-                    writer.writerow(
-                        [
-                            row["item_name"],
-                            row["model_name"],
-                            row["variation_name"],
-                            row["color_name"],
-                            row["size_name"],
-                            row["opening_stock"],
-                            row["threshold"],
-                            row["unit"],
-                        ]
-                    )
-                    yield data.getvalue()
-                    data.seek(0)
-                    data.truncate(0)
+        owner_id = _export_owner(name)
+    except PermissionError:
+        return jsonify({"error": "Insufficient permissions"}), 403
+    if fmt not in ExportService.available_formats():
+        return jsonify({"error": f"Unsupported export format: {fmt}"}), 400
+    if not isinstance(filters, dict) or (
+        columns is not None and not isinstance(columns, list)
+    ):
+        return jsonify({"error": "columns must be a list, filters an object"}), 400
+    try:
+        ExportService.prepare(name, columns, filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-            response = Response(generate(), mimetype="text/csv")
-            response.headers.set(
-                "Content-Disposition", "attachment", filename="inventory.csv"
-            )
-            return response
+    try:
+        export_id = queue_export_job(
+            getattr(current_user, "id", None),
+            name,
+            fmt,
+            columns,
+            filters,
+            owner_id=owner_id,
+        )
+        ensure_export_worker(
+            current_app.config["EXPORT_DIR"],
+            current_app.config["EXPORT_RETENTION_HOURS"],
+        )
     except Exception as e:
-        current_app.logger.error(f"Error exporting inventory to CSV: {e}")
-        return jsonify({"error": "Failed to export inventory"}), 500
+        current_app.logger.error(f"Error queueing export job: {e}")
+        return jsonify({"error": "Failed to queue export"}), 500
+    return (
+        jsonify(
+            {
+                "export_id": export_id,
+                "status": "pending",
+                "status_url": url_for("api.get_export_job_status", export_id=export_id),
+            }
+        ),
+        202,
+    )
+
+
+@api_bp.route("/exports/jobs/<uuid:export_id>")
+@login_required
+def get_export_job_status(export_id):
+    job = get_export_job(str(export_id))
+    if not job or not _can_read_export(job):
+        return jsonify({"error": "Export not found"}), 404
+    job.pop("file_path", None)
+    if job["status"] == "completed":
+        job["download_url"] = url_for(
+            "api.download_export_job", export_id=job["export_id"]
+        )
+    return jsonify(job)
+
+
+@api_bp.route("/exports/jobs/<uuid:export_id>/download")
+@login_required
+def download_export_job(export_id):
+    job = get_export_job(str(export_id))
+    if not job or not _can_read_export(job):
+        return jsonify({"error": "Export not found"}), 404
+    if job["status"] != "completed" or not os.path.exists(job["file_path"] or ""):
+        return (
+            jsonify({"error": "Export is not ready", "status": job["status"]}),
+            409,
+        )
+    extension, mimetype = FILE_FORMATS[job["format"]]
+    return send_file(
+        job["file_path"],
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=f"{job['export_name']}.{extension}",
+    )
 
 
 @api_bp.route("/imports", methods=["POST"])
@@ -2602,6 +3062,7 @@ def import_commit():
             cur.execute(
                 "LOCK TABLE item_master, color_master, size_master, item_variant IN EXCLUSIVE MODE"
             )
+            StockLedgerService.tag(cur, StockLedgerService.IMPORT)
             for idx, row_data in enumerate(import_data, 1):
                 mapped_row = {mappings.get(k, k): v for k, v in row_data.items()}
                 item_name = str(mapped_row.get("Item", "")).strip()
@@ -284,7 +284,7 @@ def duplicate_subprocess(subprocess_id):
 @subprocess_api_bp.route("/subprocess/search", methods=["GET"])
 @login_required
 def search_subprocesses():
-    """Search subprocesses by name/description."""
+    """Full-text search of subprocesses by name/description (ranked, highlighted)."""
     try:
         query = request.args.get("q", "")
         subprocess_type = request.args.get("type")
@@ -295,36 +295,8 @@ def search_subprocesses():
                 "validation_error", "Search query must be at least 2 characters", 400
             )
 
-        from database import get_conn
-        from psycopg2.extras import RealDictCursor
-
-        type_filter = ""
-        params = [f"%{query}%", f"%{query}%"]
-
-        if subprocess_type:
-            type_filter = "AND category = %s"
-            params.append(subprocess_type)
-
-        params.append(limit)
-
-        with get_conn(cursor_factory=RealDictCursor) as (conn, cur):
-            cur.execute(
-                f"""
-                SELECT
-                    id, name, description, category, estimated_time_minutes,
-                    created_at, updated_at
-                FROM subprocesses
-                WHERE is_deleted = FALSE
-                    AND (name ILIKE %s OR description ILIKE %s)
-                    {type_filter}
-                ORDER BY name
-                LIMIT %s
-            """,
-                params,
-            )
-            results = cur.fetchall()
-
-        return APIResponse.success([dict(row) for row in results])
+        results = SubprocessService.search_subprocesses(query, subprocess_type, limit)
+        return APIResponse.success(results)
 
     except Exception as e:
         current_app.logger.error(f"Error searching subprocesses: {e}")
@@ -747,6 +747,60 @@ def check_variant_availability(item_id):
         return APIResponse.error("internal_error", str(e), 500)
 
 
+MAX_AVAILABILITY_BATCH = 1000
+
+
+@variant_api_bp.route("/variants/availability", methods=["POST"])
+@login_required
+def check_variants_availability():
+    """
+    Check availability for many variants at once.
+
+    Body: {"items": [{"variant_id": 1, "quantity": 5}, ...]} or
+    {"variant_ids": [1, 2], "quantity": 1}. Quantities for repeated ids
+    are summed.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        if "items" in data:
+            items = [
+                (int(i["variant_id"]), float(i.get("quantity", 1)))
+                for i in data["items"]
+            ]
+        else:
+            quantity = float(data.get("quantity", 1))
+            items = [(int(v), quantity) for v in data.get("variant_ids") or []]
+    except (TypeError, ValueError, KeyError):
+        return APIResponse.error(
+            "validation_error", "variant_id and quantity must be numeric", 400
+        )
+
+    if not items:
+        return APIResponse.error("validation_error", "No variants given", 400)
+    if len(items) > MAX_AVAILABILITY_BATCH:
+        return APIResponse.error(
+            "validation_error",
+            f"At most {MAX_AVAILABILITY_BATCH} variants per request",
+            400,
+        )
+
+    requirements = {}
+    for variant_id, quantity in items:
+        requirements[variant_id] = requirements.get(variant_id, 0) + quantity
+
+    try:
+        results = VariantService.check_variants_availability(requirements)
+        return APIResponse.success(
+            {
+                "results": results,
+                "all_available": all(r["available"] for r in results),
+            }
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error checking batch availability: {e}")
+        return APIResponse.error("internal_error", str(e), 500)
+
+
 @variant_api_bp.route("/supplier/<int:supplier_id>/variants", methods=["GET"])
 @login_required
 def get_supplier_variants(supplier_id):
@@ -23,6 +23,8 @@ from werkzeug.utils import secure_filename
 
 from .. import validate_password
 from ..utils import role_required, validate_upload
+from ..services.metrics_snapshot_service import MetricsSnapshotService
+from ..services.stock_ledger_service import StockLedgerService
 from ..services.subprocess_service import SubprocessService
 
 main_bp = Blueprint("main", __name__)
@@ -53,29 +55,17 @@ def favicon():
 @login_required
 def dashboard():
     try:
-        with database.get_conn(cursor_factory=psycopg2.extras.DictCursor) as (
-            conn,
-            cur,
-        ):
-            cur.execute("SELECT SUM(opening_stock) FROM item_variant")
-            total_stock = cur.fetchone()[0] or 0
-            cur.execute(
-                "SELECT COUNT(*) FROM item_variant WHERE opening_stock <= threshold"
-            )
-            low_stock_items = cur.fetchone()[0] or 0
-            cur.execute("SELECT COUNT(*) FROM suppliers")
-            total_suppliers = cur.fetchone()[0] or 0
-        metrics = {
-            "total_stock": int(total_stock),
-            "low_stock_items": low_stock_items,
-            "total_suppliers": total_suppliers,
-        }
+        snapshot = MetricsSnapshotService.get(
+            "dashboard", float(current_app.config.get("METRICS_SNAPSHOT_TTL", 0))
+        )
+        metrics = dict(snapshot["metrics"], refreshed_at=snapshot["refreshed_at"])
     except Exception as e:
         current_app.logger.error(f"Error fetching dashboard metrics: {e}")
         metrics = {
             "total_stock": "N/A",
             "low_stock_items": "N/A",
             "total_suppliers": "N/A",
+            "refreshed_at": None,
         }
     return render_template("dashboard_new.html", metrics=metrics)
 
@@ -126,6 +116,7 @@ def add_item():
                 from ..utils import get_or_create_master_id, get_or_create_item_master_id
 
                 item_id = get_or_create_item_master_id(cur, item_name, model, variation, description)
+                StockLedgerService.tag(cur, StockLedgerService.ITEM_EDIT, item_id)
 
                 # Update image path if uploaded
                 if image_path:
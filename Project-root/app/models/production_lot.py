@@ -207,6 +207,17 @@ def generate_lot_number(prefix: str = "LOT") -> str:
     return f"{prefix}-{timestamp}"
 
 
+def generate_lot_number_block(count: int, prefix: str = "LOT", start: int = 1) -> List[str]:
+    """
+    Allocate ``count`` consecutive lot numbers sharing one timestamp.
+
+    Format: PREFIX-YYYYMMDD-HHMMSS-NNN
+    Example: LOT-20251104-143022-001, LOT-20251104-143022-002
+    """
+    base = generate_lot_number(prefix)
+    return [f"{base}-{n:03d}" for n in range(start, start + count)]
+
+
 def validate_lot_selections(
     substitute_groups: List[Dict[str, Any]], selections: List[Dict[str, Any]]
 ) -> tuple[bool, Optional[str]]:
@@ -3,9 +3,13 @@ Services package for business logic and operations.
 """
 
 from .background_worker import (
+    BackgroundExportWorker,
     BackgroundImportWorker,
+    ensure_export_worker,
     get_background_worker,
+    get_export_job,
     init_background_worker,
+    queue_export_job,
     queue_import_job,
     stop_background_worker,
 )
@@ -37,4 +41,8 @@ __all__ = [
     "get_background_worker",
     "stop_background_worker",
     "queue_import_job",
+    "BackgroundExportWorker",
+    "ensure_export_worker",
+    "queue_export_job",
+    "get_export_job",
 ]
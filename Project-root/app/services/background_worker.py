@@ -1,9 +1,10 @@
 """
-Background job processor for large import operations.
+Background job processor for large import and export operations.
 
 This module provides a simple background job processing system for imports
-that exceed the synchronous processing threshold. Jobs are queued in the
-database and processed by a worker thread.
+that exceed the synchronous processing threshold, and for file exports
+(XLSX, Parquet, CSV) that are downloaded once ready. Jobs are queued in the
+database and processed by worker threads.
 
 Features:
 - Database-backed job queue (no external dependencies like Celery required)
@@ -14,13 +15,17 @@ Features:
 """
 
 import logging
+import os
 import threading
 import time
+import uuid
 from typing import Any, Dict, List, Optional
 
 import psycopg2
+import psycopg2.extras
 from database import get_conn
 
+from app.services.export_service import FILE_FORMATS, ExportService
 from app.services.import_service import ImportService
 from app.services.progress_tracker import get_progress_tracker
 
@@ -400,6 +405,8 @@ def stop_background_worker() -> None:
     """
     if _global_worker:
         _global_worker.stop()
+    if _export_worker:
+        _export_worker.stop()
 
 
 def queue_import_job(
@@ -446,3 +453,308 @@ def queue_import_job(
             f"Queued import job {job_id} for user {user_id} ({total_rows} rows)"
         )
         return job_id
+
+
+class BackgroundExportWorker:
+    """
+    Worker for building queued file exports.
+
+    Polls export_jobs for pending jobs and writes each export to
+    ``export_dir`` with ExportService.write_file. Several processes may run
+    a worker: jobs are claimed with SKIP LOCKED, and a worker holds an
+    advisory lock on its job while writing it. Every few minutes a worker
+    also does housekeeping:
+
+    - a processing job whose lock is free lost its worker; it is queued
+      again, or failed after ``max_attempts`` claims
+    - finished jobs older than ``retention_hours`` are deleted with their
+      files, as are leftover files in ``export_dir``
+    """
+
+    # Advisory lock namespace for jobs being written (second key: job id)
+    LOCK_NAMESPACE = "export_jobs"
+
+    def __init__(
+        self,
+        export_dir: str,
+        poll_interval: int = 2,
+        retention_hours: float = 24,
+        max_attempts: int = 3,
+        housekeeping_interval: int = 300,
+        claim_grace: int = 60,
+    ):
+        self.export_dir = export_dir
+        self.poll_interval = poll_interval
+        self.retention_hours = retention_hours
+        self.max_attempts = max_attempts
+        self.housekeeping_interval = housekeeping_interval
+        # Seconds between claiming a job and taking its lock
+        self.claim_grace = claim_grace
+        self.running = False
+        self.worker_thread: Optional[threading.Thread] = None
+        self._next_housekeeping = 0.0
+        self.logger = logger
+
+    def start(self) -> None:
+        if self.running:
+            return
+        os.makedirs(self.export_dir, exist_ok=True)
+        self.running = True
+        self.worker_thread = threading.Thread(
+            target=self._worker_loop, name="export-worker", daemon=True
+        )
+        self.worker_thread.start()
+        self.logger.info("Background export worker started")
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self.running = False
+        if self.worker_thread:
+            self.worker_thread.join(timeout=10)
+        self.logger.info("Background export worker stopped")
+
+    def _worker_loop(self) -> None:
+        while self.running:
+            try:
+                if time.monotonic() >= self._next_housekeeping:
+                    self._next_housekeeping = (
+                        time.monotonic() + self.housekeeping_interval
+                    )
+                    self.recover_stale_jobs()
+                    self.purge_expired()
+                job = self._get_next_job()
+                if job:
+                    self._process_job(job)
+                else:
+                    time.sleep(self.poll_interval)
+            except Exception as e:
+                self.logger.error(f"Error in export worker loop: {e}")
+                time.sleep(self.poll_interval)
+
+    def _get_next_job(self) -> Optional[Dict[str, Any]]:
+        with get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (conn, cur):
+            cur.execute(
+                """
+                UPDATE export_jobs
+                SET status = 'processing', started_at = NOW(),
+                    attempts = attempts + 1
+                WHERE id = (
+                    SELECT id FROM export_jobs
+                    WHERE status = 'pending'
+                    ORDER BY created_at
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, export_id, export_name, format, columns, filters,
+                          owner_id;
+                """
+            )
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+    def _process_job(self, job: Dict[str, Any]) -> None:
+        # The session lock marks the job as alive until this returns or the
+        # process dies with its connection
+        with get_conn() as (lock_conn, lock_cur):
+            lock_cur.execute(
+                "SELECT pg_advisory_lock(hashtext(%s), %s)",
+                (self.LOCK_NAMESPACE, job["id"]),
+            )
+            try:
+                self._write_job(job)
+            finally:
+                lock_cur.execute(
+                    "SELECT pg_advisory_unlock(hashtext(%s), %s)",
+                    (self.LOCK_NAMESPACE, job["id"]),
+                )
+
+    def _write_job(self, job: Dict[str, Any]) -> None:
+        extension = FILE_FORMATS[job["format"]][0]
+        path = os.path.join(self.export_dir, f"{job['export_id']}.{extension}")
+        partial = path + ".part"
+        try:
+            rows = ExportService.write_file(
+                job["export_name"],
+                job["format"],
+                partial,
+                columns=job["columns"],
+                filters=job["filters"],
+                owner_id=job.get("owner_id"),
+            )
+            os.replace(partial, path)
+            with get_conn() as (conn, cur):
+                cur.execute(
+                    """
+                    UPDATE export_jobs
+                    SET status = 'completed', file_path = %s, row_count = %s,
+                        file_size = %s, completed_at = NOW()
+                    WHERE id = %s;
+                    """,
+                    (path, rows, os.path.getsize(path), job["id"]),
+                )
+            self.logger.info(f"Export job {job['export_id']} completed: {rows} rows")
+        except Exception as e:
+            self.logger.error(f"Export job {job['export_id']} failed: {e}")
+            if os.path.exists(partial):
+                os.remove(partial)
+            try:
+                with get_conn() as (conn, cur):
+                    cur.execute(
+                        """
+                        UPDATE export_jobs
+                        SET status = 'failed', error_message = %s,
+                            completed_at = NOW()
+                        WHERE id = %s;
+                        """,
+                        (str(e), job["id"]),
+                    )
+            except Exception as mark_error:
+                self.logger.error(f"Failed to mark export job failed: {mark_error}")
+
+    def recover_stale_jobs(self) -> int:
+        """
+        Requeue processing jobs whose worker is gone (their advisory lock is
+        free); fail those already claimed ``max_attempts`` times.
+
+        Returns:
+            Number of jobs recovered
+        """
+        with get_conn() as (conn, cur):
+            cur.execute(
+                """
+                UPDATE export_jobs
+                SET status = CASE WHEN attempts >= %(max_attempts)s
+                                  THEN 'failed' ELSE 'pending' END,
+                    error_message = CASE WHEN attempts >= %(max_attempts)s
+                                  THEN 'Export worker stopped while processing'
+                                  END,
+                    completed_at = CASE WHEN attempts >= %(max_attempts)s
+                                  THEN NOW() END,
+                    started_at = NULL
+                WHERE status = 'processing'
+                  AND started_at < NOW() - %(grace)s * INTERVAL '1 second'
+                  AND pg_try_advisory_xact_lock(hashtext(%(namespace)s), id)
+                RETURNING export_id, status;
+                """,
+                {
+                    "max_attempts": self.max_attempts,
+                    "grace": self.claim_grace,
+                    "namespace": self.LOCK_NAMESPACE,
+                },
+            )
+            recovered = cur.fetchall()
+        for export_id, status in recovered:
+            self.logger.warning(f"Export job {export_id} lost its worker: {status}")
+        return len(recovered)
+
+    def purge_expired(self) -> int:
+        """
+        Delete finished jobs older than the retention period, their files,
+        and any other file in ``export_dir`` (abandoned partial files) as old.
+
+        Returns:
+            Number of files removed
+        """
+        with get_conn() as (conn, cur):
+            cur.execute(
+                """
+                DELETE FROM export_jobs
+                WHERE status IN ('completed', 'failed')
+                  AND completed_at < NOW() - %s * INTERVAL '1 hour'
+                RETURNING file_path;
+                """,
+                (self.retention_hours,),
+            )
+            paths = {row[0] for row in cur.fetchall() if row[0]}
+
+        cutoff = time.time() - self.retention_hours * 3600
+        with os.scandir(self.export_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    paths.add(entry.path)
+        removed = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        if removed:
+            self.logger.info(f"Removed {removed} expired export file(s)")
+        return removed
+
+
+_export_worker: Optional[BackgroundExportWorker] = None
+_export_worker_lock = threading.Lock()
+
+
+def ensure_export_worker(
+    export_dir: str, retention_hours: float = 24
+) -> BackgroundExportWorker:
+    """Start this process's export worker if it is not running yet."""
+    global _export_worker
+    with _export_worker_lock:
+        if _export_worker is None:
+            _export_worker = BackgroundExportWorker(
+                export_dir, retention_hours=retention_hours
+            )
+        _export_worker.start()
+        return _export_worker
+
+
+def queue_export_job(
+    user_id: Optional[int],
+    export_name: str,
+    fmt: str,
+    columns: Optional[List[str]],
+    filters: Dict[str, Any],
+    owner_id: Optional[int] = None,
+) -> str:
+    """
+    Queue a file export for background processing.
+
+    ``owner_id`` (from ExportService.owner_scope) limits a per-user export
+    to that user's rows when the job runs.
+
+    Returns:
+        export_id (UUID string)
+    """
+    export_id = str(uuid.uuid4())
+    with get_conn() as (conn, cur):
+        cur.execute(
+            """
+            INSERT INTO export_jobs
+                (export_id, user_id, export_name, format, columns, filters,
+                 owner_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s);
+            """,
+            (
+                export_id,
+                user_id,
+                export_name,
+                fmt,
+                psycopg2.extras.Json(columns) if columns else None,
+                psycopg2.extras.Json(filters),
+                owner_id,
+            ),
+        )
+    logger.info(f"Queued {fmt} export {export_id} ({export_name})")
+    return export_id
+
+
+def get_export_job(export_id: str) -> Optional[Dict[str, Any]]:
+    """Status of an export job, or None if unknown."""
+    with get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (conn, cur):
+        cur.execute(
+            """
+            SELECT export_id::text, user_id, export_name, format, status,
+                   file_path, row_count, file_size, error_message,
+                   created_at, started_at, completed_at
+            FROM export_jobs
+            WHERE export_id = %s;
+            """,
+            (export_id,),
+        )
+        row = cur.fetchone()
+        return dict(row) if row else None
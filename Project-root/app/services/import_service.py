@@ -21,6 +21,7 @@ from typing import Any, Dict, List, Optional
 
 from database import get_conn
 
+from app.services.stock_ledger_service import StockLedgerService
 from app.validators.import_validators import DataValidator
 
 # Configure logger
@@ -617,6 +618,8 @@ class ImportService:
             RETURNING variant_id
         """
 
+        # Per row: a failed row's rollback also drops the tag
+        StockLedgerService.tag(cur, StockLedgerService.IMPORT)
         cur.execute(query, (item_id, color_id, size_id, opening_stock, threshold, unit))
         result = cur.fetchone()
         return result[0]
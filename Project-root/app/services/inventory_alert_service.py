@@ -10,13 +10,37 @@ All methods return simple Python dicts ready for JSON serialization.
 """
 
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import date
 import database
 import psycopg2.extras
 
+from .stock_reservation_service import StockReservationService
+
 SEVERITY_ORDER = ["CRITICAL", "HIGH", "MEDIUM", "LOW", "OK"]
 
+# Thresholds used when a variant has no active alert rule
+DEFAULT_SAFETY_STOCK = 10
+DEFAULT_REORDER_POINT = 20
+
+
+def classify_stock_severity(
+    current_stock: int, required_quantity: int, safety_stock: int, reorder_point: int
+) -> Tuple[int, str]:
+    """Return (shortfall, severity) for a stock position; see evaluate_variant_stock."""
+    shortfall = max(0, required_quantity - current_stock)
+    if shortfall > 0 and shortfall >= reorder_point:
+        severity = "CRITICAL"
+    elif shortfall > 0 and shortfall >= safety_stock:
+        severity = "HIGH"
+    elif current_stock < safety_stock and shortfall == 0:
+        severity = "MEDIUM"
+    elif current_stock < reorder_point and current_stock >= safety_stock:
+        severity = "LOW"
+    else:
+        severity = "OK"
+    return shortfall, severity
+
 
 class InventoryAlertService:
     @staticmethod
@@ -116,9 +140,11 @@ class InventoryAlertService:
 
     @staticmethod
     def evaluate_variant_stock(
-        variant_id: int, required_quantity: int
+        variant_id: int, required_quantity: int, production_lot_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """Evaluate variant stock against its rule and return computed severity.
+        Stock is available-to-promise (on-hand minus reservations held by other
+        lots); reservations of ``production_lot_id`` itself are not deducted.
         Severity logic (simplified):
         - If shortfall > 0 and shortfall >= reorder_point -> CRITICAL
         - Else if shortfall > 0 and shortfall >= safety_stock -> HIGH
@@ -130,38 +156,27 @@ class InventoryAlertService:
             conn,
             cur,
         ):
-            cur.execute(
-                "SELECT opening_stock FROM item_variant WHERE variant_id = %s",
-                (variant_id,),
+            stock = StockReservationService.get_availability(
+                [variant_id], exclude_lot_id=production_lot_id, cur=cur
             )
-            row = cur.fetchone()
-            if not row:
+            if variant_id not in stock:
                 return {"variant_id": variant_id, "error": "Variant not found"}
-            current_stock = int(row["opening_stock"] or 0)
+            current_stock = int(stock[variant_id]["available_to_promise"])
             cur.execute(
                 "SELECT * FROM inventory_alert_rules WHERE variant_id = %s AND is_active = TRUE",
                 (variant_id,),
             )
             rule = cur.fetchone()
             if not rule:
-                # Default thresholds
-                safety_stock = 10
-                reorder_point = 20
+                safety_stock = DEFAULT_SAFETY_STOCK
+                reorder_point = DEFAULT_REORDER_POINT
             else:
                 safety_stock = int(rule["safety_stock_quantity"])
                 reorder_point = int(rule["reorder_point_quantity"])
 
-            shortfall = max(0, required_quantity - current_stock)
-            if shortfall > 0 and shortfall >= reorder_point:
-                severity = "CRITICAL"
-            elif shortfall > 0 and shortfall >= safety_stock:
-                severity = "HIGH"
-            elif current_stock < safety_stock and shortfall == 0:
-                severity = "MEDIUM"
-            elif current_stock < reorder_point and current_stock >= safety_stock:
-                severity = "LOW"
-            else:
-                severity = "OK"
+            shortfall, severity = classify_stock_severity(
+                current_stock, required_quantity, safety_stock, reorder_point
+            )
             return {
                 "variant_id": variant_id,
                 "current_stock": current_stock,
@@ -177,7 +192,7 @@ class InventoryAlertService:
         production_lot_id: int, variant_id: int, required_quantity: int
     ) -> Dict[str, Any]:
         eval_result = InventoryAlertService.evaluate_variant_stock(
-            variant_id, required_quantity
+            variant_id, required_quantity, production_lot_id
         )
         if eval_result.get("error"):
             return eval_result
@@ -320,7 +335,7 @@ class InventoryAlertService:
         for u in usages:
             req_qty = int((u["quantity"] or 0) * (lot["quantity"] or 0))
             eval_res = InventoryAlertService.evaluate_variant_stock(
-                u["variant_id"], req_qty
+                u["variant_id"], req_qty, production_lot_id
             )
             # Normalize to planned output shape
             results.append(
@@ -376,6 +391,174 @@ class InventoryAlertService:
             conn.commit()
         return created_ids
 
+    @staticmethod
+    def check_inventory_levels_for_production_lots(
+        production_lot_ids: List[int], cur=None
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """Set-based check_inventory_levels_for_production_lot for many lots.
+
+        Lot structure, stock and alert rules are each read once for the whole
+        batch. Intended for freshly created lots, which hold no reservations.
+        Returns alert candidates keyed by lot id, in the single-lot shape.
+        """
+        lot_ids = sorted({int(i) for i in production_lot_ids})
+        if not lot_ids:
+            return {}
+        if cur is None:
+            with database.get_conn(
+                cursor_factory=psycopg2.extras.RealDictCursor
+            ) as (conn, cur):
+                return InventoryAlertService.check_inventory_levels_for_production_lots(
+                    lot_ids, cur
+                )
+
+        cur.execute(
+            """
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema()
+              AND table_name = 'variant_usage'
+              AND column_name = 'deleted_at'
+            """,
+        )
+        deleted_filter = " AND vu.deleted_at IS NULL" if cur.fetchone() else ""
+        cur.execute(
+            f"""
+            SELECT pl.id AS lot_id, vu.variant_id, vu.quantity AS usage_quantity,
+                   pl.quantity AS lot_quantity, iv.name AS variant_name
+            FROM production_lots pl
+            JOIN process_subprocesses ps ON ps.process_id = pl.process_id
+            JOIN variant_usage vu ON vu.process_subprocess_id = ps.id
+            LEFT JOIN item_variant iv ON iv.variant_id = vu.variant_id
+            WHERE pl.id = ANY(%s){deleted_filter}
+            ORDER BY pl.id, vu.id
+            """,
+            (lot_ids,),
+        )
+        usages = cur.fetchall()
+        variant_ids = {u["variant_id"] for u in usages}
+
+        stock = StockReservationService.get_availability(variant_ids, cur=cur)
+        rules: Dict[int, Dict[str, Any]] = {}
+        if variant_ids:
+            cur.execute(
+                """
+                SELECT variant_id, safety_stock_quantity, reorder_point_quantity
+                FROM inventory_alert_rules
+                WHERE variant_id = ANY(%s) AND is_active = TRUE
+                """,
+                (sorted(variant_ids),),
+            )
+            rules = {r["variant_id"]: r for r in cur.fetchall()}
+
+        results: Dict[int, List[Dict[str, Any]]] = {lot_id: [] for lot_id in lot_ids}
+        for u in usages:
+            variant_id = u["variant_id"]
+            req_qty = int((u["usage_quantity"] or 0) * (u["lot_quantity"] or 0))
+            current_stock = int(
+                (stock.get(variant_id) or {}).get("available_to_promise", 0)
+            )
+            rule = rules.get(variant_id)
+            shortfall, severity = classify_stock_severity(
+                current_stock,
+                req_qty,
+                int(rule["safety_stock_quantity"]) if rule else DEFAULT_SAFETY_STOCK,
+                int(rule["reorder_point_quantity"]) if rule else DEFAULT_REORDER_POINT,
+            )
+            results[u["lot_id"]].append(
+                {
+                    "item_variant_id": variant_id,
+                    "variant_name": u["variant_name"] or "Variant",
+                    "current_stock": current_stock,
+                    "required_quantity": req_qty,
+                    "alert_severity": severity,
+                    "shortfall_quantity": shortfall,
+                    "suggested_procurement_qty": shortfall,
+                    "lead_time_days": 0,
+                    "supplier_id": None,
+                    "supplier_name": None,
+                }
+            )
+        return results
+
+    @staticmethod
+    def create_alerts_for_production_lots(
+        alerts_by_lot: Dict[int, List[Dict[str, Any]]], cur
+    ) -> Dict[str, Dict[int, List[int]]]:
+        """Bulk-insert alerts and HIGH/CRITICAL procurement recommendations.
+
+        Runs on the caller's cursor so it shares the lot-creation transaction.
+        Returns {"alerts": {lot_id: [alert_id]}, "recommendations": {...}}.
+        """
+        alert_rows = []
+        rec_rows = []
+        for lot_id, alerts in alerts_by_lot.items():
+            for a in alerts:
+                alert_rows.append(
+                    (
+                        lot_id,
+                        int(a.get("item_variant_id")),
+                        a.get("alert_severity"),
+                        int(a.get("current_stock") or 0),
+                        int(a.get("required_quantity") or 0),
+                        int(a.get("shortfall_quantity") or 0),
+                        int(a.get("suggested_procurement_qty") or 0),
+                    )
+                )
+                if a.get("alert_severity") in ("HIGH", "CRITICAL"):
+                    rec_rows.append(
+                        (
+                            lot_id,
+                            int(a.get("item_variant_id")),
+                            int(a.get("shortfall_quantity") or 0),
+                        )
+                    )
+
+        created: Dict[str, Dict[int, List[int]]] = {
+            "alerts": {lot_id: [] for lot_id in alerts_by_lot},
+            "recommendations": {lot_id: [] for lot_id in alerts_by_lot},
+        }
+        if alert_rows:
+            rows = psycopg2.extras.execute_values(
+                cur,
+                """
+                INSERT INTO production_lot_inventory_alerts (
+                    production_lot_id, variant_id, alert_severity,
+                    current_stock_quantity, required_quantity, shortfall_quantity,
+                    suggested_procurement_quantity
+                ) VALUES %s
+                RETURNING production_lot_id, alert_id
+                """,
+                alert_rows,
+                page_size=500,
+                fetch=True,
+            )
+            for r in rows:
+                created["alerts"][int(r["production_lot_id"])].append(int(r["alert_id"]))
+        if rec_rows:
+            rows = psycopg2.extras.execute_values(
+                cur,
+                """
+                INSERT INTO production_lot_procurement_recommendations (
+                    production_lot_id, variant_id, supplier_id, recommended_quantity,
+                    required_delivery_date, procurement_status
+                )
+                SELECT v.lot_id, v.variant_id, NULL, v.qty,
+                       COALESCE(pl.created_at, CURRENT_DATE)::date + INTERVAL '7 days',
+                       'RECOMMENDED'
+                FROM (VALUES %s) AS v(lot_id, variant_id, qty)
+                JOIN production_lots pl ON pl.id = v.lot_id
+                RETURNING production_lot_id, recommendation_id
+                """,
+                rec_rows,
+                page_size=500,
+                fetch=True,
+            )
+            for r in rows:
+                created["recommendations"][int(r["production_lot_id"])].append(
+                    int(r["recommendation_id"])
+                )
+        return created
+
     @staticmethod
     def generate_procurement_recommendations(
         production_lot_id: int, alerts_list: List[Dict[str, Any]]
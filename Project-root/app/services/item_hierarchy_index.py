@@ -0,0 +1,99 @@
+"""
+Item Hierarchy Index.
+
+The add/edit item forms cascade item name -> model -> variation dropdowns
+(/item-names, /models-by-item, /variations-by-item-model). This index holds
+that hierarchy in memory, built from one ordered scan of item_master, and
+is cached per worker by MasterDataCache: item writes invalidate it and the
+item/model/variation version counters keep other workers current.
+
+Orderings follow the database collation: the scan ranks model and
+variation names in SQL and the index keeps those ranks.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .master_data_cache import MasterDataCache
+
+# Version counters the index is built from
+TABLES = ("item_master", "model_master", "variation_master")
+
+_Option = Tuple[int, int, str]  # (rank, id, name)
+
+
+def _options(entries: Dict[int, _Option]) -> List[Dict[str, Any]]:
+    return [{"id": i, "name": name} for _, i, name in sorted(entries.values())]
+
+
+class ItemHierarchyIndex:
+    """
+    Item name -> models -> variations, answered without database access.
+    """
+
+    __slots__ = ("names", "_models", "_variations", "_variations_by_model")
+
+    def __init__(self, rows):
+        """
+        Args:
+            rows: (name, model_id, model_name, model_rank, variation_id,
+                variation_name, variation_rank), ordered by name
+        """
+        self.names: List[str] = []
+        models: Dict[str, Dict[int, _Option]] = {}
+        variations: Dict[str, Dict[int, _Option]] = {}
+        by_model: Dict[Tuple[str, str], Dict[int, _Option]] = {}
+
+        for name, model_id, model_name, m_rank, var_id, var_name, v_rank in rows:
+            if name not in models:
+                self.names.append(name)
+                models[name] = {}
+                variations[name] = {}
+            if model_name:
+                models[name][model_id] = (m_rank, model_id, model_name)
+            if var_name:
+                option = (v_rank, var_id, var_name)
+                variations[name][var_id] = option
+                if model_name:
+                    by_model.setdefault((name, model_name), {})[var_id] = option
+
+        self._models = {k: _options(v) for k, v in models.items()}
+        self._variations = {k: _options(v) for k, v in variations.items()}
+        self._variations_by_model = {k: _options(v) for k, v in by_model.items()}
+
+    def models(self, item_name: str) -> List[Dict[str, Any]]:
+        return self._models.get(item_name, [])
+
+    def variations(
+        self, item_name: str, model_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        if model_name:
+            return self._variations_by_model.get((item_name, model_name), [])
+        return self._variations.get(item_name, [])
+
+    @staticmethod
+    def load(cur) -> "ItemHierarchyIndex":
+        cur.execute(
+            """
+            SELECT
+                im.name,
+                mm.model_id,
+                mm.model_name,
+                dense_rank() OVER (ORDER BY mm.model_name),
+                vm.variation_id,
+                vm.variation_name,
+                dense_rank() OVER (ORDER BY vm.variation_name)
+            FROM item_master im
+            LEFT JOIN model_master mm ON mm.model_id = im.model_id
+            LEFT JOIN variation_master vm ON vm.variation_id = im.variation_id
+            ORDER BY im.name
+            """
+        )
+        return ItemHierarchyIndex(cur.fetchall())
+
+    @staticmethod
+    def get(ttl: float) -> "ItemHierarchyIndex":
+        return MasterDataCache.get(
+            "item_hierarchy", TABLES, ItemHierarchyIndex.load, ttl
+        ).value
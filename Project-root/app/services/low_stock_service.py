@@ -0,0 +1,79 @@
+"""
+Low Stock Service.
+
+A variant is low on stock when its opening_stock is at or below its
+threshold. Comparing two columns cannot use an index, so
+``low_stock_summary`` holds the number of live low-stock variants and a
+version that changes whenever a variant enters or leaves the set, kept by
+triggers on item_variant (see migrations/migration_add_low_stock_index.py).
+Counting them is a single-row read; the report reads the read model's
+partial index.
+
+Without the migration the count is computed from item_variant.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from .variant_read_model import VariantReadModel
+
+# Columns of the low-stock report, in output order
+REPORT_COLUMNS = (
+    "item_name",
+    "model_name",
+    "variation_name",
+    "color_name",
+    "size_name",
+    "opening_stock",
+    "threshold",
+)
+
+
+class LowStockService:
+    """
+    Service for the low-stock count and report.
+    """
+
+    @staticmethod
+    def _summary_present(cur) -> bool:
+        cur.execute("SELECT to_regclass('low_stock_summary') IS NOT NULL")
+        return bool(cur.fetchone()[0])
+
+    @staticmethod
+    def summary(cur) -> Dict[str, Any]:
+        """
+        Number of live low-stock variants.
+
+        Returns:
+            {"count": int, "version": int or None}; version is None when
+            the count was computed without the maintained summary
+        """
+        if LowStockService._summary_present(cur):
+            cur.execute(
+                "SELECT variant_count, version FROM low_stock_summary WHERE id = 1"
+            )
+            row = cur.fetchone()
+            if row is not None:
+                return {"count": int(row[0]), "version": int(row[1])}
+        cur.execute(
+            """
+            SELECT COUNT(*) FROM item_variant
+            WHERE opening_stock <= threshold AND deleted_at IS NULL
+            """
+        )
+        return {"count": int(cur.fetchone()[0] or 0), "version": None}
+
+    @staticmethod
+    def report_query(cur) -> str:
+        """
+        Query for the low-stock report: live low-stock variants ordered by
+        item, color and size, served by the read model's partial index.
+        """
+        columns = ", ".join(f"vr.{c}" for c in REPORT_COLUMNS)
+        return f"""
+            SELECT {columns}
+            FROM {VariantReadModel.source(cur)} vr
+            WHERE vr.is_low_stock AND NOT vr.is_deleted
+            ORDER BY vr.item_name, vr.color_name, vr.size_name
+        """
@@ -0,0 +1,197 @@
+"""
+Master Data Cache.
+
+Colors, sizes, models and variations are small tables read by the master
+data page and every item form. Each worker keeps their lists (and the
+per-row dependency counts) in memory:
+
+- within ``MASTER_DATA_CACHE_TTL`` seconds an entry is served without
+  touching the database
+- after that, one lookup in ``master_data_versions`` (bumped by statement
+  triggers, see migrations/migration_add_master_data_versions.py) decides
+  whether the entry is still current, so writes by other workers, imports
+  or direct SQL are picked up within the TTL
+- the generated POST/PUT/DELETE routes (and item writes) invalidate the
+  entries built from the table they wrote to immediately
+
+Without the migration an entry is simply reloaded once its TTL expires.
+
+Each list carries an ETag (a hash of its content) for conditional GETs.
+
+Entries are rebuilt under a lock of their own, so a slow rebuild only
+holds up requests for the same entry. An entry whose tables are
+invalidated while it is being rebuilt is returned to its caller but not
+kept.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import database
+
+# master table -> (table referencing it, referencing column)
+DEPENDENCIES = {
+    "color_master": ("item_variant", "color_id"),
+    "size_master": ("item_variant", "size_id"),
+    "model_master": ("item_master", "model_id"),
+    "variation_master": ("item_master", "variation_id"),
+}
+
+
+class _Entry:
+    __slots__ = ("value", "tables", "version", "checked_at", "_etag")
+
+    def __init__(
+        self,
+        value: Any,
+        tables: Tuple[str, ...],
+        version: Optional[Tuple[int, ...]],
+    ):
+        self.value = value
+        self.tables = tables
+        self.version = version
+        self.checked_at = time.monotonic()
+        self._etag: Optional[str] = None
+
+    @property
+    def etag(self) -> str:
+        """Hash of the (JSON-serialisable) value, computed on first use."""
+        if self._etag is None:
+            payload = json.dumps(self.value, sort_keys=True, default=str).encode()
+            self._etag = hashlib.sha1(payload).hexdigest()
+        return self._etag
+
+
+class MasterDataCache:
+    """
+    Versioned per-worker cache of master data lists and dependency counts.
+    """
+
+    _entries: Dict[str, _Entry] = {}
+    # Guards the dicts below; never held while the database is queried
+    _lock = threading.Lock()
+    # key -> lock held while that entry is rebuilt
+    _key_locks: Dict[str, threading.Lock] = {}
+    # table -> number of invalidations, to spot ones racing a rebuild
+    _generations: Dict[str, int] = {}
+
+    @classmethod
+    def invalidate(cls, table_name: str) -> None:
+        """Drop cached data built from a table (after a write to it)."""
+        with cls._lock:
+            cls._generations[table_name] = cls._generations.get(table_name, 0) + 1
+            for key, entry in list(cls._entries.items()):
+                if table_name in entry.tables:
+                    del cls._entries[key]
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            for table in cls._generations:
+                cls._generations[table] += 1
+            cls._entries.clear()
+
+    @classmethod
+    def _generation(cls, tables: Tuple[str, ...]) -> Tuple[int, ...]:
+        return tuple(cls._generations.get(table, 0) for table in tables)
+
+    @staticmethod
+    def _db_version(cur, tables: Tuple[str, ...]) -> Optional[Tuple[int, ...]]:
+        cur.execute("SELECT to_regclass('master_data_versions') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            return None
+        cur.execute(
+            "SELECT table_name, version FROM master_data_versions"
+            " WHERE table_name = ANY(%s)",
+            (list(tables),),
+        )
+        versions = dict(cur.fetchall())
+        return tuple(versions.get(table, 0) for table in tables)
+
+    @classmethod
+    def get(
+        cls,
+        key: str,
+        tables: Tuple[str, ...],
+        loader: Callable[[Any], Any],
+        ttl: float,
+    ) -> _Entry:
+        """
+        Cached result of ``loader(cur)``, built from ``tables``.
+
+        Returns:
+            Entry with ``value`` and ``etag``
+        """
+        entry = cls._entries.get(key)
+        if entry is not None and time.monotonic() - entry.checked_at < ttl:
+            return entry
+
+        with cls._lock:
+            key_lock = cls._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with cls._lock:
+                # Another thread may have refreshed it while we waited
+                entry = cls._entries.get(key)
+                if entry is not None and time.monotonic() - entry.checked_at < ttl:
+                    return entry
+                generation = cls._generation(tables)
+
+            with database.get_conn() as (conn, cur):
+                version = MasterDataCache._db_version(cur, tables)
+                if (
+                    entry is not None
+                    and version is not None
+                    and version == entry.version
+                ):
+                    entry.checked_at = time.monotonic()
+                    return entry
+                value = loader(cur)
+
+            entry = _Entry(value, tables, version)
+            with cls._lock:
+                # A write invalidated the tables mid-rebuild: the value may
+                # predate it, so serve it once without caching it
+                if cls._generation(tables) == generation:
+                    cls._entries[key] = entry
+            return entry
+
+    @classmethod
+    def get_list(
+        cls, table_name: str, id_col: str, name_col: str, ttl: float
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Rows of a master table as ``[{"id", "name"}]`` ordered by name.
+
+        Returns:
+            (rows, etag)
+        """
+
+        # Identifiers come from the fixed route registrations, not user input
+        def load(cur):
+            cur.execute(
+                f"SELECT {id_col}, {name_col} FROM {table_name} ORDER BY {name_col}"
+            )
+            return [{"id": row[0], "name": row[1]} for row in cur.fetchall()]
+
+        entry = cls.get(f"list:{table_name}", (table_name,), load, ttl)
+        return entry.value, entry.etag
+
+    @classmethod
+    def dependency_count(cls, table_name: str, row_id: int, ttl: float) -> int:
+        """Number of rows referencing ``row_id`` of a master table."""
+        dependent_table, column = DEPENDENCIES[table_name]
+
+        def load(cur):
+            cur.execute(
+                f"SELECT {column}, COUNT(*) FROM {dependent_table} GROUP BY {column}"
+            )
+            return {row[0]: row[1] for row in cur.fetchall()}
+
+        entry = cls.get(f"deps:{table_name}", (dependent_table, table_name), load, ttl)
+        return entry.value.get(row_id, 0)
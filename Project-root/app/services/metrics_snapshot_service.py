@@ -0,0 +1,222 @@
+"""
+Metrics Snapshot Service.
+
+The dashboard counters (total stock, low-stock variants, suppliers) and the
+UPF report metrics aggregate whole tables. Rather than computing them on
+every page view, each set is stored as a row of ``metrics_snapshots``
+(see migrations/migration_add_metrics_snapshots.py) with the time it was
+computed:
+
+- a snapshot younger than its TTL is served as stored
+- once it is older, the first worker to take its advisory lock recomputes
+  it; the others keep serving the stored row until the new one commits
+- each worker also keeps the snapshot in memory for the rest of its TTL,
+  so rendering a page usually does not touch the database at all
+
+Without the migration the metrics are computed per worker and held in
+memory for the TTL.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Tuple
+
+import database
+import psycopg2.extras
+
+from .low_stock_service import LowStockService
+
+logger = logging.getLogger(__name__)
+
+
+def _pct_change(current: float, previous: float) -> float:
+    if not previous:
+        return 0.0
+    return round((current - previous) / previous * 100.0, 2)
+
+
+def _dashboard_metrics(cur) -> Dict[str, Any]:
+    cur.execute("SELECT COALESCE(SUM(opening_stock), 0) FROM item_variant")
+    total_stock = int(cur.fetchone()[0])
+    low_stock_items = LowStockService.summary(cur)["count"]
+    cur.execute("SELECT COUNT(*) FROM suppliers")
+    total_suppliers = int(cur.fetchone()[0])
+    return {
+        "total_stock": total_stock,
+        "low_stock_items": low_stock_items,
+        "total_suppliers": total_suppliers,
+    }
+
+
+def _upf_metrics(cur) -> Dict[str, Any]:
+    cur.execute(
+        """
+        SELECT
+            COUNT(*) FILTER (WHERE p.deleted_at IS NULL) AS total_processes,
+            AVG(p.worst_case_cost) FILTER (WHERE p.deleted_at IS NULL) AS avg_cost,
+            COUNT(pl.id) AS total_lots,
+            COUNT(pl.id) FILTER (WHERE pl.status = 'completed') AS completed_lots
+        FROM processes p
+        LEFT JOIN production_lots pl ON pl.process_id = p.id;
+        """
+    )
+    total_processes, avg_cost, total_lots, completed_lots = cur.fetchone()
+    metrics = {
+        "total_processes": int(total_processes or 0),
+        "total_lots": int(total_lots or 0),
+        "avg_cost": float(avg_cost or 0.0),
+        "completed_lots": int(completed_lots or 0),
+        "processes_change": 0.0,
+        "lots_change": 0.0,
+        "cost_change": 0.0,
+        "completed_change": 0.0,
+    }
+
+    # Last 30 days against the 30 before; zero if created_at is unusable.
+    # The savepoint keeps a failure here from aborting the snapshot.
+    cur.execute("SAVEPOINT metrics_change")
+    try:
+        cur.execute(
+            """
+            SELECT
+                COUNT(*) FILTER (WHERE p.created_at >= NOW() - INTERVAL '30 days'),
+                COUNT(*) FILTER (WHERE p.created_at < NOW() - INTERVAL '30 days'
+                                   AND p.created_at >= NOW() - INTERVAL '60 days'),
+                AVG(p.worst_case_cost)
+                    FILTER (WHERE p.created_at >= NOW() - INTERVAL '30 days'),
+                AVG(p.worst_case_cost)
+                    FILTER (WHERE p.created_at < NOW() - INTERVAL '30 days'
+                              AND p.created_at >= NOW() - INTERVAL '60 days')
+            FROM processes p
+            WHERE p.deleted_at IS NULL
+              AND p.created_at >= NOW() - INTERVAL '60 days';
+            """
+        )
+        proc_recent, proc_prev, cost_recent, cost_prev = cur.fetchone()
+        cur.execute(
+            """
+            SELECT
+                COUNT(*) FILTER (WHERE pl.created_at >= NOW() - INTERVAL '30 days'),
+                COUNT(*) FILTER (WHERE pl.created_at < NOW() - INTERVAL '30 days'),
+                COUNT(*) FILTER (WHERE pl.status = 'completed'
+                                   AND pl.created_at >= NOW() - INTERVAL '30 days'),
+                COUNT(*) FILTER (WHERE pl.status = 'completed'
+                                   AND pl.created_at < NOW() - INTERVAL '30 days')
+            FROM production_lots pl
+            WHERE pl.created_at >= NOW() - INTERVAL '60 days';
+            """
+        )
+        lots_recent, lots_prev, completed_recent, completed_prev = cur.fetchone()
+        cur.execute("RELEASE SAVEPOINT metrics_change")
+    except Exception as e:
+        cur.execute("ROLLBACK TO SAVEPOINT metrics_change")
+        logger.warning(f"Change metric calculation failed; defaulting to 0: {e}")
+        return metrics
+
+    metrics.update(
+        processes_change=_pct_change(proc_recent or 0, proc_prev or 0),
+        lots_change=_pct_change(lots_recent or 0, lots_prev or 0),
+        cost_change=_pct_change(float(cost_recent or 0), float(cost_prev or 0)),
+        completed_change=_pct_change(completed_recent or 0, completed_prev or 0),
+    )
+    return metrics
+
+
+# snapshot name -> function computing its metrics from a cursor
+SNAPSHOTS: Dict[str, Callable[[Any], Dict[str, Any]]] = {
+    "dashboard": _dashboard_metrics,
+    "upf": _upf_metrics,
+}
+
+
+class MetricsSnapshotService:
+    """
+    TTL-refreshed metric snapshots shared by all workers.
+    """
+
+    # name -> (monotonic expiry, snapshot)
+    _snapshots: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._snapshots.clear()
+
+    @classmethod
+    def get(cls, name: str, ttl: float) -> Dict[str, Any]:
+        """
+        Metrics of a snapshot at most ``ttl`` seconds old (or older while
+        another worker is refreshing it).
+
+        Returns:
+            {"metrics": {...}, "refreshed_at": datetime}
+
+        Raises:
+            KeyError: Unknown snapshot
+        """
+        cached = cls._snapshots.get(name)
+        if cached is not None and time.monotonic() < cached[0]:
+            return cached[1]
+
+        with cls._lock:
+            # Another thread may have refreshed it while we waited
+            cached = cls._snapshots.get(name)
+            if cached is not None and time.monotonic() < cached[0]:
+                return cached[1]
+
+            with database.get_conn() as (conn, cur):
+                snapshot, fresh_for = MetricsSnapshotService._load(cur, name, ttl)
+            cls._snapshots[name] = (time.monotonic() + fresh_for, snapshot)
+            return snapshot
+
+    @staticmethod
+    def _snapshots_present(cur) -> bool:
+        cur.execute("SELECT to_regclass('metrics_snapshots') IS NOT NULL")
+        return bool(cur.fetchone()[0])
+
+    @staticmethod
+    def _load(cur, name: str, ttl: float) -> Tuple[Dict[str, Any], float]:
+        """The current snapshot and how many more seconds it is fresh for."""
+        compute = SNAPSHOTS[name]
+        if not MetricsSnapshotService._snapshots_present(cur):
+            metrics = compute(cur)
+            return {"metrics": metrics, "refreshed_at": datetime.now(timezone.utc)}, ttl
+
+        cur.execute(
+            """
+            SELECT payload, refreshed_at,
+                   EXTRACT(EPOCH FROM NOW() - refreshed_at)::float8 AS age
+            FROM metrics_snapshots
+            WHERE name = %s
+            """,
+            (name,),
+        )
+        row = cur.fetchone()
+        if row is not None and row[2] < ttl:
+            return {"metrics": row[0], "refreshed_at": row[1]}, ttl - row[2]
+
+        # Stale: one worker recomputes, the others serve the stored row
+        cur.execute(
+            "SELECT pg_try_advisory_xact_lock(hashtext(%s))",
+            (f"metrics_snapshots:{name}",),
+        )
+        if not cur.fetchone()[0] and row is not None:
+            return {"metrics": row[0], "refreshed_at": row[1]}, 0.0
+
+        metrics = compute(cur)
+        cur.execute(
+            """
+            INSERT INTO metrics_snapshots (name, payload, refreshed_at)
+            VALUES (%s, %s, NOW())
+            ON CONFLICT (name) DO UPDATE
+            SET payload = EXCLUDED.payload, refreshed_at = EXCLUDED.refreshed_at
+            RETURNING refreshed_at
+            """,
+            (name, psycopg2.extras.Json(metrics)),
+        )
+        return {"metrics": metrics, "refreshed_at": cur.fetchone()[0]}, ttl
@@ -0,0 +1,237 @@
+"""
+Material Requirements Planning (MRP) Service.
+
+Answers "what do we need to buy for everything currently planned" in one run:
+
+1. explode every open production lot (fixed variant_usage plus the lot's
+   OR-group selections) into gross requirements per variant
+2. net gross requirements against on-hand stock, open purchase order
+   quantities and safety stock
+3. pick a supplier per variant and consolidate the order lines per supplier
+
+Explosion, aggregation and netting run as a single set-based statement, so
+cost is one round-trip regardless of how many lots are open.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import database
+import psycopg2.extras
+
+from .stock_reservation_service import StockReservationService
+
+# Lots in these states no longer need material
+CLOSED_LOT_STATUSES = ("completed", "cancelled", "finalized", "failed")
+
+# Purchase orders in these states contribute no further incoming stock
+CLOSED_PO_STATUSES = ("Completed", "Cancelled")
+
+
+class MaterialRequirementsService:
+    """
+    Service computing consolidated, netted procurement needs across lots.
+    """
+
+    @staticmethod
+    def _table_exists(cur, table_name: str) -> bool:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL AS present", (table_name,))
+        return bool(cur.fetchone()["present"])
+
+    @staticmethod
+    def calculate_requirements(
+        lot_ids: Optional[Iterable[int]] = None, include_draft_pos: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Run MRP netting across open production lots.
+
+        Args:
+            lot_ids: Restrict the run to these lots (default: all open lots)
+            include_draft_pos: Count Draft purchase orders as incoming supply
+
+        Returns:
+            Dict with per-variant ``requirements`` and per-supplier
+            ``suppliers`` recommendations
+        """
+        lot_filter = ""
+        params: List[Any] = [list(CLOSED_LOT_STATUSES)]
+        if lot_ids is not None:
+            lot_filter = "AND pl.id = ANY(%s)"
+            params.append(sorted({int(i) for i in lot_ids}))
+
+        closed_pos = list(CLOSED_PO_STATUSES)
+        if not include_draft_pos:
+            closed_pos.append("Draft")
+
+        with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
+            conn,
+            cur,
+        ):
+            explode_sql = StockReservationService.explode_lots_sql(cur)
+
+            if MaterialRequirementsService._table_exists(cur, "inventory_alert_rules"):
+                safety_sql = """
+                    SELECT DISTINCT ON (variant_id) variant_id, safety_stock_quantity
+                    FROM inventory_alert_rules
+                    WHERE is_active = TRUE
+                    ORDER BY variant_id, updated_at DESC NULLS LAST
+                """
+            else:
+                safety_sql = "SELECT NULL::int AS variant_id, 0 AS safety_stock_quantity WHERE FALSE"
+
+            if MaterialRequirementsService._table_exists(cur, "variant_supplier_pricing"):
+                # Cheapest active price per variant, newest first on ties
+                supplier_sql = """
+                    SELECT DISTINCT ON (vsp.variant_id)
+                        vsp.variant_id, vsp.supplier_id,
+                        vsp.cost_per_unit AS unit_cost,
+                        COALESCE(vsp.minimum_order_qty, 1) AS minimum_order_qty
+                    FROM variant_supplier_pricing vsp
+                    JOIN gross g ON g.variant_id = vsp.variant_id
+                    WHERE vsp.is_active = TRUE
+                      AND (vsp.effective_to IS NULL OR vsp.effective_to > CURRENT_TIMESTAMP)
+                    ORDER BY vsp.variant_id, vsp.cost_per_unit ASC, vsp.effective_from DESC
+                """
+            else:
+                supplier_sql = """
+                    SELECT NULL::int AS variant_id, NULL::int AS supplier_id,
+                           NULL::numeric AS unit_cost, 1 AS minimum_order_qty
+                    WHERE FALSE
+                """
+
+            cur.execute(
+                f"""
+                WITH lot AS (
+                    SELECT pl.id, pl.process_id, COALESCE(pl.quantity, 1) AS qty
+                    FROM production_lots pl
+                    WHERE LOWER(COALESCE(pl.status, '')) <> ALL(%s)
+                    {lot_filter}
+                ),
+                req AS ({explode_sql}),
+                gross AS (
+                    SELECT variant_id,
+                           SUM(qty) AS gross_requirement,
+                           ARRAY_AGG(DISTINCT lot_id ORDER BY lot_id) AS lot_ids
+                    FROM req
+                    WHERE variant_id IS NOT NULL
+                    GROUP BY variant_id
+                    HAVING SUM(qty) > 0
+                ),
+                on_order AS (
+                    SELECT poi.variant_id,
+                           SUM(GREATEST(poi.quantity - COALESCE(poi.received_quantity, 0), 0))
+                               AS on_order
+                    FROM purchase_order_items poi
+                    JOIN purchase_orders po ON po.po_id = poi.po_id
+                    JOIN gross g ON g.variant_id = poi.variant_id
+                    WHERE po.deleted_at IS NULL
+                      AND poi.deleted_at IS NULL
+                      AND po.status <> ALL(%s)
+                    GROUP BY poi.variant_id
+                ),
+                safety AS ({safety_sql}),
+                best_supplier AS ({supplier_sql})
+                SELECT
+                    g.variant_id,
+                    im.name || ' - ' || COALESCE(cm.color_name, '') || ' - '
+                        || COALESCE(sm.size_name, '') AS variant_name,
+                    g.gross_requirement,
+                    COALESCE(iv.opening_stock, 0) AS on_hand,
+                    COALESCE(oo.on_order, 0) AS on_order,
+                    COALESCE(sf.safety_stock_quantity, 0) AS safety_stock,
+                    GREATEST(
+                        g.gross_requirement + COALESCE(sf.safety_stock_quantity, 0)
+                        - COALESCE(iv.opening_stock, 0) - COALESCE(oo.on_order, 0),
+                        0
+                    ) AS net_requirement,
+                    bs.supplier_id,
+                    s.firm_name AS supplier_name,
+                    bs.unit_cost,
+                    COALESCE(bs.minimum_order_qty, 1) AS minimum_order_qty,
+                    g.lot_ids
+                FROM gross g
+                JOIN item_variant iv ON iv.variant_id = g.variant_id
+                JOIN item_master im ON im.item_id = iv.item_id
+                LEFT JOIN color_master cm ON cm.color_id = iv.color_id
+                LEFT JOIN size_master sm ON sm.size_id = iv.size_id
+                LEFT JOIN on_order oo ON oo.variant_id = g.variant_id
+                LEFT JOIN safety sf ON sf.variant_id = g.variant_id
+                LEFT JOIN best_supplier bs ON bs.variant_id = g.variant_id
+                LEFT JOIN suppliers s ON s.supplier_id = bs.supplier_id
+                ORDER BY g.variant_id
+                """,
+                params + [closed_pos],
+            )
+            rows = cur.fetchall()
+
+        return MaterialRequirementsService._build_plan(rows)
+
+    @staticmethod
+    def _build_plan(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Shape netted rows into per-variant lines and per-supplier orders."""
+        requirements: List[Dict[str, Any]] = []
+        suppliers: Dict[Optional[int], Dict[str, Any]] = {}
+        lot_ids = set()
+
+        for row in rows:
+            net = float(row["net_requirement"] or 0)
+            moq = float(row["minimum_order_qty"] or 1)
+            order_qty = max(net, moq) if net > 0 else 0.0
+            unit_cost = float(row["unit_cost"]) if row["unit_cost"] is not None else None
+            line = {
+                "variant_id": row["variant_id"],
+                "variant_name": row["variant_name"],
+                "gross_requirement": float(row["gross_requirement"] or 0),
+                "on_hand": float(row["on_hand"] or 0),
+                "on_order": float(row["on_order"] or 0),
+                "safety_stock": float(row["safety_stock"] or 0),
+                "net_requirement": net,
+                "order_quantity": order_qty,
+                "supplier_id": row["supplier_id"],
+                "supplier_name": row["supplier_name"],
+                "unit_cost": unit_cost,
+                "estimated_cost": (
+                    round(order_qty * unit_cost, 2) if unit_cost is not None else None
+                ),
+                "lot_ids": list(row["lot_ids"] or []),
+            }
+            requirements.append(line)
+            lot_ids.update(line["lot_ids"])
+
+            if order_qty <= 0:
+                continue
+            group = suppliers.setdefault(
+                row["supplier_id"],
+                {
+                    "supplier_id": row["supplier_id"],
+                    "supplier_name": row["supplier_name"] or "Unassigned",
+                    "total_quantity": 0.0,
+                    "estimated_cost": 0.0,
+                    "lines": [],
+                },
+            )
+            group["total_quantity"] += order_qty
+            group["estimated_cost"] += line["estimated_cost"] or 0.0
+            group["lines"].append(line)
+
+        supplier_list = sorted(
+            suppliers.values(),
+            key=lambda g: (g["supplier_id"] is None, g["supplier_name"]),
+        )
+        for group in supplier_list:
+            group["estimated_cost"] = round(group["estimated_cost"], 2)
+            group["line_count"] = len(group["lines"])
+
+        return {
+            "generated_at": datetime.utcnow().isoformat(),
+            "lot_count": len(lot_ids),
+            "variant_count": len(requirements),
+            "shortage_count": sum(1 for r in requirements if r["order_quantity"] > 0),
+            "estimated_total_cost": round(
+                sum(g["estimated_cost"] for g in supplier_list), 2
+            ),
+            "requirements": requirements,
+            "suppliers": supplier_list,
+        }
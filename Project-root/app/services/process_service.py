@@ -24,6 +24,16 @@ import psycopg2.extras
 
 from ..models.process import Process, ProcessSubprocess
 from ..validators import ProcessValidator
+from ..utils.text_search import (
+    HEADLINE_OPTIONS,
+    TS_CONFIG,
+    prefix_tsquery,
+    search_vector_sql,
+)
+from .variant_read_model import VariantReadModel
+
+# Matches the GIN expression index idx_processes_search
+PROCESS_SEARCH_VECTOR = search_vector_sql("p.name", "p.description")
 
 
 class ProcessService:
@@ -305,6 +315,9 @@ class ProcessService:
             except Exception:
                 # Safe legacy default if detection fails under mocks
                 _seq_expr2 = "ps.sequence"  # legacy-safe default
+            # Flattened variant rows (one table once the read model is migrated)
+            variant_source = VariantReadModel.source(cur)
+
             # OPTIMIZATION 1: Batch load all subprocess-related data in a single query
             # Using CTEs and JSON aggregation to reduce N+1 queries
             # Each CTE is commented for maintainability
@@ -325,29 +338,24 @@ class ProcessService:
                             json_build_object(
                                 'id', vu.id,
                                 'variant_id', vu.variant_id,
-                                'variant_name', im.name,
-                                'opening_stock', iv.opening_stock,
+                                'variant_name', vr.item_name,
+                                'opening_stock', vr.opening_stock,
                                 'quantity', vu.quantity,
-                                'unit', iv.unit,
+                                'unit', vr.unit,
                                 'is_alternative', vu.is_alternative,
                                 'substitute_group_id', vu.substitute_group_id,
                                 'cost_per_unit', vu.cost_per_unit,
                                 'total_cost', vu.total_cost,
                                 -- include master attributes for richer frontend rendering
-                                'model', COALESCE(mm.model_name, NULL),
-                                'variation', COALESCE(vm.variation_name, NULL),
-                                'size', COALESCE(sm.size_name, NULL),
-                                'color', COALESCE(cm.color_name, NULL)
+                                'model', vr.model_name,
+                                'variation', vr.variation_name,
+                                'size', vr.size_name,
+                                'color', vr.color_name
                             ) ORDER BY vu.id
                         ) as variants
                         FROM variant_usage vu
                         -- Only include non-alternative variants (is_alternative = FALSE)
-                    JOIN item_variant iv ON iv.variant_id = vu.variant_id
-                    JOIN item_master im ON im.item_id = iv.item_id
-                    LEFT JOIN model_master mm ON mm.model_id = im.model_id
-                    LEFT JOIN variation_master vm ON vm.variation_id = im.variation_id
-                    LEFT JOIN color_master cm ON cm.color_id = iv.color_id
-                    LEFT JOIN size_master sm ON sm.size_id = iv.size_id
+                    JOIN {variant_source} vr ON vr.variant_id = vu.variant_id
                     WHERE vu.process_subprocess_id IN (SELECT ps_id FROM subprocess_ids)
                     AND (vu.substitute_group_id IS NULL OR vu.is_alternative = FALSE)
                     GROUP BY vu.process_subprocess_id
@@ -394,17 +402,16 @@ class ProcessService:
                             json_build_object(
                                 'id', vu.id,
                                 'variant_id', vu.variant_id,
-                                'variant_name', im.name,
-                                'opening_stock', iv.opening_stock,
+                                'variant_name', vr.item_name,
+                                'opening_stock', vr.opening_stock,
                                 'quantity', vu.quantity,
-                                'unit', iv.unit,
+                                'unit', vr.unit,
                                 'alternative_order', vu.alternative_order
                             ) ORDER BY vu.alternative_order
                         ) as alternatives
                     FROM substitute_groups sg
                     JOIN variant_usage vu ON vu.substitute_group_id = sg.id AND vu.is_alternative = TRUE
-                    JOIN item_variant iv ON iv.variant_id = vu.variant_id
-                    JOIN item_master im ON im.item_id = iv.item_id
+                    JOIN {variant_source} vr ON vr.variant_id = vu.variant_id
                     WHERE sg.process_subprocess_id IN (SELECT ps_id FROM subprocess_ids)
                     GROUP BY sg.process_subprocess_id, sg.id
                 ),
@@ -435,7 +442,7 @@ class ProcessService:
                 LEFT JOIN timing_data td ON td.process_subprocess_id = si.ps_id
                 ORDER BY si.sequence_order
                 """.format(
-                    seq_expr=_seq_expr2
+                    seq_expr=_seq_expr2, variant_source=variant_source
                 ),
                 (process_id,),
             )
@@ -506,7 +513,7 @@ class ProcessService:
             if subprocess_data:
                 ps_ids = tuple(subprocess_data.keys())
                 cur.execute(
-                    """
+                    f"""
                     SELECT
                         sg.id as group_id,
                         sg.process_subprocess_id,
@@ -514,17 +521,16 @@ class ProcessService:
                             json_build_object(
                                 'id', vu.id,
                                 'variant_id', vu.variant_id,
-                                'variant_name', im.name,
-                                'opening_stock', iv.opening_stock,
+                                'variant_name', vr.item_name,
+                                'opening_stock', vr.opening_stock,
                                 'quantity', vu.quantity,
-                                'unit', iv.unit,
+                                'unit', vr.unit,
                                 'alternative_order', vu.alternative_order
                             ) ORDER BY vu.alternative_order
                         ) as alternatives
                     FROM substitute_groups sg
                     JOIN variant_usage vu ON vu.substitute_group_id = sg.id AND vu.is_alternative = TRUE
-                    JOIN item_variant iv ON iv.variant_id = vu.variant_id
-                    JOIN item_master im ON im.item_id = iv.item_id
+                    JOIN {variant_source} vr ON vr.variant_id = vu.variant_id
                     WHERE sg.process_subprocess_id = ANY(%s)
                     GROUP BY sg.id, sg.process_subprocess_id
                     """,
@@ -1001,35 +1007,47 @@ class ProcessService:
     @staticmethod
     def search_processes(query: str, user_id: int) -> List[Dict[str, Any]]:
         """
-        Search processes by name or description.
+        Full-text search of processes by name and description.
+
+        Every word matches as a prefix; results are ranked (name matches
+        first) and carry ``<mark>`` highlighted name and description.
 
         Args:
             query: Search query
             user_id: User ID to filter by
 
         Returns:
-            List of matching processes
+            List of matching processes, best first
         """
-        search_pattern = f"%{query}%"
+        tsquery = prefix_tsquery(query)
+        if tsquery is None:
+            return []
 
         with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
             conn,
             cur,
         ):
+            # Headlines are built for the 50 returned rows only
             cur.execute(
-                """
+                f"""
                 SELECT
-                    p.*,
-                    COUNT(ps.id) as subprocess_count
-                FROM processes p
-                LEFT JOIN process_subprocesses ps ON ps.process_id = p.id
-                WHERE p.created_by = %s
-                  AND (p.name ILIKE %s OR p.description ILIKE %s)
-                GROUP BY p.id
-                ORDER BY p.name
-                LIMIT 50
+                    ranked.*,
+                    (SELECT COUNT(*) FROM process_subprocesses ps
+                     WHERE ps.process_id = ranked.id) as subprocess_count,
+                    ts_headline('{TS_CONFIG}', ranked.name, q, %s) as name_highlight,
+                    ts_headline('{TS_CONFIG}', coalesce(ranked.description, ''), q, %s)
+                        as description_highlight
+                FROM (
+                    SELECT p.*, ts_rank_cd({PROCESS_SEARCH_VECTOR}, q) as rank
+                    FROM processes p, to_tsquery('{TS_CONFIG}', %s) q
+                    WHERE p.created_by = %s
+                      AND {PROCESS_SEARCH_VECTOR} @@ q
+                    ORDER BY rank DESC, p.name
+                    LIMIT 50
+                ) ranked, to_tsquery('{TS_CONFIG}', %s) q
+                ORDER BY ranked.rank DESC, ranked.name
             """,
-                (user_id, search_pattern, search_pattern),
+                (HEADLINE_OPTIONS, HEADLINE_OPTIONS, tsquery, user_id, tsquery),
             )
 
             results = cur.fetchall()
@@ -0,0 +1,303 @@
+"""
+Process Version Service for Universal Process Framework.
+
+Freezes the structure of a process (subprocesses, variant usage, cost items
+and additional costs) into an immutable JSONB snapshot that production lots
+pin to. Editing a process afterwards produces a new version instead of
+changing the lots already created from it.
+
+Each version is costed once, when it is frozen; the worst-case breakdown is
+stored with the snapshot so lot creation, lot detail, variance analysis and
+actual-cost calculation read it instead of re-deriving cost from the live
+variant_usage rows. Freezing an unchanged structure returns the existing
+version, matched on an md5 of the canonical JSONB text. The structure
+includes the active supplier prices of the variants it uses, so a price
+change freezes (and costs) a new version instead of reusing a stale cost.
+
+Every method returns None when the process_versions migration has not been
+applied, and callers fall back to live costing.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import database
+import psycopg2.extras
+
+from .costing_service import CostingService
+
+# Active supplier prices of the variants a process uses, as costed by
+# CostingService (substituted for {pricing} when the table exists)
+PRICING_SQL = """
+    COALESCE((
+        SELECT jsonb_agg(jsonb_build_object(
+            'variant_id', vsp.variant_id,
+            'supplier_id', vsp.supplier_id,
+            'cost_per_unit', vsp.cost_per_unit
+        ) ORDER BY vsp.variant_id, vsp.supplier_id, vsp.cost_per_unit)
+        FROM variant_supplier_pricing vsp
+        WHERE vsp.variant_id IN (
+            SELECT vu.variant_id
+            FROM variant_usage vu
+            JOIN process_subprocesses ps ON ps.id = vu.process_subprocess_id
+            WHERE ps.process_id = p.id
+        )
+          AND vsp.is_active = TRUE
+          AND (vsp.effective_to IS NULL OR vsp.effective_to > CURRENT_TIMESTAMP)
+    ), '[]'::jsonb)
+"""
+
+# Canonical structure of one process; md5 of its jsonb text is the dedupe key
+STRUCTURE_SQL = """
+    SELECT jsonb_build_object(
+        'process_id', p.id,
+        'name', p.name,
+        'subprocesses', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'process_subprocess_id', ps.id,
+                'subprocess_id', ps.subprocess_id,
+                'name', COALESCE(ps.custom_name, s.name),
+                'variants', COALESCE((
+                    SELECT jsonb_agg(jsonb_build_object(
+                        'variant_usage_id', vu.id,
+                        'variant_id', vu.variant_id,
+                        'quantity', vu.quantity,
+                        'substitute_group_id', vu.substitute_group_id,
+                        'is_alternative', vu.is_alternative
+                    ) ORDER BY vu.id)
+                    FROM variant_usage vu
+                    WHERE vu.process_subprocess_id = ps.id
+                ), '[]'::jsonb),
+                'cost_items', COALESCE((
+                    SELECT jsonb_agg(jsonb_build_object(
+                        'cost_type', ci.cost_type,
+                        'description', ci.description,
+                        'quantity', ci.quantity,
+                        'amount', ci.amount
+                    ) ORDER BY ci.id)
+                    FROM cost_items ci
+                    WHERE ci.process_subprocess_id = ps.id
+                ), '[]'::jsonb)
+            ) ORDER BY ps.id)
+            FROM process_subprocesses ps
+            JOIN subprocesses s ON s.id = ps.subprocess_id
+            WHERE ps.process_id = p.id
+        ), '[]'::jsonb),
+        'additional_costs', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'cost_type', ac.cost_type,
+                'description', ac.description,
+                'amount', ac.amount,
+                'is_fixed', ac.is_fixed
+            ) ORDER BY ac.id)
+            FROM additional_costs ac
+            WHERE ac.process_id = p.id
+        ), '[]'::jsonb),
+        'supplier_pricing', {pricing}
+    ) AS structure
+    FROM processes p
+    WHERE p.id = %s
+"""
+
+
+def _version_dict(row: Dict[str, Any]) -> Dict[str, Any]:
+    version = dict(row)
+    if version.get("unit_cost") is not None:
+        version["unit_cost"] = float(version["unit_cost"])
+    if version.get("created_at") is not None:
+        version["created_at"] = version["created_at"].isoformat()
+    return version
+
+
+class ProcessVersionService:
+    """
+    Service for freezing process structures and reading pinned snapshots.
+    """
+
+    @staticmethod
+    def _present(cur) -> bool:
+        cur.execute("SELECT to_regclass('process_versions') IS NOT NULL AS present")
+        return bool(cur.fetchone()["present"])
+
+    @staticmethod
+    def freeze_process(
+        process_id: int, user_id: Optional[int] = None, cur=None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return the version matching the process's current structure,
+        freezing and costing a new one if the structure changed.
+
+        Args:
+            process_id: The process to freeze
+            user_id: User recorded on a newly created version
+            cur: Optional RealDictCursor to run inside the caller's
+                transaction, so a new version is only kept if the caller
+                commits
+
+        Returns:
+            Version dict, or None if versioning is unavailable or the process
+            does not exist
+        """
+        if cur is None:
+            with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
+                conn,
+                cur,
+            ):
+                version = ProcessVersionService.freeze_process(process_id, user_id, cur)
+                conn.commit()
+            return version
+
+        cur.execute(
+            "SELECT to_regclass('process_versions') IS NOT NULL AS present,"
+            " to_regclass('variant_supplier_pricing') IS NOT NULL AS priced"
+        )
+        probe = cur.fetchone()
+        if not probe["present"]:
+            return None
+        structure_sql = STRUCTURE_SQL.format(
+            pricing=PRICING_SQL if probe.get("priced") else "'[]'::jsonb"
+        )
+
+        cur.execute(
+            f"""
+            WITH snap AS ({structure_sql})
+            SELECT snap.structure, md5(snap.structure::text) AS structure_hash,
+                   pv.id AS version_id
+            FROM snap
+            LEFT JOIN process_versions pv
+              ON pv.process_id = %s AND pv.structure_hash = md5(snap.structure::text)
+            """,
+            (process_id, process_id),
+        )
+        snap = cur.fetchone()
+        if not snap:
+            return None
+        if snap["version_id"]:
+            return ProcessVersionService.get_version(snap["version_id"], cur)
+
+        # New structure: cost it once, then it is never recomputed
+        cost_breakdown = CostingService.calculate_process_total_cost(process_id)
+        unit_cost = float(cost_breakdown.get("totals", {}).get("grand_total") or 0)
+
+        cur.execute(
+            """
+            INSERT INTO process_versions (
+                process_id, version_number, structure, structure_hash,
+                cost_breakdown, unit_cost, created_by
+            )
+            SELECT %s, COALESCE(MAX(version_number), 0) + 1, %s, %s, %s, %s, %s
+            FROM process_versions
+            WHERE process_id = %s
+            ON CONFLICT (process_id, structure_hash) DO NOTHING
+            RETURNING *
+            """,
+            (
+                process_id,
+                psycopg2.extras.Json(snap["structure"]),
+                snap["structure_hash"],
+                psycopg2.extras.Json(cost_breakdown),
+                unit_cost,
+                user_id,
+                process_id,
+            ),
+        )
+        row = cur.fetchone()
+        if row:
+            return _version_dict(row)
+
+        # A concurrent freeze of the same structure won the insert
+        cur.execute(
+            "SELECT * FROM process_versions WHERE process_id = %s AND structure_hash = %s",
+            (process_id, snap["structure_hash"]),
+        )
+        row = cur.fetchone()
+        return _version_dict(row) if row else None
+
+    @staticmethod
+    def get_version(version_id: int, cur=None) -> Optional[Dict[str, Any]]:
+        """Get one frozen version by id."""
+        if cur is None:
+            with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
+                conn,
+                cur,
+            ):
+                return ProcessVersionService.get_version(version_id, cur)
+
+        cur.execute("SELECT * FROM process_versions WHERE id = %s", (version_id,))
+        row = cur.fetchone()
+        return _version_dict(row) if row else None
+
+    @staticmethod
+    def get_lot_version(lot_id: int, cur=None) -> Optional[Dict[str, Any]]:
+        """Get the version a production lot is pinned to, if any."""
+        if cur is None:
+            with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
+                conn,
+                cur,
+            ):
+                return ProcessVersionService.get_lot_version(lot_id, cur)
+
+        if not ProcessVersionService._present(cur):
+            return None
+        cur.execute(
+            """
+            SELECT pv.*
+            FROM production_lots pl
+            JOIN process_versions pv ON pv.id = pl.process_version_id
+            WHERE pl.id = %s
+            """,
+            (lot_id,),
+        )
+        row = cur.fetchone()
+        return _version_dict(row) if row else None
+
+    @staticmethod
+    def list_versions(process_id: int) -> List[Dict[str, Any]]:
+        """List versions of a process, newest first, without the structure body."""
+        with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
+            conn,
+            cur,
+        ):
+            if not ProcessVersionService._present(cur):
+                return []
+            cur.execute(
+                """
+                SELECT
+                    pv.id, pv.process_id, pv.version_number, pv.structure_hash,
+                    pv.unit_cost, pv.created_by, pv.created_at,
+                    (SELECT COUNT(*) FROM production_lots pl
+                     WHERE pl.process_version_id = pv.id) AS lot_count
+                FROM process_versions pv
+                WHERE pv.process_id = %s
+                ORDER BY pv.version_number DESC
+                """,
+                (process_id,),
+            )
+            return [_version_dict(r) for r in cur.fetchall()]
+
+    @staticmethod
+    def cost_components(version: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Per-unit worst-case cost components cached on a version.
+
+        Returns:
+            Dict with fixed_variants, substitute_groups, cost_items,
+            additional_costs and grand_total
+        """
+        breakdown = version.get("cost_breakdown") or {}
+        components = {
+            "fixed_variants": 0.0,
+            "substitute_groups": 0.0,
+            "cost_items": 0.0,
+        }
+        for sp in breakdown.get("subprocesses", []):
+            totals = (sp.get("cost_breakdown") or {}).get("totals", {})
+            for key in components:
+                components[key] += float(totals.get(key) or 0)
+        totals = breakdown.get("totals", {})
+        components["additional_costs"] = float(totals.get("additional_costs") or 0)
+        components["grand_total"] = float(
+            totals.get("grand_total") or version.get("unit_cost") or 0
+        )
+        return components
@@ -248,36 +248,24 @@ def validate_lot_ready_for_finalization(lot_id: int) -> Tuple[bool, str]:
     Returns:
         Tuple of (is_ready: bool, message: str)
     """
-    # Check if lot has subprocesses
-    has_subs, count = check_lot_has_subprocesses(lot_id)
-    if not has_subs:
-        return False, "Cannot finalize: Lot has no subprocesses. Add at least one subprocess before finalizing."
-    
-    # Check lot status
+    from .production_service import ProductionService
+
     try:
-        with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
-            conn,
-            cur,
-        ):
-            cur.execute(
-                """
-                SELECT status FROM production_lots WHERE id = %s
-                """,
-                (lot_id,),
-            )
-            
-            result = cur.fetchone()
-            if not result:
-                return False, "Production lot not found."
-            
-            status = result.get("status", "").lower()
-            
-            # Can only finalize Planning status lots
-            if status != "planning":
-                return False, f"Cannot finalize: Lot status is '{status}'. Only 'Planning' status lots can be finalized."
-            
-            return True, "Lot is ready to finalize"
-            
+        readiness = ProductionService.evaluate_lots_readiness([lot_id]).get(lot_id)
     except Exception as e:
         current_app.logger.error(f"Error validating finalization readiness for lot {lot_id}: {e}")
         return False, f"Error validating lot: {str(e)}"
+
+    if not readiness:
+        return False, "Production lot not found."
+
+    if not readiness["subprocesses"]["total"]:
+        return False, "Cannot finalize: Lot has no subprocesses. Add at least one subprocess before finalizing."
+
+    status = (readiness["status"] or "").lower()
+
+    # Can only finalize Planning status lots
+    if status != "planning":
+        return False, f"Cannot finalize: Lot status is '{status}'. Only 'Planning' status lots can be finalized."
+
+    return True, "Lot is ready to finalize"
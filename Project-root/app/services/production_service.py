@@ -19,6 +19,7 @@ from ..models.production_lot import (
     ProductionLot,
     ProductionLotSelection,
     generate_lot_number,
+    generate_lot_number_block,
 )
 from ..utils.production_lot_utils import (
     validate_cost_calculation,
@@ -29,6 +30,9 @@ from ..utils.production_lot_utils import (
     get_logger,
 )
 from .costing_service import CostingService
+from .process_version_service import ProcessVersionService
+from .stock_ledger_service import StockLedgerService
+from .stock_reservation_service import StockReservationService
 from .production_lot_subprocess_manager import link_subprocesses_to_production_lot
 
 
@@ -64,35 +68,22 @@ class ProductionService:
             return 1
 
     @staticmethod
-    def create_production_lot(
-        process_id: int,
-        user_id: int,
-        quantity: int = 1,
-        lot_number: Optional[str] = None,
-    ) -> Dict[str, Any]:
+    def _worst_case_lot_cost(
+        process_id: int, quantity: int, version: Optional[Dict[str, Any]]
+    ) -> float:
         """
-        Create a new production lot from a process.
-
-        Args:
-            process_id: The process to execute
-            user_id: User creating the lot
-            quantity: Number of units to produce
-            lot_number: Optional custom lot number (auto-generated if not provided)
-
-        Returns:
-            Created production lot with initial cost estimate
+        Validated worst-case cost of a lot: from the version's cached
+        breakdown, or live costing when the process is not versioned.
 
         Raises:
             ValueError: If cost calculation fails or returns invalid data
         """
         logger = get_logger()
-
-        if not lot_number:
-            lot_number = generate_lot_number()
-
-        # Calculate worst-case estimated cost with validation
         try:
-            cost_breakdown = CostingService.calculate_process_total_cost(process_id)
+            if version and version.get("cost_breakdown"):
+                cost_breakdown = version["cost_breakdown"]
+            else:
+                cost_breakdown = CostingService.calculate_process_total_cost(process_id)
 
             # Validate cost breakdown BEFORE using it
             is_valid, total_cost, issues = validate_cost_calculation(
@@ -119,26 +110,70 @@ class ProductionService:
             raise ValueError(
                 f"Cost calculation failed for process {process_id}: {str(e)}"
             )
+        return worst_case_cost
+
+    @staticmethod
+    def create_production_lot(
+        process_id: int,
+        user_id: int,
+        quantity: int = 1,
+        lot_number: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create a new production lot from a process.
+
+        Args:
+            process_id: The process to execute
+            user_id: User creating the lot
+            quantity: Number of units to produce
+            lot_number: Optional custom lot number (auto-generated if not provided)
+
+        Returns:
+            Created production lot with initial cost estimate
+
+        Raises:
+            ValueError: If cost calculation fails or returns invalid data
+        """
+        logger = get_logger()
+
+        if not lot_number:
+            lot_number = generate_lot_number()
 
         with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
             conn,
             cur,
         ):
             try:
+                # Pin the lot to the process's current frozen version; its cost
+                # breakdown was calculated once when the version was frozen.
+                # A newly frozen version commits or rolls back with the lot.
+                version = ProcessVersionService.freeze_process(
+                    process_id, user_id, cur
+                )
+                worst_case_cost = ProductionService._worst_case_lot_cost(
+                    process_id, quantity, version
+                )
+
+                columns = "process_id, lot_number, created_by, quantity, total_cost"
+                params = [process_id, lot_number, user_id, quantity, worst_case_cost]
+                if version:
+                    columns += ", process_version_id"
+                    params.append(version["id"])
                 cur.execute(
-                    """
-                    INSERT INTO production_lots (
-                        process_id, lot_number, created_by, quantity,
-                        total_cost, status
-                    ) VALUES (%s, %s, %s, %s, %s, 'Planning')
+                    f"""
+                    INSERT INTO production_lots ({columns}, status)
+                    VALUES ({", ".join(["%s"] * len(params))}, 'Planning')
                     RETURNING *
                 """,
-                    (process_id, lot_number, user_id, quantity, worst_case_cost),
+                    params,
                 )
 
                 lot_data = cur.fetchone()
                 conn.commit()
 
+            except ValueError:
+                conn.rollback()
+                raise
             except Exception as e:
                 conn.rollback()
                 logger.error(f"Database error creating production lot: {str(e)}")
@@ -247,6 +282,310 @@ class ProductionService:
         lot["lot_status"] = summary.get("lot_status") or lot.get("status")
         return lot
 
+    @staticmethod
+    def create_production_lots_bulk(
+        lots: List[Dict[str, Any]], user_id: int
+    ) -> Dict[str, Any]:
+        """
+        Create many production lots in one transaction.
+
+        Worst-case cost is calculated once per distinct process, lot numbers
+        are allocated as one block, subprocess links and inventory alerts are
+        inserted set-based. Either every lot is created or none is.
+
+        Args:
+            lots: Entries with process_id, quantity and optional lot_number
+            user_id: User creating the lots
+
+        Returns:
+            Dict with created ``lots`` (same shape as
+            create_production_lot_with_alerts) and alert/recommendation counts
+
+        Raises:
+            ValueError: If cost calculation fails for any process
+        """
+        from .inventory_alert_service import SEVERITY_ORDER, InventoryAlertService
+
+        logger = get_logger()
+
+        with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
+            conn,
+            cur,
+        ):
+            try:
+                # Per-unit worst-case cost, once per process (cached on its
+                # version). Versions are frozen in the lots' transaction, so
+                # they are kept only if the lots are created.
+                unit_costs: Dict[int, float] = {}
+                version_ids: Dict[int, Optional[int]] = {}
+                for process_id in sorted({int(entry["process_id"]) for entry in lots}):
+                    version = ProcessVersionService.freeze_process(
+                        process_id, user_id, cur
+                    )
+                    version_ids[process_id] = version["id"] if version else None
+                    unit_costs[process_id] = ProductionService._worst_case_lot_cost(
+                        process_id, 1, version
+                    )
+
+                auto_count = sum(1 for e in lots if not e.get("lot_number"))
+                auto_numbers = iter(generate_lot_number_block(auto_count))
+                pinned = any(version_ids.values())
+                rows = []
+                for entry in lots:
+                    process_id = int(entry["process_id"])
+                    quantity = entry["quantity"]
+                    row = (
+                        process_id,
+                        entry.get("lot_number") or next(auto_numbers),
+                        user_id,
+                        quantity,
+                        unit_costs[process_id] * quantity,
+                    )
+                    rows.append(row + (version_ids[process_id],) if pinned else row)
+
+                version_col = ", process_version_id" if pinned else ""
+                inserted = psycopg2.extras.execute_values(
+                    cur,
+                    f"""
+                    INSERT INTO production_lots (
+                        process_id, lot_number, created_by, quantity, total_cost,
+                        status{version_col}
+                    ) VALUES %s
+                    RETURNING *
+                    """,
+                    rows,
+                    template=(
+                        "(%s, %s, %s, %s, %s, 'Planning', %s)"
+                        if pinned
+                        else "(%s, %s, %s, %s, %s, 'Planning')"
+                    ),
+                    page_size=500,
+                    fetch=True,
+                )
+                by_number = {r["lot_number"]: r for r in inserted}
+                lot_rows = [by_number[row[1]] for row in rows]
+                lot_ids = [int(r["id"]) for r in lot_rows]
+
+                linked: Dict[int, int] = {}
+                cur.execute(
+                    "SELECT to_regclass('production_lot_subprocesses') IS NOT NULL AS present"
+                )
+                if cur.fetchone()["present"]:
+                    cur.execute(
+                        """
+                        INSERT INTO production_lot_subprocesses (
+                            production_lot_id, process_subprocess_id, status
+                        )
+                        SELECT pl.id, ps.id, 'Planning'
+                        FROM production_lots pl
+                        JOIN process_subprocesses ps ON ps.process_id = pl.process_id
+                        WHERE pl.id = ANY(%s)
+                        ON CONFLICT (production_lot_id, process_subprocess_id)
+                        DO UPDATE SET updated_at = CURRENT_TIMESTAMP
+                        RETURNING production_lot_id
+                        """,
+                        (lot_ids,),
+                    )
+                    for r in cur.fetchall():
+                        lot_id = int(r["production_lot_id"])
+                        linked[lot_id] = linked.get(lot_id, 0) + 1
+
+                alerts_by_lot = (
+                    InventoryAlertService.check_inventory_levels_for_production_lots(
+                        lot_ids, cur
+                    )
+                )
+                created = InventoryAlertService.create_alerts_for_production_lots(
+                    alerts_by_lot, cur
+                )
+                conn.commit()
+            except ValueError:
+                conn.rollback()
+                raise
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Database error creating production lots: {str(e)}")
+                raise
+
+        results = []
+        for lot_data in lot_rows:
+            lot_id = int(lot_data["id"])
+            result = ProductionLot(lot_data).to_dict()
+            for k, v in dict(lot_data).items():
+                if k not in result:
+                    result[k] = v
+            if "worst_case_estimated_cost" not in result:
+                result["worst_case_estimated_cost"] = result.get("total_cost")
+
+            alerts_list = alerts_by_lot.get(lot_id, [])
+            by_severity = {sev: 0 for sev in SEVERITY_ORDER}
+            for a in alerts_list:
+                if a["alert_severity"] in by_severity:
+                    by_severity[a["alert_severity"]] += 1
+            result.update(
+                {
+                    "lot_id": lot_id,
+                    "linked_subprocesses": linked.get(lot_id, 0),
+                    "alerts_present": bool(created["alerts"].get(lot_id)),
+                    "alerts_summary": {
+                        "total": len(alerts_list),
+                        "by_severity": by_severity,
+                        "action_required": bool(
+                            by_severity["CRITICAL"] or by_severity["HIGH"]
+                        ),
+                    },
+                    "alerts_details": alerts_list[:5],
+                    "procurement_recommendations": created["recommendations"].get(
+                        lot_id, []
+                    ),
+                    "lot_status": lot_data.get("lot_status_inventory")
+                    or lot_data.get("status"),
+                }
+            )
+            results.append(result)
+
+            log_production_lot_creation(
+                lot_id,
+                lot_data["lot_number"],
+                lot_data["process_id"],
+                lot_data["quantity"],
+                lot_data.get("total_cost"),
+                "Planning",
+            )
+
+        return {
+            "lots": results,
+            "created_count": len(results),
+            "alerts_created": sum(len(v) for v in created["alerts"].values()),
+            "recommendations_created": sum(
+                len(v) for v in created["recommendations"].values()
+            ),
+        }
+
+    @staticmethod
+    def bulk_transition_production_lots(
+        lot_ids: List[int],
+        action: str,
+        reason: Optional[str] = None,
+        owner_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Cancel or finalize many lots atomically.
+
+        All lots are locked and validated in one pass (existence, ownership,
+        current status and, for finalize, pending CRITICAL alerts). If any lot
+        fails nothing is changed and the per-lot errors are returned.
+
+        Args:
+            lot_ids: Lots to transition
+            action: "cancel" or "finalize"
+            reason: Optional cancellation reason (logged)
+            owner_id: If given, every lot must have been created by this user
+
+        Returns:
+            {"success", "action", "updated": [...], "errors": [...]}
+        """
+        if action not in ("cancel", "finalize"):
+            raise ValueError(f"Unsupported bulk action: {action}")
+
+        ids = sorted({int(i) for i in lot_ids})
+        with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
+            conn,
+            cur,
+        ):
+            # Lock in id order so concurrent bulk calls cannot deadlock
+            cur.execute(
+                "SELECT id FROM production_lots WHERE id = ANY(%s) ORDER BY id FOR UPDATE",
+                (ids,),
+            )
+            cur.execute(
+                """
+                SELECT pl.id, pl.lot_number, pl.status, pl.created_by,
+                       COUNT(a.alert_id) FILTER (WHERE a.alert_severity = 'CRITICAL')
+                           AS critical_alerts
+                FROM production_lots pl
+                LEFT JOIN production_lot_inventory_alerts a
+                       ON a.production_lot_id = pl.id
+                WHERE pl.id = ANY(%s)
+                GROUP BY pl.id, pl.lot_number, pl.status, pl.created_by
+                """,
+                (ids,),
+            )
+            found = {int(r["id"]): r for r in cur.fetchall()}
+
+            errors = []
+            for lot_id in ids:
+                lot = found.get(lot_id)
+                if not lot:
+                    errors.append({"lot_id": lot_id, "error": "Lot not found"})
+                    continue
+                status = (lot["status"] or "").lower()
+                error = None
+                if owner_id is not None and lot["created_by"] != owner_id:
+                    error = "Access denied"
+                elif action == "cancel" and status in ("completed", "cancelled"):
+                    error = f"Cannot cancel a {status} lot"
+                elif action == "finalize" and status in ("cancelled", "finalized"):
+                    error = f"Cannot finalize a {status} lot"
+                elif action == "finalize" and lot["critical_alerts"]:
+                    error = (
+                        "Critical inventory alerts pending. "
+                        "Please acknowledge before finalizing."
+                    )
+                if error:
+                    errors.append(
+                        {"lot_id": lot_id, "lot_number": lot["lot_number"], "error": error}
+                    )
+
+            if errors:
+                conn.rollback()
+                return {"success": False, "action": action, "updated": [], "errors": errors}
+
+            if action == "cancel":
+                cur.execute(
+                    "UPDATE production_lots SET status = 'cancelled' WHERE id = ANY(%s)",
+                    (ids,),
+                )
+                StockReservationService.release_for_lots(ids, cur)
+                new_status = "cancelled"
+            else:
+                cur.execute(
+                    """
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = current_schema()
+                      AND table_name = 'production_lots'
+                      AND column_name = 'finalized_at'
+                    """
+                )
+                finalized_at = ", finalized_at = CURRENT_TIMESTAMP" if cur.fetchone() else ""
+                cur.execute(
+                    f"UPDATE production_lots SET status = 'finalized'{finalized_at} "
+                    "WHERE id = ANY(%s)",
+                    (ids,),
+                )
+                # Finalized lots are never executed: give their stock back
+                StockReservationService.release_for_lots(ids, cur)
+                new_status = "finalized"
+            conn.commit()
+
+        if action == "cancel" and reason:
+            current_app.logger.info(f"Lots {ids} cancelled. Reason: {reason}")
+
+        return {
+            "success": True,
+            "action": action,
+            "updated": [
+                {
+                    "lot_id": lot_id,
+                    "lot_number": found[lot_id]["lot_number"],
+                    "previous_status": found[lot_id]["status"],
+                    "status": new_status,
+                }
+                for lot_id in ids
+            ],
+            "errors": [],
+        }
+
     @staticmethod
     def acknowledge_and_validate_production_lot_alerts(
         production_lot_id: int,
@@ -362,6 +701,12 @@ class ProductionService:
             # Normalize quantity for legacy/nullable schemas
             result["quantity"] = ProductionService._normalize_lot_quantity(result)
 
+            # Frozen structure and cost the lot was created from
+            if result.get("process_version_id"):
+                result["process_version"] = ProcessVersionService.get_version(
+                    result["process_version_id"], cur
+                )
+
             if include_selections:
                 # Get all variant selections (schema differences tolerated)
                 result["selections"] = []
@@ -537,6 +882,23 @@ class ProductionService:
             lot_dict = dict(lot)
             lot_dict["quantity"] = ProductionService._normalize_lot_quantity(lot_dict)
             normalized_lots.append(lot_dict)
+
+        # Readiness badges and alert counts for the whole page in one evaluation
+        try:
+            readiness = ProductionService.evaluate_lots_readiness(
+                [lot["id"] for lot in normalized_lots]
+            )
+        except Exception as e:
+            get_logger().warning(f"Readiness evaluation failed for lot list: {e}")
+            readiness = {}
+        for lot in normalized_lots:
+            report = readiness.get(lot["id"])
+            lot["readiness"] = report
+            if report:
+                lot["alerts_summary"] = {
+                    "total": sum(report["alerts_by_severity"].values()),
+                    "by_severity": report["alerts_by_severity"],
+                }
         
         from flask import current_app
         if normalized_lots:
@@ -769,69 +1131,254 @@ class ProductionService:
         return selection.to_dict()
 
     @staticmethod
-    def validate_lot_readiness(lot_id: int) -> Tuple[bool, List[str]]:
+    def evaluate_lots_readiness(lot_ids: List[int]) -> Dict[int, Dict[str, Any]]:
         """
-        Validate that lot is ready for execution (all OR groups have selections).
+        Evaluate execution and finalization readiness for many lots at once.
+
+        One schema probe plus one query computes, per lot: OR groups without a
+        selection, production_lot_subprocesses status counts, inventory alerts
+        by severity and stock sufficiency (available-to-promise plus the lot's
+        own reservations) for every exploded requirement.
 
         Args:
-            lot_id: The production lot
+            lot_ids: Lots to evaluate
 
         Returns:
-            Tuple of (is_ready, list_of_missing_groups)
+            Mapping lot_id -> readiness report; unknown lots are omitted
         """
+        from .inventory_alert_service import SEVERITY_ORDER
+
+        ids = sorted({int(i) for i in lot_ids})
+        if not ids:
+            return {}
+
         with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
             conn,
             cur,
         ):
-            # Get the process for this lot
             cur.execute(
                 """
-                SELECT process_id FROM production_lots WHERE id = %s
-            """,
-                (lot_id,),
+                SELECT
+                    to_regclass('or_groups') IS NOT NULL AS has_or_groups,
+                    to_regclass('production_lot_subprocesses') IS NOT NULL
+                        AS has_lot_subprocesses,
+                    to_regclass('production_lot_inventory_alerts') IS NOT NULL
+                        AS has_alerts,
+                    to_regclass('variant_stock_availability') IS NOT NULL
+                        AS has_availability,
+                    ARRAY(
+                        SELECT column_name::text FROM information_schema.columns
+                        WHERE table_schema = current_schema()
+                          AND table_name = 'production_lot_variant_selections'
+                    ) AS selection_columns
+                """
+            )
+            schema = cur.fetchone()
+            selection_cols = set(schema["selection_columns"] or [])
+            selection_lot_col = next(
+                (c for c in ("lot_id", "production_lot_id") if c in selection_cols),
+                None,
             )
-            lot = cur.fetchone()
-
-            if not lot:
-                return False, ["Lot not found"]
 
-            # Get all OR groups for this process
-            cur.execute(
+            if schema["has_or_groups"]:
+                selected_filter = ""
+                if selection_lot_col and "or_group_id" in selection_cols:
+                    selected_filter = f"""
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM production_lot_variant_selections s
+                            WHERE s.{selection_lot_col} = lot.id
+                              AND s.or_group_id = og.id
+                        )
+                    """
+                missing_sql = f"""
+                    SELECT lot.id AS lot_id, ARRAY_AGG(og.name ORDER BY og.id) AS names
+                    FROM lot
+                    JOIN process_subprocesses ps ON ps.process_id = lot.process_id
+                    JOIN or_groups og ON og.process_subprocess_id = ps.id
+                    {selected_filter}
+                    GROUP BY lot.id
+                """
+            else:
+                missing_sql = "SELECT NULL::int AS lot_id, NULL::text[] AS names WHERE FALSE"
+
+            if schema["has_lot_subprocesses"]:
+                subs_sql = """
+                    SELECT production_lot_id AS lot_id,
+                           COUNT(*) AS total,
+                           COUNT(*) FILTER (WHERE status = 'Completed') AS completed,
+                           COUNT(*) FILTER (WHERE status = 'Failed') AS failed,
+                           COUNT(*) FILTER (
+                               WHERE status IS NULL OR status NOT IN (
+                                   'Planning', 'In Progress', 'Completed', 'Failed', 'Skipped'
+                               )
+                           ) AS invalid
+                    FROM production_lot_subprocesses
+                    WHERE production_lot_id = ANY(%(ids)s)
+                    GROUP BY production_lot_id
+                """
+            else:
+                subs_sql = """
+                    SELECT NULL::int AS lot_id, 0 AS total, 0 AS completed,
+                           0 AS failed, 0 AS invalid
+                    WHERE FALSE
                 """
-                SELECT
-                    og.id,
-                    og.name AS group_name
-                FROM or_groups og
-                JOIN process_subprocesses ps ON ps.id = og.process_subprocess_id
-                WHERE ps.process_id = %s
-            """,
-                (lot["process_id"],),
-            )
 
-            required_groups = cur.fetchall()
+            severity_cols = ", ".join(
+                f"COUNT(*) FILTER (WHERE alert_severity = '{sev}') AS alerts_{sev.lower()}"
+                for sev in SEVERITY_ORDER
+            )
+            if schema["has_alerts"]:
+                alerts_sql = f"""
+                    SELECT production_lot_id AS lot_id, {severity_cols}
+                    FROM production_lot_inventory_alerts
+                    WHERE production_lot_id = ANY(%(ids)s)
+                    GROUP BY production_lot_id
+                """
+            else:
+                alerts_sql = f"""
+                    SELECT NULL::int AS lot_id, {severity_cols}
+                    FROM (SELECT NULL::text AS alert_severity) a
+                    WHERE FALSE
+                    GROUP BY 1
+                """
 
-            if not required_groups:
-                return True, []  # No OR groups, lot is ready
+            if schema["has_availability"]:
+                available_sql = """
+                    COALESCE(a.available_to_promise, 0) + COALESCE(own.qty, 0)
+                """
+                availability_join = """
+                    LEFT JOIN variant_stock_availability a ON a.variant_id = n.variant_id
+                    LEFT JOIN (
+                        SELECT lot_id, variant_id, SUM(quantity) AS qty
+                        FROM stock_reservations
+                        WHERE status = 'active' AND lot_id = ANY(%(ids)s)
+                        GROUP BY lot_id, variant_id
+                    ) own ON own.lot_id = n.lot_id AND own.variant_id = n.variant_id
+                """
+            else:
+                available_sql = "COALESCE(iv.opening_stock, 0)"
+                availability_join = (
+                    "LEFT JOIN item_variant iv ON iv.variant_id = n.variant_id"
+                )
 
-            # Get selections made for this lot
+            alert_cols = ", ".join(f"al.alerts_{sev.lower()}" for sev in SEVERITY_ORDER)
+            explode_sql = StockReservationService.explode_lots_sql(cur, selection_cols)
             cur.execute(
-                """
-                SELECT or_group_id
-                FROM production_lot_variant_selections
-                WHERE production_lot_id = %s
-            """,
-                (lot_id,),
+                f"""
+                WITH lot AS (
+                    SELECT id, process_id, status, created_by, COALESCE(quantity, 1) AS qty
+                    FROM production_lots
+                    WHERE id = ANY(%(ids)s)
+                ),
+                missing AS ({missing_sql}),
+                subs AS ({subs_sql}),
+                alerts AS ({alerts_sql}),
+                need AS (
+                    SELECT lot_id, variant_id, SUM(qty) AS qty
+                    FROM ({explode_sql}) req
+                    WHERE variant_id IS NOT NULL
+                    GROUP BY lot_id, variant_id
+                ),
+                stock AS (
+                    SELECT n.lot_id,
+                           COUNT(*) AS variants_required,
+                           ARRAY_AGG(n.variant_id ORDER BY n.variant_id)
+                               FILTER (WHERE n.qty > {available_sql}) AS short_variant_ids
+                    FROM need n
+                    {availability_join}
+                    GROUP BY n.lot_id
+                )
+                SELECT lot.id AS lot_id, lot.status, lot.created_by,
+                       m.names AS missing_or_groups,
+                       sb.total, sb.completed, sb.failed, sb.invalid,
+                       {alert_cols},
+                       st.variants_required, st.short_variant_ids
+                FROM lot
+                LEFT JOIN missing m ON m.lot_id = lot.id
+                LEFT JOIN subs sb ON sb.lot_id = lot.id
+                LEFT JOIN alerts al ON al.lot_id = lot.id
+                LEFT JOIN stock st ON st.lot_id = lot.id
+                """,
+                {"ids": ids},
             )
+            rows = cur.fetchall()
 
-            selected_group_ids = {row["or_group_id"] for row in cur.fetchall()}
+        return {
+            int(row["lot_id"]): ProductionService._readiness_report(row, SEVERITY_ORDER)
+            for row in rows
+        }
 
-            # Find missing selections
-            missing = []
-            for group in required_groups:
-                if group["id"] not in selected_group_ids:
-                    missing.append(group["group_name"])
+    @staticmethod
+    def _readiness_report(row: Dict[str, Any], severities: List[str]) -> Dict[str, Any]:
+        """Turn one evaluate_lots_readiness row into the readiness report."""
+        status = (row["status"] or "").lower()
+        missing = list(row["missing_or_groups"] or [])
+        short = list(row["short_variant_ids"] or [])
+        subprocesses = {
+            key: int(row[key] or 0) for key in ("total", "completed", "failed", "invalid")
+        }
+        alerts = {sev: int(row.get(f"alerts_{sev.lower()}") or 0) for sev in severities}
+
+        issues = [f"Missing selection for OR group: {name}" for name in missing]
+        if short:
+            issues.append(f"Insufficient stock for {len(short)} variant(s)")
+        if alerts["CRITICAL"]:
+            issues.append(f"{alerts['CRITICAL']} critical inventory alert(s) pending")
+        if not subprocesses["total"]:
+            issues.append("No subprocesses configured for this lot")
+        if subprocesses["invalid"]:
+            issues.append(f"{subprocesses['invalid']} subprocess(es) have invalid status")
+
+        ready_for_execution = (
+            status in ("draft", "ready", "planning") and not missing and not short
+        )
+        ready_for_finalization = (
+            status == "planning" and subprocesses["total"] > 0 and not alerts["CRITICAL"]
+        )
 
-            return len(missing) == 0, missing
+        if status in ("completed", "cancelled", "finalized"):
+            badge = "closed"
+        elif alerts["CRITICAL"] or short:
+            badge = "blocked"
+        elif missing or not subprocesses["total"] or subprocesses["invalid"]:
+            badge = "incomplete"
+        else:
+            badge = "ready"
+
+        return {
+            "lot_id": row["lot_id"],
+            "status": row["status"],
+            "created_by": row["created_by"],
+            "missing_or_groups": missing,
+            "subprocesses": subprocesses,
+            "alerts_by_severity": alerts,
+            "stock": {
+                "variants_required": int(row["variants_required"] or 0),
+                "variants_short": len(short),
+                "short_variant_ids": short,
+            },
+            "ready_for_execution": ready_for_execution,
+            "ready_for_finalization": ready_for_finalization,
+            "issues": issues,
+            "badge": badge,
+        }
+
+    @staticmethod
+    def validate_lot_readiness(lot_id: int) -> Tuple[bool, List[str]]:
+        """
+        Validate that lot is ready for execution (all OR groups have selections).
+
+        Args:
+            lot_id: The production lot
+
+        Returns:
+            Tuple of (is_ready, list_of_missing_groups)
+        """
+        report = ProductionService.evaluate_lots_readiness([lot_id]).get(lot_id)
+        if not report:
+            return False, ["Lot not found"]
+        missing = report["missing_or_groups"]
+        return len(missing) == 0, missing
 
     @staticmethod
     def calculate_lot_actual_cost(lot_id: int) -> float:
@@ -863,6 +1410,38 @@ class ProductionService:
             if not lot:
                 return 0
 
+            # Get selected variant costs
+            cur.execute(
+                """
+                SELECT selected_cost, selected_quantity
+                FROM production_lot_variant_selections
+                WHERE lot_id = %s
+            """,
+                (lot_id,),
+            )
+
+            selections = cur.fetchall()
+            selected_costs = [
+                float(sel["selected_cost"] or 0) * float(sel["selected_quantity"] or 0)
+                for sel in selections
+            ]
+
+            # Pinned lots read fixed, cost item and additional costs from the
+            # snapshot costed when their process version was frozen
+            version = (
+                ProcessVersionService.get_version(lot["process_version_id"], cur)
+                if lot.get("process_version_id")
+                else None
+            )
+            if version and version.get("cost_breakdown"):
+                components = ProcessVersionService.cost_components(version)
+                return (
+                    components["fixed_variants"]
+                    + sum(selected_costs)
+                    + components["cost_items"]
+                    + components["additional_costs"]
+                ) * lot["quantity"]
+
             # Get fixed variant costs (not in substitute groups)
             cur.execute(
                 """
@@ -889,22 +1468,6 @@ class ProductionService:
                         cost_info["worst_case_cost"] * float(variant["quantity"])
                     )
 
-            # Get selected variant costs
-            cur.execute(
-                """
-                SELECT selected_cost, selected_quantity
-                FROM production_lot_variant_selections
-                WHERE lot_id = %s
-            """,
-                (lot_id,),
-            )
-
-            selections = cur.fetchall()
-            selected_costs = [
-                float(sel["selected_cost"] or 0) * float(sel["selected_quantity"] or 0)
-                for sel in selections
-            ]
-
             # Get cost items and additional costs
             cur.execute(
                 """
@@ -1061,6 +1624,7 @@ class ProductionService:
                 )
 
             # Perform inventory deductions
+            StockLedgerService.tag(cur, StockLedgerService.PRODUCTION, lot_id)
             for deduction in deductions:
                 cur.execute(
                     """
@@ -1075,6 +1639,9 @@ class ProductionService:
                     deduction["stock_before"] - deduction["quantity"]
                 )
 
+            # Stock is now physically deducted; the lot's reservations are spent
+            StockReservationService.consume_for_lot(lot_id, cur)
+
             # Update lot status
             cur.execute(
                 """
@@ -1118,23 +1685,11 @@ class ProductionService:
 
         Raises ValueError if blocking alerts exist.
         """
-        from .inventory_alert_service import InventoryAlertService
+        readiness = ProductionService.evaluate_lots_readiness([lot_id]).get(lot_id)
+        if not readiness:
+            raise ValueError("Lot not found")
 
-        with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
-            conn,
-            cur,
-        ):
-            cur.execute(
-                "SELECT id, lot_number, status FROM production_lots WHERE id = %s",
-                (lot_id,),
-            )
-            lot = cur.fetchone()
-            if not lot:
-                raise ValueError("Lot not found")
-
-        summary = InventoryAlertService.get_production_lot_alert_summary(lot_id)
-        crit_pending = summary.get("alerts_by_severity", {}).get("CRITICAL", 0)
-        if crit_pending:
+        if readiness["alerts_by_severity"]["CRITICAL"]:
             raise ValueError(
                 "Critical inventory alerts pending. Please acknowledge before finalizing."
             )
@@ -1146,9 +1701,14 @@ class ProductionService:
                     UPDATE production_lots
                     SET status = 'finalized', finalized_at = CURRENT_TIMESTAMP
                     WHERE id = %s
+                    RETURNING lot_number
                     """,
                     (lot_id,),
                 )
+                row = cur.fetchone()
+                lot_number = row[0] if row else None
+                # A finalized lot is never executed: give its stock back
+                StockReservationService.release_for_lot(lot_id, cur)
                 conn.commit()
             except Exception as e:
                 # If the schema lacks finalized_at (older DB), fall back to updating status only
@@ -1165,16 +1725,21 @@ class ProductionService:
                     UPDATE production_lots
                     SET status = 'finalized'
                     WHERE id = %s
+                    RETURNING lot_number
                     """,
                     (lot_id,),
                 )
+                row = cur.fetchone()
+                lot_number = row[0] if row else None
+                # A finalized lot is never executed: give its stock back
+                StockReservationService.release_for_lot(lot_id, cur)
                 conn.commit()
 
         return {
             "lot_id": lot_id,
-            "lot_number": lot["lot_number"],
+            "lot_number": lot_number,
             "status": "finalized",
-            "alerts_summary": summary.get("alerts_by_severity"),
+            "alerts_summary": readiness["alerts_by_severity"],
             "finalized_at": datetime.utcnow().isoformat(),
         }
 
@@ -1202,6 +1767,8 @@ class ProductionService:
             )
 
             affected = cur.rowcount
+            if affected > 0:
+                StockReservationService.release_for_lot(lot_id, cur)
             conn.commit()
 
             if affected > 0 and reason:
@@ -1263,6 +1830,21 @@ class ProductionService:
             sql = f"UPDATE production_lots SET {', '.join(set_parts)} WHERE id = %s RETURNING *"
             cur.execute(sql, params)
             updated = cur.fetchone()
+
+            # Ready lots hold stock until executed; re-planning, cancelling,
+            # failing or closing the lot without executing it gives it back.
+            # Editing a Ready lot re-reserves its new size.
+            new_status = (updated.get("status") or "").lower()
+            if new_status == "ready":
+                StockReservationService.reserve_for_lot(lot_id, user_id, cur)
+            elif new_status in (
+                "planning",
+                "cancelled",
+                "failed",
+                "completed",
+                "finalized",
+            ):
+                StockReservationService.release_for_lot(lot_id, cur)
             conn.commit()
 
         # Normalize output using existing getter
@@ -1285,6 +1867,9 @@ class ProductionService:
             if lot["status"] in ("completed", "finalized"):
                 raise ValueError("Cannot delete a completed or finalized lot")
 
+            # Release reservations first; the ledger rows outlive the lot
+            StockReservationService.release_for_lot(lot_id, cur)
+
             # Perform hard delete to remove lot and cascade selections
             cur.execute("DELETE FROM production_lots WHERE id = %s", (lot_id,))
             affected = cur.rowcount
@@ -1357,4 +1942,11 @@ class ProductionService:
             "overrun_amount": variance if variance > 0 else 0,
             "selections": lot.get("selections", []),
             "actual_costing": lot.get("actual_costing", []),
+            "process_version_id": lot.get("process_version_id"),
+            # Per-unit estimate by cost type, from the frozen version
+            "estimated_breakdown": (
+                ProcessVersionService.cost_components(lot["process_version"])
+                if lot.get("process_version")
+                else None
+            ),
         }
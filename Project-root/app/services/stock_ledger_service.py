@@ -0,0 +1,130 @@
+"""
+Stock Ledger Service.
+
+item_variant.opening_stock holds each variant's current balance; a trigger
+appends every change to ``stock_movements`` together with the source that
+caused it (see migrations/migration_add_stock_movements.py). Writers call
+``tag`` before updating opening_stock so their movements are attributed;
+the tag lasts until the end of the transaction.
+
+Stock as of a past time is read from the variant's latest daily balance
+snapshot plus the movements recorded since the start of that day.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import database
+import psycopg2.extras
+
+
+class StockLedgerService:
+    """
+    Service for attributing and querying stock movements.
+    """
+
+    # Source types recorded by the application
+    RECEIPT = "receipt"
+    RECEIPT_REVERSAL = "receipt_reversal"
+    PRODUCTION = "production"
+    MANUAL_ADJUSTMENT = "manual_adjustment"
+    ITEM_EDIT = "item_edit"
+    IMPORT = "import"
+
+    @staticmethod
+    def tag(cur, source_type: str, source_id: Any = None) -> None:
+        """Attribute stock changes made later in this transaction."""
+        cur.execute(
+            "SELECT set_config('mtc.stock_source', %s, true),"
+            " set_config('mtc.stock_source_id', %s, true)",
+            (source_type, "" if source_id is None else str(source_id)),
+        )
+
+    @staticmethod
+    def _ledger_present(cur) -> bool:
+        cur.execute("SELECT to_regclass('stock_movements') IS NOT NULL")
+        row = cur.fetchone()
+        return bool(row[0] if not isinstance(row, dict) else next(iter(row.values())))
+
+    @staticmethod
+    def stock_as_of(
+        variant_ids: Iterable[int], as_of: datetime
+    ) -> Optional[Dict[int, Optional[int]]]:
+        """
+        Balances of variants at a point in time.
+
+        Returns:
+            variant_id -> balance (None before the ledger started), or None
+            when the ledger migration has not been applied
+        """
+        ids = sorted({int(v) for v in variant_ids})
+        with database.get_conn() as (conn, cur):
+            if not StockLedgerService._ledger_present(cur):
+                return None
+            if not ids:
+                return {}
+            cur.execute(
+                """
+                SELECT v.variant_id, s.balance + COALESCE(d.delta, 0)
+                FROM unnest(%(ids)s::int[]) AS v(variant_id)
+                LEFT JOIN LATERAL (
+                    SELECT snapshot_date, balance
+                    FROM stock_balance_snapshots
+                    WHERE variant_id = v.variant_id
+                      AND snapshot_date <= %(as_of)s::timestamptz::date
+                    ORDER BY snapshot_date DESC
+                    LIMIT 1
+                ) s ON true
+                LEFT JOIN LATERAL (
+                    SELECT SUM(delta) AS delta
+                    FROM stock_movements
+                    WHERE variant_id = v.variant_id
+                      AND created_at >= s.snapshot_date
+                      AND created_at <= %(as_of)s::timestamptz
+                ) d ON true
+                """,
+                {"ids": ids, "as_of": as_of},
+            )
+            return {
+                row[0]: int(row[1]) if row[1] is not None else None
+                for row in cur.fetchall()
+            }
+
+    @staticmethod
+    def movements(
+        variant_id: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Movements of a variant, newest first."""
+        conditions = ["variant_id = %s"]
+        params: List[Any] = [variant_id]
+        if since is not None:
+            conditions.append("created_at >= %s")
+            params.append(since)
+        if until is not None:
+            conditions.append("created_at <= %s")
+            params.append(until)
+        params.append(limit)
+
+        with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
+            conn,
+            cur,
+        ):
+            if not StockLedgerService._ledger_present(cur):
+                return []
+            cur.execute(
+                f"""
+                SELECT movement_id, variant_id, delta, balance_after,
+                       source_type, source_id, created_at
+                FROM stock_movements
+                WHERE {" AND ".join(conditions)}
+                ORDER BY created_at DESC, movement_id DESC
+                LIMIT %s
+                """,
+                params,
+            )
+            return [dict(row) for row in cur.fetchall()]
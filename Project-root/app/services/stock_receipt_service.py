@@ -0,0 +1,302 @@
+"""
+Stock Receipt Service.
+
+Posts the lines of a stock receipt as a few set-based statements instead
+of four statements per line: all stock_entries rows are inserted at once,
+and stock, purchase order lines and supplier rates are each updated once
+from the lines aggregated per variant (or item). Receipts with hundreds of
+lines therefore cost the same handful of round trips as small ones.
+
+Receipts are reversed the same way, any number at once: stock, PO
+received quantities and statuses, and supplier rates are restored by a
+fixed set of statements before the entries and receipts are deleted.
+
+Rows are locked in a fixed order (receipts, purchase orders, then variants,
+each by id) so concurrent postings and reversals cannot deadlock.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+# Receipt lines as a relation: variant, quantity and cost, in request order
+_LINES = """
+    unnest(%(variant_ids)s::int[], %(quantities)s::int[], %(costs)s::numeric[])
+        WITH ORDINALITY AS l(variant_id, quantity, cost, line_no)
+"""
+
+# Costed lines of the reversed receipts: the latest per supplier and item
+_REVERSED_RATES = """
+    SELECT DISTINCT ON (se.supplier_id, iv.item_id)
+           se.supplier_id, iv.item_id, se.entry_date, se.entry_id
+    FROM stock_entries se
+    JOIN item_variant iv ON iv.variant_id = se.variant_id
+    WHERE se.receipt_id = ANY(%(receipt_ids)s::int[])
+      AND se.supplier_id IS NOT NULL
+      AND se.cost_per_unit <> 0
+    ORDER BY se.supplier_id, iv.item_id, se.entry_date DESC, se.entry_id DESC
+"""
+
+_QUANTITY_PER_VARIANT = f"""
+    SELECT l.variant_id, SUM(l.quantity) AS quantity
+    FROM {_LINES}
+    GROUP BY l.variant_id
+"""
+
+
+class StockReceiptService:
+    """
+    Service posting stock receipt lines to stock, POs and supplier rates.
+    """
+
+    @staticmethod
+    def post_lines(
+        cur,
+        receipt_id: int,
+        supplier_id: int,
+        po_id: Optional[int],
+        items: Iterable[Dict[str, Any]],
+    ) -> int:
+        """
+        Record a receipt's lines and apply them.
+
+        Lines without a variant or quantity are skipped. When a receipt has
+        several costed lines for one item, the last one sets the supplier
+        rate. The purchase order's status is recalculated afterwards.
+
+        Returns:
+            Number of lines posted
+        """
+        lines = [
+            (item.get("variant_id"), item.get("quantity"), item.get("cost"))
+            for item in items
+            if item.get("variant_id") and item.get("quantity")
+        ]
+        if po_id:
+            cur.execute(
+                "SELECT po_id FROM purchase_orders WHERE po_id = %s FOR UPDATE",
+                (po_id,),
+            )
+        if lines:
+            params = {
+                "variant_ids": [line[0] for line in lines],
+                "quantities": [line[1] for line in lines],
+                "costs": [line[2] for line in lines],
+                "supplier_id": supplier_id,
+                "receipt_id": receipt_id,
+                "po_id": po_id,
+            }
+            cur.execute(
+                """
+                SELECT variant_id FROM item_variant
+                WHERE variant_id = ANY(%(variant_ids)s::int[])
+                ORDER BY variant_id
+                FOR UPDATE
+                """,
+                params,
+            )
+            cur.execute(
+                f"""
+                INSERT INTO stock_entries
+                    (variant_id, quantity_added, supplier_id, cost_per_unit, receipt_id)
+                SELECT l.variant_id, l.quantity, %(supplier_id)s, l.cost, %(receipt_id)s
+                FROM {_LINES}
+                ORDER BY l.line_no
+                """,
+                params,
+            )
+            cur.execute(
+                f"""
+                UPDATE item_variant iv
+                SET opening_stock = iv.opening_stock + d.quantity
+                FROM ({_QUANTITY_PER_VARIANT}) d
+                WHERE iv.variant_id = d.variant_id
+                """,
+                params,
+            )
+            if po_id:
+                cur.execute(
+                    f"""
+                    UPDATE purchase_order_items poi
+                    SET received_quantity =
+                        COALESCE(poi.received_quantity, 0) + d.quantity
+                    FROM ({_QUANTITY_PER_VARIANT}) d
+                    WHERE poi.po_id = %(po_id)s AND poi.variant_id = d.variant_id
+                    """,
+                    params,
+                )
+            if supplier_id:
+                cur.execute(
+                    f"""
+                    INSERT INTO supplier_item_rates (supplier_id, item_id, rate)
+                    SELECT DISTINCT ON (iv.item_id) %(supplier_id)s, iv.item_id, l.cost
+                    FROM {_LINES}
+                    JOIN item_variant iv ON iv.variant_id = l.variant_id
+                    WHERE l.cost <> 0
+                    ORDER BY iv.item_id, l.line_no DESC
+                    ON CONFLICT (supplier_id, item_id) DO UPDATE
+                    SET rate = EXCLUDED.rate
+                    """,
+                    params,
+                )
+        if po_id:
+            StockReceiptService.recalculate_po_status(cur, [po_id])
+        return len(lines)
+
+    @staticmethod
+    def recalculate_po_status(cur, po_ids: List[int]) -> None:
+        """
+        Set each purchase order's status from its received quantities:
+        Completed, Partially Received or Ordered.
+        """
+        cur.execute(
+            """
+            UPDATE purchase_orders po
+            SET status = CASE
+                WHEN t.received >= t.ordered THEN 'Completed'
+                WHEN t.received > 0 THEN 'Partially Received'
+                ELSE 'Ordered'
+            END
+            FROM (
+                SELECT po_id,
+                       SUM(quantity) AS ordered,
+                       SUM(COALESCE(received_quantity, 0)) AS received
+                FROM purchase_order_items
+                WHERE po_id = ANY(%s::int[])
+                GROUP BY po_id
+            ) t
+            WHERE po.po_id = t.po_id
+            """,
+            (list(po_ids),),
+        )
+
+    @staticmethod
+    def reverse(cur, receipt_ids: Iterable[int]) -> Dict[str, Any]:
+        """
+        Undo and delete receipts in one pass.
+
+        Stock and PO received quantities drop by what the receipts added,
+        and PO statuses are recalculated. A supplier rate set by a reversed
+        receipt falls back to the cost on that supplier's latest remaining
+        receipt for the item; it is left unchanged when there is none, or
+        when a later receipt has set it since.
+
+        If any receipt does not exist, nothing is changed.
+
+        Returns:
+            {"reversed": int, "entries": int, "missing": [receipt_id]}
+        """
+        ids = sorted({int(receipt_id) for receipt_id in receipt_ids})
+        params = {"receipt_ids": ids}
+        cur.execute(
+            """
+            SELECT receipt_id, po_id FROM stock_receipts
+            WHERE receipt_id = ANY(%(receipt_ids)s::int[])
+            ORDER BY receipt_id
+            FOR UPDATE
+            """,
+            params,
+        )
+        receipts = cur.fetchall()
+        found = {row[0] for row in receipts}
+        missing = [receipt_id for receipt_id in ids if receipt_id not in found]
+        if missing or not ids:
+            return {"reversed": 0, "entries": 0, "missing": missing}
+
+        po_ids = sorted({row[1] for row in receipts if row[1]})
+        if po_ids:
+            cur.execute(
+                """
+                SELECT po_id FROM purchase_orders
+                WHERE po_id = ANY(%s::int[])
+                ORDER BY po_id
+                FOR UPDATE
+                """,
+                (po_ids,),
+            )
+        cur.execute(
+            """
+            SELECT variant_id FROM item_variant
+            WHERE variant_id IN (
+                SELECT variant_id FROM stock_entries
+                WHERE receipt_id = ANY(%(receipt_ids)s::int[])
+            )
+            ORDER BY variant_id
+            FOR UPDATE
+            """,
+            params,
+        )
+
+        # Rates first: the reversed entries are still there to compare with
+        cur.execute(
+            f"""
+            WITH reversed AS ({_REVERSED_RATES}),
+            remaining AS (
+                SELECT DISTINCT ON (se.supplier_id, iv.item_id)
+                       se.supplier_id, iv.item_id, se.cost_per_unit,
+                       se.entry_date, se.entry_id
+                FROM stock_entries se
+                JOIN item_variant iv ON iv.variant_id = se.variant_id
+                JOIN reversed r
+                  ON r.supplier_id = se.supplier_id AND r.item_id = iv.item_id
+                WHERE (se.receipt_id IS NULL
+                       OR se.receipt_id <> ALL(%(receipt_ids)s::int[]))
+                  AND se.cost_per_unit <> 0
+                ORDER BY se.supplier_id, iv.item_id,
+                         se.entry_date DESC, se.entry_id DESC
+            )
+            UPDATE supplier_item_rates sir
+            SET rate = rem.cost_per_unit
+            FROM reversed rev
+            JOIN remaining rem
+              ON rem.supplier_id = rev.supplier_id AND rem.item_id = rev.item_id
+            WHERE sir.supplier_id = rev.supplier_id
+              AND sir.item_id = rev.item_id
+              AND (rev.entry_date, rev.entry_id) > (rem.entry_date, rem.entry_id)
+            """,
+            params,
+        )
+        cur.execute(
+            """
+            UPDATE item_variant iv
+            SET opening_stock = iv.opening_stock - d.quantity
+            FROM (
+                SELECT variant_id, SUM(quantity_added) AS quantity
+                FROM stock_entries
+                WHERE receipt_id = ANY(%(receipt_ids)s::int[])
+                GROUP BY variant_id
+            ) d
+            WHERE iv.variant_id = d.variant_id
+            """,
+            params,
+        )
+        if po_ids:
+            cur.execute(
+                """
+                UPDATE purchase_order_items poi
+                SET received_quantity =
+                    GREATEST(COALESCE(poi.received_quantity, 0) - d.quantity, 0)
+                FROM (
+                    SELECT sr.po_id, se.variant_id, SUM(se.quantity_added) AS quantity
+                    FROM stock_entries se
+                    JOIN stock_receipts sr ON sr.receipt_id = se.receipt_id
+                    WHERE se.receipt_id = ANY(%(receipt_ids)s::int[])
+                      AND sr.po_id IS NOT NULL
+                    GROUP BY sr.po_id, se.variant_id
+                ) d
+                WHERE poi.po_id = d.po_id AND poi.variant_id = d.variant_id
+                """,
+                params,
+            )
+        cur.execute(
+            "DELETE FROM stock_entries WHERE receipt_id = ANY(%(receipt_ids)s::int[])",
+            params,
+        )
+        entries = cur.rowcount
+        cur.execute(
+            "DELETE FROM stock_receipts WHERE receipt_id = ANY(%(receipt_ids)s::int[])",
+            params,
+        )
+        if po_ids:
+            StockReceiptService.recalculate_po_status(cur, po_ids)
+        return {"reversed": len(ids), "entries": entries, "missing": []}
@@ -0,0 +1,277 @@
+"""
+Stock Reservation Service for Universal Process Framework.
+
+Keeps a ledger of stock promised to production lots so that open lots no
+longer compete for the same on-hand quantity:
+
+- a lot reserves its exploded requirements when it moves to Ready
+- executing the lot consumes its reservations
+- cancelling, deleting or moving the lot back to Planning releases them,
+  as does finalizing or completing it without executing it
+
+Available-to-promise (on-hand minus active reservations) is served from the
+``variant_stock_availability`` view. Every method degrades to plain
+``opening_stock`` when the reservation migration has not been applied.
+
+Methods accept an optional cursor so the ledger update can share the
+caller's transaction; without one they open (and commit) their own.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import database
+import psycopg2.extras
+
+ACTIVE = "active"
+CONSUMED = "consumed"
+RELEASED = "released"
+
+
+def _first_value(row: Any) -> Any:
+    """Return the first column of a row from any cursor factory."""
+    if row is None:
+        return None
+    if isinstance(row, dict):
+        return next(iter(row.values()), None)
+    return row[0]
+
+
+class StockReservationService:
+    """
+    Service for reserving, consuming and releasing stock for production lots.
+    """
+
+    @staticmethod
+    def _ledger_present(cur) -> bool:
+        cur.execute("SELECT to_regclass('stock_reservations') IS NOT NULL")
+        return bool(_first_value(cur.fetchone()))
+
+    @staticmethod
+    def explode_lots_sql(cur, selection_columns: Optional[Iterable[str]] = None) -> str:
+        """Build the requirement explosion for a set of lots.
+
+        The returned query reads a CTE named ``lot`` (id, process_id, qty)
+        that the caller defines, and yields one (lot_id, variant_id, qty) row
+        per fixed variant_usage and per OR-group selection, scaled by lot
+        quantity. Handles both production_lot_variant_selections schemas;
+        pass ``selection_columns`` when the caller already probed them.
+        """
+        if selection_columns is None:
+            cur.execute(
+                """
+                SELECT column_name FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = %s
+                """,
+                ("production_lot_variant_selections",),
+            )
+            cols = {_first_value(r) for r in cur.fetchall()}
+        else:
+            cols = set(selection_columns)
+
+        if "variant_usage_id" in cols:
+            selections = """
+                SELECT lot.id AS lot_id, vu.variant_id,
+                       COALESCE(pls.quantity_override, vu.quantity) * lot.qty AS qty
+                FROM lot
+                JOIN production_lot_variant_selections pls ON pls.lot_id = lot.id
+                JOIN variant_usage vu ON vu.id = pls.variant_usage_id
+            """
+        elif "selected_variant_id" in cols:
+            selections = """
+                SELECT lot.id AS lot_id, pls.selected_variant_id AS variant_id,
+                       COALESCE(pls.selected_quantity, 1) * lot.qty AS qty
+                FROM lot
+                JOIN production_lot_variant_selections pls ON pls.lot_id = lot.id
+            """
+        else:
+            selections = None
+
+        union = f"UNION ALL {selections}" if selections else ""
+        return f"""
+            SELECT lot.id AS lot_id, vu.variant_id, vu.quantity * lot.qty AS qty
+            FROM lot
+            JOIN process_subprocesses ps ON ps.process_id = lot.process_id
+            JOIN variant_usage vu ON vu.process_subprocess_id = ps.id
+            WHERE vu.substitute_group_id IS NULL
+            {union}
+        """
+
+    @staticmethod
+    def reserve_for_lot(
+        lot_id: int, user_id: Optional[int] = None, cur=None
+    ) -> List[Dict[str, Any]]:
+        """
+        Reserve the lot's requirements, replacing any active reservation.
+
+        Args:
+            lot_id: The production lot
+            user_id: User recorded on the reservation rows
+            cur: Optional cursor to run inside the caller's transaction
+
+        Returns:
+            List of {variant_id, quantity} reserved
+        """
+        if cur is None:
+            with database.get_conn(
+                cursor_factory=psycopg2.extras.RealDictCursor
+            ) as (conn, cur):
+                reserved = StockReservationService.reserve_for_lot(
+                    lot_id, user_id, cur
+                )
+                conn.commit()
+            return reserved
+
+        if not StockReservationService._ledger_present(cur):
+            return []
+
+        explode_sql = StockReservationService.explode_lots_sql(cur)
+        StockReservationService._close(cur, lot_id, RELEASED)
+        cur.execute(
+            f"""
+            WITH lot AS (
+                SELECT id, process_id, COALESCE(quantity, 1) AS qty
+                FROM production_lots
+                WHERE id = %s
+            )
+            INSERT INTO stock_reservations (lot_id, variant_id, quantity, created_by)
+            SELECT %s, req.variant_id, SUM(req.qty), %s
+            FROM ({explode_sql}) req
+            WHERE req.variant_id IS NOT NULL
+            GROUP BY req.variant_id
+            HAVING SUM(req.qty) > 0
+            RETURNING variant_id, quantity
+            """,
+            (lot_id, lot_id, user_id),
+        )
+        rows = cur.fetchall()
+        return [
+            {"variant_id": int(r["variant_id"]), "quantity": float(r["quantity"])}
+            for r in rows
+        ]
+
+    @staticmethod
+    def consume_for_lot(lot_id: int, cur=None) -> int:
+        """Mark the lot's active reservations as consumed (lot executed)."""
+        return StockReservationService._close_for_lot(lot_id, CONSUMED, cur)
+
+    @staticmethod
+    def release_for_lot(lot_id: int, cur=None) -> int:
+        """Release the lot's active reservations (cancel, delete, re-plan)."""
+        return StockReservationService._close_for_lot(lot_id, RELEASED, cur)
+
+    @staticmethod
+    def release_for_lots(lot_ids: List[int], cur) -> int:
+        """Release active reservations of many lots in one statement."""
+        if not lot_ids or not StockReservationService._ledger_present(cur):
+            return 0
+        cur.execute(
+            """
+            UPDATE stock_reservations
+            SET status = 'released', closed_at = CURRENT_TIMESTAMP
+            WHERE lot_id = ANY(%s) AND status = 'active'
+            """,
+            (list(lot_ids),),
+        )
+        return cur.rowcount
+
+    @staticmethod
+    def _close_for_lot(lot_id: int, status: str, cur=None) -> int:
+        if cur is None:
+            with database.get_conn() as (conn, cur):
+                closed = StockReservationService._close_for_lot(lot_id, status, cur)
+                conn.commit()
+            return closed
+
+        if not StockReservationService._ledger_present(cur):
+            return 0
+        return StockReservationService._close(cur, lot_id, status)
+
+    @staticmethod
+    def _close(cur, lot_id: int, status: str) -> int:
+        cur.execute(
+            """
+            UPDATE stock_reservations
+            SET status = %s, closed_at = CURRENT_TIMESTAMP
+            WHERE lot_id = %s AND status = 'active'
+            """,
+            (status, lot_id),
+        )
+        return cur.rowcount
+
+    @staticmethod
+    def get_availability(
+        variant_ids: Iterable[int], exclude_lot_id: Optional[int] = None, cur=None
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Available-to-promise stock for a set of variants.
+
+        Args:
+            variant_ids: Variants to look up
+            exclude_lot_id: Ignore this lot's own reservations (re-evaluating
+                a lot should not count stock already promised to it)
+            cur: Optional cursor
+
+        Returns:
+            Mapping variant_id -> {on_hand, reserved, available_to_promise, threshold}
+        """
+        ids = sorted({int(v) for v in variant_ids if v is not None})
+        if not ids:
+            return {}
+
+        if cur is None:
+            with database.get_conn(
+                cursor_factory=psycopg2.extras.RealDictCursor
+            ) as (conn, cur):
+                return StockReservationService.get_availability(
+                    ids, exclude_lot_id, cur
+                )
+
+        cur.execute("SELECT to_regclass('variant_stock_availability') IS NOT NULL")
+        if _first_value(cur.fetchone()):
+            cur.execute(
+                """
+                SELECT
+                    a.variant_id,
+                    a.on_hand,
+                    a.reserved - COALESCE(own.quantity, 0) AS reserved,
+                    a.available_to_promise + COALESCE(own.quantity, 0)
+                        AS available_to_promise,
+                    a.threshold
+                FROM variant_stock_availability a
+                LEFT JOIN (
+                    SELECT variant_id, SUM(quantity) AS quantity
+                    FROM stock_reservations
+                    WHERE status = 'active' AND lot_id = %s
+                    GROUP BY variant_id
+                ) own ON own.variant_id = a.variant_id
+                WHERE a.variant_id = ANY(%s)
+                """,
+                (exclude_lot_id, ids),
+            )
+        else:
+            cur.execute(
+                """
+                SELECT
+                    variant_id,
+                    opening_stock AS on_hand,
+                    0 AS reserved,
+                    opening_stock AS available_to_promise,
+                    threshold
+                FROM item_variant
+                WHERE variant_id = ANY(%s)
+                """,
+                (ids,),
+            )
+
+        availability = {}
+        for row in cur.fetchall():
+            row = dict(row)
+            availability[int(row["variant_id"])] = {
+                "on_hand": float(row["on_hand"] or 0),
+                "reserved": float(row["reserved"] or 0),
+                "available_to_promise": float(row["available_to_promise"] or 0),
+                "threshold": float(row["threshold"] or 0),
+            }
+        return availability
@@ -0,0 +1,126 @@
+"""
+Stock Rollup Service.
+
+Stock received over time (the dashboard trend and supplier/variant
+analytics) is read from ``stock_daily_rollups``, which triggers on
+stock_entries keep current (see migrations/migration_add_stock_daily_rollups.py).
+A year of daily history is at most 365 rows per variant and supplier, and
+week/month buckets are summed from those days.
+
+Without the migration the same figures are computed from stock_entries
+with a range predicate on entry_date.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import database
+
+# granularity -> generate_series step
+GRANULARITIES = {"day": "1 day", "week": "1 week", "month": "1 month"}
+
+# Upper bound on returned buckets (ten years of days)
+MAX_BUCKETS = 3660
+
+
+def _bucket_count(start: date, end: date, granularity: str) -> int:
+    days = (end - start).days + 1
+    if granularity == "week":
+        return days // 7 + 2
+    if granularity == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return days
+
+
+class StockRollupService:
+    """
+    Service for stock receipt trends over date ranges.
+    """
+
+    @staticmethod
+    def _rollups_present(cur) -> bool:
+        cur.execute("SELECT to_regclass('stock_daily_rollups') IS NOT NULL")
+        return bool(cur.fetchone()[0])
+
+    @staticmethod
+    def trend(
+        start: date,
+        end: date,
+        granularity: str = "day",
+        supplier_id: Optional[int] = None,
+        variant_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Quantity and amount received per bucket between two dates
+        (inclusive), with empty buckets reported as zero.
+
+        Returns:
+            [{"bucket": date, "quantity": float, "amount": float}]
+
+        Raises:
+            ValueError: On an unknown granularity or an inverted/oversized range
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        if start > end:
+            raise ValueError("start must not be after end")
+        if _bucket_count(start, end, granularity) > MAX_BUCKETS:
+            raise ValueError(
+                f"Range too large for granularity '{granularity}' "
+                f"(at most {MAX_BUCKETS} points)"
+            )
+
+        params: Dict[str, Any] = {
+            "granularity": granularity,
+            "step": GRANULARITIES[granularity],
+            "start": start,
+            "end": end,
+            "supplier_id": supplier_id,
+            "variant_id": variant_id,
+        }
+
+        with database.get_conn() as (conn, cur):
+            if StockRollupService._rollups_present(cur):
+                totals = """
+                    SELECT date_trunc(%(granularity)s, day)::date AS bucket,
+                           SUM(quantity) AS quantity, SUM(amount) AS amount
+                    FROM stock_daily_rollups
+                    WHERE day BETWEEN %(start)s AND %(end)s
+                      AND (%(supplier_id)s::int IS NULL OR supplier_id = %(supplier_id)s)
+                      AND (%(variant_id)s::int IS NULL OR variant_id = %(variant_id)s)
+                    GROUP BY 1
+                """
+            else:
+                totals = """
+                    SELECT date_trunc(%(granularity)s, entry_date)::date AS bucket,
+                           SUM(quantity_added) AS quantity,
+                           SUM(quantity_added * COALESCE(cost_per_unit, 0)) AS amount
+                    FROM stock_entries
+                    WHERE entry_date >= %(start)s::date
+                      AND entry_date < %(end)s::date + 1
+                      AND (%(supplier_id)s::int IS NULL OR supplier_id = %(supplier_id)s)
+                      AND (%(variant_id)s::int IS NULL OR variant_id = %(variant_id)s)
+                    GROUP BY 1
+                """
+            cur.execute(
+                f"""
+                WITH totals AS ({totals})
+                SELECT s.bucket::date,
+                       COALESCE(t.quantity, 0),
+                       COALESCE(t.amount, 0)
+                FROM generate_series(
+                    date_trunc(%(granularity)s, %(start)s::date),
+                    %(end)s::date,
+                    %(step)s::interval
+                ) AS s(bucket)
+                LEFT JOIN totals t ON t.bucket = s.bucket::date
+                ORDER BY 1
+                """,
+                params,
+            )
+            return [
+                {"bucket": row[0], "quantity": float(row[1]), "amount": float(row[2])}
+                for row in cur.fetchall()
+            ]
@@ -20,6 +20,25 @@ import database
 import psycopg2.extras
 
 from ..models.process import CostItem, Subprocess, SubstituteGroup, VariantUsage
+from ..utils.text_search import (
+    HEADLINE_OPTIONS,
+    TS_CONFIG,
+    prefix_tsquery,
+    search_vector_sql,
+)
+
+# Columns returned by the subprocess library search
+SEARCH_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "category",
+    "estimated_time_minutes",
+    "created_at",
+    "updated_at",
+)
+# Matches the GIN expression index idx_subprocesses_search
+SUBPROCESS_SEARCH_VECTOR = search_vector_sql("s.name", "s.description")
 
 
 class SubprocessService:
@@ -210,6 +229,67 @@ class SubprocessService:
             },
         }
 
+    @staticmethod
+    def search_subprocesses(
+        query: str, subprocess_type: Optional[str] = None, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        Full-text search of the subprocess library by name and description.
+
+        Every word matches as a prefix; results are ranked (name matches
+        first) and carry ``<mark>`` highlighted name and description. The
+        search always runs on the indexed query, never on the per-worker
+        subprocess cache: it stems words and only sees live rows.
+
+        Args:
+            query: Search query
+            subprocess_type: Filter by subprocess type/category
+            limit: Maximum results
+
+        Returns:
+            Matching subprocesses, best first
+        """
+        tsquery = prefix_tsquery(query)
+        if tsquery is None:
+            return []
+
+        type_filter = ""
+        params: List[Any] = [HEADLINE_OPTIONS, HEADLINE_OPTIONS, tsquery]
+        if subprocess_type:
+            type_filter = "AND s.category = %s"
+            params.append(subprocess_type)
+        params += [limit, tsquery]
+
+        with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
+            conn,
+            cur,
+        ):
+            cur.execute(
+                f"""
+                SELECT
+                    ranked.*,
+                    ts_headline('{TS_CONFIG}', ranked.name, q, %s) as name_highlight,
+                    ts_headline('{TS_CONFIG}', coalesce(ranked.description, ''), q, %s)
+                        as description_highlight
+                FROM (
+                    SELECT
+                        {", ".join(f"s.{field}" for field in SEARCH_FIELDS)},
+                        ts_rank_cd({SUBPROCESS_SEARCH_VECTOR}, q) as rank
+                    FROM subprocesses s, to_tsquery('{TS_CONFIG}', %s) q
+                    WHERE s.is_deleted = FALSE
+                      AND {SUBPROCESS_SEARCH_VECTOR} @@ q
+                      {type_filter}
+                    ORDER BY rank DESC, s.name
+                    LIMIT %s
+                ) ranked, to_tsquery('{TS_CONFIG}', %s) q
+                ORDER BY ranked.rank DESC, ranked.name
+            """,
+                params,
+            )
+            results = cur.fetchall()
+
+        return [dict(row) for row in results]
+
     @staticmethod
     def update_subprocess(
         subprocess_id: int,
@@ -278,6 +358,8 @@ class SubprocessService:
         if not subprocess_data:
             return None
 
+        SubprocessService.invalidate_cache()
+
         subprocess = Subprocess(subprocess_data)
         return subprocess.to_dict()
 
@@ -316,6 +398,8 @@ class SubprocessService:
             affected = cur.rowcount
             conn.commit()
 
+        if affected:
+            SubprocessService.invalidate_cache()
         return affected > 0
 
     @staticmethod
@@ -364,6 +448,7 @@ class SubprocessService:
             new_subprocess = cur.fetchone()
             conn.commit()
 
+        SubprocessService.invalidate_cache()
         subprocess = Subprocess(new_subprocess)
         return subprocess.to_dict()
 
@@ -0,0 +1,74 @@
+"""
+Supplier Directory.
+
+The supplier listing shows every supplier with its number of contacts.
+It is built with one aggregated query (contacts counted per supplier in a
+single pass, not one query per supplier) and kept in the master data
+cache, versioned on suppliers and supplier_contacts (see
+migrations/migration_add_supplier_directory_versions.py). Search and
+pagination filter the cached list, so a listing request usually does not
+touch the database.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from .master_data_cache import MasterDataCache
+
+TABLES = ("suppliers", "supplier_contacts")
+
+
+class SupplierDirectory:
+    """
+    Cached listing of live suppliers with their contact counts.
+    """
+
+    @staticmethod
+    def _load(cur) -> List[Dict[str, Any]]:
+        cur.execute(
+            """
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'suppliers' AND column_name = 'deleted_at'
+            """
+        )
+        live = "WHERE s.deleted_at IS NULL" if cur.fetchone() else ""
+        cur.execute(
+            f"""
+            SELECT s.*, COALESCE(c.contact_count, 0) AS contact_count
+            FROM suppliers s
+            LEFT JOIN (
+                SELECT supplier_id, COUNT(*) AS contact_count
+                FROM supplier_contacts
+                GROUP BY supplier_id
+            ) c ON c.supplier_id = s.supplier_id
+            {live}
+            ORDER BY s.firm_name
+            """
+        )
+        columns = [column[0] for column in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    @staticmethod
+    def invalidate() -> None:
+        """Drop this worker's copy (after writing suppliers or contacts)."""
+        MasterDataCache.invalidate("suppliers")
+
+    @staticmethod
+    def search(ttl: float, q: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Suppliers ordered by firm name, optionally those whose firm name or
+        GSTIN contains ``q`` (case-insensitive).
+        """
+        suppliers = MasterDataCache.get(
+            "suppliers:directory", TABLES, SupplierDirectory._load, ttl
+        ).value
+        if not q:
+            return suppliers
+        term = q.lower()
+        return [
+            s
+            for s in suppliers
+            if term in (s.get("firm_name") or "").lower()
+            or term in (s.get("gstin") or "").lower()
+        ]
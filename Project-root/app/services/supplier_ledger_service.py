@@ -0,0 +1,144 @@
+"""
+Supplier Ledger Service.
+
+The supplier_ledger view unions purchase orders and receipt lines at read
+time, so every page re-sorts the supplier's whole history. Where
+migrations/migration_add_supplier_ledger_entries.py has been applied the
+ledger is read from ``supplier_ledger_entries`` instead: the same rows kept
+up to date by triggers, indexed in ledger order, and carrying each
+supplier's running received quantity and amount. Pages are read straight
+off the index and the unfiltered total comes from ``supplier_ledger_totals``.
+
+Cursors are interchangeable with those of the view: both encode
+(event_date, event_type, event_id, stock_entry_id or 0).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.pagination import count_rows, encode_cursor, keyset_condition, order_by
+
+SORT_KEYS = (
+    ("event_date", "DESC"),
+    ("event_type", "DESC"),
+    ("event_id", "DESC"),
+    ("stock_entry_id", "DESC"),
+)
+
+# Columns of a ledger row, in output order
+COLUMNS = (
+    "event_date",
+    "event_type",
+    "event_id",
+    "reference_number",
+    "receipt_id",
+    "NULLIF(stock_entry_id, 0) AS stock_entry_id",
+    "variant_id",
+    "quantity",
+    "cost_per_unit",
+    "po_status",
+    "notes",
+    "amount",
+    "balance_quantity",
+    "balance_amount",
+)
+
+
+class SupplierLedgerService:
+    """
+    Service reading the materialized supplier ledger.
+    """
+
+    @staticmethod
+    def present(cur) -> bool:
+        cur.execute("SELECT to_regclass('supplier_ledger_entries') IS NOT NULL")
+        return bool(cur.fetchone()[0])
+
+    @staticmethod
+    def total(cur, supplier_id: int) -> int:
+        """Number of ledger rows of a supplier."""
+        cur.execute(
+            "SELECT event_count FROM supplier_ledger_totals WHERE supplier_id = %s",
+            (supplier_id,),
+        )
+        row = cur.fetchone()
+        return int(row[0]) if row is not None else 0
+
+    @staticmethod
+    def page(
+        cur,
+        supplier_id: int,
+        count: str,
+        per_page: int,
+        offset: int = 0,
+        after: Optional[List[Any]] = None,
+        variant_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+        """
+        One page of a supplier's ledger, newest first.
+
+        Pages resume after the ``after`` key when given, else at ``offset``.
+
+        Returns:
+            (rows, total per ``count``, next cursor or None)
+
+        Raises:
+            ValueError: If ``after`` does not match the sort key
+        """
+        conditions = ["supplier_id = %s"]
+        params: List[Any] = [supplier_id]
+        if variant_id is not None:
+            conditions.append("variant_id = %s")
+            params.append(variant_id)
+        if start_date:
+            conditions.append("event_date >= %s")
+            params.append(start_date)
+        if end_date:
+            conditions.append("event_date <= %s")
+            params.append(end_date)
+        where_sql = " AND ".join(conditions)
+
+        filtered = len(conditions) > 1
+        if count == "exact" and not filtered:
+            total = SupplierLedgerService.total(cur, supplier_id)
+        else:
+            total = count_rows(
+                cur,
+                count,
+                f"SELECT 1 FROM supplier_ledger_entries WHERE {where_sql}",
+                params,
+            )
+
+        page_params = list(params)
+        if after is not None:
+            condition, cursor_params = keyset_condition(SORT_KEYS, after)
+            where_sql += " AND " + condition
+            page_params += cursor_params
+            offset = 0
+        cur.execute(
+            f"""
+            SELECT {", ".join(COLUMNS)}
+            FROM supplier_ledger_entries
+            WHERE {where_sql}
+            ORDER BY {order_by(SORT_KEYS)}
+            LIMIT %s OFFSET %s
+            """,
+            tuple(page_params + [per_page + 1, offset]),
+        )
+        rows = [dict(row) for row in cur.fetchall()]
+        next_cursor = None
+        if len(rows) > per_page:
+            rows = rows[:per_page]
+            last = rows[-1]
+            next_cursor = encode_cursor(
+                [
+                    last["event_date"],
+                    last["event_type"],
+                    last["event_id"],
+                    last["stock_entry_id"] or 0,
+                ]
+            )
+        return rows, total, next_cursor
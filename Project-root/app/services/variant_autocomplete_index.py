@@ -0,0 +1,534 @@
+"""
+In-process autocomplete index for the variant catalog.
+
+Serves /variants/select2 from memory so that typing in a variant dropdown
+does not cost a database round-trip per keystroke. Each worker process
+builds its own index in a background thread at start-up and keeps it fresh
+from the ``variant_catalog`` NOTIFY channel (see
+migration_add_variant_catalog_notify).
+
+Layout is array-backed and append-only:
+
+- every variant occupies a slot; slot-indexed arrays hold the variant id,
+  item id, a liveness flag, the lowercased search document and the display
+  row
+- a trigram -> slots posting array answers substring terms (3+ characters)
+- documents kept sorted (item, color, size) answer the unfiltered pages
+- a change tombstones the variant's old slot and appends a new one; the
+  index compacts itself once enough slots are dead
+
+``search`` returns None whenever the database should answer instead: the
+index is still loading, the listener lost its connection, the NOTIFY feed
+is not installed (the index would go stale), the query is one or two
+characters (matched at the start of any word, see VariantSearchService),
+or nothing matched (the database path adds typo-tolerant similarity
+matching).
+
+Results match the database path's but are not always in the same order:
+
+- ranked terms order by match tier (the document starts with the query,
+  a word starts with the first term, substring) and then by document,
+  where the database orders by word similarity and then item, color and
+  size name
+- unfiltered pages order by the lowercased document (item, color, size,
+  model, brand), where the database compares the names column by column,
+  so items whose names prefix one another can interleave differently
+
+Pages from the index continue by offset and never mix with database
+cursors, so a listing is consistent from its first page to its last.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import logging
+import select
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import database
+import psycopg2.extras
+
+from .variant_read_model import VariantReadModel
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "variant_catalog"
+
+# Display fields stored per slot, in select2 row order
+FIELDS = (
+    "text",
+    "item_name",
+    "color",
+    "size",
+    "model",
+    "brand",
+    "quantity",
+    "unit",
+    "reorder_level",
+    "available",
+)
+
+# Same limits as VariantSearchService
+MAX_TERMS = 6
+MIN_TRIGRAM_LENGTH = 3
+
+# Compact once this many slots, and this share of all slots, are dead
+COMPACT_MIN_DEAD = 1000
+COMPACT_RATIO = 0.25
+
+LOAD_BATCH_SIZE = 10000
+
+
+def _document(item, color, size, model, brand) -> str:
+    return " ".join(p for p in (item, color, size, model, brand) if p).lower()
+
+
+def _contains(doc: str, token: str) -> bool:
+    """Substring match, or word-prefix match for tokens too short for a trigram."""
+    if len(token) >= MIN_TRIGRAM_LENGTH:
+        return token in doc
+    return doc.startswith(token) or (" " + token) in doc
+
+
+def _grams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2) if " " not in text[i : i + 3]}
+
+
+class VariantAutocompleteIndex:
+    """
+    Memory-resident trigram/prefix index over variant display names.
+    """
+
+    def __init__(self, poll_interval: float = 5.0, retry_interval: float = 10.0):
+        """
+        Args:
+            poll_interval: Seconds to wait for notifications per loop
+            retry_interval: Seconds to wait before reconnecting the listener
+        """
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self.running = False
+        self.ready = False
+        self.listener_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._install(self._empty())
+
+    # ------------------------------------------------------------------
+    # Structure
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        return {
+            "ids": array("i"),
+            "item_ids": array("i"),
+            "alive": bytearray(),
+            "docs": [],
+            "rows": [],
+            "grams": {},
+            "slot_of": {},
+            "sorted_docs": [],
+            "sorted_slots": array("i"),
+            "dead": 0,
+        }
+
+    def _install(self, state: Dict[str, Any]) -> None:
+        self._ids = state["ids"]
+        self._item_ids = state["item_ids"]
+        self._alive = state["alive"]
+        self._docs = state["docs"]
+        self._rows = state["rows"]
+        self._grams = state["grams"]
+        self._slot_of = state["slot_of"]
+        self._sorted_docs = state["sorted_docs"]
+        self._sorted_slots = state["sorted_slots"]
+        self._dead = state["dead"]
+
+    @staticmethod
+    def _build(entries: Iterable[Tuple[int, int, tuple]]) -> Dict[str, Any]:
+        """Build a fresh structure from (variant_id, item_id, row) entries."""
+        state = VariantAutocompleteIndex._empty()
+        keyed = []
+        for variant_id, item_id, row in entries:
+            slot = len(state["ids"])
+            doc = _document(*row[1:6])
+            state["ids"].append(variant_id)
+            state["item_ids"].append(item_id)
+            state["alive"].append(1)
+            state["docs"].append(doc)
+            state["rows"].append(row)
+            state["slot_of"][variant_id] = slot
+            for gram in _grams(doc):
+                state["grams"].setdefault(gram, array("i")).append(slot)
+            keyed.append((doc, slot))
+        keyed.sort()
+        state["sorted_docs"] = [doc for doc, _ in keyed]
+        state["sorted_slots"] = array("i", (slot for _, slot in keyed))
+        return state
+
+    def load(self, entries: Iterable[Tuple[int, int, tuple]]) -> None:
+        """Replace the whole index."""
+        state = self._build(entries)
+        with self._lock:
+            self._install(state)
+        logger.info("Variant autocomplete index loaded: %d variants", len(state["ids"]))
+
+    def apply(self, changes: Dict[int, Optional[Tuple[int, tuple]]]) -> None:
+        """
+        Apply changed variants.
+
+        Args:
+            changes: variant_id -> (item_id, row), or None if the variant is
+                gone (deleted, soft-deleted or its item soft-deleted)
+        """
+        with self._lock:
+            for variant_id, entry in changes.items():
+                old = self._slot_of.pop(variant_id, None)
+                if old is not None:
+                    self._alive[old] = 0
+                    self._dead += 1
+                if entry is None:
+                    continue
+                item_id, row = entry
+                slot = len(self._ids)
+                doc = _document(*row[1:6])
+                self._ids.append(variant_id)
+                self._item_ids.append(item_id)
+                self._alive.append(1)
+                self._docs.append(doc)
+                self._rows.append(row)
+                self._slot_of[variant_id] = slot
+                # Slots only grow, so posting arrays stay ascending
+                for gram in _grams(doc):
+                    self._grams.setdefault(gram, array("i")).append(slot)
+                pos = bisect.bisect_right(self._sorted_docs, doc)
+                self._sorted_docs.insert(pos, doc)
+                self._sorted_slots.insert(pos, slot)
+
+            needs_compaction = (
+                self._dead >= COMPACT_MIN_DEAD
+                and self._dead >= COMPACT_RATIO * len(self._ids)
+            )
+        if needs_compaction:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rebuild without tombstoned slots."""
+        with self._lock:
+            live = [
+                (self._ids[s], self._item_ids[s], self._rows[s])
+                for s in range(len(self._ids))
+                if self._alive[s]
+            ]
+        state = self._build(live)
+        with self._lock:
+            self._install(state)
+
+    def variant_ids_for_items(self, item_ids: Set[int]) -> Set[int]:
+        """Live variants currently indexed under the given items."""
+        with self._lock:
+            return {
+                self._ids[s]
+                for s in range(len(self._ids))
+                if self._alive[s] and self._item_ids[s] in item_ids
+            }
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(
+        self, term: str, offset: int = 0, limit: int = 30
+    ) -> Optional[Tuple[List[Dict[str, Any]], bool]]:
+        """
+        Search the catalog like /variants/select2 does.
+
+        Args:
+            term: Raw search text
+            offset: Rows to skip
+            limit: Page size
+
+        Returns:
+            (rows, more), or None when the database should answer instead
+        """
+        if not self.ready:
+            return None
+        term = (term or "").strip().lower()
+        wanted = offset + limit + 1
+
+        if term and len(term) < MIN_TRIGRAM_LENGTH:
+            return None
+
+        with self._lock:
+            if not term:
+                slots = list(self._ordered_slots(wanted))
+            else:
+                slots = self._ranked_slots(term, wanted)
+            if term and not slots:
+                return None
+            page = slots[offset : offset + limit]
+            rows = [
+                {"id": self._ids[s], **dict(zip(FIELDS, self._rows[s]))} for s in page
+            ]
+        return rows, len(slots) > offset + limit
+
+    def _ordered_slots(self, wanted: int) -> Iterator[int]:
+        """Live slots in (item, color, size) order."""
+        pos = 0
+        found = 0
+        while pos < len(self._sorted_docs) and found < wanted:
+            slot = self._sorted_slots[pos]
+            pos += 1
+            if self._alive[slot]:
+                found += 1
+                yield slot
+
+    def _ranked_slots(self, term: str, wanted: int) -> List[int]:
+        """Slots containing every term (short ones at a word start), best first."""
+        tokens: List[str] = []
+        for t in term.split():
+            if t not in tokens:
+                tokens.append(t)
+        tokens = tokens[:MAX_TERMS]
+
+        postings = []
+        for token in tokens:
+            for gram in _grams(token):
+                posting = self._grams.get(gram)
+                if posting is None:
+                    return []
+                postings.append(posting)
+        if not postings:
+            return []
+
+        # Drive from the rarest trigram, verify the rest by substring
+        candidates = min(postings, key=len)
+        first_word = " " + tokens[0]
+        matches = []
+        for slot in candidates:
+            if not self._alive[slot]:
+                continue
+            doc = self._docs[slot]
+            if all(_contains(doc, t) for t in tokens):
+                if doc.startswith(term):
+                    tier = 0
+                elif (" " + doc).find(first_word) >= 0:
+                    tier = 1
+                else:
+                    tier = 2
+                matches.append((tier, doc, slot))
+        return [m[2] for m in heapq.nsmallest(wanted, matches)]
+
+    # ------------------------------------------------------------------
+    # Loading and change feed
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def fetch(
+        variant_ids: Optional[Iterable[int]] = None,
+    ) -> Iterator[Tuple[int, int, tuple]]:
+        """
+        Read catalog rows as (variant_id, item_id, row) entries.
+
+        Args:
+            variant_ids: Restrict to these variants (default: whole catalog,
+                streamed through a server-side cursor)
+        """
+        with database.get_conn(cursor_factory=psycopg2.extras.DictCursor) as (
+            conn,
+            cur,
+        ):
+            cur.execute("SELECT to_regclass('variant_stock_availability')")
+            if cur.fetchone()[0]:
+                atp_column = "vsa.available_to_promise"
+                atp_join = "LEFT JOIN variant_stock_availability vsa ON vsa.variant_id = vr.variant_id"
+            else:
+                atp_column = "vr.opening_stock"
+                atp_join = ""
+            source = VariantReadModel.source(cur)
+
+            params: List[Any] = []
+            variant_filter = ""
+            rows_cur = cur
+            if variant_ids is not None:
+                variant_filter = "AND vr.variant_id = ANY(%s)"
+                params.append(sorted(set(variant_ids)))
+            else:
+                rows_cur = conn.cursor(
+                    name="variant_autocomplete_load",
+                    cursor_factory=psycopg2.extras.DictCursor,
+                )
+                rows_cur.itersize = LOAD_BATCH_SIZE
+
+            rows_cur.execute(
+                f"""
+                SELECT
+                    vr.variant_id,
+                    vr.item_id,
+                    vr.display_name as text,
+                    vr.item_name,
+                    vr.color_name as color,
+                    vr.size_name as size,
+                    COALESCE(vr.model_name, 'N/A') as model,
+                    COALESCE(vr.brand_name, 'N/A') as brand,
+                    vr.opening_stock as quantity,
+                    vr.unit,
+                    vr.threshold as reorder_level,
+                    {atp_column} as available
+                FROM {source} vr
+                {atp_join}
+                WHERE NOT vr.is_deleted
+                  {variant_filter}
+                """,
+                params,
+            )
+            try:
+                for r in rows_cur:
+                    yield r["variant_id"], r["item_id"], tuple(r[f] for f in FIELDS)
+            finally:
+                if rows_cur is not cur:
+                    rows_cur.close()
+
+    @staticmethod
+    def feed_installed(cur) -> bool:
+        """Whether migration_add_variant_catalog_notify has been applied."""
+        cur.execute(
+            """
+            SELECT to_regprocedure('notify_variant_catalog()') IS NOT NULL
+               AND EXISTS (
+                   SELECT 1 FROM pg_trigger
+                   WHERE tgname = 'trg_notify_variant_catalog'
+                     AND tgrelid = to_regclass('item_variant')
+               )
+            """
+        )
+        return bool(cur.fetchone()[0])
+
+    def refresh_all(self) -> None:
+        self.load(self.fetch())
+        self.ready = True
+
+    def handle_notifications(self, payloads: Set[str]) -> None:
+        """Apply one batch of ``variant_catalog`` payloads."""
+        if "*" in payloads:
+            self.refresh_all()
+            return
+
+        variant_ids: Set[int] = set()
+        item_ids: Set[int] = set()
+        for payload in payloads:
+            if payload.startswith("item:"):
+                item_ids.add(int(payload[5:]))
+            elif payload.isdigit():
+                variant_ids.add(int(payload))
+
+        if item_ids:
+            variant_ids |= self.variant_ids_for_items(item_ids)
+            with database.get_conn() as (conn, cur):
+                cur.execute(
+                    "SELECT variant_id FROM item_variant WHERE item_id = ANY(%s)",
+                    (sorted(item_ids),),
+                )
+                variant_ids.update(r[0] for r in cur.fetchall())
+        if not variant_ids:
+            return
+
+        changes: Dict[int, Optional[Tuple[int, tuple]]] = {
+            vid: None for vid in variant_ids
+        }
+        for variant_id, item_id, row in self.fetch(variant_ids):
+            changes[variant_id] = (item_id, row)
+        self.apply(changes)
+
+    def start(self) -> None:
+        """Start the loader/listener thread."""
+        if self.running:
+            logger.warning("Variant autocomplete index already running")
+            return
+        self.running = True
+        self.listener_thread = threading.Thread(
+            target=self._listen_loop, name="variant-autocomplete", daemon=True
+        )
+        self.listener_thread.start()
+
+    def stop(self) -> None:
+        """Stop the listener; searches fall back to the database."""
+        self.running = False
+        self.ready = False
+        if self.listener_thread:
+            self.listener_thread.join(timeout=self.poll_interval + 1)
+
+    def _listen_loop(self) -> None:
+        warned = False
+        while self.running:
+            try:
+                with database.get_conn(autocommit=True) as (conn, cur):
+                    # Without the triggers nothing would ever be published:
+                    # keep serving from the database and check again later
+                    if not self.feed_installed(cur):
+                        if not warned:
+                            logger.warning(
+                                "Variant catalog NOTIFY feed not installed; "
+                                "autocomplete is served from the database"
+                            )
+                            warned = True
+                        time.sleep(self.retry_interval)
+                        continue
+                    # LISTEN before loading so no change falls in between
+                    cur.execute(f"LISTEN {CHANNEL}")
+                    self.refresh_all()
+                    while self.running:
+                        if select.select([conn], [], [], self.poll_interval) == (
+                            [],
+                            [],
+                            [],
+                        ):
+                            continue
+                        conn.poll()
+                        payloads = set()
+                        while conn.notifies:
+                            payloads.add(conn.notifies.pop(0).payload)
+                        if payloads:
+                            self.handle_notifications(payloads)
+            except Exception as e:
+                # Changes may be missed while disconnected: serve from the
+                # database until the reconnect reloads everything
+                self.ready = False
+                logger.warning("Variant autocomplete index listener failed: %s", e)
+                time.sleep(self.retry_interval)
+
+
+# Global index instance (one per worker process)
+_global_index: Optional[VariantAutocompleteIndex] = None
+
+
+def init_variant_autocomplete_index(
+    poll_interval: float = 5.0,
+) -> VariantAutocompleteIndex:
+    """
+    Create and start the worker's autocomplete index.
+
+    Call this during Flask app initialization.
+    """
+    global _global_index
+    _global_index = VariantAutocompleteIndex(poll_interval=poll_interval)
+    _global_index.start()
+    return _global_index
+
+
+def get_variant_autocomplete_index() -> Optional[VariantAutocompleteIndex]:
+    """Get the worker's autocomplete index, or None if it is not enabled."""
+    return _global_index
+
+
+def stop_variant_autocomplete_index() -> None:
+    """Stop the worker's autocomplete index."""
+    if _global_index:
+        _global_index.stop()
@@ -0,0 +1,80 @@
+"""
+Variant Read Model.
+
+Listings, reports, ledgers and the process structure all need the same
+flattened variant row: item, model, variation, brand, category, color and
+size names plus stock and threshold. ``variant_read_model`` holds that row
+per variant, maintained by triggers on item_variant, item_master and the
+master tables (see migrations/migration_add_variant_read_model.py), so
+readers scan one indexed table instead of repeating a seven-table join.
+
+Columns:
+    variant_id, item_id, item_name, description, model_name,
+    variation_name, brand_name, category_id, category_name, color_name,
+    size_name, display_name ('item - color - size'), unit, opening_stock,
+    threshold, is_low_stock, is_out_of_stock, is_deleted
+
+``is_deleted`` is set when the variant or its item is soft-deleted; callers
+listing live variants filter on ``NOT vr.is_deleted``.
+
+Without the migration, ``source()`` returns the equivalent join as a
+subquery with the same columns, so queries written against ``vr`` work on
+older databases.
+"""
+
+from __future__ import annotations
+
+# The read model's definition; also the fallback source before migrating
+VARIANT_ROWS_SQL = """
+    SELECT
+        iv.variant_id,
+        iv.item_id,
+        im.name AS item_name,
+        im.description,
+        mm.model_name,
+        vm.variation_name,
+        ibm.item_brand_name AS brand_name,
+        im.item_category_id AS category_id,
+        icm.item_category_name AS category_name,
+        cm.color_name,
+        sm.size_name,
+        im.name || ' - ' || cm.color_name || ' - ' || sm.size_name AS display_name,
+        iv.unit,
+        iv.opening_stock,
+        iv.threshold,
+        iv.opening_stock <= iv.threshold AS is_low_stock,
+        iv.opening_stock <= 0 AS is_out_of_stock,
+        (iv.deleted_at IS NOT NULL OR im.deleted_at IS NOT NULL) AS is_deleted
+    FROM item_variant iv
+    JOIN item_master im ON im.item_id = iv.item_id
+    JOIN color_master cm ON cm.color_id = iv.color_id
+    JOIN size_master sm ON sm.size_id = iv.size_id
+    LEFT JOIN model_master mm ON mm.model_id = im.model_id
+    LEFT JOIN variation_master vm ON vm.variation_id = im.variation_id
+    LEFT JOIN item_brand_master ibm ON ibm.item_brand_id = im.item_brand_id
+    LEFT JOIN item_category_master icm ON icm.item_category_id = im.item_category_id
+"""
+
+
+class VariantReadModel:
+    """
+    Service resolving where flattened variant rows are read from.
+    """
+
+    @staticmethod
+    def present(cur) -> bool:
+        cur.execute("SELECT to_regclass('variant_read_model') IS NOT NULL AS present")
+        row = cur.fetchone()
+        if row is None:
+            return False
+        return bool(row["present"] if isinstance(row, dict) else row[0])
+
+    @staticmethod
+    def source(cur) -> str:
+        """
+        FROM-clause source of flattened variant rows, to be aliased by the
+        caller (``FROM {source} vr``).
+        """
+        if VariantReadModel.present(cur):
+            return "variant_read_model"
+        return f"({VARIANT_ROWS_SQL})"
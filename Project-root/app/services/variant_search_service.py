@@ -0,0 +1,128 @@
+"""
+Variant Search Service.
+
+Builds the search predicate shared by /variants/select2, /all-variants and
+VariantService.search_variants. Matching runs against
+``variant_search_documents``, a trigger-maintained lowercase document per
+live variant (item, model, variation, brand, color and size names) with a
+pg_trgm GIN index:
+
+- every term must occur in the document: terms of three or more
+  characters anywhere (``LIKE '%term%'``), shorter terms at the start of a
+  word (``LIKE 'xl%' OR LIKE '% xl%'``), so "xl" or "m" still find a size,
+  color or brand. Both forms are answered from the trigram index, which
+  pads every word of the document with leading blanks.
+- typos are tolerated through word similarity (``<%``), also indexed, for
+  queries of three or more characters
+- results rank by word similarity of the whole query, as float8 so the
+  rank survives a keyset cursor unchanged
+
+Without the search migration the predicate falls back to the LIKE scan over
+the caller's joined columns, so results stay correct on older databases.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+# pg_trgm cannot index terms shorter than a trigram
+MIN_TRIGRAM_LENGTH = 3
+
+# Extra terms only narrow the result; cap the predicate size
+MAX_TERMS = 6
+
+
+def _like_escape(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class VariantSearchService:
+    """
+    Service building indexed, ranked variant search predicates.
+    """
+
+    @staticmethod
+    def documents_present(cur) -> bool:
+        cur.execute(
+            "SELECT to_regclass('variant_search_documents') IS NOT NULL AS present"
+        )
+        return bool(cur.fetchone()["present"])
+
+    @staticmethod
+    def build_filter(
+        cur,
+        term: str,
+        variant_alias: str = "iv",
+        fallback_columns: Sequence[str] = ("im.name",),
+    ) -> Dict[str, Any]:
+        """
+        Build the search join, condition and rank for a variant query.
+
+        Args:
+            cur: Cursor used to probe for the search documents
+            term: Raw search text (empty means no filtering)
+            variant_alias: Alias of item_variant in the caller's query
+            fallback_columns: Columns matched with LIKE when the search
+                documents are not migrated
+
+        Returns:
+            Dict with ``join`` (SQL to place after the caller's joins),
+            ``condition`` (bare boolean SQL), ``params`` for the condition,
+            ``rank`` (SQL expression, higher is better) and ``rank_params``
+        """
+        term = (term or "").strip().lower()
+        if not term:
+            return {
+                "join": "",
+                "condition": "TRUE",
+                "params": [],
+                "rank": "0::float8",
+                "rank_params": [],
+            }
+
+        if not VariantSearchService.documents_present(cur):
+            pattern = f"%{term}%"
+            return {
+                "join": "",
+                "condition": "("
+                + " OR ".join(f"LOWER({col}) LIKE %s" for col in fallback_columns)
+                + ")",
+                "params": [pattern] * len(fallback_columns),
+                "rank": "0::float8",
+                "rank_params": [],
+            }
+
+        join = (
+            "JOIN variant_search_documents vsd "
+            f"ON vsd.variant_id = {variant_alias}.variant_id"
+        )
+        terms: List[str] = []
+        for t in term.split():
+            if t not in terms:
+                terms.append(t)
+        terms = terms[:MAX_TERMS]
+
+        conditions = []
+        params: List[Any] = []
+        for t in terms:
+            if len(t) < MIN_TRIGRAM_LENGTH:
+                # Too short to match anywhere usefully: match word starts
+                conditions.append("(vsd.document LIKE %s OR vsd.document LIKE %s)")
+                params += [_like_escape(t) + "%", "% " + _like_escape(t) + "%"]
+            else:
+                conditions.append("vsd.document LIKE %s")
+                params.append(f"%{_like_escape(t)}%")
+        condition = " AND ".join(conditions)
+        if len(term) >= MIN_TRIGRAM_LENGTH:
+            condition = f"(({condition}) OR %s <%% vsd.document)"
+            params.append(term)
+
+        return {
+            "join": join,
+            "condition": condition,
+            "params": params,
+            # float8 so keyset cursors, which carry the rank as a JSON
+            # double, compare equal to it again on the next page
+            "rank": "word_similarity(%s, vsd.document)::float8",
+            "rank_params": [term],
+        }
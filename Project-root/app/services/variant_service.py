@@ -12,6 +12,8 @@ import database
 import psycopg2.extras
 
 from ..models.process import VariantSupplierPricing, VariantUsage
+from .stock_reservation_service import StockReservationService
+from .variant_search_service import VariantSearchService
 
 
 class VariantService:
@@ -444,10 +446,9 @@ class VariantService:
             List of matching variants with pricing and stock info
         """
         filters = filters or {}
-        search_pattern = f"%{query}%"
 
-        conditions = ["iv.name ILIKE %s"]
-        params = [search_pattern]
+        conditions = []
+        params = []
 
         # Category filter
         if filters.get("category_id"):
@@ -485,12 +486,15 @@ class VariantService:
             )
             params.append(filters["max_cost"])
 
-        where_clause = " AND ".join(conditions)
-
         with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
             conn,
             cur,
         ):
+            # Trigram-indexed, ranked match on the variant search document
+            search = VariantSearchService.build_filter(cur, query)
+            where_clause = " AND ".join([search["condition"]] + conditions)
+            params = search["rank_params"] + search["params"] + params
+
             # Check if supplier pricing table exists; if not, build a simpler query without subselects
             cur.execute(
                 """
@@ -530,11 +534,13 @@ class VariantService:
                              WHERE vsp.variant_id = iv.variant_id
                                AND vsp.is_active = TRUE
                             ), 0
-                        ) as supplier_count
+                        ) as supplier_count,
+                        {search['rank']} as search_rank
                     FROM item_variant iv
                     JOIN item_master im ON im.item_id = iv.item_id
+                    {search['join']}
                     WHERE {where_clause}
-                    ORDER BY im.name
+                    ORDER BY search_rank DESC, im.name
                     LIMIT %s
                 """,
                     params + [limit],
@@ -551,11 +557,13 @@ class VariantService:
                         im.name as item_name,
                         0 as min_cost,
                         0 as max_cost,
-                        0 as supplier_count
+                        0 as supplier_count,
+                        {search['rank']} as search_rank
                     FROM item_variant iv
                     JOIN item_master im ON im.item_id = iv.item_id
+                    {search['join']}
                     WHERE {where_clause}
-                    ORDER BY im.name
+                    ORDER BY search_rank DESC, im.name
                     LIMIT %s
                 """,
                     params + [limit],
@@ -582,6 +590,9 @@ class VariantService:
         """
         Check if sufficient stock is available for a variant.
 
+        Availability is judged on available-to-promise stock, i.e. on-hand
+        stock minus quantities reserved by lots that are Ready.
+
         Args:
             variant_id: The variant to check
             required_quantity: Required quantity
@@ -608,24 +619,174 @@ class VariantService:
             )
 
             variant = cur.fetchone()
+            if not variant:
+                return {"available": False, "reason": "Variant not found"}
 
-        if not variant:
-            return {"available": False, "reason": "Variant not found"}
+            stock = StockReservationService.get_availability([variant_id], cur=cur)
+            stock = stock.get(variant_id) or {}
 
-        current_stock = float(variant["opening_stock"] or 0)
-        is_available = current_stock >= required_quantity
+        current_stock = float(stock.get("on_hand", variant["opening_stock"] or 0))
+        reserved = float(stock.get("reserved", 0))
+        available_to_promise = float(
+            stock.get("available_to_promise", current_stock - reserved)
+        )
+        is_available = available_to_promise >= required_quantity
 
         return {
             "available": is_available,
             "variant_id": variant_id,
             "variant_name": variant["variant_name"],
             "current_stock": current_stock,
+            "reserved_stock": reserved,
+            "available_to_promise": available_to_promise,
             "required_quantity": required_quantity,
-            "shortfall": max(0, required_quantity - current_stock),
+            "shortfall": max(0, required_quantity - available_to_promise),
             "is_low_stock": current_stock <= float(variant["threshold"] or 0),
             "threshold": float(variant["threshold"] or 0),
         }
 
+    @staticmethod
+    def check_variants_availability(
+        requirements: Dict[int, float],
+    ) -> List[Dict[str, Any]]:
+        """
+        Check availability for many variants in one query.
+
+        Returns details, on-hand and reserved stock, available-to-promise
+        stock and the active supplier price range per variant.
+
+        Args:
+            requirements: variant_id -> required quantity
+
+        Returns:
+            One entry per requested variant, in request order
+        """
+        if not requirements:
+            return []
+        variant_ids = [int(v) for v in requirements]
+        quantities = [float(q) for q in requirements.values()]
+
+        with database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
+            conn,
+            cur,
+        ):
+            cur.execute(
+                """
+                SELECT
+                    to_regclass('variant_stock_availability') IS NOT NULL AS has_atp,
+                    to_regclass('variant_supplier_pricing') IS NOT NULL AS has_pricing
+                """
+            )
+            present = cur.fetchone()
+
+            if present["has_atp"]:
+                stock_columns = """
+                    COALESCE(vsa.on_hand, iv.opening_stock) AS on_hand,
+                    COALESCE(vsa.reserved, 0) AS reserved,
+                    COALESCE(vsa.available_to_promise, iv.opening_stock)
+                        AS available_to_promise"""
+                stock_join = "LEFT JOIN variant_stock_availability vsa ON vsa.variant_id = iv.variant_id"
+            else:
+                stock_columns = """
+                    iv.opening_stock AS on_hand,
+                    0 AS reserved,
+                    iv.opening_stock AS available_to_promise"""
+                stock_join = ""
+
+            if present["has_pricing"]:
+                pricing_columns = """
+                    COALESCE(p.min_cost, 0) AS min_cost,
+                    COALESCE(p.max_cost, 0) AS max_cost,
+                    COALESCE(p.supplier_count, 0) AS supplier_count"""
+                pricing_join = """
+                    LEFT JOIN (
+                        SELECT
+                            variant_id,
+                            MIN(cost_per_unit) AS min_cost,
+                            MAX(cost_per_unit) AS max_cost,
+                            COUNT(*) AS supplier_count
+                        FROM variant_supplier_pricing
+                        WHERE is_active = TRUE AND variant_id = ANY(%(ids)s)
+                        GROUP BY variant_id
+                    ) p ON p.variant_id = iv.variant_id"""
+            else:
+                pricing_columns = """
+                    0 AS min_cost,
+                    0 AS max_cost,
+                    0 AS supplier_count"""
+                pricing_join = ""
+
+            cur.execute(
+                f"""
+                SELECT
+                    r.variant_id AS requested_id,
+                    r.required_quantity,
+                    iv.variant_id,
+                    im.item_id,
+                    im.name AS variant_name,
+                    cm.color_name AS color,
+                    sm.size_name AS size,
+                    mm.model_name AS model,
+                    iv.unit,
+                    iv.threshold,
+                    {stock_columns},
+                    {pricing_columns}
+                FROM unnest(%(ids)s::int[], %(quantities)s::numeric[])
+                    WITH ORDINALITY AS r(variant_id, required_quantity, position)
+                LEFT JOIN item_variant iv ON iv.variant_id = r.variant_id
+                LEFT JOIN item_master im ON im.item_id = iv.item_id
+                LEFT JOIN color_master cm ON cm.color_id = iv.color_id
+                LEFT JOIN size_master sm ON sm.size_id = iv.size_id
+                LEFT JOIN model_master mm ON mm.model_id = im.model_id
+                {stock_join}
+                {pricing_join}
+                ORDER BY r.position
+                """,
+                {"ids": variant_ids, "quantities": quantities},
+            )
+            rows = cur.fetchall()
+
+        results = []
+        for row in rows:
+            if row["variant_id"] is None:
+                results.append(
+                    {
+                        "available": False,
+                        "variant_id": row["requested_id"],
+                        "reason": "Variant not found",
+                    }
+                )
+                continue
+
+            required_quantity = float(row["required_quantity"])
+            current_stock = float(row["on_hand"] or 0)
+            reserved = float(row["reserved"] or 0)
+            available_to_promise = float(row["available_to_promise"] or 0)
+            threshold = float(row["threshold"] or 0)
+            results.append(
+                {
+                    "available": available_to_promise >= required_quantity,
+                    "variant_id": row["variant_id"],
+                    "variant_name": row["variant_name"],
+                    "item_id": row["item_id"],
+                    "color": row["color"],
+                    "size": row["size"],
+                    "model": row["model"],
+                    "unit": row["unit"],
+                    "current_stock": current_stock,
+                    "reserved_stock": reserved,
+                    "available_to_promise": available_to_promise,
+                    "required_quantity": required_quantity,
+                    "shortfall": max(0, required_quantity - available_to_promise),
+                    "is_low_stock": current_stock <= threshold,
+                    "threshold": threshold,
+                    "min_cost": float(row["min_cost"] or 0),
+                    "max_cost": float(row["max_cost"] or 0),
+                    "supplier_count": int(row["supplier_count"] or 0),
+                }
+            )
+        return results
+
     @staticmethod
     def get_supplier_variants(supplier_id: int) -> List[Dict[str, Any]]:
         """
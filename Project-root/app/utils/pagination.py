@@ -0,0 +1,120 @@
+"""
+Keyset pagination helpers.
+
+Listings page by their sort key instead of OFFSET: the response carries an
+opaque ``next_cursor`` holding the last row's key, and the next request
+resumes strictly after it. Every page costs the same at any depth, provided
+an index matches the sort key.
+
+Totals are opt-in through ``count``:
+- ``none``: no total
+- ``estimate``: the planner's row estimate (no scan)
+- ``exact``: COUNT(*) over the filtered query
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (SQL expression, "ASC" | "DESC"); the last key must be unique
+SortKey = Tuple[str, str]
+
+COUNT_MODES = ("none", "estimate", "exact")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the last row's sort key values as an opaque token."""
+    raw = json.dumps({"k": list(values)}, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Encode a plain offset (for results ranked outside the database)."""
+    raw = json.dumps({"o": int(offset)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """
+    Decode a cursor token.
+
+    Returns:
+        ``{"k": [values]}`` for keyset cursors or ``{"o": offset}``
+
+    Raises:
+        ValueError: If the token was not produced by this module
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if isinstance(payload, dict):
+        if isinstance(payload.get("k"), list):
+            return payload
+        if isinstance(payload.get("o"), int) and payload["o"] >= 0:
+            return payload
+    raise ValueError("Invalid cursor")
+
+
+def order_by(keys: Sequence[SortKey]) -> str:
+    return ", ".join(f"{expr} {direction}" for expr, direction in keys)
+
+
+def keyset_condition(
+    keys: Sequence[SortKey], values: Sequence[Any]
+) -> Tuple[str, List[Any]]:
+    """
+    Build the predicate selecting rows after ``values`` in ``keys`` order.
+
+    Uniform directions use a row comparison, which a composite index on the
+    same columns answers directly; mixed directions expand into OR-ed terms.
+    """
+    if len(values) != len(keys):
+        raise ValueError("Invalid cursor")
+
+    directions = {direction for _, direction in keys}
+    if len(directions) == 1:
+        op = "<" if directions == {"DESC"} else ">"
+        columns = ", ".join(expr for expr, _ in keys)
+        placeholders = ", ".join(["%s"] * len(keys))
+        return f"({columns}) {op} ({placeholders})", list(values)
+
+    terms = []
+    params: List[Any] = []
+    for i, (expr, direction) in enumerate(keys):
+        op = "<" if direction == "DESC" else ">"
+        equal = [f"{keys[j][0]} = %s" for j in range(i)]
+        terms.append("(" + " AND ".join(equal + [f"{expr} {op} %s"]) + ")")
+        params.extend(list(values[:i]) + [values[i]])
+    return "(" + " OR ".join(terms) + ")", params
+
+
+def count_mode(value: Optional[str], default: str) -> str:
+    value = (value or default).lower()
+    return value if value in COUNT_MODES else default
+
+
+def count_rows(cur, mode: str, query: str, params: Sequence[Any] = ()) -> Optional[int]:
+    """
+    Count rows of ``query`` (a full SELECT) per ``mode``.
+
+    Returns:
+        The total, the planner estimate, or None for mode ``none``
+    """
+    if mode == "exact":
+        cur.execute(f"SELECT COUNT(*) FROM ({query}) AS counted", tuple(params))
+        return int(_first_column(cur.fetchone()))
+    if mode == "estimate":
+        cur.execute("EXPLAIN (FORMAT JSON) " + query, tuple(params))
+        plan = _first_column(cur.fetchone())
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    return None
+
+
+def _first_column(row):
+    return next(iter(row.values())) if isinstance(row, dict) else row[0]
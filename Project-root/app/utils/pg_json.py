@@ -0,0 +1,81 @@
+"""
+Postgres-built JSON for large read endpoints.
+
+Instead of fetching rows, building dicts and re-encoding them with jsonify,
+these helpers let Postgres render the JSON (``json_agg`` / ``row_to_json``)
+and hand the text straight to the response. The JSON typecaster is replaced
+with an identity function on the cursors used here, so psycopg2 never
+decodes the document.
+
+Values render the Postgres way: dates and timestamps as ISO 8601, numerics
+as JSON numbers. The passthrough is opt-in through the
+``PG_JSON_PASSTHROUGH`` setting; by default endpoints keep their jsonify
+path and its encoding.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterator, Sequence
+
+import psycopg2.extras
+from flask import current_app
+
+
+def _raw(value: str) -> str:
+    return value
+
+
+def passthrough_enabled() -> bool:
+    return bool(current_app.config.get("PG_JSON_PASSTHROUGH", False))
+
+
+def raw_json_cursor(conn, name: str | None = None):
+    """Open a cursor whose json/jsonb values come back as undecoded text."""
+    cur = conn.cursor(name=name) if name else conn.cursor()
+    psycopg2.extras.register_default_json(cur, loads=_raw)
+    psycopg2.extras.register_default_jsonb(cur, loads=_raw)
+    return cur
+
+
+def json_array_sql(query: str, order_by: str) -> str:
+    """
+    Wrap ``query`` so it returns its rows as one JSON array.
+
+    Args:
+        query: SELECT whose output columns become the object keys
+        order_by: Ordering over those output columns (applied in json_agg)
+    """
+    return (
+        f"SELECT COALESCE(json_agg(t ORDER BY {order_by}), '[]'::json) FROM ({query}) t"
+    )
+
+
+def fetch_json_array(
+    conn, query: str, params: Sequence[Any] = (), *, order_by: str
+) -> str:
+    """Run ``query`` and return its rows as JSON array text."""
+    cur = raw_json_cursor(conn)
+    try:
+        cur.execute(json_array_sql(query, order_by), tuple(params))
+        return cur.fetchone()[0]
+    finally:
+        cur.close()
+
+
+def iter_json_rows(
+    conn, query: str, params: Sequence[Any] = (), batch_size: int = 2000
+) -> Iterator[str]:
+    """
+    Yield each row of ``query`` as JSON object text, via a named cursor.
+
+    The query's own ORDER BY is kept: rows are rendered with row_to_json in
+    an outer projection that does not reorder them.
+    """
+    cur = raw_json_cursor(conn, name="pg_json_rows")
+    cur.itersize = batch_size
+    try:
+        cur.execute(f"SELECT row_to_json(t) FROM ({query}) t", tuple(params))
+        for (row,) in cur:
+            yield row
+    finally:
+        cur.close()
@@ -1,4 +1,7 @@
-from flask import jsonify
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from flask import current_app, jsonify, stream_with_context
 
 
 class APIResponse:
@@ -45,5 +48,73 @@ class APIResponse:
         )
 
 
+def stream_json_array(
+    items: Iterable[Any], chunk_size: int = 500, raw: bool = False
+):
+    """
+    Stream a JSON array one chunk of items at a time.
+
+    The body is byte-for-byte what ``jsonify(list(items))`` would produce
+    (same key order, escaping and, in debug mode, indentation), without
+    holding the whole list or its serialized form in memory. With ``raw``
+    the items are already JSON text (e.g. rendered by Postgres) and are
+    written unchanged.
+    """
+    provider = current_app.json
+    indent = not raw and (
+        (provider.compact is None and current_app.debug) or provider.compact is False
+    )
+
+    def encode(item) -> str:
+        if raw:
+            return item
+        if indent:
+            return "  " + provider.dumps(item, indent=2).replace("\n", "\n  ")
+        return provider.dumps(item, separators=(",", ":"))
+
+    def generate() -> Iterator[str]:
+        iterator = iter(items)
+        first = True
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            body = (",\n" if indent else ",").join(encode(item) for item in chunk)
+            if first:
+                yield ("[\n" if indent else "[") + body
+                first = False
+            else:
+                yield (",\n" if indent else ",") + body
+        if first:
+            yield "[]\n"
+        else:
+            yield "\n]\n" if indent else "]\n"
+
+    return current_app.response_class(
+        stream_with_context(generate()), mimetype=provider.mimetype
+    )
+
+
+def raw_json_response(
+    body: str, envelope: Optional[Dict[str, Any]] = None, key: str = "items"
+):
+    """
+    Respond with JSON text built elsewhere (e.g. by Postgres) without
+    decoding it.
+
+    Args:
+        body: JSON text
+        envelope: Optional metadata; the body then becomes its ``key`` member
+        key: Member name for the body inside the envelope
+    """
+    if envelope is not None:
+        meta = current_app.json.dumps(envelope, separators=(",", ":"))
+        separator = "," if len(meta) > 2 else ""
+        body = f'{meta[:-1]}{separator}"{key}":{body}}}'
+    return current_app.response_class(
+        body + "\n", mimetype=current_app.json.mimetype
+    )
+
+
 # Import in blueprints:
 # from app.utils.response import APIResponse
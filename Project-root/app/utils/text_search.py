@@ -0,0 +1,53 @@
+"""
+Full-text search helpers.
+
+Searches match every word of the query as a prefix (``'weld':* & 'jig':*``)
+against an English tsvector where names weigh more than descriptions, rank
+with ts_rank_cd and highlight matches with ts_headline. Highlighted text is
+not HTML-escaped; clients must escape it before inserting the markers.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import List, Optional
+
+TS_CONFIG = "english"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+    "MaxWords=35, MinWords=15, HighlightAll=FALSE"
+)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def search_words(text: str) -> List[str]:
+    """Lowercased, de-duplicated words of a query."""
+    words: List[str] = []
+    for word in _WORD.findall((text or "").lower()):
+        if word not in words:
+            words.append(word)
+    return words
+
+
+def search_vector_sql(name_column: str, description_column: str) -> str:
+    """Weighted tsvector expression (must match the GIN expression indexes)."""
+    return (
+        f"(setweight(to_tsvector('{TS_CONFIG}', coalesce({name_column}, '')), 'A')"
+        f" || setweight(to_tsvector('{TS_CONFIG}', coalesce({description_column}, '')), 'B'))"
+    )
+
+
+def prefix_tsquery(text: str) -> Optional[str]:
+    """
+    to_tsquery() input matching every word of ``text`` as a prefix, or None
+    when the text has no words. Words are ``\\w+`` only, so the result needs
+    no further escaping.
+    """
+    words = search_words(text)
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" for word in words)
+
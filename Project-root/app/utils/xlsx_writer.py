@@ -0,0 +1,191 @@
+"""
+Streaming XLSX writer.
+
+Writes a single-sheet workbook row by row straight into the zip archive,
+so memory does not grow with the number of rows. Strings are stored
+inline (no shared string table, which would have to be held in memory);
+numbers, booleans, dates and datetimes keep their types, dates with an
+Excel date format. Other values (e.g. JSON) are written as text.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Iterable, List, Optional
+from xml.sax.saxutils import escape
+
+_EPOCH = datetime(1899, 12, 30)
+
+# Characters XML 1.0 does not allow
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+# Excel cell limit
+MAX_CELL_TEXT = 32767
+
+# Style indexes in STYLES_XML
+_DATE_STYLE = 1
+_DATETIME_STYLE = 2
+_HEADER_STYLE = 3
+
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "</Types>"
+)
+
+ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    "</Relationships>"
+)
+
+STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    "</cellXfs></styleSheet>"
+)
+
+
+def _workbook_xml(sheet_name: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet_name[:31], {chr(34): "&quot;"})}" '
+        'sheetId="1" r:id="rId1"/></sheets></workbook>'
+    )
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _excel_serial(value: datetime) -> float:
+    delta: timedelta = value - _EPOCH
+    return delta.days + delta.seconds / 86400 + delta.microseconds / 86400e6
+
+
+def _cell(ref: str, value: Any, style: int = 0) -> str:
+    if value is None:
+        return ""
+    s = f' s="{style}"' if style else ""
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"{s}><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        if isinstance(value, float) and not math.isfinite(value):
+            return ""
+        return f'<c r="{ref}"{s}><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        # Excel has no time zones: write the wall-clock time
+        serial = _excel_serial(value.replace(tzinfo=None))
+        return f'<c r="{ref}" s="{_DATETIME_STYLE}"><v>{serial}</v></c>'
+    if isinstance(value, date):
+        serial = (value - _EPOCH.date()).days
+        return f'<c r="{ref}" s="{_DATE_STYLE}"><v>{serial}</v></c>'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, default=str)
+    text = _ILLEGAL_XML.sub("", str(value))[:MAX_CELL_TEXT]
+    return (
+        f'<c r="{ref}" t="inlineStr"{s}><is><t xml:space="preserve">'
+        f"{escape(text)}</t></is></c>"
+    )
+
+
+class XlsxStreamWriter:
+    """
+    Write rows of one worksheet to an .xlsx file as they arrive.
+
+    Usage:
+        with XlsxStreamWriter(path, "Inventory") as writer:
+            writer.write_header(["Item", "Stock"])
+            writer.write_rows(rows)
+    """
+
+    def __init__(self, path: str, sheet_name: str = "Sheet1"):
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        self._zip.writestr("[Content_Types].xml", CONTENT_TYPES_XML)
+        self._zip.writestr("_rels/.rels", ROOT_RELS_XML)
+        self._zip.writestr("xl/workbook.xml", _workbook_xml(sheet_name))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS_XML)
+        self._zip.writestr("xl/styles.xml", STYLES_XML)
+        # force_zip64: the sheet size is unknown up front
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+        self._sheet.write(
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            b"<sheetData>"
+        )
+        self._letters: List[str] = []
+        self.rows_written = 0
+
+    def _write(self, values: Iterable[Any], style: int = 0) -> None:
+        values = list(values)
+        while len(self._letters) < len(values):
+            self._letters.append(_column_letter(len(self._letters)))
+        row = self.rows_written + 1
+        cells = "".join(
+            _cell(f"{self._letters[i]}{row}", value, style)
+            for i, value in enumerate(values)
+        )
+        self._sheet.write(f'<row r="{row}">{cells}</row>'.encode())
+        self.rows_written = row
+
+    def write_header(self, headers: Iterable[str]) -> None:
+        self._write(headers, _HEADER_STYLE)
+
+    def write_row(self, values: Iterable[Any]) -> None:
+        self._write(values)
+
+    def write_rows(self, rows: Iterable[Iterable[Any]]) -> None:
+        for values in rows:
+            self._write(values)
+
+    def close(self) -> None:
+        if self._sheet is None:
+            return
+        self._sheet.write(b"</sheetData></worksheet>")
+        self._sheet.close()
+        self._sheet = None
+        self._zip.close()
+
+    def __enter__(self) -> "XlsxStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> Optional[bool]:
+        self.close()
+        return None
@@ -70,6 +70,34 @@ class Config:
     IMPORT_TIMEOUT_SECONDS = int(os.getenv("IMPORT_TIMEOUT_SECONDS", 600))
     IMPORT_BACKGROUND_THRESHOLD = int(os.getenv("IMPORT_BACKGROUND_THRESHOLD", 1000))
 
+    # In-process variant autocomplete index (one copy per worker process);
+    # opt-in, needs migration_add_variant_catalog_notify
+    VARIANT_AUTOCOMPLETE_INDEX = os.getenv(
+        "VARIANT_AUTOCOMPLETE_INDEX", "false"
+    ).lower() in ("1", "true", "yes")
+
+    # Let Postgres render large list responses as JSON (no decode/re-encode);
+    # opt-in, as dates and numerics render differently from jsonify
+    PG_JSON_PASSTHROUGH = os.getenv("PG_JSON_PASSTHROUGH", "false").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+    # Seconds a worker serves cached master data before checking its version
+    MASTER_DATA_CACHE_TTL = float(os.getenv("MASTER_DATA_CACHE_TTL", 5))
+
+    # Seconds dashboard/report metric snapshots are served before recomputing
+    METRICS_SNAPSHOT_TTL = float(os.getenv("METRICS_SNAPSHOT_TTL", 60))
+
+    # Where background exports (XLSX/Parquet/CSV) are written
+    EXPORT_DIR = os.getenv(
+        "EXPORT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "exports")
+    )
+
+    # Hours finished background exports (and their files) are kept
+    EXPORT_RETENTION_HOURS = float(os.getenv("EXPORT_RETENTION_HOURS", 24))
+
     # Redis configuration for progress tracking
     REDIS_PROGRESS_EXPIRY = int(os.getenv("REDIS_PROGRESS_EXPIRY", 86400))  # 24 hours
 
@@ -105,6 +133,11 @@ class TestingConfig(Config):
     SESSION_COOKIE_SECURE = False
     # Use memory storage for rate limiter in tests to avoid Redis warning
     RATELIMIT_STORAGE_URL = "memory://"
+    # Keep the catalog listener thread out of tests
+    VARIANT_AUTOCOMPLETE_INDEX = False
+    # Check the master data version on every request
+    MASTER_DATA_CACHE_TTL = 0
+    METRICS_SNAPSHOT_TTL = 0
 
     # Test database configuration - defaults match CI environment
     # CI workflow sets: POSTGRES_USER=postgres, POSTGRES_PASSWORD=testpass, POSTGRES_DB=testdb
@@ -0,0 +1,93 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: ownership scope, retries and retention for export jobs.
+
+Adds to export_jobs:
+- owner_id: the user whose rows a per-user export (production lots,
+  process costs) is limited to; NULL exports every row (admins)
+- attempts: how many times a worker has claimed the job, so a job that
+  keeps killing its worker is eventually failed instead of retried forever
+
+plus indexes for the worker's housekeeping: finished jobs by completion
+time (purged after the retention period) and processing jobs by start time
+(reclaimed when their worker died).
+
+Pending jobs queued by non-admins before this migration are scoped to their
+creator, or failed when they request an admin-only export.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+PER_USER_EXPORTS = ("production_lots", "process_costs")
+ADMIN_ONLY_EXPORTS = ("audit_log", "stock_movements")
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Adding export job housekeeping columns...")
+        cur.execute(
+            """
+            ALTER TABLE export_jobs
+                ADD COLUMN IF NOT EXISTS owner_id INTEGER,
+                ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_export_jobs_finished
+            ON export_jobs (completed_at)
+            WHERE status IN ('completed', 'failed');
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_export_jobs_processing
+            ON export_jobs (started_at)
+            WHERE status = 'processing';
+            """
+        )
+        cur.execute(
+            """
+            UPDATE export_jobs j
+            SET owner_id = j.user_id
+            FROM users u
+            WHERE u.user_id = j.user_id
+              AND u.role <> 'admin'
+              AND j.status = 'pending'
+              AND j.export_name = ANY(%s);
+            """,
+            (list(PER_USER_EXPORTS),),
+        )
+        cur.execute(
+            """
+            UPDATE export_jobs j
+            SET status = 'failed', error_message = 'Insufficient permissions',
+                completed_at = NOW()
+            FROM users u
+            WHERE u.user_id = j.user_id
+              AND u.role <> 'admin'
+              AND j.status = 'pending'
+              AND j.export_name = ANY(%s);
+            """,
+            (list(ADMIN_ONLY_EXPORTS),),
+        )
+        conn.commit()
+        print(" Export job housekeeping columns added")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        cur.execute("DROP INDEX IF EXISTS idx_export_jobs_finished;")
+        cur.execute("DROP INDEX IF EXISTS idx_export_jobs_processing;")
+        cur.execute(
+            """
+            ALTER TABLE export_jobs
+                DROP COLUMN IF EXISTS owner_id,
+                DROP COLUMN IF EXISTS attempts;
+            """
+        )
+        conn.commit()
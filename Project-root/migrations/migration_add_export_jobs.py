@@ -0,0 +1,64 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: export_jobs table for background file exports.
+
+Each row is one requested XLSX/Parquet/CSV export: the export name,
+format, column selection and filters, its status, and once completed the
+file written by BackgroundExportWorker (app/services/background_worker.py)
+with its row count and size.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Creating export_jobs table...")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS export_jobs (
+                id SERIAL PRIMARY KEY,
+                export_id UUID UNIQUE NOT NULL,
+                user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
+                export_name VARCHAR(50) NOT NULL,
+                format VARCHAR(10) NOT NULL,
+                columns JSONB,
+                filters JSONB,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                file_path TEXT,
+                row_count INTEGER,
+                file_size BIGINT,
+                error_message TEXT,
+                created_at TIMESTAMP DEFAULT NOW(),
+                started_at TIMESTAMP,
+                completed_at TIMESTAMP,
+                CONSTRAINT chk_export_status
+                    CHECK (status IN ('pending', 'processing', 'completed', 'failed'))
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_export_jobs_pending
+            ON export_jobs (created_at)
+            WHERE status = 'pending';
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_export_jobs_user
+            ON export_jobs (user_id, created_at DESC);
+            """
+        )
+        conn.commit()
+        print(" export_jobs table created")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        cur.execute("DROP TABLE IF EXISTS export_jobs;")
+        conn.commit()
@@ -0,0 +1,89 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: bump the item_master version when an item is renamed.
+
+The item name dropdowns (app/services/item_hierarchy_index.py) are cached
+per worker through the master data cache, so item_master's version counter
+must also move when an item's name changes, not only when the master
+tables it references change. Recreates item_master's trigger from
+migration_add_master_data_versions with ``name`` added to its UPDATE
+columns (creating the counter and its function if that migration has not
+run yet).
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+# item_master trigger events before and after this migration
+PREVIOUS_EVENTS = "INSERT OR DELETE OR TRUNCATE OR UPDATE OF model_id, variation_id"
+EVENTS = "INSERT OR DELETE OR TRUNCATE OR UPDATE OF name, model_id, variation_id"
+
+
+def _create_trigger(cur, events):
+    cur.execute("DROP TRIGGER IF EXISTS trg_master_data_version ON item_master;")
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_master_data_version
+        AFTER {events} ON item_master
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_master_data_version();
+        """
+    )
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Versioning item_master on item renames...")
+        cur.execute("SELECT to_regclass('item_master') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            print(" Skipping: table item_master does not exist")
+            return
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS master_data_versions (
+                table_name TEXT PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE OR REPLACE FUNCTION bump_master_data_version()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                INSERT INTO master_data_versions (table_name, version)
+                VALUES (TG_TABLE_NAME, 1)
+                ON CONFLICT (table_name) DO UPDATE
+                SET version = master_data_versions.version + 1,
+                    updated_at = CURRENT_TIMESTAMP;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+        cur.execute(
+            """
+            INSERT INTO master_data_versions (table_name, version)
+            VALUES ('item_master', 0)
+            ON CONFLICT (table_name) DO NOTHING;
+            """
+        )
+        _create_trigger(cur, EVENTS)
+        conn.commit()
+        print(" item_master versioned on item renames")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        cur.execute(
+            """
+            SELECT to_regclass('item_master') IS NOT NULL
+               AND to_regprocedure('bump_master_data_version()') IS NOT NULL
+            """
+        )
+        if cur.fetchone()[0]:
+            _create_trigger(cur, PREVIOUS_EVENTS)
+        conn.commit()
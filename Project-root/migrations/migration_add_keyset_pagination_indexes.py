@@ -0,0 +1,43 @@
+"""
+Migration: Add indexes matching the keyset pagination sort keys.
+
+/items pages by (name, item_id); the supplier and variant ledgers page by
+(entry_date DESC, entry_id DESC) within a supplier or variant. Indexes are
+created concurrently (outside a transaction) to avoid table locks.
+"""
+
+import os
+import sys
+
+import psycopg2.errors
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+INDEXES = {
+    "idx_item_master_name_id": "item_master (name, item_id)",
+    "idx_stock_entries_supplier_keyset": (
+        "stock_entries (supplier_id, entry_date DESC, entry_id DESC)"
+    ),
+    "idx_stock_entries_variant_keyset": (
+        "stock_entries (variant_id, entry_date DESC, entry_id DESC)"
+    ),
+}
+
+
+def upgrade():
+    with get_conn(autocommit=True) as (_conn, cur):
+        for name, definition in INDEXES.items():
+            try:
+                cur.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition};"
+                )
+            except psycopg2.errors.UndefinedTable:
+                # Deployments without the table have nothing to index
+                print(f" Skipping {name}: table {definition.split()[0]} does not exist")
+
+
+def downgrade():
+    with get_conn(autocommit=True) as (_conn, cur):
+        for name in INDEXES:
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
@@ -0,0 +1,175 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: maintained low-stock count.
+
+Creates:
+  - low_stock_summary, a single row holding the number of live low-stock
+    variants and a version bumped whenever a variant enters or leaves the
+    set, kept current by statement-level triggers on item_variant
+  - a partial index on variant_read_model for the low-stock report, which
+    now leaves out deleted variants
+
+The dashboard and /api/low-stock-summary read the count from
+low_stock_summary (app/services/low_stock_service.py) instead of counting
+item_variant.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+# trigger -> (event, transition tables)
+SUMMARY_TRIGGERS = {
+    "trg_low_stock_summary_insert": ("INSERT", "NEW TABLE AS new_rows"),
+    "trg_low_stock_summary_update": (
+        "UPDATE",
+        "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    ),
+    "trg_low_stock_summary_delete": ("DELETE", "OLD TABLE AS old_rows"),
+}
+
+# A variant is in the set when it is low on stock and not soft-deleted
+IN_SET = (
+    "COALESCE({0}.opening_stock <= {0}.threshold AND {0}.deleted_at IS NULL, FALSE)"
+)
+
+
+def _summary_function():
+    # Only statements that move variants in or out of the set touch the
+    # summary row; stock changes within (or outside) the set do not.
+    return f"""
+        CREATE OR REPLACE FUNCTION apply_low_stock_summary()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            entered INTEGER := 0;
+            departed INTEGER := 0;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT COUNT(*) INTO entered
+                FROM new_rows n WHERE {IN_SET.format("n")};
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT COUNT(*) INTO departed
+                FROM old_rows o WHERE {IN_SET.format("o")};
+            ELSE
+                SELECT COUNT(*) FILTER (WHERE now_in AND NOT was_in),
+                       COUNT(*) FILTER (WHERE was_in AND NOT now_in)
+                INTO entered, departed
+                FROM (
+                    SELECT {IN_SET.format("o")} AS was_in,
+                           {IN_SET.format("n")} AS now_in
+                    FROM old_rows o
+                    JOIN new_rows n USING (variant_id)
+                ) changes;
+            END IF;
+            IF entered + departed > 0 THEN
+                UPDATE low_stock_summary
+                SET variant_count = variant_count + entered - departed,
+                    version = version + 1,
+                    updated_at = NOW()
+                WHERE id = 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Creating low_stock_summary...")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS low_stock_summary (
+                id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+                variant_count INTEGER NOT NULL DEFAULT 0,
+                version BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            );
+            """
+        )
+
+        cur.execute(_summary_function())
+        cur.execute(
+            """
+            CREATE OR REPLACE FUNCTION truncate_low_stock_summary()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                UPDATE low_stock_summary
+                SET variant_count = 0, version = version + 1, updated_at = NOW()
+                WHERE id = 1;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+
+        for trigger, (event, tables) in SUMMARY_TRIGGERS.items():
+            cur.execute(f"DROP TRIGGER IF EXISTS {trigger} ON item_variant;")
+            cur.execute(
+                f"""
+                CREATE TRIGGER {trigger}
+                AFTER {event} ON item_variant
+                REFERENCING {tables}
+                FOR EACH STATEMENT EXECUTE FUNCTION apply_low_stock_summary();
+                """
+            )
+        cur.execute(
+            "DROP TRIGGER IF EXISTS trg_low_stock_summary_truncate ON item_variant;"
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER trg_low_stock_summary_truncate
+            AFTER TRUNCATE ON item_variant
+            FOR EACH STATEMENT EXECUTE FUNCTION truncate_low_stock_summary();
+            """
+        )
+
+        # Creating the triggers locked out writers, so the count is exact
+        cur.execute(
+            """
+            INSERT INTO low_stock_summary (id, variant_count, version)
+            SELECT 1, COUNT(*), 1
+            FROM item_variant
+            WHERE opening_stock <= threshold AND deleted_at IS NULL
+            ON CONFLICT (id) DO UPDATE
+            SET variant_count = EXCLUDED.variant_count,
+                version = low_stock_summary.version + 1,
+                updated_at = NOW();
+            """
+        )
+
+        cur.execute("SELECT to_regclass('variant_read_model') IS NOT NULL")
+        if cur.fetchone()[0]:
+            print("Indexing live low-stock rows of variant_read_model...")
+            cur.execute("DROP INDEX IF EXISTS idx_variant_read_model_low_stock;")
+            cur.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_variant_read_model_low_stock
+                ON variant_read_model (item_name, color_name, size_name)
+                WHERE is_low_stock AND NOT is_deleted;
+                """
+            )
+        conn.commit()
+        print(" Low-stock index and summary created")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        for trigger in list(SUMMARY_TRIGGERS) + ["trg_low_stock_summary_truncate"]:
+            cur.execute(f"DROP TRIGGER IF EXISTS {trigger} ON item_variant;")
+        cur.execute("DROP FUNCTION IF EXISTS apply_low_stock_summary();")
+        cur.execute("DROP FUNCTION IF EXISTS truncate_low_stock_summary();")
+        cur.execute("DROP TABLE IF EXISTS low_stock_summary;")
+        cur.execute("SELECT to_regclass('variant_read_model') IS NOT NULL")
+        if cur.fetchone()[0]:
+            cur.execute("DROP INDEX IF EXISTS idx_variant_read_model_low_stock;")
+            cur.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_variant_read_model_low_stock
+                ON variant_read_model (item_name, color_name, size_name)
+                WHERE is_low_stock;
+                """
+            )
+        conn.commit()
@@ -0,0 +1,90 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: version counters for the master data cache.
+
+Creates master_data_versions (one counter per table) and statement-level
+triggers that bump it when a master table changes, or when the columns of
+item_variant/item_master that reference one change. Workers compare the
+counter with their cached copy (app/services/master_data_cache.py).
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+# table -> trigger events
+VERSIONED_TABLES = {
+    "color_master": "INSERT OR UPDATE OR DELETE OR TRUNCATE",
+    "size_master": "INSERT OR UPDATE OR DELETE OR TRUNCATE",
+    "model_master": "INSERT OR UPDATE OR DELETE OR TRUNCATE",
+    "variation_master": "INSERT OR UPDATE OR DELETE OR TRUNCATE",
+    "item_variant": "INSERT OR DELETE OR TRUNCATE OR UPDATE OF color_id, size_id",
+    "item_master": ("INSERT OR DELETE OR TRUNCATE OR UPDATE OF model_id, variation_id"),
+}
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Creating master data version counters...")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS master_data_versions (
+                table_name TEXT PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE OR REPLACE FUNCTION bump_master_data_version()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                INSERT INTO master_data_versions (table_name, version)
+                VALUES (TG_TABLE_NAME, 1)
+                ON CONFLICT (table_name) DO UPDATE
+                SET version = master_data_versions.version + 1,
+                    updated_at = CURRENT_TIMESTAMP;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+
+        for table, events in VERSIONED_TABLES.items():
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+            if not cur.fetchone()[0]:
+                continue
+            cur.execute(
+                """
+                INSERT INTO master_data_versions (table_name, version)
+                VALUES (%s, 0)
+                ON CONFLICT (table_name) DO NOTHING;
+                """,
+                (table,),
+            )
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_master_data_version ON {table};")
+            cur.execute(
+                f"""
+                CREATE TRIGGER trg_master_data_version
+                AFTER {events} ON {table}
+                FOR EACH STATEMENT EXECUTE FUNCTION bump_master_data_version();
+                """
+            )
+        conn.commit()
+        print(" Master data version counters created")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        for table in VERSIONED_TABLES:
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+            if cur.fetchone()[0]:
+                cur.execute(
+                    f"DROP TRIGGER IF EXISTS trg_master_data_version ON {table};"
+                )
+        cur.execute("DROP FUNCTION IF EXISTS bump_master_data_version();")
+        cur.execute("DROP TABLE IF EXISTS master_data_versions;")
+        conn.commit()
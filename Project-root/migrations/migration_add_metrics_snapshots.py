@@ -0,0 +1,38 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: shared metrics snapshots.
+
+Creates metrics_snapshots, one row per snapshot (the dashboard counters,
+the UPF report metrics) holding the computed figures and when they were
+computed. app/services/metrics_snapshot_service.py recomputes a snapshot
+once it is older than its TTL, in a single worker at a time; all workers
+read the stored row in between.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Creating metrics_snapshots table...")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS metrics_snapshots (
+                name VARCHAR(50) PRIMARY KEY,
+                payload JSONB NOT NULL,
+                refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            );
+            """
+        )
+        conn.commit()
+        print(" metrics_snapshots table created")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        cur.execute("DROP TABLE IF EXISTS metrics_snapshots;")
+        conn.commit()
@@ -0,0 +1,47 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: full-text search indexes for processes and subprocesses.
+
+Creates GIN expression indexes over the weighted English tsvector of
+name (A) and description (B) that ProcessService.search_processes and
+SubprocessService.search_subprocesses match against
+(app/utils/text_search.py). Expression indexes keep the vector out of
+``SELECT *`` results. Indexes are created concurrently to avoid locks.
+"""
+
+import os
+import sys
+
+import psycopg2.errors
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+SEARCH_VECTOR = (
+    "(setweight(to_tsvector('english', coalesce(name, '')), 'A')"
+    " || setweight(to_tsvector('english', coalesce(description, '')), 'B'))"
+)
+
+INDEXES = {
+    "idx_processes_search": "processes",
+    "idx_subprocesses_search": "subprocesses",
+}
+
+
+def upgrade():
+    with get_conn(autocommit=True) as (_conn, cur):
+        for name, table in INDEXES.items():
+            try:
+                cur.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                    f"ON {table} USING GIN ({SEARCH_VECTOR});"
+                )
+            except psycopg2.errors.UndefinedTable:
+                # Deployments without the table have nothing to index
+                print(f" Skipping {name}: table {table} does not exist")
+
+
+def downgrade():
+    with get_conn(autocommit=True) as (_conn, cur):
+        for name in INDEXES:
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
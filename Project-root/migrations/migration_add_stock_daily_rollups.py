@@ -0,0 +1,146 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: daily stock receipt rollups.
+
+Creates stock_daily_rollups (quantity, amount and entry count received per
+day, variant and supplier) and statement-level triggers on stock_entries
+that apply each INSERT/UPDATE/DELETE as one aggregated upsert using
+transition tables. Entries without a supplier roll up under supplier 0.
+Days follow the database TimeZone setting, like CURRENT_DATE.
+
+The stock trend (app/services/stock_rollup_service.py) reads this table
+instead of scanning stock_entries.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+# trigger -> (event, transition tables)
+ROLLUP_TRIGGERS = {
+    "trg_stock_daily_rollup_insert": ("INSERT", "NEW TABLE AS new_rows"),
+    "trg_stock_daily_rollup_update": (
+        "UPDATE",
+        "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    ),
+    "trg_stock_daily_rollup_delete": ("DELETE", "OLD TABLE AS old_rows"),
+}
+
+
+def _rollup_upsert(source, sign):
+    # Ordered so concurrent statements lock rollup rows in the same order
+    return f"""
+        INSERT INTO stock_daily_rollups AS r
+            (day, variant_id, supplier_id, quantity, amount, entry_count)
+        SELECT entry_date::date, variant_id, COALESCE(supplier_id, 0),
+               {sign} SUM(quantity_added),
+               {sign} SUM(quantity_added * COALESCE(cost_per_unit, 0)),
+               {sign} COUNT(*)
+        FROM {source}
+        GROUP BY 1, 2, 3
+        ORDER BY 1, 2, 3
+        ON CONFLICT (day, variant_id, supplier_id) DO UPDATE
+        SET quantity = r.quantity + EXCLUDED.quantity,
+            amount = r.amount + EXCLUDED.amount,
+            entry_count = r.entry_count + EXCLUDED.entry_count;
+    """
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Creating daily stock rollups...")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stock_daily_rollups (
+                day DATE NOT NULL,
+                variant_id INTEGER NOT NULL,
+                supplier_id INTEGER NOT NULL DEFAULT 0,
+                quantity BIGINT NOT NULL DEFAULT 0,
+                amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+                entry_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, variant_id, supplier_id)
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_stock_daily_rollups_supplier
+            ON stock_daily_rollups (supplier_id, day);
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_stock_daily_rollups_variant
+            ON stock_daily_rollups (variant_id, day);
+            """
+        )
+
+        # Transition tables are planned lazily: each branch only runs for
+        # the events whose trigger declares its tables.
+        cur.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION apply_stock_daily_rollup()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    {_rollup_upsert("old_rows", "-")}
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    {_rollup_upsert("new_rows", "")}
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+        cur.execute(
+            """
+            CREATE OR REPLACE FUNCTION truncate_stock_daily_rollups()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                TRUNCATE stock_daily_rollups;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+
+        for trigger, (event, tables) in ROLLUP_TRIGGERS.items():
+            cur.execute(f"DROP TRIGGER IF EXISTS {trigger} ON stock_entries;")
+            cur.execute(
+                f"""
+                CREATE TRIGGER {trigger}
+                AFTER {event} ON stock_entries
+                REFERENCING {tables}
+                FOR EACH STATEMENT EXECUTE FUNCTION apply_stock_daily_rollup();
+                """
+            )
+        cur.execute(
+            "DROP TRIGGER IF EXISTS trg_stock_daily_rollup_truncate ON stock_entries;"
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER trg_stock_daily_rollup_truncate
+            AFTER TRUNCATE ON stock_entries
+            FOR EACH STATEMENT EXECUTE FUNCTION truncate_stock_daily_rollups();
+            """
+        )
+
+        # Creating the triggers locked out writers, so the backfill is exact
+        print("Backfilling daily stock rollups...")
+        cur.execute("DELETE FROM stock_daily_rollups;")
+        cur.execute(_rollup_upsert("stock_entries", ""))
+        conn.commit()
+        print(" Daily stock rollups created")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        for trigger in list(ROLLUP_TRIGGERS) + ["trg_stock_daily_rollup_truncate"]:
+            cur.execute(f"DROP TRIGGER IF EXISTS {trigger} ON stock_entries;")
+        cur.execute("DROP FUNCTION IF EXISTS apply_stock_daily_rollup();")
+        cur.execute("DROP FUNCTION IF EXISTS truncate_stock_daily_rollups();")
+        cur.execute("DROP TABLE IF EXISTS stock_daily_rollups;")
+        conn.commit()
@@ -0,0 +1,162 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: append-only stock movement ledger with daily balance snapshots.
+
+Every change to item_variant.opening_stock (receipts, production
+deductions, manual edits, imports, variant creation and deletion) is
+recorded by a row trigger in stock_movements, in the writer's transaction,
+with the source type/id the writer tagged the transaction with
+(app/services/stock_ledger_service.py). Untagged writes are recorded as
+'direct'. opening_stock stays the current balance: the latest movement's
+balance_after always equals it.
+
+The first movement of a variant on a given day also records the variant's
+balance at the start of that day in stock_balance_snapshots, so stock as
+of any time is one snapshot plus at most one day of movements.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+
+RECORD_STOCK_MOVEMENT = """
+    CREATE OR REPLACE FUNCTION record_stock_movement()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        v_id INTEGER;
+        old_balance INTEGER := 0;
+        new_balance INTEGER := 0;
+        -- When the row changed, not when the transaction began: a later writer
+        -- of the same variant waited for this one's row lock, so its movement
+        -- is stamped after this one commits
+        v_at TIMESTAMPTZ := clock_timestamp();
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            v_id := OLD.variant_id;
+        ELSE
+            v_id := NEW.variant_id;
+            new_balance := COALESCE(NEW.opening_stock, 0);
+        END IF;
+        IF TG_OP <> 'INSERT' THEN
+            old_balance := COALESCE(OLD.opening_stock, 0);
+        END IF;
+        IF new_balance = old_balance THEN
+            RETURN NULL;
+        END IF;
+
+        -- The first movement of the day records the opening balance
+        INSERT INTO stock_balance_snapshots (variant_id, snapshot_date, balance)
+        VALUES (v_id, v_at::date, old_balance)
+        ON CONFLICT (variant_id, snapshot_date) DO NOTHING;
+
+        INSERT INTO stock_movements
+            (variant_id, delta, balance_after, source_type, source_id, created_at)
+        VALUES (
+            v_id,
+            new_balance - old_balance,
+            new_balance,
+            COALESCE(NULLIF(current_setting('mtc.stock_source', true), ''), 'direct'),
+            NULLIF(current_setting('mtc.stock_source_id', true), ''),
+            v_at
+        );
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Creating stock movement ledger...")
+        # No foreign key to item_variant: history outlives deleted variants
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stock_movements (
+                movement_id BIGSERIAL PRIMARY KEY,
+                variant_id INTEGER NOT NULL,
+                delta INTEGER NOT NULL,
+                balance_after INTEGER NOT NULL,
+                source_type VARCHAR(32) NOT NULL,
+                source_id TEXT,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_stock_movements_variant_time
+            ON stock_movements (variant_id, created_at);
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_stock_movements_source
+            ON stock_movements (source_type, source_id);
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stock_balance_snapshots (
+                variant_id INTEGER NOT NULL,
+                snapshot_date DATE NOT NULL,
+                balance INTEGER NOT NULL,
+                PRIMARY KEY (variant_id, snapshot_date)
+            );
+            """
+        )
+
+        cur.execute(
+            """
+            CREATE OR REPLACE FUNCTION stock_movements_append_only()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                RAISE EXCEPTION 'stock_movements is append-only';
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+        cur.execute(
+            "DROP TRIGGER IF EXISTS trg_stock_movements_append_only ON stock_movements;"
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER trg_stock_movements_append_only
+            BEFORE UPDATE OR DELETE ON stock_movements
+            FOR EACH ROW EXECUTE FUNCTION stock_movements_append_only();
+            """
+        )
+
+        cur.execute(RECORD_STOCK_MOVEMENT)
+        cur.execute("DROP TRIGGER IF EXISTS trg_stock_movement ON item_variant;")
+        cur.execute(
+            """
+            CREATE TRIGGER trg_stock_movement
+            AFTER INSERT OR DELETE OR UPDATE OF opening_stock ON item_variant
+            FOR EACH ROW EXECUTE FUNCTION record_stock_movement();
+            """
+        )
+
+        # The ledger starts from today's balances
+        cur.execute(
+            """
+            INSERT INTO stock_balance_snapshots (variant_id, snapshot_date, balance)
+            SELECT variant_id, CURRENT_DATE, COALESCE(opening_stock, 0)
+            FROM item_variant
+            ON CONFLICT (variant_id, snapshot_date) DO NOTHING;
+            """
+        )
+        conn.commit()
+        print(" Stock movement ledger created")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        cur.execute("DROP TRIGGER IF EXISTS trg_stock_movement ON item_variant;")
+        cur.execute("DROP FUNCTION IF EXISTS record_stock_movement();")
+        cur.execute("DROP TABLE IF EXISTS stock_balance_snapshots;")
+        cur.execute("DROP TABLE IF EXISTS stock_movements;")
+        cur.execute("DROP FUNCTION IF EXISTS stock_movements_append_only();")
+        conn.commit()
@@ -0,0 +1,83 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: version counters for the cached supplier directory.
+
+Adds suppliers and supplier_contacts to master_data_versions, bumped by
+the same statement-level trigger as the master tables, so workers caching
+the supplier listing (app/services/supplier_directory.py) see changes made
+elsewhere within the cache TTL.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+VERSIONED_TABLES = ("suppliers", "supplier_contacts")
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Versioning the supplier directory...")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS master_data_versions (
+                table_name TEXT PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE OR REPLACE FUNCTION bump_master_data_version()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                INSERT INTO master_data_versions (table_name, version)
+                VALUES (TG_TABLE_NAME, 1)
+                ON CONFLICT (table_name) DO UPDATE
+                SET version = master_data_versions.version + 1,
+                    updated_at = CURRENT_TIMESTAMP;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+        for table in VERSIONED_TABLES:
+            cur.execute(
+                """
+                INSERT INTO master_data_versions (table_name, version)
+                VALUES (%s, 0)
+                ON CONFLICT (table_name) DO NOTHING;
+                """,
+                (table,),
+            )
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_master_data_version ON {table};")
+            cur.execute(
+                f"""
+                CREATE TRIGGER trg_master_data_version
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+                FOR EACH STATEMENT EXECUTE FUNCTION bump_master_data_version();
+                """
+            )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_supplier_contacts_supplier
+            ON supplier_contacts (supplier_id);
+            """
+        )
+        conn.commit()
+        print(" Supplier directory versioned")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        for table in VERSIONED_TABLES:
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_master_data_version ON {table};")
+        cur.execute(
+            "DELETE FROM master_data_versions WHERE table_name = ANY(%s);",
+            (list(VERSIONED_TABLES),),
+        )
+        cur.execute("DROP INDEX IF EXISTS idx_supplier_contacts_supplier;")
+        conn.commit()
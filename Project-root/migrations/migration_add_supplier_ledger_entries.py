@@ -0,0 +1,307 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: materialized supplier ledger.
+
+Creates supplier_ledger_entries, the rows of the supplier_ledger view
+(one per purchase order and one per receipt line) stored and indexed by
+supplier and ledger order, with each supplier's running received quantity
+and amount precomputed on every row. supplier_ledger_totals keeps each
+supplier's event count, so the unfiltered ledger total is a single-row read.
+
+Statement-level triggers on purchase_orders, stock_receipts and
+stock_entries pass the ids they touched to refresh_supplier_ledger(), which
+rewrites just those events and recomputes the running balances from the
+earliest changed event onwards. Receipts are normally posted at the end of
+a supplier's ledger, so that is usually only the new rows. Refreshes take
+a per-supplier advisory lock so concurrent writers cannot interleave
+balances.
+
+PO rows store stock_entry_id 0 so the ledger order key is never NULL.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+# table -> (id column passed to the refresh, refresh argument)
+LEDGER_SOURCES = {
+    "purchase_orders": ("po_id", "po_ids"),
+    "stock_receipts": ("receipt_id", "receipt_ids"),
+    "stock_entries": ("receipt_id", "receipt_ids"),
+}
+
+# event -> transition tables
+LEDGER_EVENTS = {
+    "INSERT": "NEW TABLE AS new_rows",
+    "UPDATE": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "DELETE": "OLD TABLE AS old_rows",
+}
+
+
+def _has_column(cur, table, column):
+    cur.execute(
+        """
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = %s AND column_name = %s
+        """,
+        (table, column),
+    )
+    return cur.fetchone() is not None
+
+
+def _refresh_function(po_notes, receipt_notes):
+    return f"""
+        CREATE OR REPLACE FUNCTION refresh_supplier_ledger(
+            p_receipt_ids INT[], p_po_ids INT[]
+        ) RETURNS VOID AS $$
+        DECLARE
+            v_suppliers INT[];
+            v_dates TIMESTAMP[];
+            v_deltas INT[];
+        BEGIN
+            p_receipt_ids := COALESCE(p_receipt_ids, '{{}}');
+            p_po_ids := COALESCE(p_po_ids, '{{}}');
+            IF cardinality(p_receipt_ids) = 0 AND cardinality(p_po_ids) = 0 THEN
+                RETURN;
+            END IF;
+
+            WITH removed AS (
+                DELETE FROM supplier_ledger_entries
+                WHERE (event_type = 'receipt' AND event_id = ANY(p_receipt_ids))
+                   OR (event_type = 'po' AND event_id = ANY(p_po_ids))
+                RETURNING supplier_id, event_date
+            )
+            SELECT COALESCE(array_agg(supplier_id), '{{}}'),
+                   COALESCE(array_agg(event_date), '{{}}'),
+                   COALESCE(array_agg(-1), '{{}}')
+            INTO v_suppliers, v_dates, v_deltas
+            FROM removed;
+
+            WITH added AS (
+                INSERT INTO supplier_ledger_entries (
+                    supplier_id, event_date, event_type, event_id,
+                    stock_entry_id, reference_number, receipt_id, variant_id,
+                    quantity, cost_per_unit, amount, po_status, notes
+                )
+                SELECT po.supplier_id, po.order_date::timestamp, 'po', po.po_id,
+                       0, po.po_number::text, NULL, NULL,
+                       NULL, NULL, 0, po.status::text, {po_notes}
+                FROM purchase_orders po
+                WHERE po.po_id = ANY(p_po_ids) AND po.supplier_id IS NOT NULL
+                UNION ALL
+                SELECT sr.supplier_id,
+                       COALESCE(sr.receipt_date, se.entry_date)::timestamp,
+                       'receipt',
+                       sr.receipt_id, se.entry_id, sr.bill_number::text,
+                       sr.receipt_id, se.variant_id, se.quantity_added,
+                       se.cost_per_unit,
+                       se.quantity_added * COALESCE(se.cost_per_unit, 0),
+                       NULL, {receipt_notes}
+                FROM stock_receipts sr
+                JOIN stock_entries se ON se.receipt_id = sr.receipt_id
+                WHERE sr.receipt_id = ANY(p_receipt_ids)
+                  AND sr.supplier_id IS NOT NULL
+                RETURNING supplier_id, event_date
+            )
+            SELECT v_suppliers || COALESCE(array_agg(supplier_id), '{{}}'),
+                   v_dates || COALESCE(array_agg(event_date), '{{}}'),
+                   v_deltas || COALESCE(array_agg(1), '{{}}')
+            INTO v_suppliers, v_dates, v_deltas
+            FROM added;
+
+            IF cardinality(v_suppliers) = 0 THEN
+                RETURN;
+            END IF;
+
+            -- One refresh per supplier at a time, in supplier order. Taken
+            -- before the balances are read, so they include every
+            -- committed refresh of the same supplier.
+            PERFORM pg_advisory_xact_lock(hashtext('supplier_ledger'), s.supplier_id)
+            FROM (SELECT DISTINCT unnest(v_suppliers) AS supplier_id ORDER BY 1) s;
+
+            INSERT INTO supplier_ledger_totals AS t (supplier_id, event_count)
+            SELECT c.supplier_id, SUM(c.delta)
+            FROM unnest(v_suppliers, v_deltas) AS c(supplier_id, delta)
+            GROUP BY c.supplier_id
+            ORDER BY c.supplier_id
+            ON CONFLICT (supplier_id) DO UPDATE
+            SET event_count = t.event_count + EXCLUDED.event_count;
+
+            -- Running balances from each supplier's earliest changed event,
+            -- continuing from the balance of the row before it
+            UPDATE supplier_ledger_entries e
+            SET balance_quantity = r.balance_quantity,
+                balance_amount = r.balance_amount
+            FROM (
+                SELECT l.entry_key,
+                       COALESCE(prev.balance_quantity, 0)
+                           + SUM(COALESCE(l.quantity, 0)) OVER w AS balance_quantity,
+                       COALESCE(prev.balance_amount, 0)
+                           + SUM(l.amount) OVER w AS balance_amount
+                FROM (
+                    SELECT c.supplier_id, MIN(c.event_date) AS since
+                    FROM unnest(v_suppliers, v_dates) AS c(supplier_id, event_date)
+                    GROUP BY c.supplier_id
+                ) a
+                LEFT JOIN LATERAL (
+                    SELECT p.balance_quantity, p.balance_amount
+                    FROM supplier_ledger_entries p
+                    WHERE p.supplier_id = a.supplier_id AND p.event_date < a.since
+                    ORDER BY p.event_date DESC, p.event_type DESC,
+                             p.event_id DESC, p.stock_entry_id DESC
+                    LIMIT 1
+                ) prev ON TRUE
+                JOIN supplier_ledger_entries l
+                  ON l.supplier_id = a.supplier_id AND l.event_date >= a.since
+                WINDOW w AS (
+                    PARTITION BY l.supplier_id
+                    ORDER BY l.event_date, l.event_type, l.event_id, l.stock_entry_id
+                )
+            ) r
+            WHERE e.entry_key = r.entry_key
+              AND (e.balance_quantity, e.balance_amount)
+                  IS DISTINCT FROM (r.balance_quantity, r.balance_amount);
+        END;
+        $$ LANGUAGE plpgsql;
+    """
+
+
+def _trigger_function(table, column, argument):
+    other = "po_ids" if argument == "receipt_ids" else "receipt_ids"
+    # Transition tables are planned lazily: each branch only runs for the
+    # events whose trigger declares its tables.
+    return f"""
+        CREATE OR REPLACE FUNCTION refresh_supplier_ledger_from_{table}()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            v_ids INT[] := '{{}}';
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                v_ids := v_ids || ARRAY(
+                    SELECT {column} FROM old_rows WHERE {column} IS NOT NULL
+                );
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                v_ids := v_ids || ARRAY(
+                    SELECT {column} FROM new_rows WHERE {column} IS NOT NULL
+                );
+            END IF;
+            PERFORM refresh_supplier_ledger(
+                p_{argument} => ARRAY(SELECT DISTINCT unnest(v_ids) ORDER BY 1),
+                p_{other} => '{{}}'
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Creating materialized supplier ledger...")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS supplier_ledger_entries (
+                entry_key BIGSERIAL PRIMARY KEY,
+                supplier_id INTEGER NOT NULL,
+                event_date TIMESTAMP NOT NULL,
+                event_type TEXT NOT NULL,
+                event_id BIGINT NOT NULL,
+                stock_entry_id BIGINT NOT NULL DEFAULT 0,
+                reference_number TEXT,
+                receipt_id BIGINT,
+                variant_id BIGINT,
+                quantity NUMERIC,
+                cost_per_unit NUMERIC,
+                amount NUMERIC NOT NULL DEFAULT 0,
+                po_status TEXT,
+                notes TEXT,
+                balance_quantity NUMERIC NOT NULL DEFAULT 0,
+                balance_amount NUMERIC NOT NULL DEFAULT 0,
+                UNIQUE (event_type, event_id, stock_entry_id)
+            );
+            """
+        )
+        # Ledger order; scanned backwards for the newest-first pages
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_supplier_ledger_entries_order
+            ON supplier_ledger_entries
+                (supplier_id, event_date, event_type, event_id, stock_entry_id);
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_supplier_ledger_entries_variant
+            ON supplier_ledger_entries (supplier_id, variant_id, event_date)
+            WHERE variant_id IS NOT NULL;
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS supplier_ledger_totals (
+                supplier_id INTEGER PRIMARY KEY,
+                event_count BIGINT NOT NULL DEFAULT 0
+            );
+            """
+        )
+
+        po_notes = (
+            "po.notes::text"
+            if _has_column(cur, "purchase_orders", "notes")
+            else "NULL::text"
+        )
+        receipt_notes = (
+            "sr.notes::text"
+            if _has_column(cur, "stock_receipts", "notes")
+            else "NULL::text"
+        )
+        cur.execute(_refresh_function(po_notes, receipt_notes))
+
+        for table, (column, argument) in LEDGER_SOURCES.items():
+            cur.execute(_trigger_function(table, column, argument))
+            for event, tables in LEDGER_EVENTS.items():
+                trigger = f"trg_supplier_ledger_{event.lower()}"
+                cur.execute(f"DROP TRIGGER IF EXISTS {trigger} ON {table};")
+                cur.execute(
+                    f"""
+                    CREATE TRIGGER {trigger}
+                    AFTER {event} ON {table}
+                    REFERENCING {tables}
+                    FOR EACH STATEMENT
+                    EXECUTE FUNCTION refresh_supplier_ledger_from_{table}();
+                    """
+                )
+
+        # Creating the triggers locked out writers, so the backfill is exact
+        print("Backfilling supplier ledger...")
+        cur.execute("TRUNCATE supplier_ledger_entries, supplier_ledger_totals;")
+        cur.execute(
+            """
+            SELECT refresh_supplier_ledger(
+                ARRAY(SELECT receipt_id FROM stock_receipts ORDER BY receipt_id),
+                ARRAY(SELECT po_id FROM purchase_orders ORDER BY po_id)
+            );
+            """
+        )
+        conn.commit()
+        print(" Materialized supplier ledger created")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        for table in LEDGER_SOURCES:
+            for event in LEDGER_EVENTS:
+                cur.execute(
+                    f"DROP TRIGGER IF EXISTS trg_supplier_ledger_{event.lower()} "
+                    f"ON {table};"
+                )
+            cur.execute(
+                f"DROP FUNCTION IF EXISTS refresh_supplier_ledger_from_{table}();"
+            )
+        cur.execute("DROP FUNCTION IF EXISTS refresh_supplier_ledger(INT[], INT[]);")
+        cur.execute("DROP TABLE IF EXISTS supplier_ledger_totals;")
+        cur.execute("DROP TABLE IF EXISTS supplier_ledger_entries;")
+        conn.commit()
@@ -0,0 +1,94 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: immutable process version snapshots.
+
+Creates:
+  - process_versions (frozen JSONB structure of a process plus the worst-case
+    cost breakdown calculated once when the version is frozen)
+  - production_lots.process_version_id pinning each lot to the version it
+    was created from
+  - trigger rejecting changes to a frozen structure
+
+Named after the UPF migrations so it sorts after the one that creates
+production_lots.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Creating process_versions table...")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS process_versions (
+                id SERIAL PRIMARY KEY,
+                process_id INTEGER NOT NULL REFERENCES processes(id) ON DELETE CASCADE,
+                version_number INTEGER NOT NULL,
+                structure JSONB NOT NULL,
+                structure_hash CHAR(32) NOT NULL,
+                cost_breakdown JSONB,
+                unit_cost NUMERIC(14, 4),
+                created_by INTEGER REFERENCES users(user_id) ON DELETE SET NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                CONSTRAINT uq_process_versions_number UNIQUE (process_id, version_number),
+                CONSTRAINT uq_process_versions_hash UNIQUE (process_id, structure_hash)
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE OR REPLACE FUNCTION process_versions_immutable()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                IF NEW.structure IS DISTINCT FROM OLD.structure
+                   OR NEW.structure_hash IS DISTINCT FROM OLD.structure_hash
+                   OR NEW.process_id IS DISTINCT FROM OLD.process_id THEN
+                    RAISE EXCEPTION 'process version % is immutable', OLD.id;
+                END IF;
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+        cur.execute(
+            "DROP TRIGGER IF EXISTS trg_process_versions_immutable ON process_versions;"
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER trg_process_versions_immutable
+            BEFORE UPDATE ON process_versions
+            FOR EACH ROW EXECUTE FUNCTION process_versions_immutable();
+            """
+        )
+
+        print("Pinning production lots to process versions...")
+        cur.execute(
+            """
+            ALTER TABLE production_lots
+            ADD COLUMN IF NOT EXISTS process_version_id INTEGER
+                REFERENCES process_versions(id) ON DELETE SET NULL;
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_production_lots_process_version
+            ON production_lots (process_version_id);
+            """
+        )
+        conn.commit()
+        print(" Process versions created")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        cur.execute(
+            "ALTER TABLE production_lots DROP COLUMN IF EXISTS process_version_id;"
+        )
+        cur.execute("DROP TABLE IF EXISTS process_versions CASCADE;")
+        cur.execute("DROP FUNCTION IF EXISTS process_versions_immutable();")
+        conn.commit()
@@ -0,0 +1,80 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: stock reservation ledger for production lots.
+
+Creates:
+  - stock_reservations  (one row per lot/variant reservation, never deleted;
+    status moves active -> consumed | released)
+  - partial index on active reservations per variant
+  - variant_stock_availability view (on-hand stock minus active reservations)
+
+Named after the UPF migrations so it sorts after the one that creates
+production_lots.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Creating stock reservation ledger...")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stock_reservations (
+                reservation_id SERIAL PRIMARY KEY,
+                lot_id INTEGER REFERENCES production_lots(id) ON DELETE SET NULL,
+                variant_id INTEGER NOT NULL REFERENCES item_variant(variant_id) ON DELETE CASCADE,
+                quantity NUMERIC(14, 4) NOT NULL CHECK (quantity >= 0),
+                status VARCHAR(20) NOT NULL DEFAULT 'active'
+                    CHECK (status IN ('active', 'consumed', 'released')),
+                created_by INTEGER REFERENCES users(user_id),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                closed_at TIMESTAMP
+            );
+            """
+        )
+        # Availability lookups only ever aggregate active rows
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_stock_reservations_active_variant
+            ON stock_reservations (variant_id) INCLUDE (quantity)
+            WHERE status = 'active';
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_stock_reservations_lot_status
+            ON stock_reservations (lot_id, status);
+            """
+        )
+        cur.execute(
+            """
+            CREATE OR REPLACE VIEW variant_stock_availability AS
+            SELECT
+                iv.variant_id,
+                iv.opening_stock AS on_hand,
+                COALESCE(r.reserved, 0) AS reserved,
+                iv.opening_stock - COALESCE(r.reserved, 0) AS available_to_promise,
+                iv.threshold
+            FROM item_variant iv
+            LEFT JOIN (
+                SELECT variant_id, SUM(quantity) AS reserved
+                FROM stock_reservations
+                WHERE status = 'active'
+                GROUP BY variant_id
+            ) r ON r.variant_id = iv.variant_id;
+            """
+        )
+        conn.commit()
+        print(" Stock reservation ledger created")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        cur.execute("DROP VIEW IF EXISTS variant_stock_availability;")
+        cur.execute("DROP TABLE IF EXISTS stock_reservations CASCADE;")
+        conn.commit()
@@ -0,0 +1,103 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: NOTIFY feed for the in-process variant autocomplete index.
+
+Creates notify_variant_catalog() and triggers that publish on the
+``variant_catalog`` channel:
+  - '<variant_id>'  item_variant rows (and stock reservations) changed
+  - 'item:<item_id>' an item's name, model, brand or deletion changed
+  - '*'              a color/size/model/brand name changed (full reload)
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+# table -> trigger events
+NOTIFY_TRIGGERS = {
+    "item_variant": (
+        "INSERT OR DELETE OR UPDATE OF item_id, color_id, size_id, opening_stock,"
+        " threshold, unit, deleted_at"
+    ),
+    "item_master": "UPDATE OF name, model_id, item_brand_id, deleted_at",
+    "color_master": "UPDATE OF color_name",
+    "size_master": "UPDATE OF size_name",
+    "model_master": "UPDATE OF model_name",
+    "item_brand_master": "UPDATE OF item_brand_name",
+    "stock_reservations": "INSERT OR UPDATE OF status, quantity",
+}
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Creating variant catalog NOTIFY triggers...")
+        cur.execute(
+            """
+            CREATE OR REPLACE FUNCTION notify_variant_catalog()
+            RETURNS TRIGGER AS $$
+            DECLARE
+                rec RECORD;
+                payload TEXT;
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    rec := OLD;
+                ELSE
+                    rec := NEW;
+                END IF;
+
+                IF TG_TABLE_NAME IN ('item_variant', 'stock_reservations') THEN
+                    payload := rec.variant_id::text;
+                ELSIF TG_TABLE_NAME = 'item_master' THEN
+                    payload := 'item:' || rec.item_id::text;
+                ELSE
+                    payload := '*';
+                END IF;
+
+                PERFORM pg_notify('variant_catalog', payload);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+        cur.execute(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'item_master' AND column_name = 'item_brand_id'
+            )
+            """
+        )
+        has_brand_column = cur.fetchone()[0]
+
+        for table, events in NOTIFY_TRIGGERS.items():
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+            if not cur.fetchone()[0]:
+                continue
+            if table == "item_master" and not has_brand_column:
+                events = "UPDATE OF name, model_id, deleted_at"
+            cur.execute(
+                f"DROP TRIGGER IF EXISTS trg_notify_variant_catalog ON {table};"
+            )
+            cur.execute(
+                f"""
+                CREATE TRIGGER trg_notify_variant_catalog
+                AFTER {events} ON {table}
+                FOR EACH ROW EXECUTE FUNCTION notify_variant_catalog();
+                """
+            )
+        conn.commit()
+        print(" Variant catalog NOTIFY triggers created")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        for table in NOTIFY_TRIGGERS:
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+            if cur.fetchone()[0]:
+                cur.execute(
+                    f"DROP TRIGGER IF EXISTS trg_notify_variant_catalog ON {table};"
+                )
+        cur.execute("DROP FUNCTION IF EXISTS notify_variant_catalog();")
+        conn.commit()
@@ -0,0 +1,279 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: trigger-maintained variant read model.
+
+Creates:
+  - variant_read_model (one flattened row per variant: item, model,
+    variation, brand, category, color and size names, display name, unit,
+    stock, threshold and low/out-of-stock and deleted flags)
+  - indexes matching the variant listing order and the low-stock report
+  - refresh_variant_read_model(int[]) and triggers on item_variant,
+    item_master and the master tables that keep rows current
+
+The row definition matches VARIANT_ROWS_SQL in
+app/services/variant_read_model.py, which readers fall back to before this
+migration is applied.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+COLUMNS = (
+    "variant_id",
+    "item_id",
+    "item_name",
+    "description",
+    "model_name",
+    "variation_name",
+    "brand_name",
+    "category_id",
+    "category_name",
+    "color_name",
+    "size_name",
+    "display_name",
+    "unit",
+    "opening_stock",
+    "threshold",
+    "is_low_stock",
+    "is_out_of_stock",
+    "is_deleted",
+)
+
+ITEM_VARIANT_COLUMNS = (
+    "item_id, color_id, size_id, opening_stock, threshold, unit, deleted_at"
+)
+ITEM_MASTER_COLUMNS = (
+    "name, description, model_id, variation_id, item_brand_id,"
+    " item_category_id, deleted_at"
+)
+
+# master table -> (name column, variants affected by a change to row NEW)
+MASTER_TABLES = {
+    "color_master": (
+        "color_name",
+        "SELECT variant_id FROM item_variant WHERE color_id = NEW.color_id",
+    ),
+    "size_master": (
+        "size_name",
+        "SELECT variant_id FROM item_variant WHERE size_id = NEW.size_id",
+    ),
+    "model_master": (
+        "model_name",
+        """SELECT iv.variant_id FROM item_variant iv
+           JOIN item_master im ON im.item_id = iv.item_id
+           WHERE im.model_id = NEW.model_id""",
+    ),
+    "variation_master": (
+        "variation_name",
+        """SELECT iv.variant_id FROM item_variant iv
+           JOIN item_master im ON im.item_id = iv.item_id
+           WHERE im.variation_id = NEW.variation_id""",
+    ),
+    "item_brand_master": (
+        "item_brand_name",
+        """SELECT iv.variant_id FROM item_variant iv
+           JOIN item_master im ON im.item_id = iv.item_id
+           WHERE im.item_brand_id = NEW.item_brand_id""",
+    ),
+    "item_category_master": (
+        "item_category_name",
+        """SELECT iv.variant_id FROM item_variant iv
+           JOIN item_master im ON im.item_id = iv.item_id
+           WHERE im.item_category_id = NEW.item_category_id""",
+    ),
+}
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Creating variant read model...")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS variant_read_model (
+                variant_id INTEGER PRIMARY KEY
+                    REFERENCES item_variant(variant_id) ON DELETE CASCADE,
+                item_id INTEGER NOT NULL,
+                item_name VARCHAR(255) NOT NULL,
+                description TEXT,
+                model_name TEXT,
+                variation_name TEXT,
+                brand_name TEXT,
+                category_id INTEGER,
+                category_name TEXT,
+                color_name TEXT,
+                size_name TEXT,
+                display_name TEXT NOT NULL,
+                unit VARCHAR(50),
+                opening_stock INTEGER NOT NULL DEFAULT 0,
+                threshold INTEGER NOT NULL DEFAULT 5,
+                is_low_stock BOOLEAN NOT NULL DEFAULT FALSE,
+                is_out_of_stock BOOLEAN NOT NULL DEFAULT FALSE,
+                is_deleted BOOLEAN NOT NULL DEFAULT FALSE,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_variant_read_model_listing
+            ON variant_read_model (item_name, color_name, size_name, variant_id)
+            WHERE NOT is_deleted;
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_variant_read_model_low_stock
+            ON variant_read_model (item_name, color_name, size_name)
+            WHERE is_low_stock;
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_variant_read_model_item
+            ON variant_read_model (item_id);
+            """
+        )
+
+        updates = ",\n                    ".join(
+            f"{c} = EXCLUDED.{c}" for c in COLUMNS if c != "variant_id"
+        )
+        current = ", ".join(f"variant_read_model.{c}" for c in COLUMNS)
+        excluded = ", ".join(f"EXCLUDED.{c}" for c in COLUMNS)
+        cur.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION refresh_variant_read_model(
+                p_variant_ids INTEGER[]
+            ) RETURNS VOID AS $$
+            BEGIN
+                INSERT INTO variant_read_model ({", ".join(COLUMNS)})
+                SELECT
+                    iv.variant_id,
+                    iv.item_id,
+                    im.name,
+                    im.description,
+                    mm.model_name,
+                    vm.variation_name,
+                    ibm.item_brand_name,
+                    im.item_category_id,
+                    icm.item_category_name,
+                    cm.color_name,
+                    sm.size_name,
+                    im.name || ' - ' || cm.color_name || ' - ' || sm.size_name,
+                    iv.unit,
+                    iv.opening_stock,
+                    iv.threshold,
+                    iv.opening_stock <= iv.threshold,
+                    iv.opening_stock <= 0,
+                    iv.deleted_at IS NOT NULL OR im.deleted_at IS NOT NULL
+                FROM item_variant iv
+                JOIN item_master im ON im.item_id = iv.item_id
+                JOIN color_master cm ON cm.color_id = iv.color_id
+                JOIN size_master sm ON sm.size_id = iv.size_id
+                LEFT JOIN model_master mm ON mm.model_id = im.model_id
+                LEFT JOIN variation_master vm ON vm.variation_id = im.variation_id
+                LEFT JOIN item_brand_master ibm ON ibm.item_brand_id = im.item_brand_id
+                LEFT JOIN item_category_master icm
+                    ON icm.item_category_id = im.item_category_id
+                WHERE iv.variant_id = ANY(p_variant_ids)
+                ON CONFLICT (variant_id) DO UPDATE
+                SET {updates},
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE ({current}) IS DISTINCT FROM ({excluded});
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+
+        cur.execute(
+            """
+            CREATE OR REPLACE FUNCTION variant_read_model_variant_changed()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                PERFORM refresh_variant_read_model(ARRAY[NEW.variant_id]);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+        cur.execute("DROP TRIGGER IF EXISTS trg_variant_read_model ON item_variant;")
+        cur.execute(
+            f"""
+            CREATE TRIGGER trg_variant_read_model
+            AFTER INSERT OR UPDATE OF {ITEM_VARIANT_COLUMNS}
+            ON item_variant
+            FOR EACH ROW EXECUTE FUNCTION variant_read_model_variant_changed();
+            """
+        )
+
+        cur.execute(
+            """
+            CREATE OR REPLACE FUNCTION variant_read_model_item_changed()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                PERFORM refresh_variant_read_model(ARRAY(
+                    SELECT variant_id FROM item_variant WHERE item_id = NEW.item_id
+                ));
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+        cur.execute("DROP TRIGGER IF EXISTS trg_variant_read_model ON item_master;")
+        cur.execute(
+            f"""
+            CREATE TRIGGER trg_variant_read_model
+            AFTER UPDATE OF {ITEM_MASTER_COLUMNS} ON item_master
+            FOR EACH ROW EXECUTE FUNCTION variant_read_model_item_changed();
+            """
+        )
+
+        for table, (name_column, variants_sql) in MASTER_TABLES.items():
+            cur.execute(
+                f"""
+                CREATE OR REPLACE FUNCTION variant_read_model_{table}_changed()
+                RETURNS TRIGGER AS $$
+                BEGIN
+                    PERFORM refresh_variant_read_model(ARRAY({variants_sql}));
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;
+                """
+            )
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_variant_read_model ON {table};")
+            cur.execute(
+                f"""
+                CREATE TRIGGER trg_variant_read_model
+                AFTER UPDATE OF {name_column} ON {table}
+                FOR EACH ROW EXECUTE FUNCTION variant_read_model_{table}_changed();
+                """
+            )
+
+        print("Backfilling variant read model...")
+        cur.execute(
+            """
+            SELECT refresh_variant_read_model(
+                ARRAY(SELECT variant_id FROM item_variant)
+            );
+            """
+        )
+        cur.execute("ANALYZE variant_read_model;")
+        conn.commit()
+        print(" Variant read model created")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        for table in ("item_variant", "item_master", *MASTER_TABLES):
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_variant_read_model ON {table};")
+        for table in MASTER_TABLES:
+            cur.execute(
+                f"DROP FUNCTION IF EXISTS variant_read_model_{table}_changed();"
+            )
+        cur.execute("DROP FUNCTION IF EXISTS variant_read_model_item_changed();")
+        cur.execute("DROP FUNCTION IF EXISTS variant_read_model_variant_changed();")
+        cur.execute("DROP FUNCTION IF EXISTS refresh_variant_read_model(INTEGER[]);")
+        cur.execute("DROP TABLE IF EXISTS variant_read_model;")
+        conn.commit()
@@ -0,0 +1,255 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: trigram-indexed variant search documents.
+
+Creates:
+  - pg_trgm extension
+  - variant_search_documents (one lowercased search document per live
+    variant: item, model, variation, brand, color and size names)
+  - GIN gin_trgm_ops index for substring and similarity matching, plus a
+    text_pattern_ops index for prefix matching of 1-2 character terms
+  - refresh_variant_search_documents(int[]) and triggers on item_variant,
+    item_master and the master tables that keep documents current
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+
+# master table -> (name column, variants affected by a change to row NEW)
+MASTER_TABLES = {
+    "color_master": (
+        "color_name",
+        "SELECT variant_id FROM item_variant WHERE color_id = NEW.color_id",
+    ),
+    "size_master": (
+        "size_name",
+        "SELECT variant_id FROM item_variant WHERE size_id = NEW.size_id",
+    ),
+    "model_master": (
+        "model_name",
+        """SELECT iv.variant_id FROM item_variant iv
+           JOIN item_master im ON im.item_id = iv.item_id
+           WHERE im.model_id = NEW.model_id""",
+    ),
+    "variation_master": (
+        "variation_name",
+        """SELECT iv.variant_id FROM item_variant iv
+           JOIN item_master im ON im.item_id = iv.item_id
+           WHERE im.variation_id = NEW.variation_id""",
+    ),
+    "item_brand_master": (
+        "item_brand_name",
+        """SELECT iv.variant_id FROM item_variant iv
+           JOIN item_master im ON im.item_id = iv.item_id
+           WHERE im.item_brand_id = NEW.item_brand_id""",
+    ),
+}
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Creating variant search documents...")
+        cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS variant_search_documents (
+                variant_id INTEGER PRIMARY KEY
+                    REFERENCES item_variant(variant_id) ON DELETE CASCADE,
+                item_id INTEGER NOT NULL,
+                document TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_variant_search_documents_trgm
+            ON variant_search_documents USING GIN (document gin_trgm_ops);
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_variant_search_documents_prefix
+            ON variant_search_documents (document text_pattern_ops);
+            """
+        )
+
+        cur.execute(
+            """
+            SELECT
+                to_regclass('variation_master') IS NOT NULL,
+                to_regclass('item_brand_master') IS NOT NULL
+            """
+        )
+        has_variation, has_brand = cur.fetchone()
+        variation_join = (
+            "LEFT JOIN variation_master vm ON vm.variation_id = im.variation_id"
+            if has_variation
+            else ""
+        )
+        brand_join = (
+            "LEFT JOIN item_brand_master ibm ON ibm.item_brand_id = im.item_brand_id"
+            if has_brand
+            else ""
+        )
+        document_parts = ["im.name", "mm.model_name"]
+        if has_variation:
+            document_parts.append("vm.variation_name")
+        if has_brand:
+            document_parts.append("ibm.item_brand_name")
+        document_parts += ["cm.color_name", "sm.size_name"]
+
+        cur.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION refresh_variant_search_documents(
+                p_variant_ids INTEGER[]
+            ) RETURNS VOID AS $$
+            BEGIN
+                DELETE FROM variant_search_documents d
+                WHERE d.variant_id = ANY(p_variant_ids)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM item_variant iv
+                      JOIN item_master im ON im.item_id = iv.item_id
+                      WHERE iv.variant_id = d.variant_id
+                        AND iv.deleted_at IS NULL
+                        AND im.deleted_at IS NULL
+                  );
+
+                INSERT INTO variant_search_documents (variant_id, item_id, document)
+                SELECT
+                    iv.variant_id,
+                    iv.item_id,
+                    lower(concat_ws(' ', {", ".join(document_parts)}))
+                FROM item_variant iv
+                JOIN item_master im ON im.item_id = iv.item_id
+                LEFT JOIN model_master mm ON mm.model_id = im.model_id
+                {variation_join}
+                {brand_join}
+                LEFT JOIN color_master cm ON cm.color_id = iv.color_id
+                LEFT JOIN size_master sm ON sm.size_id = iv.size_id
+                WHERE iv.variant_id = ANY(p_variant_ids)
+                  AND iv.deleted_at IS NULL
+                  AND im.deleted_at IS NULL
+                ON CONFLICT (variant_id) DO UPDATE
+                SET item_id = EXCLUDED.item_id,
+                    document = EXCLUDED.document,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE variant_search_documents.document IS DISTINCT FROM EXCLUDED.document
+                   OR variant_search_documents.item_id IS DISTINCT FROM EXCLUDED.item_id;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+
+        cur.execute(
+            """
+            CREATE OR REPLACE FUNCTION variant_search_variant_changed()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                PERFORM refresh_variant_search_documents(ARRAY[NEW.variant_id]);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+        cur.execute(
+            "DROP TRIGGER IF EXISTS trg_variant_search_variant ON item_variant;"
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER trg_variant_search_variant
+            AFTER INSERT OR UPDATE OF item_id, color_id, size_id, deleted_at
+            ON item_variant
+            FOR EACH ROW EXECUTE FUNCTION variant_search_variant_changed();
+            """
+        )
+
+        item_columns = ["name", "model_id", "deleted_at"]
+        if has_variation:
+            item_columns.append("variation_id")
+        if has_brand:
+            item_columns.append("item_brand_id")
+        cur.execute(
+            """
+            CREATE OR REPLACE FUNCTION variant_search_item_changed()
+            RETURNS TRIGGER AS $$
+            BEGIN
+                PERFORM refresh_variant_search_documents(ARRAY(
+                    SELECT variant_id FROM item_variant WHERE item_id = NEW.item_id
+                ));
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """
+        )
+        cur.execute("DROP TRIGGER IF EXISTS trg_variant_search_item ON item_master;")
+        cur.execute(
+            f"""
+            CREATE TRIGGER trg_variant_search_item
+            AFTER UPDATE OF {", ".join(item_columns)} ON item_master
+            FOR EACH ROW EXECUTE FUNCTION variant_search_item_changed();
+            """
+        )
+
+        for table, (name_column, variants_sql) in MASTER_TABLES.items():
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+            if not cur.fetchone()[0]:
+                continue
+            cur.execute(
+                f"""
+                CREATE OR REPLACE FUNCTION variant_search_{table}_changed()
+                RETURNS TRIGGER AS $$
+                BEGIN
+                    PERFORM refresh_variant_search_documents(ARRAY({variants_sql}));
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;
+                """
+            )
+            cur.execute(
+                f"DROP TRIGGER IF EXISTS trg_variant_search_{table} ON {table};"
+            )
+            cur.execute(
+                f"""
+                CREATE TRIGGER trg_variant_search_{table}
+                AFTER UPDATE OF {name_column} ON {table}
+                FOR EACH ROW EXECUTE FUNCTION variant_search_{table}_changed();
+                """
+            )
+
+        print("Backfilling variant search documents...")
+        cur.execute(
+            """
+            SELECT refresh_variant_search_documents(
+                ARRAY(SELECT variant_id FROM item_variant)
+            );
+            """
+        )
+        cur.execute("ANALYZE variant_search_documents;")
+        conn.commit()
+        print(" Variant search documents created")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        cur.execute(
+            "DROP TRIGGER IF EXISTS trg_variant_search_variant ON item_variant;"
+        )
+        cur.execute("DROP TRIGGER IF EXISTS trg_variant_search_item ON item_master;")
+        for table in MASTER_TABLES:
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+            if cur.fetchone()[0]:
+                cur.execute(
+                    f"DROP TRIGGER IF EXISTS trg_variant_search_{table} ON {table};"
+                )
+            cur.execute(f"DROP FUNCTION IF EXISTS variant_search_{table}_changed();")
+        cur.execute("DROP FUNCTION IF EXISTS variant_search_item_changed();")
+        cur.execute("DROP FUNCTION IF EXISTS variant_search_variant_changed();")
+        cur.execute(
+            "DROP FUNCTION IF EXISTS refresh_variant_search_documents(INTEGER[]);"
+        )
+        cur.execute("DROP TABLE IF EXISTS variant_search_documents;")
+        conn.commit()
@@ -0,0 +1,36 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: drop item_variant.is_low_stock.
+
+Earlier versions of migration_add_low_stock_index added is_low_stock as a
+stored generated column with a partial index. Adding it rewrote
+item_variant under an ACCESS EXCLUSIVE lock, and nothing queried the
+index: the count comes from low_stock_summary and the report from
+variant_read_model. The summary trigger now compares opening_stock with
+threshold itself, so the column and its index are dropped.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+from migrations.migration_add_low_stock_index import _summary_function
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Dropping item_variant.is_low_stock...")
+        cur.execute("SELECT to_regprocedure('apply_low_stock_summary()') IS NOT NULL")
+        if cur.fetchone()[0]:
+            # Must stop reading the column before it is dropped
+            cur.execute(_summary_function())
+        cur.execute("DROP INDEX IF EXISTS idx_item_variant_low_stock;")
+        cur.execute("ALTER TABLE item_variant DROP COLUMN IF EXISTS is_low_stock;")
+        conn.commit()
+        print(" item_variant.is_low_stock dropped")
+
+
+def downgrade():
+    # The column was never read; there is nothing to restore
+    pass
@@ -0,0 +1,40 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: stamp stock movements with the time of the change.
+
+Earlier versions of migration_add_stock_movements let stock_movements
+.created_at default to now(), the start of the writing transaction. A long
+transaction that committed after a shorter one on the same variant got the
+earlier timestamp, so movements() ran balance_after backwards and
+stock_as_of could count a change that had not committed at that time.
+Re-creates record_stock_movement to stamp each movement (and pick its
+snapshot date) with clock_timestamp().
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+from migrations.migration_add_stock_movements import RECORD_STOCK_MOVEMENT
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Stamping stock movements with clock_timestamp()...")
+        cur.execute("SELECT to_regclass('stock_movements') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            print(" Skipping: table stock_movements does not exist")
+            return
+        cur.execute(
+            "ALTER TABLE stock_movements "
+            "ALTER COLUMN created_at SET DEFAULT clock_timestamp();"
+        )
+        cur.execute(RECORD_STOCK_MOVEMENT)
+        conn.commit()
+        print(" Stock movements stamped with clock_timestamp()")
+
+
+def downgrade():
+    # Transaction-start timestamps were the bug; there is nothing to restore
+    pass
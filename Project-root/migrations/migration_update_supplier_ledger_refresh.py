@@ -0,0 +1,335 @@
+# Auto-import handled by migrations.py runner
+"""
+Migration: incremental supplier ledger refresh without needless rebalancing.
+
+migration_add_supplier_ledger_entries rewrote every touched event and
+recomputed running balances from the earliest one. Every receipt against a
+PO runs recalculate_po_status, which updates purchase_orders, so each
+receipt also re-windowed the supplier's ledger from the PO's order date.
+
+The replacement refresh_supplier_ledger(int[], int[]) diffs the events
+against their sources instead:
+
+- PO events carry no quantity or amount, so they are updated in place.
+  Only a new, removed or moved PO event gets its own balance, copied from
+  the event before it; no other row changes.
+- Receipt events are upserted and deleted by key. Balances are recomputed
+  only from the earliest receipt event whose supplier, date, quantity or
+  amount changed, and not at all when only notes, references or status
+  changed.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import get_conn
+from migrations.migration_add_supplier_ledger_entries import (
+    _has_column,
+    _refresh_function,
+)
+
+
+def _incremental_refresh_function(po_notes, receipt_notes):
+    return f"""
+        CREATE OR REPLACE FUNCTION refresh_supplier_ledger(
+            p_receipt_ids INT[], p_po_ids INT[]
+        ) RETURNS VOID AS $$
+        DECLARE
+            v_suppliers INT[];
+            v_dates TIMESTAMP[];
+            v_deltas INT[];
+            v_po_suppliers INT[];
+            v_po_deltas INT[];
+            v_po_moved BIGINT[];
+        BEGIN
+            p_receipt_ids := COALESCE(p_receipt_ids, '{{}}');
+            p_po_ids := COALESCE(p_po_ids, '{{}}');
+            IF cardinality(p_receipt_ids) = 0 AND cardinality(p_po_ids) = 0 THEN
+                RETURN;
+            END IF;
+
+            -- PO events: in place; a new, removed or moved event is the
+            -- only one whose balance can change
+            WITH src AS (
+                SELECT po.supplier_id, po.order_date::timestamp AS event_date,
+                       po.po_id AS event_id, po.po_number::text AS reference_number,
+                       po.status::text AS po_status, {po_notes} AS notes
+                FROM purchase_orders po
+                WHERE po.po_id = ANY(p_po_ids) AND po.supplier_id IS NOT NULL
+            ),
+            old AS (
+                SELECT entry_key, supplier_id, event_date, event_id
+                FROM supplier_ledger_entries
+                WHERE event_type = 'po' AND event_id = ANY(p_po_ids)
+            ),
+            removed AS (
+                DELETE FROM supplier_ledger_entries e
+                USING old o
+                WHERE e.entry_key = o.entry_key
+                  AND NOT EXISTS (SELECT 1 FROM src s WHERE s.event_id = o.event_id)
+                RETURNING e.supplier_id
+            ),
+            upserted AS (
+                INSERT INTO supplier_ledger_entries AS e (
+                    supplier_id, event_date, event_type, event_id, stock_entry_id,
+                    reference_number, amount, po_status, notes
+                )
+                SELECT supplier_id, event_date, 'po', event_id, 0,
+                       reference_number, 0, po_status, notes
+                FROM src
+                ON CONFLICT (event_type, event_id, stock_entry_id) DO UPDATE
+                SET supplier_id = EXCLUDED.supplier_id,
+                    event_date = EXCLUDED.event_date,
+                    reference_number = EXCLUDED.reference_number,
+                    po_status = EXCLUDED.po_status,
+                    notes = EXCLUDED.notes
+                WHERE (e.supplier_id, e.event_date, e.reference_number,
+                       e.po_status, e.notes)
+                      IS DISTINCT FROM
+                      (EXCLUDED.supplier_id, EXCLUDED.event_date,
+                       EXCLUDED.reference_number, EXCLUDED.po_status,
+                       EXCLUDED.notes)
+                RETURNING e.entry_key, e.supplier_id, e.event_date, e.event_id,
+                          (xmax = 0) AS inserted
+            ),
+            changes AS (
+                SELECT supplier_id, -1 AS delta, NULL::BIGINT AS moved
+                FROM removed
+                UNION ALL
+                SELECT u.supplier_id,
+                       CASE WHEN u.inserted
+                              OR u.supplier_id <> o.supplier_id THEN 1 ELSE 0 END,
+                       CASE WHEN u.inserted
+                              OR (u.supplier_id, u.event_date)
+                                 IS DISTINCT FROM (o.supplier_id, o.event_date)
+                            THEN u.entry_key END
+                FROM upserted u
+                LEFT JOIN old o ON o.event_id = u.event_id
+                UNION ALL
+                SELECT o.supplier_id, -1, NULL
+                FROM upserted u
+                JOIN old o ON o.event_id = u.event_id
+                WHERE NOT u.inserted AND u.supplier_id <> o.supplier_id
+            )
+            SELECT COALESCE(array_agg(supplier_id), '{{}}'),
+                   COALESCE(array_agg(delta), '{{}}'),
+                   COALESCE(array_agg(moved) FILTER (WHERE moved IS NOT NULL), '{{}}')
+            INTO v_po_suppliers, v_po_deltas, v_po_moved
+            FROM changes;
+
+            -- Receipt events: diffed by key; only supplier, date, quantity
+            -- or amount changes need a rebalance
+            WITH src AS (
+                SELECT sr.supplier_id,
+                       COALESCE(sr.receipt_date, se.entry_date)::timestamp
+                           AS event_date,
+                       sr.receipt_id AS event_id, se.entry_id AS stock_entry_id,
+                       sr.bill_number::text AS reference_number,
+                       se.variant_id, se.quantity_added AS quantity,
+                       se.cost_per_unit,
+                       se.quantity_added * COALESCE(se.cost_per_unit, 0) AS amount,
+                       {receipt_notes} AS notes
+                FROM stock_receipts sr
+                JOIN stock_entries se ON se.receipt_id = sr.receipt_id
+                WHERE sr.receipt_id = ANY(p_receipt_ids)
+                  AND sr.supplier_id IS NOT NULL
+            ),
+            old AS (
+                SELECT entry_key, supplier_id, event_date, event_id,
+                       stock_entry_id, quantity, amount
+                FROM supplier_ledger_entries
+                WHERE event_type = 'receipt' AND event_id = ANY(p_receipt_ids)
+            ),
+            removed AS (
+                DELETE FROM supplier_ledger_entries e
+                USING old o
+                WHERE e.entry_key = o.entry_key
+                  AND NOT EXISTS (
+                      SELECT 1 FROM src s
+                      WHERE s.event_id = o.event_id
+                        AND s.stock_entry_id = o.stock_entry_id
+                  )
+                RETURNING e.supplier_id, e.event_date
+            ),
+            upserted AS (
+                INSERT INTO supplier_ledger_entries AS e (
+                    supplier_id, event_date, event_type, event_id,
+                    stock_entry_id, reference_number, receipt_id, variant_id,
+                    quantity, cost_per_unit, amount, notes
+                )
+                SELECT supplier_id, event_date, 'receipt', event_id,
+                       stock_entry_id, reference_number, event_id, variant_id,
+                       quantity, cost_per_unit, amount, notes
+                FROM src
+                ON CONFLICT (event_type, event_id, stock_entry_id) DO UPDATE
+                SET supplier_id = EXCLUDED.supplier_id,
+                    event_date = EXCLUDED.event_date,
+                    reference_number = EXCLUDED.reference_number,
+                    variant_id = EXCLUDED.variant_id,
+                    quantity = EXCLUDED.quantity,
+                    cost_per_unit = EXCLUDED.cost_per_unit,
+                    amount = EXCLUDED.amount,
+                    notes = EXCLUDED.notes
+                WHERE (e.supplier_id, e.event_date, e.reference_number,
+                       e.variant_id, e.quantity, e.cost_per_unit, e.amount,
+                       e.notes)
+                      IS DISTINCT FROM
+                      (EXCLUDED.supplier_id, EXCLUDED.event_date,
+                       EXCLUDED.reference_number, EXCLUDED.variant_id,
+                       EXCLUDED.quantity, EXCLUDED.cost_per_unit,
+                       EXCLUDED.amount, EXCLUDED.notes)
+                RETURNING e.supplier_id, e.event_date, e.event_id,
+                          e.stock_entry_id, e.quantity, e.amount,
+                          (xmax = 0) AS inserted
+            ),
+            changes AS (
+                SELECT supplier_id, event_date, -1 AS delta FROM removed
+                UNION ALL
+                SELECT supplier_id, event_date, 1 FROM upserted WHERE inserted
+                UNION ALL
+                -- A changed event rebalances from both its old and new place
+                SELECT s.supplier_id, s.event_date, s.delta
+                FROM upserted u
+                JOIN old o ON o.event_id = u.event_id
+                          AND o.stock_entry_id = u.stock_entry_id
+                CROSS JOIN LATERAL (
+                    VALUES (o.supplier_id, o.event_date,
+                            CASE WHEN o.supplier_id <> u.supplier_id
+                                 THEN -1 ELSE 0 END),
+                           (u.supplier_id, u.event_date,
+                            CASE WHEN o.supplier_id <> u.supplier_id
+                                 THEN 1 ELSE 0 END)
+                ) AS s(supplier_id, event_date, delta)
+                WHERE NOT u.inserted
+                  AND (u.supplier_id, u.event_date, u.quantity, u.amount)
+                      IS DISTINCT FROM
+                      (o.supplier_id, o.event_date, o.quantity, o.amount)
+            )
+            SELECT COALESCE(array_agg(supplier_id), '{{}}'),
+                   COALESCE(array_agg(event_date), '{{}}'),
+                   COALESCE(array_agg(delta), '{{}}')
+            INTO v_suppliers, v_dates, v_deltas
+            FROM changes;
+
+            IF cardinality(v_suppliers) = 0 AND cardinality(v_po_suppliers) = 0 THEN
+                RETURN;
+            END IF;
+
+            -- One refresh per supplier at a time, in supplier order. Taken
+            -- before the balances are read, so they include every
+            -- committed refresh of the same supplier.
+            PERFORM pg_advisory_xact_lock(hashtext('supplier_ledger'), s.supplier_id)
+            FROM (
+                SELECT DISTINCT unnest(v_suppliers || v_po_suppliers) AS supplier_id
+                ORDER BY 1
+            ) s;
+
+            INSERT INTO supplier_ledger_totals AS t (supplier_id, event_count)
+            SELECT c.supplier_id, SUM(c.delta)
+            FROM unnest(v_suppliers || v_po_suppliers, v_deltas || v_po_deltas)
+                AS c(supplier_id, delta)
+            GROUP BY c.supplier_id
+            HAVING SUM(c.delta) <> 0
+            ORDER BY c.supplier_id
+            ON CONFLICT (supplier_id) DO UPDATE
+            SET event_count = t.event_count + EXCLUDED.event_count;
+
+            -- Running balances from each supplier's earliest changed receipt
+            -- event, continuing from the balance of the row before it
+            IF cardinality(v_suppliers) > 0 THEN
+                UPDATE supplier_ledger_entries e
+                SET balance_quantity = r.balance_quantity,
+                    balance_amount = r.balance_amount
+                FROM (
+                    SELECT l.entry_key,
+                           COALESCE(prev.balance_quantity, 0)
+                               + SUM(COALESCE(l.quantity, 0)) OVER w
+                               AS balance_quantity,
+                           COALESCE(prev.balance_amount, 0)
+                               + SUM(l.amount) OVER w AS balance_amount
+                    FROM (
+                        SELECT c.supplier_id, MIN(c.event_date) AS since
+                        FROM unnest(v_suppliers, v_dates)
+                            AS c(supplier_id, event_date)
+                        GROUP BY c.supplier_id
+                    ) a
+                    LEFT JOIN LATERAL (
+                        SELECT p.balance_quantity, p.balance_amount
+                        FROM supplier_ledger_entries p
+                        WHERE p.supplier_id = a.supplier_id
+                          AND p.event_date < a.since
+                        ORDER BY p.event_date DESC, p.event_type DESC,
+                                 p.event_id DESC, p.stock_entry_id DESC
+                        LIMIT 1
+                    ) prev ON TRUE
+                    JOIN supplier_ledger_entries l
+                      ON l.supplier_id = a.supplier_id AND l.event_date >= a.since
+                    WINDOW w AS (
+                        PARTITION BY l.supplier_id
+                        ORDER BY l.event_date, l.event_type, l.event_id,
+                                 l.stock_entry_id
+                    )
+                ) r
+                WHERE e.entry_key = r.entry_key
+                  AND (e.balance_quantity, e.balance_amount)
+                      IS DISTINCT FROM (r.balance_quantity, r.balance_amount);
+            END IF;
+
+            -- A new or moved PO event carries the balance of the row before it
+            UPDATE supplier_ledger_entries e
+            SET balance_quantity = COALESCE(prev.balance_quantity, 0),
+                balance_amount = COALESCE(prev.balance_amount, 0)
+            FROM supplier_ledger_entries m
+            LEFT JOIN LATERAL (
+                SELECT p.balance_quantity, p.balance_amount
+                FROM supplier_ledger_entries p
+                WHERE p.supplier_id = m.supplier_id
+                  AND (p.event_date, p.event_type, p.event_id, p.stock_entry_id)
+                      < (m.event_date, m.event_type, m.event_id, m.stock_entry_id)
+                ORDER BY p.event_date DESC, p.event_type DESC,
+                         p.event_id DESC, p.stock_entry_id DESC
+                LIMIT 1
+            ) prev ON TRUE
+            WHERE m.entry_key = ANY(v_po_moved)
+              AND e.entry_key = m.entry_key
+              AND (e.balance_quantity, e.balance_amount)
+                  IS DISTINCT FROM (COALESCE(prev.balance_quantity, 0),
+                                    COALESCE(prev.balance_amount, 0));
+        END;
+        $$ LANGUAGE plpgsql;
+    """
+
+
+def _notes_columns(cur):
+    po_notes = (
+        "po.notes::text"
+        if _has_column(cur, "purchase_orders", "notes")
+        else "NULL::text"
+    )
+    receipt_notes = (
+        "sr.notes::text"
+        if _has_column(cur, "stock_receipts", "notes")
+        else "NULL::text"
+    )
+    return po_notes, receipt_notes
+
+
+def upgrade():
+    with get_conn() as (conn, cur):
+        print("Replacing the supplier ledger refresh...")
+        cur.execute("SELECT to_regclass('supplier_ledger_entries') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            print(" Skipping: run migration_add_supplier_ledger_entries first")
+            return
+        cur.execute(_incremental_refresh_function(*_notes_columns(cur)))
+        conn.commit()
+        print(" Supplier ledger refresh replaced")
+
+
+def downgrade():
+    with get_conn() as (conn, cur):
+        cur.execute("SELECT to_regclass('supplier_ledger_entries') IS NOT NULL")
+        if cur.fetchone()[0]:
+            cur.execute(_refresh_function(*_notes_columns(cur)))
+        conn.commit()
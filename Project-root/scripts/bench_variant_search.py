@@ -0,0 +1,189 @@
+"""Benchmark variant search: legacy LIKE scan vs. trigram search documents.
+
+Usage:
+  python scripts/bench_variant_search.py                  # current catalog
+  python scripts/bench_variant_search.py --synthetic 1000000
+  python scripts/bench_variant_search.py --terms bolt "red m" --runs 100
+
+Catalog mode times the /variants/select2 query shape (first page of 30)
+with the five-column LIKE filter and with VariantSearchService, and prints
+the indexed plan for the first term.
+
+Synthetic mode builds N documents in a TEMP table with the same GIN index,
+times the indexed predicate against it and rolls everything back, so it can
+show the 1M-variant case without touching real data.
+
+Requires the variant search migration for the indexed timings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import psycopg2.extras
+
+import database
+from app import create_app
+from app.services.variant_search_service import VariantSearchService
+
+DEFAULT_TERMS = ["bo", "bolt", "steel bolt", "red", "blu m", "scrw"]
+PAGE_SIZE = 30
+
+SELECT2_SHAPE = """
+    SELECT iv.variant_id
+    FROM item_variant iv
+    JOIN item_master im ON iv.item_id = im.item_id
+    JOIN color_master cm ON iv.color_id = cm.color_id
+    JOIN size_master sm ON iv.size_id = sm.size_id
+    LEFT JOIN model_master mm ON im.model_id = mm.model_id
+    LEFT JOIN item_brand_master ibm ON im.item_brand_id = ibm.item_brand_id
+    {join}
+    WHERE iv.deleted_at IS NULL
+      AND im.deleted_at IS NULL
+      AND {condition}
+    ORDER BY {rank} DESC, im.name, cm.color_name, sm.size_name
+    LIMIT %s
+"""
+
+LEGACY_CONDITION = """(
+    LOWER(im.name) LIKE LOWER(%s) OR
+    LOWER(cm.color_name) LIKE LOWER(%s) OR
+    LOWER(sm.size_name) LIKE LOWER(%s) OR
+    LOWER(mm.model_name) LIKE LOWER(%s) OR
+    LOWER(ibm.item_brand_name) LIKE LOWER(%s)
+)"""
+
+SYNTHETIC_WORDS = [
+    "bolt", "screw", "washer", "nut", "rivet", "hinge", "bracket", "clamp",
+    "steel", "brass", "zinc", "nylon", "red", "blue", "black", "white",
+    "green", "m4", "m6", "m8", "m10", "small", "large", "xl",
+]  # fmt: skip
+
+
+def time_query(cur, sql, params, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        cur.execute(sql, params)
+        cur.fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def report(label, p50, p95):
+    print(f"  {label:<10} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def bench_catalog(cur, terms, runs):
+    cur.execute("SELECT COUNT(*) AS n FROM item_variant WHERE deleted_at IS NULL")
+    print(f"Catalog: {cur.fetchone()['n']} live variants, {runs} runs per query\n")
+    indexed = VariantSearchService.documents_present(cur)
+    if not indexed:
+        print("variant_search_documents missing; only the legacy scan is timed\n")
+
+    for i, term in enumerate(terms):
+        print(f"q={term!r}")
+        legacy_sql = SELECT2_SHAPE.format(
+            join="", condition=LEGACY_CONDITION, rank="0::real"
+        )
+        report(
+            "legacy",
+            *time_query(cur, legacy_sql, [f"%{term}%"] * 5 + [PAGE_SIZE + 1], runs),
+        )
+        if not indexed:
+            continue
+        search = VariantSearchService.build_filter(cur, term)
+        indexed_sql = SELECT2_SHAPE.format(**search)
+        params = search["params"] + search["rank_params"] + [PAGE_SIZE + 1]
+        report("trigram", *time_query(cur, indexed_sql, params, runs))
+        if i == 0:
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + indexed_sql, params)
+            print("\n".join("    " + r["QUERY PLAN"] for r in cur.fetchall()))
+
+
+def bench_synthetic(cur, size, terms, runs):
+    print(f"Building {size} synthetic documents (rolled back afterwards)...")
+    cur.execute(
+        """
+        CREATE TEMP TABLE bench_search_documents ON COMMIT DROP AS
+        SELECT g AS variant_id,
+               concat_ws(' ',
+                   (%(w)s::text[])[1 + (g * 7) %% cardinality(%(w)s::text[])],
+                   (%(w)s::text[])[1 + (g * 13) %% cardinality(%(w)s::text[])],
+                   'item' || (g %% 50000),
+                   (%(w)s::text[])[1 + (g * 31) %% cardinality(%(w)s::text[])]
+               ) AS document
+        FROM generate_series(1, %(n)s) g
+        """,
+        {"w": SYNTHETIC_WORDS, "n": size},
+    )
+    cur.execute(
+        "CREATE INDEX ON bench_search_documents USING GIN (document gin_trgm_ops)"
+    )
+    cur.execute("CREATE INDEX ON bench_search_documents (document text_pattern_ops)")
+    cur.execute("ANALYZE bench_search_documents")
+    # Reuse the production predicate; only the table name differs
+    for term in terms + ["item4242"]:
+        search = VariantSearchService.build_filter(_AlwaysPresent(), term)
+        sql = f"""
+            SELECT vsd.variant_id
+            FROM bench_search_documents vsd
+            WHERE {search["condition"]}
+            ORDER BY {search["rank"]} DESC
+            LIMIT %s
+        """
+        print(f"q={term!r}")
+        report(
+            "trigram",
+            *time_query(
+                cur,
+                sql,
+                search["params"] + search["rank_params"] + [PAGE_SIZE + 1],
+                runs,
+            ),
+        )
+
+
+class _AlwaysPresent:
+    """Cursor stand-in answering the search-documents probe with True."""
+
+    def execute(self, *args, **kwargs):
+        pass
+
+    def fetchone(self):
+        return {"present": True}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terms", nargs="+", default=DEFAULT_TERMS)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--synthetic", type=int, metavar="N")
+    args = parser.parse_args()
+
+    app = create_app()
+    with (
+        app.app_context(),
+        database.get_conn(cursor_factory=psycopg2.extras.RealDictCursor) as (
+            conn,
+            cur,
+        ),
+    ):
+        try:
+            if args.synthetic:
+                bench_synthetic(cur, args.synthetic, args.terms, args.runs)
+            else:
+                bench_catalog(cur, args.terms, args.runs)
+        finally:
+            conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -179,7 +179,7 @@ const productionLots = {
                     <td><span class="lot-number">${lot.lot_number || ''}</span></td>
                     <td>${lot.process_name || ''}</td>
                     <td>${lot.quantity != null ? lot.quantity : ''}</td>
-                    <td><span class="status-badge ${statusClass}">${statusText}</span></td>
+                    <td><span class="status-badge ${statusClass}">${statusText}</span>${renderReadinessBadge(lot)}</td>
                     <td>${renderAlertsCell(lot)}</td>
                     <td>${cost}</td>
                     <td>${lot.created_by_name || 'System'}</td>
@@ -282,9 +282,19 @@ function renderAlertsCell(lot) {
     return parts.join('') || total;
 }
 
+function renderReadinessBadge(lot) {
+    // Readiness is evaluated server-side for the whole page (see list_production_lots)
+    const readiness = lot.readiness;
+    if (!readiness || readiness.badge === 'closed') return '';
+    const labels = { ready: '✓ Ready', blocked: '⛔ Blocked', incomplete: '… Incomplete' };
+    const title = (readiness.issues || []).join('\n').replace(/"/g, '&quot;');
+    return ` <span class="readiness-badge ${readiness.badge}" title="${title}" style="margin-left:4px;">${labels[readiness.badge] || readiness.badge}</span>`;
+}
+
 // Expose helper to global scope for pages that may reuse it
 try {
     window.renderAlertsCell = renderAlertsCell;
+    window.renderReadinessBadge = renderReadinessBadge;
 } catch (e) {
     // ignore in non-browser contexts
 }
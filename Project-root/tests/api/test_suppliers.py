@@ -14,3 +14,35 @@ def test_get_suppliers(client):
     assert data["success"] is True, "Success should be True for get_suppliers"
     assert isinstance(data["data"], list), "Data should be a list of suppliers"
     assert isinstance(data["message"], str), "Message should be a string"
+
+
+def test_get_suppliers_query_count(client, monkeypatch):
+    """Listing 2,000 suppliers runs a fixed handful of queries, not one each."""
+    from contextlib import contextmanager
+    from unittest.mock import MagicMock
+
+    import database
+    from app.services.master_data_cache import MasterDataCache
+
+    rows = [(i, f"Supplier {i}", i % 4) for i in range(2000)]
+    cur = MagicMock()
+    cur.description = [("supplier_id",), ("firm_name",), ("contact_count",)]
+    cur.fetchone.return_value = (False,)
+    cur.fetchall.return_value = rows
+
+    @contextmanager
+    def fake_get_conn(*args, **kwargs):
+        yield MagicMock(), cur
+
+    monkeypatch.setattr(database, "get_conn", fake_get_conn)
+    MasterDataCache.clear()
+    try:
+        resp = client.get("/api/suppliers?page=2&per_page=100")
+    finally:
+        MasterDataCache.clear()
+
+    assert resp.status_code == 200
+    data = resp.get_json()["data"]
+    assert data["total"] == 2000
+    assert [s["supplier_id"] for s in data["items"]] == list(range(100, 200))
+    assert cur.execute.call_count <= 3
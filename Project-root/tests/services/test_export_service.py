@@ -0,0 +1,368 @@
+"""
+Test coverage for ExportService.
+
+Tests export validation, COPY statement generation, chunked streaming and
+file exports built by the background export worker.
+"""
+
+import gzip
+import os
+import time
+import zipfile
+from contextlib import contextmanager
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services import background_worker, export_service
+from app.services.export_service import EXPORTS, ExportService
+
+
+def _copy_cursor(rows):
+    """Cursor whose copy_expert writes ``rows`` (bytes) to the file."""
+    cur = MagicMock()
+    cur.fetchone.return_value = (True,)
+    cur.mogrify.side_effect = lambda query, params: (
+        query.replace("%s", "{}").format(*[repr(p) for p in params]).encode()
+    )
+
+    def copy_expert(sql, file):
+        for row in rows:
+            file.write(row)
+
+    cur.copy_expert.side_effect = copy_expert
+    return cur
+
+
+def _patch_conn(cur, conn=None):
+    conn = conn or MagicMock()
+
+    @contextmanager
+    def fake_get_conn(*args, **kwargs):
+        yield conn, cur
+
+    return patch.object(export_service.database, "get_conn", fake_get_conn)
+
+
+class TestExportService:
+    """Test suite for streamed CSV exports."""
+
+    def test_prepare_selects_columns_and_parses_filters(self):
+        """Columns keep the requested order; filters are parsed by type."""
+        selected, predicates = ExportService.prepare(
+            "stock_entries",
+            ["quantity", "supplier", "quantity"],
+            {"supplier_id": "4", "start_date": "2026-01-01", "page": "2"},
+        )
+
+        assert selected == [
+            ("se.quantity_added", "Quantity"),
+            ("s.firm_name", "Supplier"),
+        ]
+        assert predicates == [
+            ("sr.supplier_id = %s", 4),
+            ("se.entry_date >= %s", date(2026, 1, 1)),
+        ]
+
+    def test_prepare_bool_filter_applies_only_when_true(self):
+        """A false boolean filter adds no predicate."""
+        _, on = ExportService.prepare("inventory", None, {"low_stock": "true"})
+        _, off = ExportService.prepare("inventory", None, {"low_stock": "0"})
+
+        assert on == [("vr.is_low_stock", None)]
+        assert off == []
+
+    @pytest.mark.parametrize(
+        "columns, filters",
+        [(["password"], {}), (None, {"supplier_id": "abc"})],
+    )
+    def test_prepare_rejects_bad_input(self, columns, filters):
+        """Unknown columns and unparsable filter values are errors."""
+        with pytest.raises(ValueError):
+            ExportService.prepare("stock_entries", columns, filters)
+
+    def test_owner_scope(self):
+        """Non-admins are limited to their own rows or refused outright."""
+        assert ExportService.owner_scope("production_lots", 7, False) == 7
+        assert ExportService.owner_scope("production_lots", 7, True) is None
+        assert ExportService.owner_scope("inventory", 7, False) is None
+        for name in ("audit_log", "stock_movements"):
+            assert ExportService.owner_scope(name, 7, True) is None
+            with pytest.raises(PermissionError):
+                ExportService.owner_scope(name, 7, False)
+
+    def test_prepare_restricts_per_user_export_to_owner(self):
+        """The owner predicate cannot be dropped through the filters."""
+        _, predicates = ExportService.prepare(
+            "production_lots", None, {"status": "completed"}, owner_id=7
+        )
+        _, shared = ExportService.prepare("inventory", None, {}, owner_id=7)
+
+        assert predicates == [
+            ("pl.status = %s", "completed"),
+            ("pl.created_by = %s", 7),
+        ]
+        assert shared == []
+
+    def test_copy_sql_binds_values_client_side(self):
+        """COPY takes no parameters, so values are mogrified into the query."""
+        cur = _copy_cursor([])
+        selected, predicates = ExportService.prepare(
+            "audit_log", ["action_type"], {"user_id": "3"}
+        )
+
+        sql = ExportService.copy_sql(cur, "audit_log", selected, predicates)
+
+        assert sql.startswith('COPY (SELECT a.action_type AS "Action" FROM audit_log')
+        assert "WHERE a.deleted_at IS NULL AND a.user_id = 3" in sql
+        assert sql.endswith("TO STDOUT WITH (FORMAT csv, HEADER true)")
+
+    def test_stream_csv_relays_copy_output_in_chunks(self):
+        """Rows are buffered into chunks of at least CHUNK_SIZE bytes."""
+        rows = [b"Item,Stock\n"] + [b"bolt,%d\n" % i for i in range(50)]
+        cur = _copy_cursor(rows)
+
+        with _patch_conn(cur), patch.object(export_service, "CHUNK_SIZE", 100):
+            chunks = list(ExportService.stream_csv("inventory", ["item_name", "stock"]))
+
+        assert b"".join(chunks) == b"".join(rows)
+        assert len(chunks) > 1
+        assert all(len(c) >= 100 for c in chunks[:-1])
+
+    def test_stream_csv_gzip(self):
+        """Compressed output decompresses to the CSV."""
+        rows = [b"Item\n", b"bolt\n", b"nut\n"]
+        cur = _copy_cursor(rows)
+
+        with _patch_conn(cur):
+            body = b"".join(ExportService.stream_csv("inventory", compress=True))
+
+        assert gzip.decompress(body) == b"Item\nbolt\nnut\n"
+
+    def test_stream_csv_reraises_copy_errors(self):
+        """A failing COPY surfaces in the consuming generator."""
+        cur = _copy_cursor([])
+        cur.copy_expert.side_effect = RuntimeError("boom")
+
+        with _patch_conn(cur), pytest.raises(RuntimeError, match="boom"):
+            list(ExportService.stream_csv("inventory"))
+
+    def test_validation_happens_before_streaming(self):
+        """Bad input fails at call time, without touching the database."""
+        with patch.object(export_service.database, "get_conn") as mock_conn:
+            with pytest.raises(ValueError):
+                ExportService.stream_csv("inventory", ["nope"])
+            mock_conn.assert_not_called()
+
+    def test_closing_the_stream_cancels_the_query(self):
+        """A client disconnect cancels the COPY instead of draining it."""
+        rows = [b"x" * 10 + b"\n"] * 1000
+        cur = _copy_cursor(rows)
+        conn = MagicMock()
+
+        with (
+            _patch_conn(cur, conn),
+            patch.object(export_service, "CHUNK_SIZE", 10),
+            patch.object(export_service, "QUEUE_DEPTH", 1),
+        ):
+            stream = ExportService.stream_csv("inventory")
+            assert next(stream)
+            stream.close()
+
+        conn.cancel.assert_called_once()
+
+
+class TestFileExports:
+    """Test suite for XLSX/Parquet/CSV file exports."""
+
+    def test_write_file_xlsx_reads_in_batches(self, tmp_path):
+        """Rows come from a named cursor, FETCH_BATCH at a time."""
+        cur = _copy_cursor([])
+        cur.mogrify.side_effect = None
+        named = MagicMock()
+        named.fetchmany.side_effect = [[("bolt", 5), ("nut", 7)], [("washer", 1)], []]
+        conn = MagicMock()
+        conn.cursor.return_value = named
+        path = tmp_path / "inventory.xlsx"
+
+        with _patch_conn(cur, conn), patch.object(export_service, "FETCH_BATCH", 2):
+            count = ExportService.write_file(
+                "inventory", "xlsx", str(path), ["item_name", "stock"], {}
+            )
+
+        assert count == 3
+        conn.cursor.assert_called_once_with(name="export_inventory")
+        named.fetchmany.assert_called_with(2)
+        named.close.assert_called_once()
+        with zipfile.ZipFile(path) as zf:
+            sheet = zf.read("xl/worksheets/sheet1.xml").decode()
+        assert "washer" in sheet and '<row r="4">' in sheet
+
+    def test_write_file_csv_uses_copy(self, tmp_path):
+        """CSV files are written by COPY without a server-side cursor."""
+        cur = _copy_cursor([b"Item\n", b"bolt\n"])
+        cur.rowcount = 1
+        conn = MagicMock()
+        path = tmp_path / "inventory.csv"
+
+        with _patch_conn(cur, conn):
+            count = ExportService.write_file("inventory", "csv", str(path))
+
+        assert count == 1
+        assert path.read_bytes() == b"Item\nbolt\n"
+        conn.cursor.assert_not_called()
+
+    def test_parquet_unavailable_without_pyarrow(self, tmp_path):
+        """Parquet is only offered when pyarrow is installed."""
+        with patch.object(export_service, "pa", None):
+            assert "parquet" not in ExportService.available_formats()
+            with pytest.raises(ValueError, match="Unsupported"):
+                ExportService.write_file("inventory", "parquet", str(tmp_path / "x"))
+
+    def test_process_costs_export_filters_by_process(self):
+        """The process cost export accepts a process filter."""
+        _, predicates = ExportService.prepare(
+            "process_costs", None, {"process_id": "9"}
+        )
+
+        assert predicates == [(EXPORTS["process_costs"]["filters"]["process_id"][0], 9)]
+
+    def test_process_costs_owner_follows_process_schema(self):
+        """Process ownership is user_id, or created_by on older schemas."""
+        selected, predicates = ExportService.prepare(
+            "process_costs", ["process"], {}, owner_id=7
+        )
+        cur = MagicMock()
+
+        cur.fetchone.return_value = (1,)
+        query, params = ExportService.select_sql(
+            cur, "process_costs", selected, predicates
+        )
+        assert "WHERE p.user_id = %s" in query
+        assert params == [7]
+
+        cur.fetchone.return_value = None
+        query, _ = ExportService.select_sql(cur, "process_costs", selected, predicates)
+        assert "WHERE p.created_by = %s" in query
+
+
+@contextmanager
+def _worker_conn(cur):
+    """Patch the worker's get_conn so every connection uses ``cur``."""
+    with patch.object(background_worker, "get_conn") as mock_conn:
+        mock_conn.return_value.__enter__.return_value = (MagicMock(), cur)
+        yield
+
+
+def _statements(cur):
+    return [c.args[0] for c in cur.execute.call_args_list]
+
+
+class TestBackgroundExportWorker:
+    """Test suite for the export job worker."""
+
+    def test_process_job_writes_file_and_marks_completed(self, tmp_path):
+        """The file is written under a temporary name and then renamed."""
+        cur = MagicMock()
+        worker = background_worker.BackgroundExportWorker(str(tmp_path))
+        job = {
+            "id": 1,
+            "export_id": "abc",
+            "export_name": "production_lots",
+            "format": "csv",
+            "columns": None,
+            "filters": {},
+            "owner_id": 7,
+        }
+
+        def write_file(name, fmt, path, columns, filters, owner_id):
+            assert path.endswith(".part")
+            assert owner_id == 7
+            with open(path, "w") as f:
+                f.write("Lot\nL-1\n")
+            return 1
+
+        with (
+            _worker_conn(cur),
+            patch.object(ExportService, "write_file", side_effect=write_file),
+        ):
+            worker._process_job(job)
+
+        final = tmp_path / "abc.csv"
+        assert final.read_text() == "Lot\nL-1\n"
+        assert not (tmp_path / "abc.csv.part").exists()
+        statements = _statements(cur)
+        # The job's lock is held around the write and released afterwards
+        assert "pg_advisory_lock" in statements[0]
+        assert "pg_advisory_unlock" in statements[-1]
+        assert cur.execute.call_args_list[0].args[1] == ("export_jobs", 1)
+        sql, params = cur.execute.call_args_list[1].args
+        assert "status = 'completed'" in sql
+        assert params == (str(final), 1, final.stat().st_size, 1)
+
+    def test_process_job_failure_marks_failed_and_cleans_up(self, tmp_path):
+        """A failed export leaves no partial file behind."""
+        cur = MagicMock()
+        worker = background_worker.BackgroundExportWorker(str(tmp_path))
+        job = {
+            "id": 2,
+            "export_id": "def",
+            "export_name": "inventory",
+            "format": "xlsx",
+            "columns": None,
+            "filters": {},
+        }
+
+        def write_file(name, fmt, path, columns, filters, owner_id):
+            open(path, "w").close()
+            raise RuntimeError("disk full")
+
+        with (
+            _worker_conn(cur),
+            patch.object(ExportService, "write_file", side_effect=write_file),
+        ):
+            worker._process_job(job)
+
+        assert list(tmp_path.iterdir()) == []
+        sql, params = cur.execute.call_args_list[1].args
+        assert "status = 'failed'" in sql
+        assert params == ("disk full", 2)
+        assert "pg_advisory_unlock" in _statements(cur)[-1]
+
+    def test_recover_stale_jobs_requeues_unlocked_jobs(self, tmp_path):
+        """Only processing jobs whose lock is free are reclaimed."""
+        cur = MagicMock()
+        cur.fetchall.return_value = [("abc", "pending"), ("def", "failed")]
+        worker = background_worker.BackgroundExportWorker(str(tmp_path), max_attempts=2)
+
+        with _worker_conn(cur):
+            assert worker.recover_stale_jobs() == 2
+
+        sql, params = cur.execute.call_args.args
+        assert "status = 'processing'" in sql
+        assert "pg_try_advisory_xact_lock(hashtext(%(namespace)s), id)" in sql
+        assert params == {"max_attempts": 2, "grace": 60, "namespace": "export_jobs"}
+
+    def test_purge_expired_removes_old_jobs_and_files(self, tmp_path):
+        """Expired jobs' files and stale leftovers go; recent files stay."""
+        expired = tmp_path / "old.xlsx"
+        leftover = tmp_path / "crashed.csv.part"
+        recent = tmp_path / "new.csv"
+        for path in (expired, leftover, recent):
+            path.write_text("x")
+        day_ago = time.time() - 25 * 3600
+        os.utime(leftover, (day_ago, day_ago))
+        cur = MagicMock()
+        cur.fetchall.return_value = [(str(expired),), (str(tmp_path / "gone.csv"),)]
+        worker = background_worker.BackgroundExportWorker(
+            str(tmp_path), retention_hours=24
+        )
+
+        with _worker_conn(cur):
+            assert worker.purge_expired() == 2
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["new.csv"]
+        sql, params = cur.execute.call_args.args
+        assert "DELETE FROM export_jobs" in sql
+        assert params == (24,)
@@ -0,0 +1,60 @@
+"""
+Test coverage for ItemHierarchyIndex.
+
+Tests the item -> model -> variation lookups behind the item form dropdowns.
+"""
+
+from unittest.mock import MagicMock
+
+from app.services.item_hierarchy_index import ItemHierarchyIndex
+
+ROWS = [
+    # name, model_id, model_name, model_rank, variation_id, variation_name, rank
+    ("Bolt", 2, "Zinc", 2, 11, "Long", 2),
+    ("Bolt", 1, "Steel", 1, 10, "Short", 3),
+    ("Bolt", 1, "Steel", 1, 11, "Long", 2),
+    ("Bolt", 1, "Steel", 1, 12, "Fine", 1),
+    ("Nut", None, None, 3, None, None, 4),
+    ("washer", 1, "Steel", 1, None, None, 4),
+]
+
+
+class TestItemHierarchyIndex:
+    """Test suite for the item hierarchy index."""
+
+    def test_names_keep_database_order(self):
+        index = ItemHierarchyIndex(ROWS)
+
+        assert index.names == ["Bolt", "Nut", "washer"]
+
+    def test_models_distinct_and_ranked(self):
+        index = ItemHierarchyIndex(ROWS)
+
+        assert index.models("Bolt") == [
+            {"id": 1, "name": "Steel"},
+            {"id": 2, "name": "Zinc"},
+        ]
+        assert index.models("Nut") == []
+        assert index.models("Unknown") == []
+
+    def test_variations_by_item_and_model(self):
+        index = ItemHierarchyIndex(ROWS)
+
+        assert [v["name"] for v in index.variations("Bolt")] == [
+            "Fine",
+            "Long",
+            "Short",
+        ]
+        assert [v["name"] for v in index.variations("Bolt", "Zinc")] == ["Long"]
+        assert index.variations("Bolt", "Brass") == []
+        assert index.variations("washer") == []
+
+    def test_load_runs_one_query(self):
+        cur = MagicMock()
+        cur.fetchall.return_value = ROWS
+
+        index = ItemHierarchyIndex.load(cur)
+
+        cur.execute.assert_called_once()
+        assert "dense_rank()" in cur.execute.call_args[0][0]
+        assert index.models("washer") == [{"id": 1, "name": "Steel"}]
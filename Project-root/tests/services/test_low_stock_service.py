@@ -0,0 +1,44 @@
+"""
+Test coverage for LowStockService.
+
+Tests the maintained low-stock count, its fallback and the report query.
+"""
+
+from unittest.mock import MagicMock
+
+from app.services.low_stock_service import LowStockService
+
+
+class TestLowStockService:
+    """Test suite for the low-stock count and report."""
+
+    def test_summary_reads_maintained_count(self):
+        """With the summary table, the count is a single-row read."""
+        cur = MagicMock()
+        cur.fetchone.side_effect = [(True,), (12, 40)]
+
+        assert LowStockService.summary(cur) == {"count": 12, "version": 40}
+        sql = cur.execute.call_args.args[0]
+        assert "FROM low_stock_summary" in sql
+        assert "item_variant" not in sql
+
+    def test_summary_falls_back_to_counting_variants(self):
+        """Without the migration, live low-stock variants are counted."""
+        cur = MagicMock()
+        cur.fetchone.side_effect = [(False,), (3,)]
+
+        assert LowStockService.summary(cur) == {"count": 3, "version": None}
+        sql = cur.execute.call_args.args[0]
+        assert "opening_stock <= threshold" in sql
+        assert "deleted_at IS NULL" in sql
+
+    def test_report_query_uses_read_model_and_skips_deleted(self):
+        """The report matches the read model's partial low-stock index."""
+        cur = MagicMock()
+        cur.fetchone.return_value = (True,)
+
+        sql = LowStockService.report_query(cur)
+
+        assert "FROM variant_read_model vr" in sql
+        assert "WHERE vr.is_low_stock AND NOT vr.is_deleted" in sql
+        assert "ORDER BY vr.item_name, vr.color_name, vr.size_name" in sql
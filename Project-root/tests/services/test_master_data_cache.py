@@ -0,0 +1,151 @@
+"""
+Test coverage for MasterDataCache.
+
+Tests TTL serving, version-checked revalidation and invalidation.
+"""
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.master_data_cache import MasterDataCache
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    MasterDataCache.clear()
+    yield
+    MasterDataCache.clear()
+
+
+def _mock_conn(mock_conn, version, rows):
+    """Cursor answering the version probe, the version and then the rows."""
+    mock_cursor = MagicMock()
+    mock_conn.return_value.__enter__.return_value = (MagicMock(), mock_cursor)
+    state = {"version": version, "rows": rows, "loads": 0}
+
+    def fetchall():
+        query, *params = mock_cursor.execute.call_args[0]
+        if "master_data_versions" in query:
+            return [(table, state["version"]) for table in params[0][0]]
+        state["loads"] += 1
+        return state["rows"]
+
+    mock_cursor.fetchone.side_effect = lambda: (state["version"] is not None,)
+    mock_cursor.fetchall.side_effect = fetchall
+    return mock_cursor, state
+
+
+class TestMasterDataCache:
+    """Test suite for the master data cache."""
+
+    def test_served_from_memory_within_ttl(self):
+        with patch("app.services.master_data_cache.database.get_conn") as mock_conn:
+            _mock_conn(mock_conn, 1, [(1, "Red")])
+            first, etag = MasterDataCache.get_list(
+                "color_master", "color_id", "color_name", ttl=60
+            )
+            again, again_etag = MasterDataCache.get_list(
+                "color_master", "color_id", "color_name", ttl=60
+            )
+
+        assert first == again == [{"id": 1, "name": "Red"}]
+        assert etag == again_etag
+        assert mock_conn.call_count == 1
+
+    def test_unchanged_version_skips_reload(self):
+        """After the TTL only the version counter is read."""
+        with patch("app.services.master_data_cache.database.get_conn") as mock_conn:
+            _, state = _mock_conn(mock_conn, 3, [(1, "Red")])
+            MasterDataCache.get_list("color_master", "color_id", "color_name", ttl=0)
+            state["rows"] = [(1, "Blue")]
+            rows, _ = MasterDataCache.get_list(
+                "color_master", "color_id", "color_name", ttl=0
+            )
+
+        assert rows == [{"id": 1, "name": "Red"}]
+        assert state["loads"] == 1
+
+    def test_changed_version_reloads(self):
+        """A bump by another worker is picked up with a new ETag."""
+        with patch("app.services.master_data_cache.database.get_conn") as mock_conn:
+            _, state = _mock_conn(mock_conn, 3, [(1, "Red")])
+            _, etag = MasterDataCache.get_list(
+                "color_master", "color_id", "color_name", ttl=0
+            )
+            state.update(version=4, rows=[(1, "Blue")])
+            rows, new_etag = MasterDataCache.get_list(
+                "color_master", "color_id", "color_name", ttl=0
+            )
+
+        assert rows == [{"id": 1, "name": "Blue"}]
+        assert new_etag != etag
+
+    def test_invalidate_forces_reload(self):
+        with patch("app.services.master_data_cache.database.get_conn") as mock_conn:
+            _, state = _mock_conn(mock_conn, None, [(1, "M8")])
+            MasterDataCache.get_list("size_master", "size_id", "size_name", ttl=60)
+            state["rows"] = [(1, "M8"), (2, "M10")]
+            MasterDataCache.invalidate("size_master")
+            rows, _ = MasterDataCache.get_list(
+                "size_master", "size_id", "size_name", ttl=60
+            )
+
+        assert [r["name"] for r in rows] == ["M8", "M10"]
+
+    def test_dependency_counts_grouped_once(self):
+        """One GROUP BY answers the count for every row of the table."""
+        with patch("app.services.master_data_cache.database.get_conn") as mock_conn:
+            mock_cursor, state = _mock_conn(mock_conn, 1, [(1, 4), (2, 1)])
+            counts = [
+                MasterDataCache.dependency_count("color_master", i, ttl=60)
+                for i in (1, 2, 3)
+            ]
+
+        assert counts == [4, 1, 0]
+        assert state["loads"] == 1
+        assert "GROUP BY color_id" in mock_cursor.execute.call_args[0][0]
+
+    def test_slow_rebuild_does_not_block_other_keys(self):
+        """Only requests for the entry being rebuilt wait for it."""
+        started, release = threading.Event(), threading.Event()
+
+        def slow(cur):
+            started.set()
+            release.wait(5)
+            return "slow"
+
+        with patch("app.services.master_data_cache.database.get_conn") as mock_conn:
+            _mock_conn(mock_conn, None, [])
+            worker = threading.Thread(
+                target=MasterDataCache.get, args=("deps:x", ("x",), slow, 60)
+            )
+            worker.start()
+            assert started.wait(5)
+            try:
+                entry = MasterDataCache.get("list:y", ("y",), lambda cur: "fast", 60)
+                assert entry.value == "fast"
+            finally:
+                release.set()
+                worker.join(5)
+
+        assert MasterDataCache.get("deps:x", ("x",), slow, 60).value == "slow"
+
+    def test_invalidation_during_rebuild_is_not_cached(self):
+        """A value loaded before a concurrent write is served once, not kept."""
+        loads = []
+
+        def load(cur):
+            loads.append(1)
+            if len(loads) == 1:
+                MasterDataCache.invalidate("size_master")
+            return len(loads)
+
+        with patch("app.services.master_data_cache.database.get_conn") as mock_conn:
+            _mock_conn(mock_conn, None, [])
+            first = MasterDataCache.get("k", ("size_master",), load, 60)
+            second = MasterDataCache.get("k", ("size_master",), load, 60)
+            third = MasterDataCache.get("k", ("size_master",), load, 60)
+
+        assert (first.value, second.value, third.value) == (1, 2, 2)
@@ -0,0 +1,130 @@
+"""
+Test coverage for MetricsSnapshotService.
+
+Tests serving fresh snapshots, refreshing stale ones under the advisory
+lock, and the per-worker cache.
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services import metrics_snapshot_service
+from app.services.metrics_snapshot_service import MetricsSnapshotService
+
+REFRESHED = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def clear_snapshots():
+    MetricsSnapshotService.clear()
+    yield
+    MetricsSnapshotService.clear()
+
+
+def _mock_conn(mock_conn):
+    mock_cursor = MagicMock()
+    mock_conn.return_value.__enter__.return_value = (MagicMock(), mock_cursor)
+    return mock_cursor
+
+
+def _executed(cur):
+    return " ".join(c.args[0] for c in cur.execute.call_args_list)
+
+
+class TestMetricsSnapshotService:
+    """Test suite for shared metric snapshots."""
+
+    def test_fresh_snapshot_is_served_as_stored(self):
+        """A snapshot younger than the TTL is not recomputed."""
+        compute = MagicMock()
+        with patch.object(metrics_snapshot_service.database, "get_conn") as mock_conn:
+            cur = _mock_conn(mock_conn)
+            cur.fetchone.side_effect = [(True,), ({"total_stock": 7}, REFRESHED, 10.0)]
+            with patch.dict(metrics_snapshot_service.SNAPSHOTS, dashboard=compute):
+                snapshot = MetricsSnapshotService.get("dashboard", 60)
+
+        assert snapshot == {"metrics": {"total_stock": 7}, "refreshed_at": REFRESHED}
+        compute.assert_not_called()
+        assert "INSERT INTO metrics_snapshots" not in _executed(cur)
+
+    def test_stale_snapshot_is_recomputed_under_lock(self):
+        """The worker holding the advisory lock recomputes and stores it."""
+        compute = MagicMock(return_value={"total_stock": 9})
+        with patch.object(metrics_snapshot_service.database, "get_conn") as mock_conn:
+            cur = _mock_conn(mock_conn)
+            cur.fetchone.side_effect = [
+                (True,),
+                ({"total_stock": 7}, REFRESHED, 90.0),
+                (True,),
+                (REFRESHED,),
+            ]
+            with patch.dict(metrics_snapshot_service.SNAPSHOTS, dashboard=compute):
+                snapshot = MetricsSnapshotService.get("dashboard", 60)
+
+        assert snapshot["metrics"] == {"total_stock": 9}
+        compute.assert_called_once_with(cur)
+        sql = _executed(cur)
+        assert "pg_try_advisory_xact_lock" in sql
+        assert "INSERT INTO metrics_snapshots" in sql
+
+    def test_stale_snapshot_served_while_another_worker_refreshes(self):
+        """Without the lock the stored row is returned unchanged."""
+        compute = MagicMock()
+        with patch.object(metrics_snapshot_service.database, "get_conn") as mock_conn:
+            cur = _mock_conn(mock_conn)
+            cur.fetchone.side_effect = [
+                (True,),
+                ({"total_stock": 7}, REFRESHED, 90.0),
+                (False,),
+            ]
+            with patch.dict(metrics_snapshot_service.SNAPSHOTS, dashboard=compute):
+                snapshot = MetricsSnapshotService.get("dashboard", 60)
+
+        assert snapshot["metrics"] == {"total_stock": 7}
+        compute.assert_not_called()
+
+    def test_worker_cache_skips_database_within_ttl(self):
+        """A second read within the remaining TTL stays in memory."""
+        with patch.object(metrics_snapshot_service.database, "get_conn") as mock_conn:
+            cur = _mock_conn(mock_conn)
+            cur.fetchone.side_effect = [(True,), ({"total_stock": 7}, REFRESHED, 10.0)]
+            first = MetricsSnapshotService.get("dashboard", 60)
+            second = MetricsSnapshotService.get("dashboard", 60)
+
+        assert first is second
+        assert mock_conn.call_count == 1
+
+    def test_without_table_metrics_are_computed_directly(self):
+        """Before the migration the snapshot is computed per worker."""
+        with patch.object(metrics_snapshot_service.database, "get_conn") as mock_conn:
+            cur = _mock_conn(mock_conn)
+            # table check, stock sum, low-stock summary check + count, suppliers
+            cur.fetchone.side_effect = [(False,), (120,), (False,), (4,), (3,)]
+            snapshot = MetricsSnapshotService.get("dashboard", 60)
+
+        assert snapshot["metrics"] == {
+            "total_stock": 120,
+            "low_stock_items": 4,
+            "total_suppliers": 3,
+        }
+        assert "metrics_snapshots WHERE" not in _executed(cur)
+
+    def test_upf_change_failure_rolls_back_to_savepoint(self):
+        """Failed change queries leave the core metrics and zero changes."""
+        cur = MagicMock()
+        cur.fetchone.return_value = (4, 125.5, 10, 6)
+
+        def execute(sql, *args):
+            if "INTERVAL '60 days'" in sql:
+                raise RuntimeError("column created_at does not exist")
+
+        cur.execute.side_effect = execute
+
+        metrics = metrics_snapshot_service._upf_metrics(cur)
+
+        assert metrics["total_processes"] == 4
+        assert metrics["avg_cost"] == 125.5
+        assert metrics["lots_change"] == 0.0
+        cur.execute.assert_called_with("ROLLBACK TO SAVEPOINT metrics_change")
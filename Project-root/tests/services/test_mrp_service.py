@@ -0,0 +1,76 @@
+"""
+Test coverage for MaterialRequirementsService.
+
+Tests the single-statement MRP run and per-supplier consolidation.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from app.services.mrp_service import MaterialRequirementsService
+
+
+def _row(variant_id, net, supplier_id=None, unit_cost=None, moq=1, lots=(1,)):
+    return {
+        "variant_id": variant_id,
+        "variant_name": f"Variant {variant_id}",
+        "gross_requirement": net + 10,
+        "on_hand": 10,
+        "on_order": 0,
+        "safety_stock": 0,
+        "net_requirement": net,
+        "supplier_id": supplier_id,
+        "supplier_name": f"Supplier {supplier_id}" if supplier_id else None,
+        "unit_cost": unit_cost,
+        "minimum_order_qty": moq,
+        "lot_ids": list(lots),
+    }
+
+
+class TestMaterialRequirementsService:
+    """Test suite for MRP netting."""
+
+    def test_build_plan_groups_by_supplier(self):
+        """Shortages are consolidated per supplier; covered variants are not ordered."""
+        plan = MaterialRequirementsService._build_plan(
+            [
+                _row(1, 30, supplier_id=7, unit_cost=2.0, lots=(1, 2)),
+                _row(2, 5, supplier_id=7, unit_cost=1.5, moq=20, lots=(2,)),
+                _row(3, 0, supplier_id=8, unit_cost=9.0, lots=(3,)),
+                _row(4, 12, lots=(3,)),
+            ]
+        )
+
+        assert plan["lot_count"] == 3
+        assert plan["variant_count"] == 4
+        assert plan["shortage_count"] == 3
+
+        by_supplier = {g["supplier_id"]: g for g in plan["suppliers"]}
+        assert set(by_supplier) == {7, None}
+        # Minimum order quantity rounds the 5-unit shortage up to 20
+        assert by_supplier[7]["total_quantity"] == 50
+        assert by_supplier[7]["estimated_cost"] == 90.0
+        assert by_supplier[7]["line_count"] == 2
+        assert by_supplier[None]["supplier_name"] == "Unassigned"
+        # Unassigned lines sort last
+        assert plan["suppliers"][-1]["supplier_id"] is None
+
+    def test_calculate_requirements_single_statement(self):
+        """The whole run is one netting query after the schema probes."""
+        with patch("app.services.mrp_service.database.get_conn") as mock_conn:
+            mock_cursor = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (MagicMock(), mock_cursor)
+            mock_cursor.fetchone.return_value = {"present": True}
+            mock_cursor.fetchall.side_effect = [
+                [{"column_name": "variant_usage_id"}],
+                [_row(1, 4, supplier_id=7, unit_cost=3.0)],
+            ]
+
+            plan = MaterialRequirementsService.calculate_requirements(
+                lot_ids=[5, 5, 2]
+            )
+
+            sql, params = mock_cursor.execute.call_args.args
+            assert "purchase_order_items" in sql
+            assert params[1] == [2, 5]
+            assert "Draft" in params[2]
+            assert plan["suppliers"][0]["estimated_cost"] == 12.0
@@ -507,3 +507,29 @@ class TestProcessServiceIntegration:
 
             # In real workflow, would add subprocesses here via separate service calls
             # Then retrieve full structure to verify
+
+
+class TestProcessServiceSearch:
+    """Test full-text process search."""
+
+    def test_search_uses_prefix_tsquery(self):
+        """Every word matches as a prefix; ranking and highlights come from SQL."""
+        with patch("app.services.process_service.database.get_conn") as mock_conn:
+            mock_cursor = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (MagicMock(), mock_cursor)
+            mock_cursor.fetchall.return_value = [
+                {"id": 3, "name": "Frame welding", "rank": 0.4}
+            ]
+
+            results = ProcessService.search_processes("Frame Weld", user_id=7)
+
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "to_tsvector('english'" in sql
+        assert "ILIKE" not in sql
+        assert params[2:] == ("frame:* & weld:*", 7, "frame:* & weld:*")
+        assert results[0]["id"] == 3
+
+    def test_search_without_words_skips_query(self):
+        with patch("app.services.process_service.database.get_conn") as mock_conn:
+            assert ProcessService.search_processes("%%", user_id=7) == []
+            mock_conn.assert_not_called()
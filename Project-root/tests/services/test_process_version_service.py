@@ -0,0 +1,131 @@
+"""
+Test coverage for ProcessVersionService.
+
+Tests freezing process structures, version reuse and cached cost components.
+"""
+
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.process_version_service import ProcessVersionService
+
+
+def _version_row(**overrides):
+    row = {
+        "id": 3,
+        "process_id": 5,
+        "version_number": 2,
+        "structure": {"process_id": 5, "subprocesses": []},
+        "structure_hash": "a" * 32,
+        "cost_breakdown": {"totals": {"grand_total": 12.5}},
+        "unit_cost": 12.5,
+        "created_by": 1,
+        "created_at": datetime(2025, 1, 1),
+    }
+    row.update(overrides)
+    return row
+
+
+class TestProcessVersionService:
+    """Test suite for process version snapshots."""
+
+    @patch(
+        "app.services.process_version_service.CostingService.calculate_process_total_cost"
+    )
+    def test_freeze_unchanged_structure_reuses_version(self, mock_costing):
+        """An unchanged structure returns the existing version without costing."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.side_effect = [
+            {"present": True},
+            {"structure": {}, "structure_hash": "a" * 32, "version_id": 3},
+            _version_row(),
+        ]
+
+        version = ProcessVersionService.freeze_process(5, cur=mock_cursor)
+
+        assert version["id"] == 3
+        assert version["unit_cost"] == 12.5
+        assert version["created_at"] == "2025-01-01T00:00:00"
+        mock_costing.assert_not_called()
+        assert not any(
+            "INSERT" in c.args[0] for c in mock_cursor.execute.call_args_list
+        )
+
+    @patch(
+        "app.services.process_version_service.CostingService.calculate_process_total_cost"
+    )
+    def test_freeze_changed_structure_costs_once(self, mock_costing):
+        """A new structure is costed once and stored with the snapshot."""
+        mock_costing.return_value = {"totals": {"grand_total": 20.0}}
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.side_effect = [
+            {"present": True},
+            {
+                "structure": {"process_id": 5},
+                "structure_hash": "b" * 32,
+                "version_id": None,
+            },
+            _version_row(id=4, version_number=3, unit_cost=20.0),
+        ]
+
+        version = ProcessVersionService.freeze_process(5, user_id=1, cur=mock_cursor)
+
+        mock_costing.assert_called_once_with(5)
+        sql, params = mock_cursor.execute.call_args.args
+        assert "INSERT INTO process_versions" in sql
+        assert params[2] == "b" * 32
+        assert params[4] == 20.0
+        assert version["version_number"] == 3
+
+    @pytest.mark.parametrize("priced", [True, False])
+    def test_freeze_hashes_active_supplier_pricing(self, priced):
+        """Price changes alter the hashed structure, so stale costs are not reused."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.side_effect = [
+            {"present": True, "priced": priced},
+            {"structure": {}, "structure_hash": "a" * 32, "version_id": 3},
+            _version_row(),
+        ]
+
+        ProcessVersionService.freeze_process(5, cur=mock_cursor)
+
+        sql = mock_cursor.execute.call_args_list[1].args[0]
+        assert "'supplier_pricing'," in sql
+        assert ("FROM variant_supplier_pricing vsp" in sql) is priced
+        assert "md5(snap.structure::text)" in sql
+
+    def test_freeze_without_migration_returns_none(self):
+        """Databases without process_versions freeze nothing."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = {"present": False}
+
+        assert ProcessVersionService.freeze_process(5, cur=mock_cursor) is None
+        assert mock_cursor.execute.call_count == 1
+
+    def test_cost_components_sum_subprocess_totals(self):
+        """Cost components are read from the cached breakdown."""
+        components = ProcessVersionService.cost_components(
+            {
+                "cost_breakdown": {
+                    "subprocesses": [
+                        {
+                            "cost_breakdown": {
+                                "totals": {"fixed_variants": 3, "cost_items": 1}
+                            }
+                        },
+                        {"cost_breakdown": {"totals": {"substitute_groups": 2}}},
+                    ],
+                    "totals": {"additional_costs": 4, "grand_total": 10},
+                }
+            }
+        )
+
+        assert components == {
+            "fixed_variants": 3.0,
+            "substitute_groups": 2.0,
+            "cost_items": 1.0,
+            "additional_costs": 4.0,
+            "grand_total": 10.0,
+        }
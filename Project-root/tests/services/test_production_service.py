@@ -7,10 +7,21 @@ Tests production lot operations: create, get, list, update status.
 from datetime import datetime
 from unittest.mock import MagicMock, patch
 
+import pytest
 
 from app.services.production_service import ProductionService
 
 
+@pytest.fixture(autouse=True)
+def _unversioned_processes():
+    """Run lot creation as if process versioning were not migrated."""
+    with patch(
+        "app.services.production_service.ProcessVersionService.freeze_process",
+        return_value=None,
+    ):
+        yield
+
+
 class TestProductionService:
     """Test suite for production service operations."""
 
@@ -302,3 +313,409 @@ class TestProductionService:
                 assert lot2["id"] == 2
                 assert lot1["lot_number"] != lot2["lot_number"]
                 assert lot1["quantity"] != lot2["quantity"]
+
+
+    @patch(
+        "app.services.production_service.CostingService.calculate_process_total_cost"
+    )
+    def test_create_production_lot_pins_process_version(self, mock_costing):
+        """Lots pin to the frozen version and reuse its cached cost."""
+        version = {
+            "id": 11,
+            "process_id": 5,
+            "cost_breakdown": {"totals": {"grand_total": 40.0}},
+        }
+        with patch(
+            "app.services.production_service.ProcessVersionService.freeze_process",
+            return_value=version,
+        ), patch("app.services.production_service.database.get_conn") as mock_conn:
+            mock_cursor = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (MagicMock(), mock_cursor)
+            mock_cursor.fetchone.return_value = {
+                "id": 9,
+                "process_id": 5,
+                "lot_number": "LOT-9",
+                "quantity": 3,
+                "total_cost": 120.0,
+                "process_version_id": 11,
+                "status": "Planning",
+            }
+
+            result = ProductionService.create_production_lot(
+                process_id=5, user_id=1, quantity=3, lot_number="LOT-9"
+            )
+
+        mock_costing.assert_not_called()
+        sql, params = mock_cursor.execute.call_args_list[0].args
+        assert "process_version_id" in sql
+        assert params == [5, "LOT-9", 1, 3, 120.0, 11]
+        assert result["process_version_id"] == 11
+
+    def test_create_production_lot_freezes_in_lot_transaction(self):
+        """The version is frozen on the lot's cursor and rolled back with it."""
+        with patch(
+            "app.services.production_service.ProcessVersionService.freeze_process",
+            return_value={"id": 11, "cost_breakdown": {"totals": {"grand_total": 4}}},
+        ) as mock_freeze, patch(
+            "app.services.production_service.database.get_conn"
+        ) as mock_conn:
+            mock_cursor = MagicMock()
+            mock_connection = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (
+                mock_connection,
+                mock_cursor,
+            )
+            mock_cursor.execute.side_effect = RuntimeError("duplicate lot number")
+
+            with pytest.raises(RuntimeError):
+                ProductionService.create_production_lot(
+                    process_id=5, user_id=1, quantity=3, lot_number="LOT-9"
+                )
+
+        mock_freeze.assert_called_once_with(5, 1, mock_cursor)
+        mock_connection.rollback.assert_called_once()
+        mock_connection.commit.assert_not_called()
+
+    def test_calculate_lot_actual_cost_reads_snapshot(self):
+        """Pinned lots are costed from the snapshot, not per variant."""
+        version = {
+            "id": 11,
+            "unit_cost": 70.0,
+            "cost_breakdown": {
+                "subprocesses": [
+                    {
+                        "cost_breakdown": {
+                            "totals": {
+                                "fixed_variants": 30.0,
+                                "substitute_groups": 20.0,
+                                "cost_items": 5.0,
+                            }
+                        }
+                    }
+                ],
+                "totals": {"additional_costs": 15.0, "grand_total": 70.0},
+            },
+        }
+        with patch(
+            "app.services.production_service.ProcessVersionService.get_version",
+            return_value=version,
+        ), patch(
+            "app.services.production_service.CostingService.get_variant_worst_case_cost"
+        ) as mock_variant_cost, patch(
+            "app.services.production_service.database.get_conn"
+        ) as mock_conn:
+            mock_cursor = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (MagicMock(), mock_cursor)
+            mock_cursor.fetchone.return_value = {
+                "id": 9,
+                "process_id": 5,
+                "quantity": 2,
+                "process_version_id": 11,
+            }
+            mock_cursor.fetchall.return_value = [
+                {"selected_cost": 4.0, "selected_quantity": 2}
+            ]
+
+            total = ProductionService.calculate_lot_actual_cost(9)
+
+        # (30 fixed + 8 selected + 5 cost items + 15 additional) * 2
+        assert total == 116.0
+        mock_variant_cost.assert_not_called()
+        assert mock_cursor.execute.call_count == 2
+
+
+class TestProductionServiceBulk:
+    """Test suite for bulk lot creation and status transitions."""
+
+    @patch(
+        "app.services.inventory_alert_service.InventoryAlertService.create_alerts_for_production_lots"
+    )
+    @patch(
+        "app.services.inventory_alert_service.InventoryAlertService.check_inventory_levels_for_production_lots"
+    )
+    @patch("app.services.production_service.psycopg2.extras.execute_values")
+    @patch(
+        "app.services.production_service.CostingService.calculate_process_total_cost"
+    )
+    def test_create_production_lots_bulk_costs_once_per_process(
+        self, mock_costing, mock_execute_values, mock_check, mock_create_alerts
+    ):
+        """Cost is calculated per distinct process and lot numbers come from one block."""
+        mock_costing.return_value = {"totals": {"grand_total": 10.0}}
+
+        def _insert(cur, sql, rows, **kwargs):
+            return [
+                {
+                    "id": index + 1,
+                    "process_id": row[0],
+                    "lot_number": row[1],
+                    "created_by": row[2],
+                    "quantity": row[3],
+                    "total_cost": row[4],
+                    "status": "Planning",
+                }
+                for index, row in enumerate(rows)
+            ]
+
+        mock_execute_values.side_effect = _insert
+        mock_check.return_value = {
+            1: [{"item_variant_id": 9, "alert_severity": "CRITICAL"}],
+            2: [],
+            3: [],
+        }
+        mock_create_alerts.return_value = {
+            "alerts": {1: [100], 2: [], 3: []},
+            "recommendations": {1: [200], 2: [], 3: []},
+        }
+
+        with patch("app.services.production_service.database.get_conn") as mock_conn:
+            mock_cursor = MagicMock()
+            mock_connection = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (
+                mock_connection,
+                mock_cursor,
+            )
+            mock_cursor.fetchone.return_value = {"present": False}
+
+            result = ProductionService.create_production_lots_bulk(
+                [
+                    {"process_id": 5, "quantity": 2},
+                    {"process_id": 5, "quantity": 3},
+                    {"process_id": 6, "quantity": 1, "lot_number": "CUSTOM-1"},
+                ],
+                user_id=1,
+            )
+
+        assert mock_costing.call_count == 2
+        mock_execute_values.assert_called_once()
+        mock_connection.commit.assert_called_once()
+
+        lots = result["lots"]
+        assert result["created_count"] == 3
+        assert [lot["total_cost"] for lot in lots] == [20.0, 30.0, 10.0]
+        assert lots[0]["lot_number"].endswith("-001")
+        assert lots[1]["lot_number"].endswith("-002")
+        assert lots[2]["lot_number"] == "CUSTOM-1"
+        assert lots[0]["alerts_summary"]["action_required"] is True
+        assert lots[0]["procurement_recommendations"] == [200]
+        assert result["alerts_created"] == 1
+
+    def test_bulk_transition_rejects_all_when_one_lot_invalid(self):
+        """A single blocked lot aborts the whole bulk finalize."""
+        with patch("app.services.production_service.database.get_conn") as mock_conn:
+            mock_cursor = MagicMock()
+            mock_connection = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (
+                mock_connection,
+                mock_cursor,
+            )
+            mock_cursor.fetchall.return_value = [
+                {"id": 1, "lot_number": "L1", "status": "Planning", "created_by": 1, "critical_alerts": 0},
+                {"id": 2, "lot_number": "L2", "status": "Planning", "created_by": 1, "critical_alerts": 2},
+            ]
+
+            result = ProductionService.bulk_transition_production_lots(
+                [1, 2, 3], "finalize"
+            )
+
+        assert result["success"] is False
+        assert {e["lot_id"] for e in result["errors"]} == {2, 3}
+        mock_connection.rollback.assert_called_once()
+        mock_connection.commit.assert_not_called()
+        statements = [c.args[0] for c in mock_cursor.execute.call_args_list]
+        assert not any(sql.lstrip().startswith("UPDATE") for sql in statements)
+
+    def test_bulk_transition_cancel_updates_set_based(self):
+        """Bulk cancel issues one UPDATE for all lots."""
+        with patch("app.services.production_service.database.get_conn") as mock_conn:
+            mock_cursor = MagicMock()
+            mock_connection = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (
+                mock_connection,
+                mock_cursor,
+            )
+            mock_cursor.fetchall.return_value = [
+                {"id": 1, "lot_number": "L1", "status": "Planning", "created_by": 4, "critical_alerts": 0},
+                {"id": 2, "lot_number": "L2", "status": "Ready", "created_by": 4, "critical_alerts": 1},
+            ]
+            mock_cursor.fetchone.return_value = (False,)
+
+            result = ProductionService.bulk_transition_production_lots(
+                [2, 1], "cancel", owner_id=4
+            )
+
+        assert result["success"] is True
+        assert [u["status"] for u in result["updated"]] == ["cancelled", "cancelled"]
+        updates = [
+            c.args
+            for c in mock_cursor.execute.call_args_list
+            if "UPDATE production_lots" in c.args[0]
+        ]
+        assert len(updates) == 1
+        assert updates[0][1] == ([1, 2],)
+
+    def test_finalize_releases_reservations_in_same_transaction(self):
+        """A finalized lot is never executed, so its stock goes back."""
+        readiness = {1: {"alerts_by_severity": {"CRITICAL": 0}}}
+        with patch(
+            "app.services.production_service.ProductionService.evaluate_lots_readiness",
+            return_value=readiness,
+        ), patch("app.services.production_service.database.get_conn") as mock_conn, patch(
+            "app.services.production_service.StockReservationService.release_for_lot"
+        ) as mock_release:
+            mock_cursor = MagicMock()
+            mock_connection = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (
+                mock_connection,
+                mock_cursor,
+            )
+            mock_cursor.fetchone.return_value = ("LOT-1",)
+            mock_connection.commit.side_effect = lambda: mock_release.assert_called_once()
+
+            result = ProductionService.finalize_production_lot(1, user_id=4)
+
+        mock_release.assert_called_once_with(1, mock_cursor)
+        mock_connection.commit.assert_called_once()
+        assert result["status"] == "finalized"
+
+    @pytest.mark.parametrize("status", ["completed", "finalized", "cancelled"])
+    def test_update_to_closed_status_releases_reservations(self, status):
+        with patch(
+            "app.services.production_service.database.get_conn"
+        ) as mock_conn, patch(
+            "app.services.production_service.StockReservationService.release_for_lot"
+        ) as mock_release, patch(
+            "app.services.production_service.ProductionService.get_production_lot"
+        ):
+            mock_cursor = MagicMock()
+            mock_connection = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (
+                mock_connection,
+                mock_cursor,
+            )
+            mock_cursor.fetchone.side_effect = [
+                {"id": 1, "lot_number": "L1", "created_by": 4, "status": "Ready"},
+                {"id": 1, "status": status},
+            ]
+
+            ProductionService.update_production_lot(1, {"status": status}, user_id=4)
+
+        mock_release.assert_called_once_with(1, mock_cursor)
+        mock_connection.commit.assert_called_once()
+
+    def test_bulk_finalize_releases_reservations(self):
+        """Bulk finalize closes the lots' active reservations in its transaction."""
+        with patch("app.services.production_service.database.get_conn") as mock_conn:
+            mock_cursor = MagicMock()
+            mock_connection = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (
+                mock_connection,
+                mock_cursor,
+            )
+            mock_cursor.fetchall.return_value = [
+                {"id": 1, "lot_number": "L1", "status": "Ready", "created_by": 4, "critical_alerts": 0},
+                {"id": 2, "lot_number": "L2", "status": "Ready", "created_by": 4, "critical_alerts": 0},
+            ]
+            mock_cursor.fetchone.return_value = (True,)
+
+            result = ProductionService.bulk_transition_production_lots(
+                [2, 1], "finalize"
+            )
+
+        assert result["success"] is True
+        statements = [c.args for c in mock_cursor.execute.call_args_list]
+        finalize = next(
+            i for i, (sql, *_) in enumerate(statements)
+            if "SET status = 'finalized'" in sql
+        )
+        release = next(
+            i for i, (sql, *_) in enumerate(statements)
+            if "UPDATE stock_reservations" in sql
+        )
+        assert release > finalize
+        assert "status = 'released'" in statements[release][0]
+        assert "status = 'active'" in statements[release][0]
+        assert statements[release][1] == ([1, 2],)
+        mock_connection.commit.assert_called_once()
+
+
+class TestProductionServiceReadiness:
+    """Test suite for the set-based readiness evaluator."""
+
+    @staticmethod
+    def _row(**overrides):
+        row = {
+            "lot_id": 1,
+            "status": "Planning",
+            "created_by": 1,
+            "missing_or_groups": None,
+            "total": 2,
+            "completed": 0,
+            "failed": 0,
+            "invalid": 0,
+            "alerts_critical": 0,
+            "alerts_high": 0,
+            "alerts_medium": 0,
+            "alerts_low": 0,
+            "alerts_ok": 0,
+            "variants_required": 3,
+            "short_variant_ids": None,
+        }
+        row.update(overrides)
+        return row
+
+    def test_evaluate_lots_readiness_single_query(self):
+        """Many lots are evaluated with one probe and one evaluation query."""
+        with patch("app.services.production_service.database.get_conn") as mock_conn:
+            mock_cursor = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (MagicMock(), mock_cursor)
+            mock_cursor.fetchone.return_value = {
+                "has_or_groups": True,
+                "has_lot_subprocesses": True,
+                "has_alerts": True,
+                "has_availability": True,
+                "selection_columns": ["lot_id", "or_group_id", "variant_usage_id"],
+            }
+            mock_cursor.fetchall.return_value = [
+                self._row(lot_id=1),
+                self._row(lot_id=2, missing_or_groups=["Fabric"]),
+                self._row(lot_id=3, alerts_critical=1, short_variant_ids=[9]),
+                self._row(lot_id=4, status="completed"),
+            ]
+
+            result = ProductionService.evaluate_lots_readiness([4, 3, 2, 1, 1])
+
+        assert mock_cursor.execute.call_count == 2
+        sql, params = mock_cursor.execute.call_args.args
+        assert params == {"ids": [1, 2, 3, 4]}
+        assert "s.lot_id = lot.id" in sql
+
+        assert result[1]["badge"] == "ready"
+        assert result[1]["ready_for_execution"] is True
+        assert result[1]["ready_for_finalization"] is True
+        assert result[2]["badge"] == "incomplete"
+        assert result[2]["missing_or_groups"] == ["Fabric"]
+        assert result[3]["badge"] == "blocked"
+        assert result[3]["ready_for_execution"] is False
+        assert result[3]["ready_for_finalization"] is False
+        assert result[3]["stock"]["variants_short"] == 1
+        assert result[4]["badge"] == "closed"
+
+    def test_validate_lot_readiness_uses_evaluator(self):
+        """validate_lot_readiness reports missing OR groups from the evaluator."""
+        report = ProductionService._readiness_report(
+            self._row(missing_or_groups=["Fabric", "Thread"]),
+            ["CRITICAL", "HIGH", "MEDIUM", "LOW", "OK"],
+        )
+        with patch.object(
+            ProductionService, "evaluate_lots_readiness", return_value={1: report}
+        ):
+            assert ProductionService.validate_lot_readiness(1) == (
+                False,
+                ["Fabric", "Thread"],
+            )
+        with patch.object(ProductionService, "evaluate_lots_readiness", return_value={}):
+            assert ProductionService.validate_lot_readiness(1) == (
+                False,
+                ["Lot not found"],
+            )
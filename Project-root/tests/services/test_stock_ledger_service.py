@@ -0,0 +1,85 @@
+"""
+Test coverage for StockLedgerService.
+
+Tests movement attribution and as-of balance lookups.
+"""
+
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from app.services.stock_ledger_service import StockLedgerService
+
+
+def _mock_conn(mock_conn):
+    mock_cursor = MagicMock()
+    mock_connection = MagicMock()
+    mock_conn.return_value.__enter__.return_value = (mock_connection, mock_cursor)
+    return mock_connection, mock_cursor
+
+
+class TestStockLedgerService:
+    """Test suite for the stock movement ledger."""
+
+    def test_tag_sets_transaction_local_source(self):
+        """Tags are transaction-local settings read by the ledger trigger."""
+        mock_cursor = MagicMock()
+
+        StockLedgerService.tag(mock_cursor, StockLedgerService.RECEIPT, 42)
+
+        sql, params = mock_cursor.execute.call_args.args
+        assert "set_config('mtc.stock_source', %s, true)" in sql
+        assert "set_config('mtc.stock_source_id', %s, true)" in sql
+        assert params == ("receipt", "42")
+
+    def test_tag_without_source_id_clears_it(self):
+        """A tag without an id must not inherit an earlier tag's id."""
+        mock_cursor = MagicMock()
+
+        StockLedgerService.tag(mock_cursor, StockLedgerService.MANUAL_ADJUSTMENT)
+
+        assert mock_cursor.execute.call_args.args[1] == ("manual_adjustment", "")
+
+    def test_stock_as_of_reads_snapshot_plus_delta(self):
+        """One query combines each variant's snapshot and later movements."""
+        with patch("app.services.stock_ledger_service.database.get_conn") as mock_conn:
+            _, mock_cursor = _mock_conn(mock_conn)
+            mock_cursor.fetchone.return_value = (True,)
+            mock_cursor.fetchall.return_value = [(3, 12), (5, None)]
+            as_of = datetime(2026, 1, 5, 12, 0)
+
+            balances = StockLedgerService.stock_as_of([5, 3, 3], as_of)
+
+            assert balances == {3: 12, 5: None}
+            sql, params = mock_cursor.execute.call_args.args
+            assert "stock_balance_snapshots" in sql
+            assert "stock_movements" in sql
+            assert params == {"ids": [3, 5], "as_of": as_of}
+
+    def test_stock_as_of_without_ledger(self):
+        """Databases without the migration report no ledger."""
+        with patch("app.services.stock_ledger_service.database.get_conn") as mock_conn:
+            _, mock_cursor = _mock_conn(mock_conn)
+            mock_cursor.fetchone.return_value = (False,)
+
+            assert StockLedgerService.stock_as_of([1], datetime(2026, 1, 5)) is None
+            assert mock_cursor.execute.call_count == 1
+
+    def test_movements_filters_by_range(self):
+        """Optional bounds become parameters ahead of the limit."""
+        with patch("app.services.stock_ledger_service.database.get_conn") as mock_conn:
+            _, mock_cursor = _mock_conn(mock_conn)
+            mock_cursor.fetchone.return_value = {"?column?": True}
+            mock_cursor.fetchall.return_value = [
+                {"movement_id": 9, "delta": -4, "source_type": "production"}
+            ]
+            since = datetime(2026, 1, 1)
+
+            rows = StockLedgerService.movements(7, since=since, limit=20)
+
+            assert rows == [
+                {"movement_id": 9, "delta": -4, "source_type": "production"}
+            ]
+            sql, params = mock_cursor.execute.call_args.args
+            assert "created_at >= %s" in sql
+            assert "created_at <= %s" not in sql
+            assert params == [7, since, 20]
@@ -0,0 +1,133 @@
+"""
+Test coverage for StockReceiptService.
+
+Tests that receipt lines are posted, and receipts reversed, with a fixed
+number of set-based statements, locking in a deterministic order.
+"""
+
+from unittest.mock import MagicMock
+
+from app.services.stock_receipt_service import StockReceiptService
+
+
+def _statements(cur):
+    return [" ".join(c.args[0].split()) for c in cur.execute.call_args_list]
+
+
+class TestStockReceiptService:
+    """Test suite for posting stock receipt lines."""
+
+    def test_post_lines_uses_fixed_statement_count(self):
+        """Hundreds of lines cost the same statements as one."""
+        cur = MagicMock()
+        items = [
+            {"variant_id": 100 - i % 50, "quantity": 2, "cost": 5} for i in range(300)
+        ]
+
+        posted = StockReceiptService.post_lines(cur, 7, 3, 11, items)
+
+        assert posted == 300
+        statements = _statements(cur)
+        assert len(statements) == 7
+        assert statements[0].startswith("SELECT po_id FROM purchase_orders")
+        assert statements[0].endswith("FOR UPDATE")
+        assert "ORDER BY variant_id FOR UPDATE" in statements[1]
+        assert statements[2].startswith("INSERT INTO stock_entries")
+        assert statements[3].startswith("UPDATE item_variant")
+        assert statements[4].startswith("UPDATE purchase_order_items")
+        assert statements[5].startswith("INSERT INTO supplier_item_rates")
+        assert statements[6].startswith("UPDATE purchase_orders po SET status")
+
+        params = cur.execute.call_args_list[2].args[1]
+        assert len(params["variant_ids"]) == 300
+        assert params["receipt_id"] == 7 and params["supplier_id"] == 3
+
+    def test_post_lines_skips_incomplete_lines(self):
+        """Lines without a variant or quantity are not posted."""
+        cur = MagicMock()
+        items = [
+            {"variant_id": 1, "quantity": 4, "cost": None},
+            {"variant_id": None, "quantity": 4},
+            {"variant_id": 2, "quantity": 0},
+        ]
+
+        posted = StockReceiptService.post_lines(cur, 7, 3, None, items)
+
+        assert posted == 1
+        params = cur.execute.call_args_list[0].args[1]
+        assert params["variant_ids"] == [1]
+        assert params["quantities"] == [4]
+        assert params["costs"] == [None]
+        assert not any("purchase_order" in sql for sql in _statements(cur))
+
+    def test_latest_costed_line_sets_supplier_rate(self):
+        """The rate upsert keeps one row per item, preferring later lines."""
+        cur = MagicMock()
+
+        StockReceiptService.post_lines(
+            cur, 7, 3, None, [{"variant_id": 1, "quantity": 1, "cost": 2}]
+        )
+
+        rates = next(s for s in _statements(cur) if "supplier_item_rates" in s)
+        assert "DISTINCT ON (iv.item_id)" in rates
+        assert "ORDER BY iv.item_id, l.line_no DESC" in rates
+        assert "WHERE l.cost <> 0" in rates
+
+    def test_po_status_recalculated_without_lines(self):
+        """A receipt against a PO refreshes its status even with no lines."""
+        cur = MagicMock()
+
+        assert StockReceiptService.post_lines(cur, 7, 3, 11, []) == 0
+
+        statements = _statements(cur)
+        assert len(statements) == 2
+        assert cur.execute.call_args.args[1] == ([11],)
+
+
+class TestStockReceiptReversal:
+    """Test suite for reversing stock receipts."""
+
+    def test_reverse_many_receipts_in_one_pass(self):
+        """Stock, PO lines, rates and statuses are restored set-wise."""
+        cur = MagicMock()
+        cur.fetchall.return_value = [(3, 11), (5, None), (9, 12)]
+        cur.rowcount = 40
+
+        result = StockReceiptService.reverse(cur, [9, 3, 5, 3])
+
+        assert result == {"reversed": 3, "entries": 40, "missing": []}
+        statements = _statements(cur)
+        assert len(statements) == 9
+        assert "FROM stock_receipts" in statements[0]
+        assert statements[0].endswith("ORDER BY receipt_id FOR UPDATE")
+        assert cur.execute.call_args_list[0].args[1] == {"receipt_ids": [3, 5, 9]}
+        assert "FROM purchase_orders" in statements[1]
+        assert cur.execute.call_args_list[1].args[1] == ([11, 12],)
+        assert statements[2].endswith("ORDER BY variant_id FOR UPDATE")
+        assert statements[3].startswith("WITH reversed AS")
+        assert "UPDATE supplier_item_rates" in statements[3]
+        assert "opening_stock = iv.opening_stock - d.quantity" in statements[4]
+        assert statements[5].startswith("UPDATE purchase_order_items")
+        assert statements[6].startswith("DELETE FROM stock_entries")
+        assert statements[7].startswith("DELETE FROM stock_receipts")
+        assert statements[8].startswith("UPDATE purchase_orders po SET status")
+        assert cur.execute.call_args.args[1] == ([11, 12],)
+
+    def test_reverse_changes_nothing_when_a_receipt_is_missing(self):
+        """All or nothing: a missing receipt stops before any write."""
+        cur = MagicMock()
+        cur.fetchall.return_value = [(3, None)]
+
+        result = StockReceiptService.reverse(cur, [3, 4])
+
+        assert result == {"reversed": 0, "entries": 0, "missing": [4]}
+        assert cur.execute.call_count == 1
+
+    def test_reverse_without_purchase_orders_skips_po_statements(self):
+        """Receipts not tied to a PO leave purchase orders alone."""
+        cur = MagicMock()
+        cur.fetchall.return_value = [(3, None)]
+
+        StockReceiptService.reverse(cur, [3])
+
+        assert not any("purchase_order" in sql for sql in _statements(cur))
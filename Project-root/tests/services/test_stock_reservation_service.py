@@ -0,0 +1,129 @@
+"""
+Test coverage for StockReservationService.
+
+Tests reserve/consume/release bookkeeping and available-to-promise lookups.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from app.services.stock_reservation_service import StockReservationService
+from app.services.variant_service import VariantService
+
+
+def _mock_conn(mock_conn):
+    mock_cursor = MagicMock()
+    mock_connection = MagicMock()
+    mock_conn.return_value.__enter__.return_value = (mock_connection, mock_cursor)
+    return mock_connection, mock_cursor
+
+
+class TestStockReservationService:
+    """Test suite for the stock reservation ledger."""
+
+    def test_reserve_for_lot_releases_previous_and_inserts(self):
+        """Reserving replaces any active reservation for the lot."""
+        with patch(
+            "app.services.stock_reservation_service.database.get_conn"
+        ) as mock_conn:
+            mock_connection, mock_cursor = _mock_conn(mock_conn)
+            mock_cursor.fetchone.return_value = {"?column?": True}
+            mock_cursor.fetchall.side_effect = [
+                [{"column_name": "variant_usage_id"}],
+                [{"variant_id": 5, "quantity": 40}],
+            ]
+
+            reserved = StockReservationService.reserve_for_lot(7, user_id=3)
+
+            assert reserved == [{"variant_id": 5, "quantity": 40.0}]
+            statements = [c.args[0] for c in mock_cursor.execute.call_args_list]
+            release_idx = next(
+                i for i, sql in enumerate(statements) if "UPDATE stock_reservations" in sql
+            )
+            insert_idx = next(
+                i for i, sql in enumerate(statements) if "INSERT INTO stock_reservations" in sql
+            )
+            assert release_idx < insert_idx
+            assert "pls.variant_usage_id" in statements[insert_idx]
+            assert mock_cursor.execute.call_args_list[insert_idx].args[1] == (7, 7, 3)
+            mock_connection.commit.assert_called_once()
+
+    def test_reserve_for_lot_without_ledger_is_noop(self):
+        """Databases without the reservation table reserve nothing."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = (False,)
+
+        assert StockReservationService.reserve_for_lot(7, cur=mock_cursor) == []
+        assert mock_cursor.execute.call_count == 1
+
+    def test_consume_and_release_set_status(self):
+        """Consume and release close only active reservations of the lot."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = (True,)
+        mock_cursor.rowcount = 2
+
+        assert StockReservationService.consume_for_lot(9, cur=mock_cursor) == 2
+        assert mock_cursor.execute.call_args.args[1] == ("consumed", 9)
+
+        assert StockReservationService.release_for_lot(9, cur=mock_cursor) == 2
+        assert mock_cursor.execute.call_args.args[1] == ("released", 9)
+
+    def test_get_availability_uses_view(self):
+        """Available-to-promise comes from the availability view."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = (True,)
+        mock_cursor.fetchall.return_value = [
+            {
+                "variant_id": 5,
+                "on_hand": 100,
+                "reserved": 30,
+                "available_to_promise": 70,
+                "threshold": 10,
+            }
+        ]
+
+        result = StockReservationService.get_availability(
+            [5, 5], exclude_lot_id=4, cur=mock_cursor
+        )
+
+        assert result[5]["available_to_promise"] == 70.0
+        assert result[5]["reserved"] == 30.0
+        sql, params = mock_cursor.execute.call_args.args
+        assert "variant_stock_availability" in sql
+        assert params == (4, [5])
+
+    def test_get_availability_empty_input(self):
+        """No variants means no query."""
+        with patch(
+            "app.services.stock_reservation_service.database.get_conn"
+        ) as mock_conn:
+            assert StockReservationService.get_availability([]) == {}
+            mock_conn.assert_not_called()
+
+    def test_check_variant_availability_counts_reservations(self):
+        """VariantService judges availability on ATP, not on-hand stock."""
+        with patch("app.services.variant_service.database.get_conn") as mock_conn:
+            _, mock_cursor = _mock_conn(mock_conn)
+            mock_cursor.fetchone.return_value = {
+                "variant_id": 5,
+                "variant_name": "Bolt",
+                "opening_stock": 100,
+                "threshold": 10,
+            }
+            with patch.object(
+                StockReservationService,
+                "get_availability",
+                return_value={
+                    5: {
+                        "on_hand": 100.0,
+                        "reserved": 80.0,
+                        "available_to_promise": 20.0,
+                        "threshold": 10.0,
+                    }
+                },
+            ):
+                result = VariantService.check_variant_availability(5, 50)
+
+            assert result["available"] is False
+            assert result["current_stock"] == 100.0
+            assert result["reserved_stock"] == 80.0
+            assert result["shortfall"] == 30
@@ -0,0 +1,89 @@
+"""
+Test coverage for StockRollupService.
+
+Tests range validation and the rollup/fallback trend queries.
+"""
+
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.stock_rollup_service import StockRollupService
+
+
+def _mock_conn(mock_conn):
+    mock_cursor = MagicMock()
+    mock_connection = MagicMock()
+    mock_conn.return_value.__enter__.return_value = (mock_connection, mock_cursor)
+    return mock_connection, mock_cursor
+
+
+class TestStockRollupService:
+    """Test suite for stock receipt trends."""
+
+    def test_trend_reads_daily_rollups(self):
+        """With the rollup table, buckets are summed from daily rows."""
+        with patch("app.services.stock_rollup_service.database.get_conn") as mock_conn:
+            _, mock_cursor = _mock_conn(mock_conn)
+            mock_cursor.fetchone.return_value = (True,)
+            mock_cursor.fetchall.return_value = [
+                (date(2026, 1, 1), 10, 250),
+                (date(2026, 2, 1), 0, 0),
+            ]
+
+            trend = StockRollupService.trend(
+                date(2026, 1, 15), date(2026, 2, 10), "month", supplier_id=4
+            )
+
+            assert trend == [
+                {"bucket": date(2026, 1, 1), "quantity": 10.0, "amount": 250.0},
+                {"bucket": date(2026, 2, 1), "quantity": 0.0, "amount": 0.0},
+            ]
+            sql, params = mock_cursor.execute.call_args.args
+            assert "FROM stock_daily_rollups" in sql
+            assert "stock_entries" not in sql
+            assert params["step"] == "1 month"
+            assert params["supplier_id"] == 4
+            assert params["variant_id"] is None
+
+    def test_trend_falls_back_to_sargable_entry_scan(self):
+        """Without rollups, entry_date is compared as a range, not DATE()."""
+        with patch("app.services.stock_rollup_service.database.get_conn") as mock_conn:
+            _, mock_cursor = _mock_conn(mock_conn)
+            mock_cursor.fetchone.return_value = (False,)
+            mock_cursor.fetchall.return_value = []
+
+            StockRollupService.trend(date(2026, 1, 1), date(2026, 1, 30))
+
+            sql = mock_cursor.execute.call_args.args[0]
+            assert "FROM stock_entries" in sql
+            assert "entry_date >= %(start)s::date" in sql
+            assert "DATE(" not in sql
+
+    @pytest.mark.parametrize(
+        "start, end, granularity",
+        [
+            (date(2026, 1, 2), date(2026, 1, 1), "day"),
+            (date(2026, 1, 1), date(2026, 1, 2), "hour"),
+            (date(2000, 1, 1), date(2026, 1, 1), "day"),
+        ],
+    )
+    def test_trend_rejects_invalid_ranges(self, start, end, granularity):
+        """Inverted ranges, unknown granularities and oversized ranges fail fast."""
+        with patch("app.services.stock_rollup_service.database.get_conn") as mock_conn:
+            with pytest.raises(ValueError):
+                StockRollupService.trend(start, end, granularity)
+            mock_conn.assert_not_called()
+
+    def test_years_of_history_fit_in_monthly_buckets(self):
+        """Long ranges are accepted at coarser granularity."""
+        with patch("app.services.stock_rollup_service.database.get_conn") as mock_conn:
+            _, mock_cursor = _mock_conn(mock_conn)
+            mock_cursor.fetchone.return_value = (True,)
+            mock_cursor.fetchall.return_value = []
+
+            assert (
+                StockRollupService.trend(date(2000, 1, 1), date(2026, 1, 1), "month")
+                == []
+            )
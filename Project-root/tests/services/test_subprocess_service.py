@@ -281,3 +281,51 @@ class TestSubprocessService:
             assert result1["id"] == 1
             assert result2["id"] == 2
             assert result1["name"] != result2["name"]
+
+
+class TestSubprocessSearch:
+    """Full-text subprocess library search."""
+
+    def setup_method(self):
+        SubprocessService.get_all_subprocesses_cached.cache_clear()
+
+    def teardown_method(self):
+        SubprocessService.get_all_subprocesses_cached.cache_clear()
+
+    def test_cold_cache_uses_fulltext_query(self):
+        """Without a warm cache the indexed tsvector query runs."""
+        with patch("app.services.subprocess_service.database.get_conn") as mock_conn:
+            mock_cursor = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (MagicMock(), mock_cursor)
+            mock_cursor.fetchall.return_value = [{"id": 1, "name": "Welding"}]
+
+            results = SubprocessService.search_subprocesses("weld jig", "Assembly", 10)
+
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "ts_rank_cd" in sql and "ts_headline" in sql
+        assert "weld:* & jig:*" in params
+        assert params[3:5] == ["Assembly", 10]
+        assert results == [{"id": 1, "name": "Welding"}]
+
+    def test_warm_cache_still_queries_index(self):
+        """A warm subprocess cache does not answer searches."""
+        with patch("app.services.subprocess_service.database.get_conn") as mock_conn:
+            mock_cursor = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (MagicMock(), mock_cursor)
+            mock_cursor.fetchall.return_value = [{"id": 2, "name": "Welding"}]
+            SubprocessService.get_all_subprocesses_cached(
+                SubprocessService._cache_version
+            )
+            mock_cursor.execute.reset_mock()
+
+            results = SubprocessService.search_subprocesses("processes")
+
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "to_tsquery('english', %s)" in sql
+        assert "processes:*" in params
+        assert results == [{"id": 2, "name": "Welding"}]
+
+    def test_query_without_words(self):
+        with patch("app.services.subprocess_service.database.get_conn") as mock_conn:
+            assert SubprocessService.search_subprocesses("--") == []
+            mock_conn.assert_not_called()
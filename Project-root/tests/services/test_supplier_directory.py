@@ -0,0 +1,89 @@
+"""
+Test coverage for SupplierDirectory.
+
+Tests the aggregated listing query, its caching and search.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.master_data_cache import MasterDataCache
+from app.services.supplier_directory import SupplierDirectory
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    MasterDataCache.clear()
+    yield
+    MasterDataCache.clear()
+
+
+def _supplier_cursor(suppliers):
+    """Cursor answering the cache probes and the directory query."""
+    cur = MagicMock()
+    cur.description = [("supplier_id",), ("firm_name",), ("gstin",), ("contact_count",)]
+
+    def fetchall():
+        query, *params = cur.execute.call_args[0]
+        if "master_data_versions" in query:
+            return [(table, 1) for table in params[0][0]]
+        return suppliers
+
+    cur.fetchone.return_value = (1,)
+    cur.fetchall.side_effect = fetchall
+    return cur
+
+
+def _mock_conn(mock_conn, cur):
+    mock_conn.return_value.__enter__.return_value = (MagicMock(), cur)
+
+
+SUPPLIERS = [
+    (1, "Acme Bolts", "27ABCDE1234F1Z5", 2),
+    (2, "Nuts & Co", None, 0),
+]
+
+
+class TestSupplierDirectory:
+    """Test suite for the cached supplier listing."""
+
+    @pytest.mark.parametrize("count", [2, 2000])
+    def test_query_count_does_not_grow_with_suppliers(self, count):
+        """One aggregated query, however many suppliers there are."""
+        rows = [(i, f"Supplier {i}", None, i % 3) for i in range(count)]
+        cur = _supplier_cursor(rows)
+        with patch("app.services.master_data_cache.database.get_conn") as mock_conn:
+            _mock_conn(mock_conn, cur)
+            suppliers = SupplierDirectory.search(ttl=0)
+
+        assert len(suppliers) == count
+        queries = [c.args[0] for c in cur.execute.call_args_list]
+        # cache version probe + versions, deleted_at probe, directory query
+        assert len(queries) == 4
+        assert not any("WHERE supplier_id = %s" in q for q in queries)
+        assert "COUNT(*) AS contact_count" in queries[-1]
+        assert "WHERE s.deleted_at IS NULL" in queries[-1]
+
+    def test_served_from_cache_and_invalidated_on_write(self):
+        """Within the TTL the list is reused until a supplier write."""
+        cur = _supplier_cursor(SUPPLIERS)
+        with patch("app.services.master_data_cache.database.get_conn") as mock_conn:
+            _mock_conn(mock_conn, cur)
+            SupplierDirectory.search(ttl=60)
+            SupplierDirectory.search(ttl=60)
+            assert mock_conn.call_count == 1
+
+            SupplierDirectory.invalidate()
+            SupplierDirectory.search(ttl=60)
+            assert mock_conn.call_count == 2
+
+    @pytest.mark.parametrize("q, ids", [("acme", [1]), ("27abc", [1]), ("&", [2])])
+    def test_search_matches_firm_name_or_gstin(self, q, ids):
+        cur = _supplier_cursor(SUPPLIERS)
+        with patch("app.services.master_data_cache.database.get_conn") as mock_conn:
+            _mock_conn(mock_conn, cur)
+            suppliers = SupplierDirectory.search(ttl=60, q=q)
+
+        assert [s["supplier_id"] for s in suppliers] == ids
+        assert suppliers[0]["contact_count"] == SUPPLIERS[ids[0] - 1][3]
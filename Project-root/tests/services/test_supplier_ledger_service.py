@@ -0,0 +1,118 @@
+"""
+Test coverage for SupplierLedgerService.
+
+Tests paging the materialized supplier ledger and where its totals come from.
+"""
+
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.supplier_ledger_service import SupplierLedgerService
+from app.utils.pagination import decode_cursor
+
+
+def _row(event_date, event_type, event_id, stock_entry_id):
+    return {
+        "event_date": event_date,
+        "event_type": event_type,
+        "event_id": event_id,
+        "stock_entry_id": stock_entry_id,
+        "balance_quantity": 10,
+        "balance_amount": 250,
+    }
+
+
+class TestSupplierLedgerService:
+    """Test suite for the materialized supplier ledger."""
+
+    def test_present_probes_table(self):
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = (True,)
+
+        assert SupplierLedgerService.present(mock_cursor) is True
+        sql = mock_cursor.execute.call_args.args[0]
+        assert "to_regclass('supplier_ledger_entries')" in sql
+
+    def test_unfiltered_exact_total_reads_totals_row(self):
+        """The unfiltered total is the maintained count, not COUNT(*)."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = (42,)
+        mock_cursor.fetchall.return_value = []
+
+        rows, total, next_cursor = SupplierLedgerService.page(
+            mock_cursor, 7, "exact", 20
+        )
+
+        assert (rows, total, next_cursor) == ([], 42, None)
+        count_sql, count_params = mock_cursor.execute.call_args_list[0].args
+        assert "supplier_ledger_totals" in count_sql
+        assert count_params == (7,)
+        assert not any(
+            "COUNT(*)" in c.args[0] for c in mock_cursor.execute.call_args_list
+        )
+
+    def test_supplier_without_totals_row_has_no_events(self):
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = None
+
+        assert SupplierLedgerService.total(mock_cursor, 7) == 0
+
+    def test_filtered_exact_total_counts_rows(self):
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = (3,)
+        mock_cursor.fetchall.return_value = []
+
+        _, total, _ = SupplierLedgerService.page(
+            mock_cursor, 7, "exact", 20, variant_id=5, start_date="2026-01-01"
+        )
+
+        assert total == 3
+        count_sql, count_params = mock_cursor.execute.call_args_list[0].args
+        assert count_sql.startswith("SELECT COUNT(*)")
+        assert "variant_id = %s" in count_sql
+        assert "event_date >= %s" in count_sql
+        assert count_params == (7, 5, "2026-01-01")
+
+    def test_keyset_page_and_next_cursor(self):
+        """Pages resume after the cursor key; PO rows encode entry id 0."""
+        mock_cursor = MagicMock()
+        first = datetime(2026, 3, 2, 9, 0)
+        second = datetime(2026, 3, 1, 9, 0)
+        mock_cursor.fetchall.return_value = [
+            _row(first, "receipt", 12, 40),
+            _row(second, "po", 8, None),
+            _row(second, "po", 7, None),
+        ]
+        after = ["2026-03-03 00:00:00", "receipt", 13, 41]
+
+        rows, total, next_cursor = SupplierLedgerService.page(
+            mock_cursor, 7, "none", 2, offset=40, after=after
+        )
+
+        assert total is None
+        assert len(rows) == 2
+        assert rows[0]["balance_amount"] == 250
+        sql, params = mock_cursor.execute.call_args.args
+        assert "FROM supplier_ledger_entries" in sql
+        assert (
+            "(event_date, event_type, event_id, stock_entry_id) < (%s, %s, %s, %s)"
+            in sql
+        )
+        assert "ORDER BY event_date DESC, event_type DESC" in sql
+        assert "NULLIF(stock_entry_id, 0) AS stock_entry_id" in sql
+        assert params == (7, *after, 3, 0)
+        assert decode_cursor(next_cursor)["k"] == [str(second), "po", 8, 0]
+
+    def test_offset_page_without_cursor(self):
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = []
+
+        SupplierLedgerService.page(mock_cursor, 7, "none", 25, offset=50)
+
+        assert mock_cursor.execute.call_args.args[1] == (7, 26, 50)
+
+    def test_malformed_cursor_is_rejected(self):
+        with pytest.raises(ValueError):
+            SupplierLedgerService.page(MagicMock(), 7, "none", 20, after=[1, 2])
@@ -0,0 +1,153 @@
+"""
+Tests for VariantAutocompleteIndex.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from app.services.variant_autocomplete_index import VariantAutocompleteIndex
+
+
+def _row(item, color, size, model="N/A", brand="N/A", qty=10, available=None):
+    text = f"{item} - {color} - {size}"
+    return (text, item, color, size, model, brand, qty, "pcs", 2, available)
+
+
+CATALOG = [
+    (1, 10, _row("Steel Bolt", "Red", "M6", brand="Acme")),
+    (2, 10, _row("Steel Bolt", "Blue", "M8", brand="Acme")),
+    (3, 11, _row("Brass Washer", "Gold", "M6")),
+    (4, 12, _row("Anchor Bolt", "Black", "M10")),
+]
+
+
+def _index():
+    index = VariantAutocompleteIndex()
+    index.load(CATALOG)
+    index.ready = True
+    return index
+
+
+class TestVariantAutocompleteIndex:
+    def test_not_ready_falls_back(self):
+        index = VariantAutocompleteIndex()
+        index.load(CATALOG)
+
+        assert index.search("bolt") is None
+
+    def test_empty_term_pages_in_name_order(self):
+        rows, more = _index().search("", 0, 2)
+
+        assert [r["id"] for r in rows] == [4, 3]
+        assert more is True
+
+    def test_short_term_falls_back(self):
+        """One or two characters are word-prefix matched by the database."""
+        assert _index().search("m6", 0, 30) is None
+
+    def test_short_token_matches_word_start(self):
+        index = _index()
+
+        rows, more = index.search("bolt m", 0, 30)
+        assert [r["id"] for r in rows] == [4, 2, 1]
+        assert more is False
+        assert rows[1]["item_name"] == "Steel Bolt"
+        assert rows[1]["unit"] == "pcs"
+
+        # "ol" occurs in "bolt" but starts no word
+        assert index.search("steel ol", 0, 30) is None
+
+    def test_every_term_must_match_and_prefix_ranks_first(self):
+        index = _index()
+
+        rows, _ = index.search("bolt", 0, 30)
+        assert [r["id"] for r in rows] == [4, 2, 1]
+
+        rows, _ = index.search("acme m6", 0, 30)
+        assert [r["id"] for r in rows] == [1]
+
+        rows, _ = index.search("steel", 0, 30)
+        assert [r["id"] for r in rows] == [2, 1]
+
+    def test_no_match_falls_back(self):
+        index = _index()
+
+        assert index.search("stele", 0, 30) is None
+        assert index.search("zzz", 0, 30) is None
+
+    def test_update_and_delete_tombstone_old_slots(self):
+        index = _index()
+        index.apply(
+            {
+                1: (10, _row("Steel Bolt", "Green", "M6")),
+                3: None,
+            }
+        )
+
+        rows, _ = index.search("steel bolt", 0, 30)
+        assert {r["id"]: r["color"] for r in rows} == {1: "Green", 2: "Blue"}
+        assert index.search("washer", 0, 30) is None
+        assert index.search("red", 0, 30) is None
+        assert len(index) == 3
+
+    def test_compact_keeps_live_variants(self):
+        index = _index()
+        index.apply({2: None})
+        index.compact()
+
+        rows, _ = index.search("", 0, 30)
+        assert [r["id"] for r in rows] == [4, 3, 1]
+        assert len(index._ids) == 3
+
+    def test_item_notification_refreshes_item_variants(self):
+        index = _index()
+        renamed = [(1, 10, _row("Hex Bolt", "Red", "M6"))]
+
+        with (
+            patch("app.services.variant_autocomplete_index.database") as db,
+            patch.object(
+                VariantAutocompleteIndex, "fetch", return_value=renamed
+            ) as fetch,
+        ):
+            cur = MagicMock()
+            cur.fetchall.return_value = [(1,), (2,)]
+            db.get_conn.return_value.__enter__.return_value = (MagicMock(), cur)
+
+            index.handle_notifications({"item:10"})
+
+        # Variant 2 no longer comes back (e.g. soft-deleted) and is dropped
+        assert set(fetch.call_args[0][0]) == {1, 2}
+        rows, _ = index.search("bolt", 0, 30)
+        assert [r["id"] for r in rows] == [4, 1]
+        assert rows[1]["item_name"] == "Hex Bolt"
+
+    def test_wildcard_notification_reloads(self):
+        index = _index()
+
+        with patch.object(VariantAutocompleteIndex, "refresh_all") as refresh_all:
+            index.handle_notifications({"*", "5"})
+
+        refresh_all.assert_called_once()
+
+    def test_listener_without_notify_feed_stays_on_database(self):
+        """Without the triggers the index never loads, so it cannot go stale."""
+        index = VariantAutocompleteIndex()
+        index.running = True
+
+        def stop(_seconds):
+            index.running = False
+
+        with (
+            patch("app.services.variant_autocomplete_index.database") as db,
+            patch("app.services.variant_autocomplete_index.time.sleep", stop),
+            patch.object(VariantAutocompleteIndex, "refresh_all") as refresh_all,
+        ):
+            cur = MagicMock()
+            cur.fetchone.return_value = (False,)
+            db.get_conn.return_value.__enter__.return_value = (MagicMock(), cur)
+
+            index._listen_loop()
+
+        assert "notify_variant_catalog()" in cur.execute.call_args.args[0]
+        assert cur.execute.call_count == 1
+        refresh_all.assert_not_called()
+        assert index.search("bolt") is None
@@ -0,0 +1,25 @@
+from unittest.mock import MagicMock
+
+from app.services.variant_read_model import VARIANT_ROWS_SQL, VariantReadModel
+
+
+class TestVariantReadModel:
+    """Readers use the read model table when it is migrated"""
+
+    def test_source_uses_table_when_present(self):
+        cur = MagicMock()
+        cur.fetchone.return_value = {"present": True}
+
+        assert VariantReadModel.source(cur) == "variant_read_model"
+        assert "to_regclass('variant_read_model')" in cur.execute.call_args[0][0]
+
+    def test_source_falls_back_to_join(self):
+        """Before migrating, the equivalent join is used as a subquery"""
+        cur = MagicMock()
+        cur.fetchone.return_value = (False,)
+
+        source = VariantReadModel.source(cur)
+
+        assert source == f"({VARIANT_ROWS_SQL})"
+        for column in ("display_name", "is_low_stock", "is_deleted", "brand_name"):
+            assert f"AS {column}" in source
@@ -0,0 +1,103 @@
+"""
+Test coverage for VariantSearchService.
+
+Tests the trigram search predicate, its fallback and its use by VariantService.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from app.services.variant_search_service import VariantSearchService
+from app.services.variant_service import VariantService
+
+
+def _cursor(present=True):
+    cur = MagicMock()
+    cur.fetchone.return_value = {"present": present}
+    return cur
+
+
+class TestVariantSearchService:
+    """Test suite for variant search predicates."""
+
+    def test_empty_term_matches_everything_without_probe(self):
+        """No search text means no join, no filter and no query."""
+        cur = _cursor()
+
+        search = VariantSearchService.build_filter(cur, "   ")
+
+        assert search["join"] == ""
+        assert search["condition"] == "TRUE"
+        assert search["params"] == []
+        cur.execute.assert_not_called()
+
+    def test_terms_use_trigram_document(self):
+        """Every term must occur in the document; the query also matches fuzzily."""
+        search = VariantSearchService.build_filter(_cursor(), "Bolt  red_5 bolt")
+
+        assert "variant_search_documents vsd" in search["join"]
+        assert search["condition"].count("vsd.document LIKE %s") == 2
+        assert "<%% vsd.document" in search["condition"]
+        assert search["params"] == ["%bolt%", "%red\\_5%", "bolt  red_5 bolt"]
+        assert search["rank"] == "word_similarity(%s, vsd.document)::float8"
+        assert search["rank_params"] == ["bolt  red_5 bolt"]
+
+    def test_short_term_is_word_prefix_match(self):
+        """One or two characters match the start of any word, e.g. a size."""
+        search = VariantSearchService.build_filter(_cursor(), "XL")
+
+        assert search["condition"] == (
+            "(vsd.document LIKE %s OR vsd.document LIKE %s)"
+        )
+        assert search["params"] == ["xl%", "% xl%"]
+
+    def test_short_terms_in_longer_query_match_word_starts(self):
+        """Short terms narrow a longer query by word prefix, not substring."""
+        search = VariantSearchService.build_filter(_cursor(), "bolt m")
+
+        assert search["condition"] == (
+            "((vsd.document LIKE %s AND "
+            "(vsd.document LIKE %s OR vsd.document LIKE %s))"
+            " OR %s <%% vsd.document)"
+        )
+        assert search["params"] == ["%bolt%", "m%", "% m%", "bolt m"]
+
+    def test_fallback_without_documents(self):
+        """Unmigrated databases keep the LIKE scan over the caller's columns."""
+        search = VariantSearchService.build_filter(
+            _cursor(present=False),
+            "Bolt",
+            fallback_columns=("im.name", "cm.color_name"),
+        )
+
+        assert search["join"] == ""
+        assert search["condition"] == (
+            "(LOWER(im.name) LIKE %s OR LOWER(cm.color_name) LIKE %s)"
+        )
+        assert search["params"] == ["%bolt%", "%bolt%"]
+        assert search["rank"] == "0::float8"
+
+    def test_variant_service_search_ranks_by_similarity(self):
+        """VariantService.search_variants filters and orders via the document."""
+        with patch("app.services.variant_service.database.get_conn") as mock_conn:
+            cur = MagicMock()
+            mock_conn.return_value.__enter__.return_value = (MagicMock(), cur)
+            cur.fetchone.side_effect = [{"present": True}, None]
+            cur.fetchall.return_value = [
+                {
+                    "variant_id": 1,
+                    "opening_stock": 5,
+                    "threshold": 2,
+                    "search_rank": 1.0,
+                }
+            ]
+
+            result = VariantService.search_variants(
+                "bolt", filters={"in_stock_only": True}, limit=10
+            )
+
+        sql, params = cur.execute.call_args.args
+        assert "JOIN variant_search_documents vsd" in sql
+        assert "ORDER BY search_rank DESC" in sql
+        assert "iv.opening_stock > 0" in sql
+        assert params == ["bolt", "%bolt%", "bolt", 10]
+        assert result[0]["stock_status"] == "in_stock"
@@ -195,3 +195,83 @@ class TestVariantService:
             assert result["quantity"] == 150.0
             assert result["cost_per_unit"] == 6.50
             assert result["total_cost"] == 975.00
+
+
+class TestVariantServiceBatchAvailability:
+    """Batch availability runs as one set-based query."""
+
+    def _mock(self, mock_conn, present, rows):
+        mock_cursor = MagicMock()
+        mock_conn.return_value.__enter__.return_value = (MagicMock(), mock_cursor)
+        mock_cursor.fetchone.return_value = present
+        mock_cursor.fetchall.return_value = rows
+        return mock_cursor
+
+    def test_batch_availability_single_query(self):
+        """Details, ATP and price range come back per variant, in order."""
+        rows = [
+            {
+                "requested_id": 7,
+                "required_quantity": 30,
+                "variant_id": 7,
+                "item_id": 2,
+                "variant_name": "Bolt",
+                "color": "Black",
+                "size": "M8",
+                "model": None,
+                "unit": "Nos",
+                "threshold": 5,
+                "on_hand": 100,
+                "reserved": 80,
+                "available_to_promise": 20,
+                "min_cost": 1.5,
+                "max_cost": 2.0,
+                "supplier_count": 2,
+            },
+            {
+                "requested_id": 99,
+                "required_quantity": 1,
+                "variant_id": None,
+            },
+        ]
+        with patch("app.services.variant_service.database.get_conn") as mock_conn:
+            mock_cursor = self._mock(
+                mock_conn, {"has_atp": True, "has_pricing": True}, rows
+            )
+            results = VariantService.check_variants_availability({7: 30, 99: 1})
+
+        assert mock_cursor.execute.call_count == 2
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "variant_stock_availability" in sql
+        assert "variant_supplier_pricing" in sql
+        assert params == {"ids": [7, 99], "quantities": [30.0, 1.0]}
+
+        assert results[0]["available"] is False
+        assert results[0]["shortfall"] == 10
+        assert results[0]["reserved_stock"] == 80.0
+        assert results[0]["min_cost"] == 1.5
+        assert results[0]["supplier_count"] == 2
+        assert results[1] == {
+            "available": False,
+            "variant_id": 99,
+            "reason": "Variant not found",
+        }
+
+    def test_batch_availability_without_optional_tables(self):
+        """Falls back to opening stock when the ATP view is absent."""
+        with patch("app.services.variant_service.database.get_conn") as mock_conn:
+            mock_cursor = self._mock(
+                mock_conn, {"has_atp": False, "has_pricing": False}, []
+            )
+            VariantService.check_variants_availability({1: 1})
+
+        sql = mock_cursor.execute.call_args[0][0]
+        assert "variant_stock_availability" not in sql
+        assert "variant_supplier_pricing" not in sql
+        assert "iv.opening_stock AS available_to_promise" in sql
+
+    def test_batch_availability_empty(self):
+        """No variants means no query."""
+        with patch("app.services.variant_service.database.get_conn") as mock_conn:
+            assert VariantService.check_variants_availability({}) == []
+            mock_conn.assert_not_called()
@@ -0,0 +1,91 @@
+import datetime
+import struct
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.utils.pagination import (
+    count_mode,
+    count_rows,
+    decode_cursor,
+    encode_cursor,
+    encode_offset_cursor,
+    keyset_condition,
+    order_by,
+)
+
+
+class TestKeysetPagination:
+    """Tests for cursor encoding and keyset predicates"""
+
+    def test_cursor_round_trip(self):
+        """Cursors are opaque and decode to the encoded key values"""
+        when = datetime.datetime(2025, 1, 2, 3, 4, 5)
+        token = encode_cursor([when, "Bolt", 42])
+
+        assert "Bolt" not in token
+        assert decode_cursor(token) == {"k": ["2025-01-02 03:04:05", "Bolt", 42]}
+        assert decode_cursor(encode_offset_cursor(60)) == {"o": 60}
+
+    @pytest.mark.parametrize("token", ["not-a-cursor", "e30", "eyJvIjotMX0"])
+    def test_invalid_cursor_rejected(self, token):
+        """Garbage, empty payloads and negative offsets are rejected"""
+        with pytest.raises(ValueError):
+            decode_cursor(token)
+
+    def test_uniform_direction_uses_row_comparison(self):
+        """Same-direction keys compare as a row (index friendly)"""
+        keys = (("se.entry_date", "DESC"), ("se.entry_id", "DESC"))
+        sql, params = keyset_condition(keys, ["2025-01-01", 7])
+
+        assert sql == "(se.entry_date, se.entry_id) < (%s, %s)"
+        assert params == ["2025-01-01", 7]
+        assert order_by(keys) == "se.entry_date DESC, se.entry_id DESC"
+
+    def test_mixed_directions_expand(self):
+        """Mixed-direction keys expand into OR-ed prefix equalities"""
+        keys = (("search_rank", "DESC"), ("item_name", "ASC"), ("id", "ASC"))
+        sql, params = keyset_condition(keys, [0.5, "bolt", 3])
+
+        assert sql == (
+            "((search_rank < %s) OR (search_rank = %s AND item_name > %s)"
+            " OR (search_rank = %s AND item_name = %s AND id > %s))"
+        )
+        assert params == [0.5, 0.5, "bolt", 0.5, "bolt", 3]
+
+    @pytest.mark.parametrize("similarity", [0.3, 2 / 3])
+    def test_float8_rank_survives_cursor(self, similarity):
+        """A float4 similarity cast to float8 comes back bit-identical"""
+        # word_similarity() is float4; the search rank is its float8 cast
+        rank = struct.unpack("f", struct.pack("f", similarity))[0]
+        assert rank != similarity
+        keys = (("search_rank", "DESC"), ("item_name", "ASC"), ("id", "ASC"))
+
+        after = decode_cursor(encode_cursor([rank, "bolt", 3]))["k"]
+        _, params = keyset_condition(keys, after)
+
+        # The tie test (search_rank = %s) matches the boundary row's rank
+        assert params[1] == rank
+        assert params[0] == params[1] == params[3]
+
+    def test_cursor_for_other_sort_rejected(self):
+        """A cursor with the wrong number of keys is rejected"""
+        with pytest.raises(ValueError):
+            keyset_condition((("i.name", "ASC"), ("i.item_id", "ASC")), ["x"])
+
+    def test_count_modes(self):
+        """Counts are skipped, estimated from the plan, or exact"""
+        cur = MagicMock()
+        assert count_rows(cur, "none", "SELECT 1") is None
+        cur.execute.assert_not_called()
+
+        cur.fetchone.return_value = [[{"Plan": {"Plan Rows": 1234}}]]
+        assert count_rows(cur, "estimate", "SELECT 1 FROM t WHERE a = %s", [1]) == 1234
+        assert cur.execute.call_args[0][0].startswith("EXPLAIN (FORMAT JSON) SELECT")
+
+        cur.fetchone.return_value = [17]
+        assert count_rows(cur, "exact", "SELECT 1 FROM t") == 17
+
+        assert count_mode("ESTIMATE", "none") == "estimate"
+        assert count_mode("bogus", "exact") == "exact"
+        assert count_mode(None, "none") == "none"
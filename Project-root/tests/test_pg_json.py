@@ -0,0 +1,72 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from flask import Flask
+
+from app.utils.pg_json import fetch_json_array, iter_json_rows, json_array_sql
+from app.utils.response import raw_json_response
+
+
+class TestPgJsonPassthrough:
+    """Postgres-rendered JSON goes to the response undecoded"""
+
+    def test_json_array_sql_orders_inside_aggregate(self):
+        """Order is applied by json_agg and empty results give []"""
+        sql = json_array_sql("SELECT * FROM po", "order_date DESC")
+
+        assert sql == (
+            "SELECT COALESCE(json_agg(t ORDER BY order_date DESC), '[]'::json) "
+            "FROM (SELECT * FROM po) t"
+        )
+
+    def test_fetch_disables_json_typecaster(self):
+        """The cursor returns the aggregate as text"""
+        conn = MagicMock()
+        cur = conn.cursor.return_value
+        cur.fetchone.return_value = ['[{"id":1}]']
+
+        with (
+            patch("psycopg2.extras.register_default_json") as reg_json,
+            patch("psycopg2.extras.register_default_jsonb") as reg_jsonb,
+        ):
+            body = fetch_json_array(conn, "SELECT 1 AS id", [5], order_by="id")
+
+        assert body == '[{"id":1}]'
+        assert reg_json.call_args[0][0] is cur
+        assert reg_json.call_args[1]["loads"]("x") == "x"
+        assert reg_jsonb.call_args[0][0] is cur
+        assert cur.execute.call_args[0][1] == (5,)
+        cur.close.assert_called_once()
+
+    def test_iter_json_rows_uses_named_cursor(self):
+        """Rows stream through a server-side cursor"""
+        conn = MagicMock()
+        cur = conn.cursor.return_value
+        cur.__iter__.return_value = iter([('{"id":1}',), ('{"id":2}',)])
+
+        with (
+            patch("psycopg2.extras.register_default_json"),
+            patch("psycopg2.extras.register_default_jsonb"),
+        ):
+            rows = list(iter_json_rows(conn, "SELECT 1", batch_size=10))
+
+        assert rows == ['{"id":1}', '{"id":2}']
+        assert conn.cursor.call_args[1]["name"] == "pg_json_rows"
+        assert cur.itersize == 10
+
+    def test_raw_json_response_envelope(self):
+        """Metadata wraps the raw body without re-encoding it"""
+        app = Flask(__name__)
+        with app.app_context():
+            plain = raw_json_response('[{"a" : 1}]')
+            wrapped = raw_json_response('[{"a" : 1}]', envelope={"total": 1, "page": 1})
+            empty = raw_json_response("[]", envelope={})
+
+        assert plain.get_data(as_text=True) == '[{"a" : 1}]\n'
+        assert plain.mimetype == "application/json"
+        assert json.loads(wrapped.get_data()) == {
+            "total": 1,
+            "page": 1,
+            "items": [{"a": 1}],
+        }
+        assert json.loads(empty.get_data()) == {"items": []}
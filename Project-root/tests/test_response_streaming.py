@@ -0,0 +1,52 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask, jsonify
+
+from app.utils.response import stream_json_array
+
+ROWS = [
+    {
+        "id": i,
+        "name": f'Bolt é "{i}"\nM{i}',
+        "unit_price": float(i) / 3,
+        "quantity": Decimal("1.50"),
+        "created": datetime.date(2025, 1, i % 28 + 1),
+        "description": None,
+        "nested": {"b": [1, 2], "a": {}},
+    }
+    for i in range(1, 8)
+]
+
+
+class TestStreamJsonArray:
+    """Streamed arrays must match jsonify byte for byte"""
+
+    @pytest.mark.parametrize("debug", [False, True])
+    @pytest.mark.parametrize("rows", [ROWS, ROWS[:1], []])
+    def test_matches_jsonify(self, debug, rows):
+        app = Flask(__name__)
+        app.debug = debug
+        with app.test_request_context():
+            expected = jsonify(rows).get_data()
+            response = stream_json_array(iter(rows), chunk_size=3)
+            assert response.is_streamed
+            assert response.mimetype == "application/json"
+            assert response.get_data() == expected
+
+    def test_consumes_lazily(self):
+        app = Flask(__name__)
+        pulled = []
+
+        def rows():
+            for row in ROWS:
+                pulled.append(row["id"])
+                yield row
+
+        with app.test_request_context():
+            response = stream_json_array(rows(), chunk_size=2)
+            assert pulled == []
+            chunks = iter(response.response)
+            next(chunks)
+            assert pulled == [1, 2]
@@ -0,0 +1,59 @@
+"""
+Tests for the streaming XLSX writer.
+"""
+
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.etree import ElementTree
+
+from app.utils.xlsx_writer import XlsxStreamWriter, _column_letter
+
+NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def _sheet_rows(path):
+    with zipfile.ZipFile(path) as zf:
+        assert "[Content_Types].xml" in zf.namelist()
+        root = ElementTree.fromstring(zf.read("xl/worksheets/sheet1.xml"))
+    return root.findall("m:sheetData/m:row", NS)
+
+
+def test_column_letters():
+    assert [_column_letter(i) for i in (0, 25, 26, 701, 702)] == [
+        "A",
+        "Z",
+        "AA",
+        "ZZ",
+        "AAA",
+    ]
+
+
+def test_writes_typed_cells(tmp_path):
+    path = tmp_path / "out.xlsx"
+    with XlsxStreamWriter(str(path), "Inventory") as writer:
+        writer.write_header(["Item", "Stock", "Cost", "Active", "Date"])
+        writer.write_rows(
+            [
+                ["bolt <M8> & nut", 5, Decimal("1.50"), True, date(2026, 1, 2)],
+                ["nut\x00", None, 2.5, False, datetime(2026, 1, 2, 12, 0)],
+            ]
+        )
+        assert writer.rows_written == 3
+
+    header, first, second = _sheet_rows(path)
+    assert header.find("m:c", NS).get("s") == "3"
+
+    cells = first.findall("m:c", NS)
+    assert cells[0].get("t") == "inlineStr"
+    assert cells[0].find("m:is/m:t", NS).text == "bolt <M8> & nut"
+    assert cells[1].find("m:v", NS).text == "5"
+    assert cells[2].find("m:v", NS).text == "1.50"
+    assert cells[3].get("t") == "b"
+    assert cells[4].find("m:v", NS).text == "46024"
+
+    cells = second.findall("m:c", NS)
+    # None leaves the cell out; control characters are dropped
+    assert [c.get("r") for c in cells] == ["A3", "C3", "D3", "E3"]
+    assert cells[0].find("m:is/m:t", NS).text == "nut"
+    assert cells[3].find("m:v", NS).text == "46024.5"